@@ -0,0 +1,46 @@
+"""Add duplicate_account_groups for suspected multi-account review
+
+Revision ID: 3e7b5d2a91c4
+Revises: 9cb1c3ac276f
+Create Date: 2026-10-19 11:02:17.336410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e7b5d2a91c4'
+down_revision: Union[str, None] = '9cb1c3ac276f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('duplicate_account_groups',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('group_key', sa.String(length=64), nullable=False),
+    sa.Column('user_ids', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('member_count', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Numeric(precision=5, scale=2), nullable=False),
+    sa.Column('max_face_similarity', sa.Numeric(precision=5, scale=4), nullable=True),
+    sa.Column('evidence', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('reviewed_by', sa.UUID(), nullable=True),
+    sa.Column('reviewed_at', sa.DateTime(), nullable=True),
+    sa.Column('review_notes', sa.Text(), nullable=True),
+    sa.Column('detected_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['reviewed_by'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('group_key')
+    )
+    op.create_index(op.f('ix_duplicate_account_groups_status'), 'duplicate_account_groups', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_duplicate_account_groups_status'), table_name='duplicate_account_groups')
+    op.drop_table('duplicate_account_groups')
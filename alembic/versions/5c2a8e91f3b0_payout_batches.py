@@ -0,0 +1,51 @@
+"""Add payout_batches for bulk payout files
+
+Revision ID: 5c2a8e91f3b0
+Revises: b41f0c6e8d27
+Create Date: 2026-10-19 15:48:30.271645
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2a8e91f3b0'
+down_revision: Union[str, None] = 'b41f0c6e8d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('payout_batches',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('payout_method', postgresql.ENUM('WAVE_MONEY', 'KBZ_PAY', 'CB_PAY', 'AYA_PAY', 'ONEPAY', 'PAYPAL', 'WESTERN_UNION', 'MONEYGRAM', 'BANK_TRANSFER', name='payoutmethodenum', create_type=False), nullable=False),
+    sa.Column('currency_code', sa.String(length=3), nullable=False),
+    sa.Column('exchange_rate', sa.Numeric(precision=18, scale=8), nullable=False),
+    sa.Column('file_path', sa.String(length=512), nullable=False),
+    sa.Column('file_format', sa.String(length=20), nullable=False),
+    sa.Column('item_count', sa.Integer(), nullable=False),
+    sa.Column('total_amount_usd', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('total_amount_local', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('status', postgresql.ENUM('PENDING', 'COMPLETED', 'FAILED', 'CANCELLED', name='transactionstatusenum', create_type=False), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_payout_batches_created_at'), 'payout_batches', ['created_at'], unique=False)
+    
+    op.add_column('withdrawals', sa.Column('payout_batch_id', sa.UUID(), nullable=True))
+    op.create_foreign_key('withdrawals_payout_batch_id_fkey', 'withdrawals', 'payout_batches', ['payout_batch_id'], ['id'], ondelete='SET NULL')
+    op.create_index(op.f('ix_withdrawals_payout_batch_id'), 'withdrawals', ['payout_batch_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_withdrawals_payout_batch_id'), table_name='withdrawals')
+    op.drop_constraint('withdrawals_payout_batch_id_fkey', 'withdrawals', type_='foreignkey')
+    op.drop_column('withdrawals', 'payout_batch_id')
+    op.drop_index(op.f('ix_payout_batches_created_at'), table_name='payout_batches')
+    op.drop_table('payout_batches')
@@ -0,0 +1,30 @@
+"""Store face embeddings as binary float32 vectors
+
+Revision ID: 9cb1c3ac276f
+Revises: fe986d4c0a6a
+Create Date: 2026-10-19 09:12:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9cb1c3ac276f'
+down_revision: Union[str, None] = 'fe986d4c0a6a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The old text column held a truncated base64 selfie, which is useless
+    # for matching. Users are re-enrolled on their next face login.
+    op.execute("ALTER TABLE users DROP COLUMN IF EXISTS face_embedding")
+    op.add_column('users', sa.Column('face_embedding', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'face_embedding')
+    op.add_column('users', sa.Column('face_embedding', sa.Text(), nullable=True))
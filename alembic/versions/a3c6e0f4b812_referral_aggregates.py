@@ -0,0 +1,81 @@
+"""Per-referrer referral aggregates and referral listing indexes
+
+Revision ID: a3c6e0f4b812
+Revises: f2a8d5c13e94
+Create Date: 2026-10-19 21:36:05.271904
+
+referral_aggregates holds each referrer's counters, maintained by the
+apply-code and bonus flows; existing referrers are counted once here in
+one INSERT ... SELECT. The referrer_id index gives way to
+(referrer_id, referred_user_id) and (referrer_id, created_at, id) for
+keyset pages. referral_code was unique across all rows although applied
+referrals repeat their referrer's code; uniqueness now only covers the
+code records.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c6e0f4b812'
+down_revision: Union[str, None] = 'f2a8d5c13e94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'referral_aggregates',
+        sa.Column('referrer_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('referral_code', sa.String(length=50), nullable=True),
+        sa.Column('total_referrals', sa.Integer(), nullable=False),
+        sa.Column('successful_referrals', sa.Integer(), nullable=False),
+        sa.Column('total_earned_usd', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['referrer_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('referrer_id'),
+    )
+    op.execute(sa.text(
+        """
+        INSERT INTO referral_aggregates (
+            referrer_id, referral_code, total_referrals,
+            successful_referrals, total_earned_usd, updated_at
+        )
+        SELECT
+            referrer_id,
+            max(referral_code) FILTER (WHERE referred_user_id IS NULL),
+            count(referred_user_id),
+            count(*) FILTER (WHERE bonus_earned),
+            coalesce(sum(bonus_amount_usd) FILTER (WHERE bonus_earned), 0),
+            now() AT TIME ZONE 'utc'
+        FROM referrals
+        GROUP BY referrer_id
+        """
+    ))
+    
+    op.drop_index('ix_referrals_referral_code', table_name='referrals')
+    op.create_index(op.f('ix_referrals_referral_code'), 'referrals', ['referral_code'], unique=False)
+    op.create_index(
+        'uq_referrals_referral_code_code_record',
+        'referrals',
+        ['referral_code'],
+        unique=True,
+        postgresql_where=sa.text('referred_user_id IS NULL'),
+    )
+    op.drop_index('ix_referrals_referrer_id', table_name='referrals')
+    op.create_index('ix_referrals_referrer_id_referred_user_id', 'referrals', ['referrer_id', 'referred_user_id'], unique=False)
+    op.create_index('ix_referrals_referrer_id_created_at_id', 'referrals', ['referrer_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_referrals_referrer_id_created_at_id', table_name='referrals')
+    op.drop_index('ix_referrals_referrer_id_referred_user_id', table_name='referrals')
+    op.create_index('ix_referrals_referrer_id', 'referrals', ['referrer_id'], unique=False)
+    op.drop_index('uq_referrals_referral_code_code_record', table_name='referrals')
+    op.drop_index(op.f('ix_referrals_referral_code'), table_name='referrals')
+    # Only restorable while no code has been applied twice
+    op.create_index('ix_referrals_referral_code', 'referrals', ['referral_code'], unique=True)
+    op.drop_table('referral_aggregates')
@@ -0,0 +1,189 @@
+"""Partition append-only log tables by month on created_at
+
+Revision ID: a7d3f1c9e215
+Revises: 5c2a8e91f3b0
+Create Date: 2026-10-19 18:02:11.538104
+
+Each table is rebuilt as a RANGE (created_at) partitioned table with
+primary key (id, created_at): monthly partitions from the oldest row
+through PREMAKE_MONTHS ahead, plus a DEFAULT partition as a safety net.
+Existing rows are copied across. face_liveness_logs and chat_messages
+were created from metadata rather than a migration, so they are created
+here if missing. Later partitions come from scripts/manage_partitions.py.
+
+Online migration only (reads the oldest row per table).
+"""
+from typing import Sequence, Union
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3f1c9e215'
+down_revision: Union[str, None] = '5c2a8e91f3b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PREMAKE_MONTHS = 3
+
+
+def _columns(table):
+    """Fresh Column objects per call (a Column can only belong to one table)"""
+    return {
+        'user_activity_logs': lambda: [
+            sa.Column('id', sa.UUID(), nullable=False),
+            sa.Column('user_id', sa.UUID(), nullable=False),
+            sa.Column('activity_type', sa.String(length=100), nullable=False),
+            sa.Column('activity_description', sa.Text(), nullable=True),
+            sa.Column('activity_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+            sa.Column('ip_address', sa.String(length=45), nullable=True),
+            sa.Column('user_agent', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        ],
+        'face_liveness_logs': lambda: [
+            sa.Column('id', sa.UUID(), nullable=False),
+            sa.Column('user_id', sa.UUID(), nullable=False),
+            sa.Column('is_live', sa.Boolean(), nullable=False),
+            sa.Column('confidence_score', sa.Numeric(precision=5, scale=2), nullable=False),
+            sa.Column('detection_details', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        ],
+        'ai_decision_logs': lambda: [
+            sa.Column('id', sa.UUID(), nullable=False),
+            sa.Column('decision_type', sa.String(length=100), nullable=False),
+            sa.Column('decision_context', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+            sa.Column('decision_made', sa.String(length=50), nullable=False),
+            sa.Column('decision_rationale', sa.Text(), nullable=True),
+            sa.Column('confidence_level', sa.Numeric(precision=5, scale=2), nullable=True),
+            sa.Column('was_overridden', sa.Boolean(), nullable=False),
+            sa.Column('override_reason', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+        ],
+        'ai_learning_events': lambda: [
+            sa.Column('id', sa.UUID(), nullable=False),
+            sa.Column('event_type', sa.String(length=100), nullable=False),
+            sa.Column('input_data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+            sa.Column('ai_response', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+            sa.Column('outcome', sa.String(length=50), nullable=False),
+            sa.Column('confidence_score', sa.Numeric(precision=5, scale=2), nullable=True),
+            sa.Column('human_validated', sa.Boolean(), nullable=False),
+            sa.Column('human_feedback', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+        ],
+        'system_health_metrics': lambda: [
+            sa.Column('id', sa.UUID(), nullable=False),
+            sa.Column('metric_name', sa.String(length=100), nullable=False),
+            sa.Column('metric_value', sa.Numeric(precision=15, scale=2), nullable=False),
+            sa.Column('metric_metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+        ],
+        'chat_messages': lambda: [
+            sa.Column('id', sa.UUID(), nullable=False),
+            sa.Column('user_id', sa.UUID(), nullable=False),
+            sa.Column('conversation_id', sa.String(length=100), nullable=False),
+            sa.Column('role', sa.String(length=20), nullable=False),
+            sa.Column('message', sa.Text(), nullable=False),
+            sa.Column('message_metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        ],
+        'admin_activity_logs': lambda: [
+            sa.Column('id', sa.UUID(), nullable=False),
+            sa.Column('admin_id', sa.UUID(), nullable=False),
+            sa.Column('action_type', sa.String(length=100), nullable=False),
+            sa.Column('action_description', sa.Text(), nullable=False),
+            sa.Column('action_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+            sa.Column('target_user_id', sa.UUID(), nullable=True),
+            sa.Column('was_ai_suggested', sa.Boolean(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['admin_id'], ['users.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['target_user_id'], ['users.id'], ondelete='SET NULL'),
+        ],
+    }[table]()
+
+
+INDEXES = {
+    'user_activity_logs': ['created_at', 'user_id'],
+    'face_liveness_logs': ['user_id'],
+    'ai_decision_logs': ['created_at'],
+    'ai_learning_events': ['created_at'],
+    'system_health_metrics': ['created_at', 'metric_name'],
+    'chat_messages': ['conversation_id'],
+    'admin_activity_logs': ['admin_id', 'created_at'],
+}
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _column_list(table):
+    return ', '.join(c.name for c in _columns(table) if isinstance(c, sa.Column))
+
+
+def _rename_aside(table, suffix):
+    """Move a table and its index names out of the way"""
+    old = f'{table}_{suffix}'
+    op.rename_table(table, old)
+    op.execute(f'ALTER INDEX IF EXISTS {table}_pkey RENAME TO {old}_pkey')
+    for column in INDEXES[table]:
+        op.execute(f'ALTER INDEX IF EXISTS ix_{table}_{column} RENAME TO ix_{old}_{column}')
+    return old
+
+
+def _create_partitioned(table, first_month):
+    op.create_table(
+        table,
+        *_columns(table),
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        postgresql_partition_by='RANGE (created_at)',
+    )
+    for column in INDEXES[table]:
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
+    
+    op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+    month = first_month
+    last_month = _add_months(datetime.utcnow().date().replace(day=1), PREMAKE_MONTHS)
+    while month <= last_month:
+        op.execute(
+            f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    current_month = datetime.utcnow().date().replace(day=1)
+    
+    for table in INDEXES:
+        if not sa.inspect(bind).has_table(table):
+            _create_partitioned(table, current_month)
+            continue
+        
+        legacy = _rename_aside(table, 'unpartitioned')
+        oldest = bind.execute(sa.text(f'SELECT min(created_at) FROM {legacy}')).scalar()
+        first_month = min(oldest.date().replace(day=1), current_month) if oldest else current_month
+        
+        _create_partitioned(table, first_month)
+        columns = _column_list(table)
+        op.execute(f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {legacy}')
+        op.drop_table(legacy)
+
+
+def downgrade() -> None:
+    for table in INDEXES:
+        partitioned = _rename_aside(table, 'partitioned')
+        op.create_table(table, *_columns(table), sa.PrimaryKeyConstraint('id'))
+        for column in INDEXES[table]:
+            op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
+        columns = _column_list(table)
+        op.execute(f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {partitioned}')
+        op.execute(f'DROP TABLE {partitioned} CASCADE')
@@ -0,0 +1,80 @@
+"""Support inbox: SLA deadlines, assignment and queue indexes
+
+Revision ID: a8e2f71c4d90
+Revises: a3c6e0f4b812
+Create Date: 2026-10-19 23:02:47.518306
+
+sla_due_at is the reply deadline the agent inbox is ordered by;
+existing tickets get it from their priority and the owner's tier with
+the hours in src/services/support_inbox.py. ix_support_tickets_queue
+only holds unassigned live tickets, so it stays small however many
+tickets are closed. resolved_at was already written when a ticket is
+closed but had no column. Threads page by (ticket_id, created_at, id).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8e2f71c4d90'
+down_revision: Union[str, None] = 'a3c6e0f4b812'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('support_tickets', sa.Column('assigned_at', sa.DateTime(), nullable=True))
+    op.add_column('support_tickets', sa.Column('sla_due_at', sa.DateTime(), nullable=True))
+    op.add_column('support_tickets', sa.Column('resolved_at', sa.DateTime(), nullable=True))
+    op.execute(sa.text(
+        """
+        UPDATE support_tickets t
+        SET sla_due_at = t.created_at + make_interval(hours => 1) * (
+            CASE t.priority
+                WHEN 'URGENT' THEN 2
+                WHEN 'HIGH' THEN 8
+                WHEN 'MEDIUM' THEN 24
+                ELSE 72
+            END
+        ) * (
+            CASE u.subscription_tier
+                WHEN 'PREMIUM' THEN 0.5
+                WHEN 'PRO' THEN 0.75
+                ELSE 1.0
+            END
+        )
+        FROM users u
+        WHERE u.id = t.user_id
+        """
+    ))
+    op.alter_column('support_tickets', 'sla_due_at', nullable=False)
+    
+    op.create_index(
+        'ix_support_tickets_queue',
+        'support_tickets',
+        ['sla_due_at', 'id'],
+        unique=False,
+        postgresql_where=sa.text("assigned_to IS NULL AND status IN ('OPEN', 'IN_PROGRESS')"),
+    )
+    op.create_index('ix_support_tickets_assigned_to_status', 'support_tickets', ['assigned_to', 'status'], unique=False)
+    
+    # support_ticket_messages comes from metadata, so its old index may be missing
+    op.execute('DROP INDEX IF EXISTS ix_support_ticket_messages_ticket_id')
+    op.create_index(
+        'ix_support_ticket_messages_ticket_id_created_at_id',
+        'support_ticket_messages',
+        ['ticket_id', 'created_at', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_support_ticket_messages_ticket_id_created_at_id', table_name='support_ticket_messages')
+    op.create_index('ix_support_ticket_messages_ticket_id', 'support_ticket_messages', ['ticket_id'], unique=False)
+    op.drop_index('ix_support_tickets_assigned_to_status', table_name='support_tickets')
+    op.drop_index('ix_support_tickets_queue', table_name='support_tickets')
+    op.drop_column('support_tickets', 'resolved_at')
+    op.drop_column('support_tickets', 'sla_due_at')
+    op.drop_column('support_tickets', 'assigned_at')
@@ -0,0 +1,30 @@
+"""Track provider payouts on withdrawals
+
+Revision ID: b41f0c6e8d27
+Revises: 3e7b5d2a91c4
+Create Date: 2026-10-19 13:26:05.914372
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41f0c6e8d27'
+down_revision: Union[str, None] = '3e7b5d2a91c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('withdrawals', sa.Column('payout_reference', sa.String(length=255), nullable=True))
+    op.add_column('withdrawals', sa.Column('payout_attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('withdrawals', sa.Column('payout_error', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('withdrawals', 'payout_error')
+    op.drop_column('withdrawals', 'payout_attempts')
+    op.drop_column('withdrawals', 'payout_reference')
@@ -0,0 +1,43 @@
+"""Withdrawal risk scores and review holds
+
+Revision ID: b6d3f8a24c57
+Revises: e2a7c5d91b38
+Create Date: 2026-10-20 18:27:35.904126
+
+Existing withdrawals get no score and no hold; score the pending ones
+with scripts/rescore_withdrawals.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d3f8a24c57'
+down_revision: Union[str, None] = 'e2a7c5d91b38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('withdrawals', sa.Column('risk_score', sa.Numeric(precision=5, scale=4), nullable=True))
+    op.add_column('withdrawals', sa.Column('risk_hold', sa.Boolean(), server_default='false', nullable=False))
+    op.add_column('withdrawals', sa.Column('risk_reviewed_by', sa.UUID(), nullable=True))
+    op.add_column('withdrawals', sa.Column('risk_reviewed_at', sa.DateTime(), nullable=True))
+    op.create_foreign_key(
+        'withdrawals_risk_reviewed_by_fkey', 'withdrawals', 'users', ['risk_reviewed_by'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index(
+        'ix_withdrawals_risk_review', 'withdrawals', ['risk_score'], unique=False,
+        postgresql_where=sa.text('risk_hold'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_withdrawals_risk_review', table_name='withdrawals', postgresql_where=sa.text('risk_hold'))
+    op.drop_constraint('withdrawals_risk_reviewed_by_fkey', 'withdrawals', type_='foreignkey')
+    op.drop_column('withdrawals', 'risk_reviewed_at')
+    op.drop_column('withdrawals', 'risk_reviewed_by')
+    op.drop_column('withdrawals', 'risk_hold')
+    op.drop_column('withdrawals', 'risk_score')
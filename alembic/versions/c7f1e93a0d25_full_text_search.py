@@ -0,0 +1,85 @@
+"""Full-text search columns, GIN and trigram indexes
+
+Revision ID: c7f1e93a0d25
+Revises: a8e2f71c4d90
+Create Date: 2026-10-20 10:14:52.803117
+
+Tickets, chat messages and proposals get a stored generated tsvector
+(search_vector) with a GIN index; users get trigram indexes on email
+and full_name for the admin substring search. Adding a stored generated
+column rewrites the table (chat_messages partition by partition) under
+an exclusive lock, so run this in a maintenance window on large
+databases.
+
+ai_proposals also gets the columns the proposals API has been writing
+(user_id, title, category, upvotes); proposal_type becomes optional
+since user proposals don't have one.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7f1e93a0d25'
+down_revision: Union[str, None] = 'a8e2f71c4d90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def search_vector(*fields) -> sa.Column:
+    expression = " || ".join(
+        f"setweight(to_tsvector('simple'::regconfig, coalesce({column}, '')), '{weight}')"
+        for column, weight in fields
+    )
+    return sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(expression, persisted=True), nullable=True)
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    
+    op.add_column('ai_proposals', sa.Column('user_id', sa.UUID(), nullable=True))
+    op.add_column('ai_proposals', sa.Column('title', sa.String(length=255), server_default='', nullable=False))
+    op.add_column('ai_proposals', sa.Column('category', sa.String(length=50), nullable=True))
+    op.add_column('ai_proposals', sa.Column('upvotes', sa.Integer(), server_default='0', nullable=False))
+    op.alter_column('ai_proposals', 'proposal_type', existing_type=sa.String(length=100), nullable=True)
+    op.create_foreign_key('ai_proposals_user_id_fkey', 'ai_proposals', 'users', ['user_id'], ['id'], ondelete='SET NULL')
+    op.create_index(op.f('ix_ai_proposals_user_id'), 'ai_proposals', ['user_id'], unique=False)
+    
+    op.add_column('support_tickets', search_vector(('subject', 'A'), ('description', 'B')))
+    op.add_column('chat_messages', search_vector(('message', 'D')))
+    op.add_column('ai_proposals', search_vector(('title', 'A'), ('description', 'B'), ('rationale', 'C')))
+    op.create_index('ix_support_tickets_search_vector', 'support_tickets', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_chat_messages_search_vector', 'chat_messages', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_ai_proposals_search_vector', 'ai_proposals', ['search_vector'], unique=False, postgresql_using='gin')
+    
+    op.create_index(
+        'ix_users_email_trgm', 'users', ['email'], unique=False,
+        postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_users_full_name_trgm', 'users', ['full_name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'full_name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_full_name_trgm', table_name='users')
+    op.drop_index('ix_users_email_trgm', table_name='users')
+    op.drop_index('ix_ai_proposals_search_vector', table_name='ai_proposals')
+    op.drop_index('ix_chat_messages_search_vector', table_name='chat_messages')
+    op.drop_index('ix_support_tickets_search_vector', table_name='support_tickets')
+    op.drop_column('ai_proposals', 'search_vector')
+    op.drop_column('chat_messages', 'search_vector')
+    op.drop_column('support_tickets', 'search_vector')
+    
+    op.drop_index(op.f('ix_ai_proposals_user_id'), table_name='ai_proposals')
+    op.drop_constraint('ai_proposals_user_id_fkey', 'ai_proposals', type_='foreignkey')
+    # Only restorable while every proposal has a type
+    op.alter_column('ai_proposals', 'proposal_type', existing_type=sa.String(length=100), nullable=False)
+    op.drop_column('ai_proposals', 'upvotes')
+    op.drop_column('ai_proposals', 'category')
+    op.drop_column('ai_proposals', 'title')
+    op.drop_column('ai_proposals', 'user_id')
@@ -0,0 +1,36 @@
+"""Index chat_messages by (conversation_id, created_at DESC)
+
+Revision ID: d19b6e4a7c52
+Revises: a7d3f1c9e215
+Create Date: 2026-10-19 19:10:42.806213
+
+Chat history reads the newest N messages of a conversation. The composite
+index serves that as a top-N scan (and any conversation_id lookup), so
+the single-column conversation_id index goes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd19b6e4a7c52'
+down_revision: Union[str, None] = 'a7d3f1c9e215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_chat_messages_conversation_id_created_at',
+        'chat_messages',
+        ['conversation_id', sa.text('created_at DESC')],
+        unique=False,
+    )
+    op.drop_index('ix_chat_messages_conversation_id', table_name='chat_messages')
+
+
+def downgrade() -> None:
+    op.create_index('ix_chat_messages_conversation_id', 'chat_messages', ['conversation_id'], unique=False)
+    op.drop_index('ix_chat_messages_conversation_id_created_at', table_name='chat_messages')
@@ -0,0 +1,39 @@
+"""Per-user proposal votes
+
+Revision ID: d4b9a2e6f731
+Revises: c7f1e93a0d25
+Create Date: 2026-10-20 13:41:09.622485
+
+proposal_votes records who upvoted what; its primary key makes a second
+vote by the same user a no-op. Existing upvotes were never attributed to
+users, so they stay as counted and only new votes are deduplicated.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4b9a2e6f731'
+down_revision: Union[str, None] = 'c7f1e93a0d25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'proposal_votes',
+        sa.Column('proposal_id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['proposal_id'], ['ai_proposals.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('proposal_id', 'user_id'),
+    )
+    op.create_index(op.f('ix_proposal_votes_user_id'), 'proposal_votes', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_proposal_votes_user_id'), table_name='proposal_votes')
+    op.drop_table('proposal_votes')
@@ -0,0 +1,46 @@
+"""Withdrawal payout approval and dispatch state
+
+Revision ID: d8b4e1f6a372
+Revises: c1f7a3e95d28
+Create Date: 2026-10-22 09:41:18.562093
+
+Existing pending withdrawals are not approved: an admin approves them
+(or set PAYOUT_AUTO_APPROVE_MAX_RISK) before they are paid out.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b4e1f6a372'
+down_revision: Union[str, None] = 'c1f7a3e95d28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('withdrawals', sa.Column('approved_by', sa.UUID(), nullable=True))
+    op.add_column('withdrawals', sa.Column('approved_at', sa.DateTime(), nullable=True))
+    op.add_column('withdrawals', sa.Column('payout_state', sa.String(length=20), nullable=True))
+    op.add_column('withdrawals', sa.Column('payout_claimed_at', sa.DateTime(), nullable=True))
+    op.create_foreign_key(
+        'withdrawals_approved_by_fkey', 'withdrawals', 'users', ['approved_by'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index(
+        'ix_withdrawals_payout_unconfirmed', 'withdrawals', ['updated_at'], unique=False,
+        postgresql_where=sa.text("payout_state = 'unconfirmed'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_withdrawals_payout_unconfirmed', table_name='withdrawals',
+        postgresql_where=sa.text("payout_state = 'unconfirmed'"),
+    )
+    op.drop_constraint('withdrawals_approved_by_fkey', 'withdrawals', type_='foreignkey')
+    op.drop_column('withdrawals', 'payout_claimed_at')
+    op.drop_column('withdrawals', 'payout_state')
+    op.drop_column('withdrawals', 'approved_at')
+    op.drop_column('withdrawals', 'approved_by')
@@ -0,0 +1,35 @@
+"""Proposal MinHash signatures and LSH buckets
+
+Revision ID: e2a7c5d91b38
+Revises: d4b9a2e6f731
+Create Date: 2026-10-20 16:02:47.318204
+
+ai_proposals gains the MinHash signature of each proposal and its LSH
+bucket keys, GIN-indexed for near-duplicate lookup on create. Existing
+proposals are signed by scripts/cluster_proposals.py --store; until then
+they are only found by the offline clustering.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a7c5d91b38'
+down_revision: Union[str, None] = 'd4b9a2e6f731'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('ai_proposals', sa.Column('minhash', sa.LargeBinary(), nullable=True))
+    op.add_column('ai_proposals', sa.Column('lsh_bands', postgresql.ARRAY(sa.BigInteger()), nullable=True))
+    op.create_index('ix_ai_proposals_lsh_bands', 'ai_proposals', ['lsh_bands'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ai_proposals_lsh_bands', table_name='ai_proposals')
+    op.drop_column('ai_proposals', 'lsh_bands')
+    op.drop_column('ai_proposals', 'minhash')
@@ -0,0 +1,45 @@
+"""Unique (user_id, context_type) and expires_at index on ai_context_store
+
+Revision ID: e5c4a9b27f13
+Revises: d19b6e4a7c52
+Create Date: 2026-10-19 20:02:17.418530
+
+The chat user context snapshot is upserted per (user_id, context_type),
+and expired rows are deleted by expires_at. Older duplicate rows are
+dropped first so the unique index can be built.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c4a9b27f13'
+down_revision: Union[str, None] = 'd19b6e4a7c52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.text(
+        """
+        DELETE FROM ai_context_store a
+        USING ai_context_store b
+        WHERE a.user_id = b.user_id
+          AND a.context_type = b.context_type
+          AND (a.created_at, a.id) < (b.created_at, b.id)
+        """
+    ))
+    op.create_index(
+        'uq_ai_context_store_user_id_context_type',
+        'ai_context_store',
+        ['user_id', 'context_type'],
+        unique=True,
+    )
+    op.create_index(op.f('ix_ai_context_store_expires_at'), 'ai_context_store', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ai_context_store_expires_at'), table_name='ai_context_store')
+    op.drop_index('uq_ai_context_store_user_id_context_type', table_name='ai_context_store')
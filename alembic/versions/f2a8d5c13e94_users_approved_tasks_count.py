@@ -0,0 +1,42 @@
+"""Per-user approved task counter for referral milestones
+
+Revision ID: f2a8d5c13e94
+Revises: e5c4a9b27f13
+Create Date: 2026-10-19 20:48:33.102947
+
+Approvals increment users.approved_tasks_count, so the referral bonus
+milestone is detected without counting submissions. Existing users are
+counted once here, in one set-based UPDATE.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a8d5c13e94'
+down_revision: Union[str, None] = 'e5c4a9b27f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('approved_tasks_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(sa.text(
+        """
+        UPDATE users
+        SET approved_tasks_count = counts.approved
+        FROM (
+            SELECT user_id, count(*) AS approved
+            FROM submissions
+            WHERE status = 'APPROVED'
+            GROUP BY user_id
+        ) AS counts
+        WHERE users.id = counts.user_id
+        """
+    ))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'approved_tasks_count')
@@ -0,0 +1,72 @@
+"""
+Analyze Referral Graph - Offline batch job
+Builds the multi-level referral graph, prints downline/depth/component
+statistics and flags referral rings (referrals between accounts sharing
+a device or IP, and referral cycles) for admin review
+
+Usage:
+    python scripts/analyze_referral_graph.py
+    python scripts/analyze_referral_graph.py --top 50 --output rings.json
+    python scripts/analyze_referral_graph.py --user 3f2c...  # one user's downline
+"""
+import sys
+import os
+import argparse
+import asyncio
+import json
+from uuid import UUID
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db.session import AsyncSessionLocal, engine
+from src.services.referral_graph import ReferralGraphAnalyzer
+
+
+async def analyze(top, output, user_id):
+    """Run the analyzer and print a summary"""
+    try:
+        async with AsyncSessionLocal() as session:
+            graph, rings, summary = await ReferralGraphAnalyzer.run(session)
+        
+        print(f"✅ Built the graph of {summary['referrals']:,} referrals over {summary['users']:,} users "
+              f"in {summary['build_seconds']}s ({summary['graph_mb']} MB)")
+        print(f"   Deepest chain: {summary['max_depth']} levels  Largest downline: {summary['largest_downline']:,}")
+        print(f"   Referral components: {summary['components']:,}  Users on or below referral cycles: {summary['cyclic_users']:,}")
+        print(f"   Rings flagged: {summary['rings']:,}")
+        
+        for ring in rings[:top]:
+            evidence = ring["evidence"]
+            print(f"   - score {ring['score']:5.1f}  {ring['member_count']:>5} accounts  "
+                  f"device links {evidence['shared_device_edges']}  IP links {evidence['shared_ip_edges']}  "
+                  f"cycle edges {evidence['cycle_edges']}  top referrer {evidence['top_referrer']}")
+        
+        if user_id:
+            node = graph.index_of(UUID(user_id))
+            if node is None:
+                print(f"   {user_id} has no referrals either way")
+            else:
+                print(f"   {user_id}: {json.dumps(graph.stats(node))}")
+        
+        if output:
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump({"summary": summary, "rings": rings}, f, indent=2, default=str)
+            print(f"   Rings written to {output}")
+    
+    except Exception as e:
+        print(f"❌ Error analyzing referral graph: {e}")
+        raise
+    
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top", type=int, default=20, help="Rings to print")
+    parser.add_argument("--output", help="Write every ring to this JSON file")
+    parser.add_argument("--user", help="Print one user's referral stats")
+    args = parser.parse_args()
+    
+    print("🕸️  Analyzing referral graph...")
+    asyncio.run(analyze(args.top, args.output, args.user))
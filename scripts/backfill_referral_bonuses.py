@@ -0,0 +1,66 @@
+"""
+Backfill Referral Bonuses - Pay referrals that reached the milestone
+before the milestone engine existed (or were missed)
+Works set-based: each batch flips up to --batch referrals, loads both
+parties in one query and writes their BONUS transactions in one INSERT,
+then commits. Safe to re-run; paid referrals are never paid again.
+
+Usage:
+    python scripts/backfill_referral_bonuses.py
+    python scripts/backfill_referral_bonuses.py --recount --batch 5000
+"""
+import sys
+import os
+import argparse
+import asyncio
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.config import settings
+from src.db.session import AsyncSessionLocal, engine
+from src.services.referral_milestones import ReferralMilestones
+
+
+async def backfill(batch_size, recount):
+    """Credit every eligible unpaid referral, batch by batch"""
+    try:
+        started = time.perf_counter()
+        if recount:
+            async with AsyncSessionLocal() as session:
+                changed = await ReferralMilestones.recount_approved(session)
+                await session.commit()
+            print(f"   recounted approved tasks: {changed} users corrected")
+        
+        paid = 0
+        after = None
+        while True:
+            async with AsyncSessionLocal() as session:
+                referred = await ReferralMilestones.eligible_batch(session, after, batch_size)
+                if not referred:
+                    break
+                paid += len(await ReferralMilestones.credit(session, referred))
+                await session.commit()
+            after = referred[-1]
+            print(f"   {paid} referrals paid...")
+        
+        elapsed = time.perf_counter() - started
+        print(f"✅ {paid} referral bonuses paid (${settings.REFERRAL_BONUS_USD:g} each to both parties, {elapsed:.1f}s)")
+    
+    except Exception as e:
+        print(f"❌ Error backfilling referral bonuses: {e}")
+        raise
+    
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch", type=int, default=settings.REFERRAL_BACKFILL_BATCH)
+    parser.add_argument("--recount", action="store_true", help="Recount approved tasks from submissions first")
+    args = parser.parse_args()
+    
+    print("🎁 Backfilling referral bonuses...")
+    asyncio.run(backfill(args.batch, args.recount))
@@ -0,0 +1,157 @@
+"""
+Benchmark - AI Chat Time to First Byte
+Serves the ai-chat router with uvicorn (fake user and session, FakeChatLLM)
+and compares a buffered reply from the same LLM against POST /stream:
+time to first byte, time to first token and total time, plus a client
+that disconnects mid-stream to check the turn is still saved once
+
+Usage:
+    python scripts/bench_chat_stream.py
+    python scripts/bench_chat_stream.py --first-token-ms 800 --token-ms 50 --requests 20
+"""
+import sys
+import os
+import argparse
+import asyncio
+import socket
+import statistics
+import threading
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.api.v1 import ai_chat
+from src.core.deps import get_current_active_user
+from src.db.models import SubscriptionTier
+from src.db.session import get_db
+from src.services import ai_chat as ai_chat_service
+from src.services import chat_history as chat_history_module
+from src.services.chat_llm import FakeChatLLM
+from src.services.log_sink import LogSink
+
+
+class NoRows:
+    def first(self):
+        return None
+
+
+class NullSession:
+    """No stored context snapshot; writes go nowhere"""
+    
+    async def execute(self, statement):
+        return NoRows()
+    
+    async def scalar(self, statement):
+        return 0
+    
+    async def commit(self):
+        pass
+    
+    async def close(self):
+        pass
+
+
+async def null_db():
+    yield NullSession()
+
+
+def make_app(first_token_ms: int, token_ms: int) -> FastAPI:
+    user = SimpleNamespace(
+        id=uuid4(),
+        subscription_tier=SubscriptionTier.FREE,
+        total_earnings_usd=12.5,
+        available_balance_usd=7.25,
+        pending_balance_usd=0,
+        current_streak_days=3,
+        is_verified=True,
+        kyc_verified=False,
+        face_verified=False,
+        preferred_language="en",
+    )
+    ai_chat.chat_llm = FakeChatLLM(first_token_ms=first_token_ms, token_ms=token_ms)
+    
+    app = FastAPI()
+    
+    @app.post("/ai-chat/buffered")
+    async def buffered(request: ai_chat.ChatMessageRequest):
+        """Same LLM, whole reply in one JSON body: what /message costs with a real model"""
+        _, _, _, ai_response = await ai_chat._prepare_reply(request.message, None, NullSession(), user)
+        tokens = [token async for token in ai_chat.chat_llm.stream({"draft": ai_response["message"]})]
+        return {**ai_response, "message": "".join(tokens)}
+    
+    app.include_router(ai_chat.router, prefix="/ai-chat")
+    app.dependency_overrides[get_db] = null_db
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def timed_request(client: httpx.AsyncClient, path: str):
+    started = time.perf_counter()
+    first_byte = first_token = None
+    async with client.stream("POST", path, json={"message": "How can I earn more from tasks?"}) as response:
+        async for chunk in response.aiter_text():
+            now = time.perf_counter() - started
+            first_byte = first_byte or now
+            if first_token is None and ("event: token" in chunk or not path.endswith("/stream")):
+                first_token = now
+    return first_byte, first_token, time.perf_counter() - started
+
+
+def summary(label: str, samples):
+    first_byte, first_token, total = (statistics.median(column) * 1000 for column in zip(*samples))
+    print(f"   {label:<10} TTFB {first_byte:7.0f} ms   first token {first_token:7.0f} ms   total {total:7.0f} ms")
+
+
+async def run(port: int, requests: int, sink: LogSink):
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+        for path in ("/ai-chat/buffered", "/ai-chat/stream"):
+            samples = [await timed_request(client, path) for _ in range(requests)]
+            summary(path.rsplit("/", 1)[1], samples)
+        
+        # Disconnect after the first token
+        before = sink.pending
+        async with client.stream("POST", "/ai-chat/stream", json={"message": "Tell me about withdrawals"}) as response:
+            async for chunk in response.aiter_text():
+                if "event: token" in chunk:
+                    break
+        await asyncio.sleep(0.5)
+        print(f"   disconnect mid-stream: {sink.pending - before} messages saved (expected 2)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--first-token-ms", type=int, default=300)
+    parser.add_argument("--token-ms", type=int, default=30)
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args()
+    
+    sink = LogSink(max_queue=100_000)
+    chat_history_module.log_sink = sink
+    ai_chat_service.log_sink = sink
+    
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        make_app(args.first_token_ms, args.token_ms), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    
+    print(f"⏱️  Benchmarking chat streaming (first token {args.first_token_ms} ms, {args.token_ms} ms/token)...")
+    asyncio.run(run(port, args.requests, sink))
+    server.should_exit = True
+    thread.join()
@@ -0,0 +1,372 @@
+"""
+Benchmark - AI Chat Reply Rendering
+Per intent and tier: time per reply and memory held per reply for the old
+f-string handlers versus the precompiled templates (src/services/
+chat_templates.py). Memory is measured by keeping a batch of replies alive
+and dividing the traced bytes / allocated blocks by the batch size, which
+is where shared suggestion and action structures show up.
+
+Usage:
+    python scripts/bench_chat_templates.py
+    python scripts/bench_chat_templates.py --iterations 100000 --language es
+"""
+import sys
+import os
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Any, Dict
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.chat_templates import chat_templates
+from src.services.intent_classifier import INTENTS
+
+
+class LegacyHandlers:
+    """The per-call handlers AIChat used before the templates"""
+    
+    @staticmethod
+    def _handle_help_request(context: Dict, user_context: Dict) -> Dict[str, Any]:
+        """Handle help requests"""
+        return {
+            "message": f"""👋 Hi! I'm your DigniLife AI assistant!
+
+I can help you with:
+
+🎯 **Tasks & Earning**
+- Find the best tasks for you
+- Tips to maximize earnings
+- Understand quality bonuses
+
+💰 **Withdrawals**
+- Withdrawal process
+- Fee structure (Your tier: {context['user_tier'].upper()} - {['15%', '10%', '5%'][['free', 'pro', 'premium'].index(context['user_tier'])]} fee)
+- Payout methods
+
+📊 **Account**
+- Track your progress
+- Upgrade subscription
+- Manage profile
+
+What would you like help with?""",
+            "intent": "help_request",
+            "suggestions": [
+                "Show me available tasks",
+                "How can I earn more?",
+                "Tell me about withdrawals",
+                "Upgrade my subscription"
+            ],
+            "actions": []
+        }
+    
+    @staticmethod
+    def _handle_task_inquiry(context: Dict, user_context: Dict) -> Dict[str, Any]:
+        """Handle task-related inquiries"""
+        streak = context['current_streak']
+        
+        return {
+            "message": f"""🎯 **Task Information**
+
+📈 Your Current Stats:
+- Streak: {streak} days ({min(streak, 30)}% bonus!)
+- Today's Tasks: {context['tasks_completed_today']}
+- Balance: ${context['available_balance']:.2f}
+
+💡 **Tips to Maximize Earnings:**
+1. ⚡ Complete tasks faster for speed bonus (up to 20%)
+2. ✅ High quality work = quality bonus (up to 50%)
+3. 🔥 Keep your streak going! ({min(streak, 30)}% bonus)
+4. 🚀 Upgrade to PRO/PREMIUM for higher multipliers
+
+Would you like me to find the best tasks for you?""",
+            "intent": "task_inquiry",
+            "suggestions": [
+                "Show me high-paying tasks",
+                "What's my earning potential?",
+                "How to improve my quality score?"
+            ],
+            "actions": [
+                {
+                    "type": "navigate",
+                    "target": "/tasks",
+                    "label": "Browse Tasks"
+                }
+            ]
+        }
+    
+    @staticmethod
+    def _handle_withdrawal_inquiry(context: Dict, user_context: Dict) -> Dict[str, Any]:
+        """Handle withdrawal inquiries"""
+        tier = context['user_tier']
+        fee_rates = {"free": 15, "pro": 10, "premium": 5}
+        fee = fee_rates[tier]
+        balance = context['available_balance']
+        
+        return {
+            "message": f"""💰 **Withdrawal Information**
+
+Your Balance: **${balance:.2f}**
+Your Tier: **{tier.upper()}**
+Withdrawal Fee: **{fee}%** (AUTO-CUT)
+
+🏦 **Available Payout Methods:**
+- Wave Money, KBZ Pay, CB Pay (Myanmar) - Min $5
+- AYA Pay, OnePay (Myanmar) - Min $5
+- PayPal (Global) - Min $10
+- Western Union, MoneyGram - Min $20
+- Bank Transfer - Min $50
+
+💡 **Want to save on fees?**
+Upgrade to PRO (10% fee) or PREMIUM (5% fee)!
+
+Net amount after {fee}% fee: **${balance * (1 - fee/100):.2f}**""",
+            "intent": "withdrawal_inquiry",
+            "suggestions": [
+                "Request withdrawal",
+                "Calculate withdrawal fee",
+                "Upgrade to reduce fees"
+            ],
+            "actions": [
+                {
+                    "type": "navigate",
+                    "target": "/withdrawals/request",
+                    "label": "Request Withdrawal"
+                }
+            ]
+        }
+    
+    @staticmethod
+    def _handle_subscription_inquiry(context: Dict, user_context: Dict) -> Dict[str, Any]:
+        """Handle subscription inquiries"""
+        current_tier = context['user_tier']
+        
+        tiers_info = {
+            "free": {
+                "next": "PRO",
+                "benefits": "10% withdrawal fee (vs 15%), 1.2x earning multiplier"
+            },
+            "pro": {
+                "next": "PREMIUM",
+                "benefits": "5% withdrawal fee (vs 10%), 1.5x earning multiplier"
+            },
+            "premium": {
+                "next": None,
+                "benefits": "You're at the highest tier!"
+            }
+        }
+        
+        info = tiers_info[current_tier]
+        
+        if info["next"]:
+            message = f"""⭐ **Subscription Upgrade**
+
+Current Tier: **{current_tier.upper()}**
+
+Upgrade to **{info["next"]}** and get:
+{info["benefits"]}
+
+💰 Example: On $100 withdrawal
+- Current ({current_tier.upper()}): You get ${100 * (1 - [15, 10, 5][['free', 'pro', 'premium'].index(current_tier)]/100):.2f}
+- After upgrade ({info["next"]}): You get ${100 * (1 - [15, 10, 5][['free', 'pro', 'premium'].index(info["next"].lower())]/100):.2f}
+
+Ready to upgrade?"""
+        else:
+            message = f"""⭐ **Subscription Status**
+
+You're on **{current_tier.upper()}** - the highest tier! 🎉
+
+You enjoy:
+- Only 5% withdrawal fee
+- 1.5x earning multiplier
+- Priority support
+
+Keep earning! 💪"""
+        
+        return {
+            "message": message,
+            "intent": "subscription_inquiry",
+            "suggestions": [
+                "Upgrade now" if info["next"] else "Check my earnings",
+                "Compare all tiers",
+                "Calculate savings"
+            ],
+            "actions": [
+                {
+                    "type": "upgrade",
+                    "target": info["next"],
+                    "label": f"Upgrade to {info['next']}"
+                }
+            ] if info["next"] else []
+        }
+    
+    @staticmethod
+    def _handle_problem_report(context: Dict, user_context: Dict) -> Dict[str, Any]:
+        """Handle problem reports"""
+        return {
+            "message": """😟 I'm sorry you're experiencing an issue!
+
+I can help you with:
+
+1. 🐛 **Technical Issues**
+   - App not working
+   - Can't submit tasks
+   - Payment problems
+
+2. 💬 **Create Support Ticket**
+   - Get human help
+   - Track your issue
+   - Priority support (for PRO/PREMIUM)
+
+What kind of problem are you facing?""",
+            "intent": "problem_report",
+            "suggestions": [
+                "Can't submit task",
+                "Withdrawal not received",
+                "Create support ticket",
+                "Talk to human agent"
+            ],
+            "actions": [
+                {
+                    "type": "navigate",
+                    "target": "/support/create-ticket",
+                    "label": "Create Support Ticket"
+                }
+            ]
+        }
+    
+    @staticmethod
+    def _handle_suggestion(context: Dict, user_context: Dict) -> Dict[str, Any]:
+        """Handle user suggestions"""
+        return {
+            "message": """💡 **We Love Your Ideas!**
+
+Your suggestions help us improve DigniLife!
+
+🎁 **Suggestion Rewards:**
+- Get rewarded if your idea is implemented
+- Influence platform development
+- Help the community
+
+What's your suggestion?""",
+            "intent": "suggestion",
+            "suggestions": [
+                "Submit my suggestion",
+                "View past suggestions",
+                "See what's being worked on"
+            ],
+            "actions": [
+                {
+                    "type": "navigate",
+                    "target": "/ai-proposals/create",
+                    "label": "Submit Suggestion"
+                }
+            ]
+        }
+    
+    @staticmethod
+    def _handle_general(context: Dict, user_context: Dict) -> Dict[str, Any]:
+        """Handle general conversation"""
+        return {
+            "message": f"""👋 Hello! I'm here to help you succeed on DigniLife!
+
+📊 Quick Stats:
+- Your Balance: ${context['available_balance']:.2f}
+- Streak: {context['current_streak']} days 🔥
+- Tier: {context['user_tier'].upper()}
+
+How can I assist you today?""",
+            "intent": "general_conversation",
+            "suggestions": [
+                "Show me tasks",
+                "How to earn more?",
+                "Withdraw money",
+                "Get help"
+            ],
+            "actions": []
+        }
+
+
+LEGACY = {
+    "help_request": LegacyHandlers._handle_help_request,
+    "task_inquiry": LegacyHandlers._handle_task_inquiry,
+    "withdrawal_inquiry": LegacyHandlers._handle_withdrawal_inquiry,
+    "subscription_inquiry": LegacyHandlers._handle_subscription_inquiry,
+    "problem_report": LegacyHandlers._handle_problem_report,
+    "suggestion": LegacyHandlers._handle_suggestion,
+    "general_conversation": LegacyHandlers._handle_general,
+}
+
+
+def make_context(tier: str) -> Dict[str, Any]:
+    return {
+        "user_tier": tier,
+        "available_balance": 123.45,
+        "current_streak": 12,
+        "tasks_completed_today": 4,
+    }
+
+
+def time_per_call(render, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        render()
+    return (time.perf_counter() - started) / iterations
+
+
+def memory_per_reply(render, batch: int):
+    """(bytes, blocks) still allocated per reply while a batch is kept"""
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    replies = [render() for _ in range(batch)]
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sys.getallocatedblocks() - blocks_before
+    del replies
+    return traced / batch, blocks / batch
+
+
+def run(iterations: int, batch: int, language: str):
+    totals = {"legacy": [0.0, 0.0, 0.0], "templates": [0.0, 0.0, 0.0]}
+    rows = 0
+    
+    print(f"\n🧩 Reply rendering ({iterations:,} calls per row, language={language})")
+    print(f"   {'intent':<22} {'tier':<8} {'legacy µs':>10} {'tmpl µs':>9} {'legacy B':>9} {'tmpl B':>7} {'legacy blk':>10} {'tmpl blk':>8}")
+    for intent in INTENTS:
+        for tier in ("free", "pro", "premium"):
+            context = make_context(tier)
+            paths = {
+                "legacy": lambda: LEGACY[intent](context, {}),
+                "templates": lambda: chat_templates.render(intent, context, language=language, tier=tier),
+            }
+            results = {}
+            for name, render in paths.items():
+                seconds = time_per_call(render, iterations)
+                size, blocks = memory_per_reply(render, batch)
+                results[name] = (seconds, size, blocks)
+                for i, value in enumerate(results[name]):
+                    totals[name][i] += value
+            rows += 1
+            legacy, templates = results["legacy"], results["templates"]
+            print(f"   {intent:<22} {tier:<8} {legacy[0] * 1e6:>10.2f} {templates[0] * 1e6:>9.2f} "
+                  f"{legacy[1]:>9.0f} {templates[1]:>7.0f} {legacy[2]:>10.1f} {templates[2]:>8.1f}")
+    
+    legacy, templates = ([value / rows for value in totals[name]] for name in ("legacy", "templates"))
+    print(f"\n   mean time per reply:   {legacy[0] * 1e6:.2f} µs -> {templates[0] * 1e6:.2f} µs "
+          f"({legacy[0] / templates[0]:.1f}x)")
+    print(f"   mean bytes per reply:  {legacy[1]:.0f} -> {templates[1]:.0f}")
+    print(f"   mean blocks per reply: {legacy[2]:.1f} -> {templates[2]:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=2000, help="Replies kept alive for the memory columns")
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args()
+    
+    print("⏱️  Benchmarking chat reply rendering...")
+    run(args.iterations, args.batch, args.language)
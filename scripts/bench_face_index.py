@@ -0,0 +1,77 @@
+"""
+Benchmark - Face Index Lookup Latency
+Measures IVF build time, 1:N lookup latency, recall@1 and incremental
+inserts at 100k and 1M enrolled users (synthetic embeddings)
+
+Usage:
+    python scripts/bench_face_index.py
+    python scripts/bench_face_index.py --sizes 100000 --queries 2000
+"""
+import sys
+import os
+import argparse
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.vector_index import IVFIndex, normalize
+
+
+def percentile_ms(samples, pct):
+    return float(np.percentile(samples, pct) * 1000)
+
+
+def run(size: int, dim: int, n_lists: int, n_probe: int, queries: int, noise: float):
+    rng = np.random.default_rng(42)
+    enrolled = normalize(rng.standard_normal((size, dim), dtype=np.float32))
+    ids = np.arange(size)
+    
+    index = IVFIndex(dim=dim, n_lists=n_lists, n_probe=n_probe)
+    
+    started = time.perf_counter()
+    index.build(ids, enrolled)
+    build_seconds = time.perf_counter() - started
+    
+    # Queries are noisy re-captures of enrolled faces
+    targets = rng.choice(size, queries, replace=False)
+    probes = normalize(enrolled[targets] + noise * rng.standard_normal((queries, dim), dtype=np.float32))
+    
+    latencies = []
+    hits = 0
+    for target, probe in zip(targets, probes):
+        started = time.perf_counter()
+        result = index.search(probe, k=1)
+        latencies.append(time.perf_counter() - started)
+        hits += bool(result) and result[0][0] == target
+    
+    inserts = normalize(rng.standard_normal((1000, dim), dtype=np.float32))
+    started = time.perf_counter()
+    for offset, vector in enumerate(inserts):
+        index.add(size + offset, vector)
+    insert_us = (time.perf_counter() - started) / len(inserts) * 1e6
+    
+    print(f"\n👥 {size:,} enrolled users  (dim={dim}, lists={n_lists}, probe={n_probe})")
+    print(f"   build:      {build_seconds:.1f}s")
+    print(f"   lookup p50: {percentile_ms(latencies, 50):.2f} ms")
+    print(f"   lookup p99: {percentile_ms(latencies, 99):.2f} ms")
+    print(f"   recall@1:   {hits / queries:.3f}")
+    print(f"   insert:     {insert_us:.0f} µs/user")
+    print(f"   vectors:    {enrolled.nbytes / 1024 ** 2:.0f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--lists", type=int, default=1024)
+    parser.add_argument("--probe", type=int, default=16)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--noise", type=float, default=0.05)
+    args = parser.parse_args()
+    
+    print("⏱️  Benchmarking face index...")
+    for size in args.sizes:
+        run(size, args.dim, args.lists, args.probe, args.queries, args.noise)
@@ -0,0 +1,102 @@
+"""
+Benchmark - Chat Intent Classification
+Messages/sec on one core for the old keyword cascade, classify() per
+message and classify_many(), with and without the n-gram model, plus
+accuracy on the labelled fixture set (tests/fixtures/chat_intents.jsonl)
+
+Usage:
+    python scripts/bench_intent_classifier.py
+    python scripts/bench_intent_classifier.py --messages 200000 --batch 256
+"""
+import sys
+import os
+import argparse
+import json
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.intent_classifier import (
+    INTENT_KEYWORDS, HashedNGramModel, IntentClassifier, KeywordMatcher
+)
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'fixtures', 'chat_intents.jsonl')
+
+
+def legacy_intent(message: str) -> str:
+    """The substring cascade AIChat used before the classifier"""
+    message_lower = message.lower()
+    if any(word in message_lower for word in ["help", "how", "what", "guide"]):
+        return "help_request"
+    elif any(word in message_lower for word in ["task", "work", "earn"]):
+        return "task_inquiry"
+    elif any(word in message_lower for word in ["withdraw", "payout", "money", "cash"]):
+        return "withdrawal_inquiry"
+    elif any(word in message_lower for word in ["upgrade", "premium", "pro", "subscription"]):
+        return "subscription_inquiry"
+    elif any(word in message_lower for word in ["problem", "issue", "error", "not working"]):
+        return "problem_report"
+    elif any(word in message_lower for word in ["suggestion", "improve", "feature", "idea"]):
+        return "suggestion"
+    else:
+        return "general_conversation"
+
+
+def throughput(label: str, count: int, seconds: float):
+    print(f"   {label:<34} {count / seconds:>12,.0f} msg/s")
+
+
+def accuracy(label: str, predicted, expected):
+    correct = sum(p == e for p, e in zip(predicted, expected))
+    print(f"   {label:<34} {correct / len(expected):>12.3f}  ({correct}/{len(expected)})")
+
+
+def run(total: int, batch: int):
+    with open(FIXTURES, encoding="utf-8") as f:
+        examples = [json.loads(line) for line in f if line.strip()]
+    messages = [row["message"] for row in examples]
+    expected = [row["intent"] for row in examples]
+    workload = (messages * (total // len(messages) + 1))[:total]
+    
+    keywords = IntentClassifier(KeywordMatcher(INTENT_KEYWORDS))
+    # Trained on the fixtures themselves: measures speed, not generalisation
+    model = HashedNGramModel().fit(messages, expected)
+    with_model = IntentClassifier(KeywordMatcher(INTENT_KEYWORDS), model)
+    
+    print(f"\n⚡ Throughput ({total:,} messages, one core)")
+    started = time.perf_counter()
+    for message in workload:
+        legacy_intent(message)
+    throughput("legacy substring cascade", total, time.perf_counter() - started)
+    
+    for label, classifier in (("keywords", keywords), ("keywords + model", with_model)):
+        started = time.perf_counter()
+        for message in workload:
+            classifier.classify(message)
+        throughput(f"{label}: classify()", total, time.perf_counter() - started)
+        
+        started = time.perf_counter()
+        for offset in range(0, total, batch):
+            classifier.classify_many(workload[offset:offset + batch])
+        throughput(f"{label}: classify_many({batch})", total, time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    for offset in range(0, total, batch):
+        model.predict_proba(workload[offset:offset + batch])
+    throughput(f"model only: predict_proba({batch})", total, time.perf_counter() - started)
+    
+    print(f"\n🎯 Accuracy on {len(examples)} labelled messages")
+    accuracy("legacy substring cascade", [legacy_intent(m) for m in messages], expected)
+    accuracy("keywords", [r["intent"] for r in keywords.classify_many(messages)], expected)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=256)
+    args = parser.parse_args()
+    
+    print("⏱️  Benchmarking intent classification...")
+    run(args.messages, args.batch)
@@ -0,0 +1,86 @@
+"""
+Benchmark - Payout Dispatcher Throughput
+Pushes synthetic withdrawals through fake providers with realistic
+latency, transient outages and declines, and reports withdrawals/minute
+
+Usage:
+    python scripts/bench_payout_dispatcher.py
+    python scripts/bench_payout_dispatcher.py --withdrawals 20000 --latency 0.2
+"""
+import sys
+import os
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+from uuid import uuid4
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db.models import PayoutMethodEnum
+from src.services.payout_dispatcher import (
+    PROVIDER_LIMITS, FakePayoutProvider, PayoutDispatcher, idempotency_key
+)
+
+
+def make_payouts(count: int):
+    methods = list(PayoutMethodEnum)
+    weights = [30, 30, 8, 8, 4, 8, 4, 4, 4]  # Mobile wallets dominate
+    payouts = []
+    for method in random.choices(methods, weights=weights, k=count):
+        withdrawal_id = str(uuid4())
+        payouts.append({
+            "withdrawal_id": withdrawal_id,
+            "idempotency_key": idempotency_key(withdrawal_id),
+            "payout_method": method,
+            "amount": "10000.00",
+            "currency_code": "MMK",
+            "amount_usd": "4.75",
+            "destination": {"phone": "09000000000"},
+        })
+    return payouts
+
+
+async def run(count: int, latency: float, failure_rate: float, sequential: bool):
+    providers = {
+        method: FakePayoutProvider(
+            method,
+            max_concurrency=1 if sequential else limits["max_concurrency"],
+            batch_size=1 if sequential else limits["batch_size"],
+            latency_seconds=latency,
+            transient_failure_rate=failure_rate,
+            decline_rate=0.01,
+            seed=7,
+        )
+        for method, limits in PROVIDER_LIMITS.items()
+    }
+    dispatcher = PayoutDispatcher(providers, max_attempts=5, retry_base_seconds=0.05, retry_max_seconds=1.0)
+    payouts = make_payouts(count)
+    
+    started = time.perf_counter()
+    results = await dispatcher.dispatch(payouts)
+    elapsed = time.perf_counter() - started
+    
+    outcomes = Counter(result["status"] for result in results)
+    requests = sum(provider.requests for provider in providers.values())
+    label = "one at a time per provider" if sequential else "pooled + batched"
+    print(f"\n📦 {count:,} withdrawals, {latency * 1000:.0f} ms provider latency ({label})")
+    print(f"   elapsed:     {elapsed:.1f}s")
+    print(f"   throughput:  {count / elapsed * 60:,.0f} withdrawals/minute")
+    print(f"   requests:    {requests:,}")
+    print(f"   outcomes:    {dict(outcomes)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--withdrawals", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    args = parser.parse_args()
+    
+    random.seed(1)
+    print("⏱️  Benchmarking payout dispatcher...")
+    asyncio.run(run(args.withdrawals, args.latency, args.failure_rate, sequential=True))
+    asyncio.run(run(args.withdrawals, args.latency, args.failure_rate, sequential=False))
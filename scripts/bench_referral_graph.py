@@ -0,0 +1,84 @@
+"""
+Benchmark - Referral Graph Build
+Builds the CSR referral graph from synthetic referrals and reports build
+time, resident size of the graph and peak memory during the build.
+
+The synthetic graph looks like production: most users refer nobody, a
+few promoters refer thousands, chains run a few levels deep, and a small
+share of users sit on referral cycles.
+
+Usage:
+    python scripts/bench_referral_graph.py
+    python scripts/bench_referral_graph.py --edges 5000000 --queries 1000
+"""
+import sys
+import os
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.referral_graph import ReferralGraph
+
+
+def synthetic_edges(edges: int, seed: int = 7):
+    """(referrer keys, referred keys): each user referred at most once"""
+    rng = np.random.default_rng(seed)
+    users = edges + edges // 20
+    keys = np.frombuffer(rng.bytes(16 * users), dtype="S16")
+    referred = rng.permutation(users)[:edges]
+    # Zipf-like referrers: a few promoters, a long tail
+    referrers = (rng.pareto(1.2, edges) * users / 50).astype(np.int64) % users
+    # Break self-referrals; the rest of the cycles stay (that's the fraud)
+    same = referrers == referred
+    referrers[same] = (referrers[same] + 1) % users
+    return keys[referrers], keys[referred]
+
+
+def run(edges: int, queries: int):
+    referrers, referred = synthetic_edges(edges)
+    input_mb = (referrers.nbytes + referred.nbytes) / 1e6
+    
+    tracemalloc.start()
+    started = time.perf_counter()
+    graph = ReferralGraph.from_edges(referrers, referred)
+    build_seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    rng = np.random.default_rng(11)
+    nodes = rng.integers(0, graph.node_count, queries)
+    started = time.perf_counter()
+    for node in nodes:
+        graph.stats(int(node))
+    stats_ms = (time.perf_counter() - started) / queries * 1000
+    
+    promoter = int(np.argmax(graph.downline_size))
+    started = time.perf_counter()
+    downline = graph.downline(promoter)
+    downline_ms = (time.perf_counter() - started) * 1000
+    
+    print(f"\n🕸️  {graph.edge_count:,} edges, {graph.node_count:,} users ({input_mb:.0f} MB of keys in)")
+    print(f"   build              {build_seconds:7.2f} s")
+    print(f"   graph size         {graph.nbytes / 1e6:7.1f} MB   "
+          f"({graph.nbytes / graph.node_count:.1f} B/user incl. {4 * graph.edge_count / graph.node_count:.1f} B/user of edges)")
+    print(f"   build peak         {peak / 1e6:7.1f} MB   ({(peak - graph.nbytes) / graph.edge_count:.1f} B/edge transient)")
+    print(f"   stats(node)        {stats_ms:7.3f} ms")
+    print(f"   downline(top)      {downline_ms:7.1f} ms   ({len(downline):,} users, "
+          f"max depth {int(graph.depth.max())}, {int(graph.cyclic.sum()):,} on or below cycles)")
+    print(f"   components (2+)    {len(graph.component_sizes()):,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--edges", type=int, nargs="+", default=[1000000, 5000000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    
+    print("⏱️  Building referral graphs...")
+    for edges in args.edges:
+        run(edges, args.queries)
@@ -0,0 +1,165 @@
+"""
+Benchmark - Referral Stats and Listings
+Seeds one promoter with N referred users (default 50,000) and times:
+  stats (legacy)   code lookup + two COUNTs + SUM over the promoter's referrals
+  stats            one referral_aggregates row
+  list (legacy)    every referral joined to its user, no pagination
+  first page       newest page of the keyset listing
+  deep page        a page from the middle of the listing via its cursor
+
+Needs DATABASE_URL with migrations applied. Creates throwaway users and
+removes them (and their referrals) afterwards.
+
+Usage:
+    python scripts/bench_referrals.py
+    python scripts/bench_referrals.py --referrals 50000 --iterations 50
+"""
+import sys
+import os
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import delete, func, insert, select
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.security import get_password_hash
+from src.db.session import engine, AsyncSessionLocal
+from src.db.models import User, Referral
+from src.services.referral_aggregates import ReferralAggregates
+
+SEED_BATCH = 5000
+PAGE_SIZE = 50
+
+
+async def seed(referrals: int):
+    """The promoter, its code record and `referrals` applied codes"""
+    promoter_id = uuid4()
+    code = f"BENCH{uuid4().hex[:8].upper()}"
+    password = get_password_hash("bench-password")
+    now = datetime.utcnow()
+    user_ids = [uuid4() for _ in range(referrals)]
+    
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(User), [{
+            "id": promoter_id,
+            "email": f"bench-promoter-{code.lower()}@example.invalid",
+            "hashed_password": password,
+            "full_name": "Referral Bench Promoter",
+        }])
+        await session.execute(insert(Referral), [{
+            "referrer_id": promoter_id, "referral_code": code, "created_at": now,
+        }])
+        for start in range(0, referrals, SEED_BATCH):
+            batch = user_ids[start:start + SEED_BATCH]
+            await session.execute(insert(User), [
+                {
+                    "id": user_id,
+                    "email": f"bench-{user_id.hex}@example.invalid",
+                    "hashed_password": password,
+                    "full_name": "Referral Bench Friend",
+                }
+                for user_id in batch
+            ])
+            await session.execute(insert(Referral), [
+                {
+                    "referrer_id": promoter_id,
+                    "referred_user_id": user_id,
+                    "referral_code": code,
+                    # Every 4th friend has reached the milestone
+                    "bonus_earned": (start + i) % 4 == 0,
+                    "bonus_amount_usd": 5 if (start + i) % 4 == 0 else 0,
+                    "created_at": now - timedelta(seconds=start + i),
+                }
+                for i, user_id in enumerate(batch)
+            ])
+        await ReferralAggregates.rebuild(session)
+        await session.commit()
+    return promoter_id, [promoter_id, *user_ids]
+
+
+async def cleanup(user_ids):
+    async with AsyncSessionLocal() as session:
+        for start in range(0, len(user_ids), SEED_BATCH):
+            await session.execute(delete(User).where(User.id.in_(user_ids[start:start + SEED_BATCH])))
+        await session.commit()
+
+
+async def legacy_stats(session, promoter_id):
+    await session.execute(select(Referral).where(Referral.referrer_id == promoter_id, Referral.referred_user_id == None))
+    await session.scalar(select(func.count(Referral.id)).where(Referral.referrer_id == promoter_id, Referral.referred_user_id != None))
+    await session.scalar(select(func.count(Referral.id)).where(Referral.referrer_id == promoter_id, Referral.bonus_earned == True))
+    await session.scalar(select(func.sum(Referral.bonus_amount_usd)).where(Referral.referrer_id == promoter_id, Referral.bonus_earned == True))
+
+
+async def legacy_list(session, promoter_id):
+    result = await session.execute(
+        select(Referral, User)
+        .join(User, Referral.referred_user_id == User.id)
+        .where(Referral.referrer_id == promoter_id, Referral.referred_user_id != None)
+        .order_by(Referral.created_at.desc())
+    )
+    result.all()
+
+
+async def time_path(iterations: int, call) -> list:
+    samples = []
+    for _ in range(iterations):
+        async with AsyncSessionLocal() as session:
+            started = time.perf_counter()
+            await call(session)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def report(name: str, samples: list):
+    samples = sorted(samples)
+    p95 = samples[max(int(len(samples) * 0.95) - 1, 0)]
+    print(f"   {name:<14} mean {statistics.mean(samples) * 1000:9.3f} ms   "
+          f"p50 {statistics.median(samples) * 1000:9.3f} ms   p95 {p95 * 1000:9.3f} ms")
+
+
+async def run(referrals: int, iterations: int):
+    print(f"🌱 Seeding a promoter with {referrals:,} referrals...")
+    promoter_id, user_ids = await seed(referrals)
+    try:
+        # Cursor halfway down the listing
+        async with AsyncSessionLocal() as session:
+            middle = (await session.execute(
+                select(Referral.created_at, Referral.id)
+                .where(Referral.referrer_id == promoter_id, Referral.referred_user_id != None)
+                .order_by(Referral.created_at.desc(), Referral.id.desc())
+                .offset(referrals // 2)
+                .limit(1)
+            )).one()
+        
+        results = {
+            "stats (legacy)": await time_path(iterations, lambda s: legacy_stats(s, promoter_id)),
+            "stats": await time_path(iterations, lambda s: ReferralAggregates.stats(s, promoter_id)),
+            "list (legacy)": await time_path(max(iterations // 10, 3), lambda s: legacy_list(s, promoter_id)),
+            "first page": await time_path(iterations, lambda s: ReferralAggregates.page(s, promoter_id, None, PAGE_SIZE)),
+            "deep page": await time_path(
+                iterations, lambda s: ReferralAggregates.page(s, promoter_id, (middle.created_at, middle.id), PAGE_SIZE)
+            ),
+        }
+        print(f"\n🤝 referrals of one promoter ({referrals:,} referred, pages of {PAGE_SIZE})")
+        for name, samples in results.items():
+            report(name, samples)
+    finally:
+        await cleanup(user_ids)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--referrals", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    
+    print("⏱️  Timing referral stats and listings...")
+    asyncio.run(run(args.referrals, args.iterations))
@@ -0,0 +1,187 @@
+"""
+Benchmark - Database Round Trips per Write Request
+Drives claim_task, submit_task and request_withdrawal through the ASGI app
+against a real database and counts round trips (BEGIN, statements, COMMIT,
+ROLLBACK) per request. The "legacy tail" column is what the old handlers
+added on top: an in-handler COMMIT followed by refresh() (BEGIN + SELECT)
+and the get_db COMMIT - it is measured by replaying those calls on the row
+each request created.
+
+Needs DATABASE_URL and at least one active task (scripts/seed_*.py).
+Creates a throwaway user and removes everything it wrote afterwards.
+
+Usage:
+    python scripts/bench_round_trips.py
+    python scripts/bench_round_trips.py --iterations 200
+"""
+import sys
+import os
+import argparse
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime
+from uuid import UUID, uuid4
+
+import httpx
+from sqlalchemy import event, select, delete, update
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.main import app
+from src.core.security import create_access_token, get_password_hash
+from src.db.session import engine, AsyncSessionLocal
+from src.db.models import (
+    User, Task, TaskAssignment, Submission, EarningHistory, Withdrawal,
+    WithdrawalFee, Transaction, FaceLivenessLog
+)
+from src.services.face_liveness import FaceLivenessDetector
+
+
+class RoundTripCounter:
+    """Counts client/server round trips seen by the engine"""
+    
+    def __init__(self, sync_engine):
+        self.counts = Counter()
+        event.listen(sync_engine, "begin", lambda conn: self.counts.update(["BEGIN"]))
+        event.listen(sync_engine, "commit", lambda conn: self.counts.update(["COMMIT"]))
+        event.listen(sync_engine, "rollback", lambda conn: self.counts.update(["ROLLBACK"]))
+        event.listen(sync_engine, "before_cursor_execute", self._on_execute)
+    
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.counts[statement.split(None, 1)[0].upper()] += 1
+    
+    def take(self) -> Counter:
+        counts, self.counts = self.counts, Counter()
+        return counts
+
+
+async def legacy_tail(counter: RoundTripCounter, model, row_id) -> int:
+    """Round trips of the removed refresh() + second commit for one row"""
+    async with AsyncSessionLocal() as session:
+        obj = await session.get(model, UUID(row_id))
+        await session.commit()
+        counter.take()
+        await session.refresh(obj)
+        await session.commit()
+    return sum(counter.take().values())
+
+
+async def create_user() -> User:
+    async with AsyncSessionLocal() as session:
+        user = User(
+            id=uuid4(),
+            email=f"bench-{uuid4().hex[:12]}@example.invalid",
+            hashed_password=get_password_hash("bench-password"),
+            full_name="Round Trip Bench",
+            available_balance_usd=1_000_000,
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+        )
+        session.add(user)
+        await session.commit()
+        return user
+
+
+async def cleanup(user_id, task_id, current_submissions: int):
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(EarningHistory).where(EarningHistory.user_id == user_id))
+        await session.execute(delete(Submission).where(Submission.user_id == user_id))
+        await session.execute(delete(TaskAssignment).where(TaskAssignment.user_id == user_id))
+        await session.execute(delete(WithdrawalFee).where(WithdrawalFee.user_id == user_id))
+        await session.execute(delete(Transaction).where(Transaction.user_id == user_id))
+        await session.execute(delete(Withdrawal).where(Withdrawal.user_id == user_id))
+        await session.execute(delete(FaceLivenessLog).where(FaceLivenessLog.user_id == user_id))
+        await session.execute(delete(User).where(User.id == user_id))
+        await session.execute(
+            update(Task)
+            .where(Task.id == task_id)
+            .values(current_submissions=current_submissions)
+        )
+        await session.commit()
+
+
+async def always_live(image_data, user_id):
+    return {"is_live": True, "confidence": 99.0, "details": {"provider": "bench"}}
+
+
+def report(name: str, samples: list, tails: list, latencies: list):
+    total = Counter()
+    for sample in samples:
+        total.update(sample)
+    n = len(samples)
+    per_request = sum(total.values()) / n
+    tail = sum(tails) / n
+    breakdown = "  ".join(f"{kind}={count / n:.1f}" for kind, count in sorted(total.items()))
+    print(f"\n🔁 {name}")
+    print(f"   round trips/request: {per_request:.1f}   ({breakdown})")
+    print(f"   legacy tail avoided: {tail:.1f}  -> {per_request + tail:.1f} before")
+    print(f"   latency mean:        {sum(latencies) / n * 1000:.1f} ms")
+
+
+async def run(iterations: int):
+    async with AsyncSessionLocal() as session:
+        task = (await session.execute(
+            select(Task).where(Task.is_active == True).limit(1)
+        )).scalar_one_or_none()
+    if task is None:
+        print("❌ No active task found - seed tasks first")
+        return
+    
+    await engine.dispose()  # Start counting on fresh pool connections
+    counter = RoundTripCounter(engine.sync_engine)
+    
+    user = await create_user()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    FaceLivenessDetector.verify_liveness = staticmethod(always_live)
+    
+    samples = {"claim_task": [], "submit_task": [], "request_withdrawal": []}
+    tails = {name: [] for name in samples}
+    latencies = {name: [] for name in samples}
+    
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        try:
+            for _ in range(iterations):
+                calls = [
+                    ("claim_task", TaskAssignment, "assignment_id",
+                     lambda: client.post(f"/api/v1/tasks/{task.id}/claim", headers=headers)),
+                    ("submit_task", Submission, "id",
+                     lambda: client.post(f"/api/v1/tasks/{task.id}/submit", json={"answer": "bench"}, headers=headers)),
+                    ("request_withdrawal", Withdrawal, "id",
+                     lambda: client.post(
+                         "/api/v1/withdrawals/request",
+                         params={"face_verification": "bench"},
+                         json={
+                             "amount_usd": 5.0,
+                             "currency_code": "USD",
+                             "payout_method": "paypal",
+                             "payout_details": {"email": "bench@example.invalid"},
+                             "face_verification_base64": "bench",
+                         },
+                         headers=headers,
+                     )),
+                ]
+                for name, model, id_field, call in calls:
+                    counter.take()
+                    started = time.perf_counter()
+                    response = await call()
+                    latencies[name].append(time.perf_counter() - started)
+                    if response.status_code != 200:
+                        raise RuntimeError(f"{name} failed: {response.status_code} {response.text}")
+                    samples[name].append(counter.take())
+                    tails[name].append(await legacy_tail(counter, model, response.json()[id_field]))
+        finally:
+            await cleanup(user.id, task.id, task.current_submissions)
+    
+    for name in samples:
+        report(name, samples[name], tails[name], latencies[name])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    
+    print("⏱️  Counting round trips per write request...")
+    asyncio.run(run(args.iterations))
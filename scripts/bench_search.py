@@ -0,0 +1,176 @@
+"""
+Benchmark - Full-Text and User Search
+Builds scratch tables shaped like chat_messages and users (default
+10,000,000 rows each) and times:
+  users ILIKE (legacy)     '%term%' on email/full_name without an index
+  users trigram            the same filter with the gin_trgm_ops indexes
+  docs rare/common/phrase  ranked, highlighted search (as src/services/search.py)
+  ingest                   batches of new rows into the GIN-indexed table
+
+The scratch tables are UNLOGGED, named bench_search_*, and dropped
+afterwards; no application data is touched. Needs DATABASE_URL and the
+pg_trgm extension (migration c7f1e93a0d25 creates it). Seeding 10M rows
+takes several minutes.
+
+Usage:
+    python scripts/bench_search.py
+    python scripts/bench_search.py --rows 1000000 --iterations 20
+"""
+import sys
+import os
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.config import settings
+from src.db.session import engine
+from src.services.search import HEADLINE_OPTIONS
+
+VOCABULARY = 20000
+WORDS_PER_DOC = 12
+INGEST_BATCH = 1000
+
+
+# Words are w0 ... w19999 drawn with a skewed distribution, so low numbers
+# are common and high ones rare, like real text. The subquery refers to g
+# so it is evaluated per row, not once.
+SEED_DOCS = f"""
+INSERT INTO bench_search_docs (created_at, body)
+SELECT
+    now() - g * interval '1 second',
+    (SELECT string_agg('w' || floor(power(random(), 3) * {VOCABULARY})::int, ' ')
+     FROM generate_series(1, {WORDS_PER_DOC}) WHERE g > 0)
+FROM generate_series(:start, :stop) AS g
+"""
+
+SEED_USERS = """
+INSERT INTO bench_search_users (email, full_name)
+SELECT 'user' || g || '@' || md5(g::text) || '.example', 'Name ' || md5((g * 7)::text)
+FROM generate_series(:start, :stop) AS g
+"""
+
+DOC_SEARCH = f"""
+SELECT id, created_at, rank,
+       ts_headline('simple', body, websearch_to_tsquery('simple', :term), '{HEADLINE_OPTIONS}') AS body
+FROM (
+    SELECT id, created_at, body, ts_rank_cd(search_vector, websearch_to_tsquery('simple', :term), 32) AS rank
+    FROM (
+        SELECT id, created_at, body, search_vector FROM bench_search_docs
+        WHERE search_vector @@ websearch_to_tsquery('simple', :term)
+        LIMIT :candidates
+    ) AS candidates
+    ORDER BY rank DESC, created_at DESC
+    LIMIT 20
+) AS top
+ORDER BY rank DESC, created_at DESC
+"""
+
+USER_SEARCH = """
+SELECT id, email, full_name FROM bench_search_users
+WHERE email ILIKE :pattern OR full_name ILIKE :pattern
+LIMIT 50
+"""
+
+
+async def execute(sql: str, **params):
+    async with engine.begin() as conn:
+        result = await conn.execute(text(sql), params)
+        return result.all() if result.returns_rows else None
+
+
+async def seed(rows: int):
+    await execute("DROP TABLE IF EXISTS bench_search_docs, bench_search_users")
+    await execute("""
+        CREATE UNLOGGED TABLE bench_search_docs (
+            id bigserial PRIMARY KEY,
+            created_at timestamp NOT NULL,
+            body text NOT NULL,
+            search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple'::regconfig, coalesce(body, '')), 'D')
+            ) STORED
+        )
+    """)
+    await execute("CREATE UNLOGGED TABLE bench_search_users (id bigserial PRIMARY KEY, email text, full_name text)")
+    step = 1000000
+    for start in range(1, rows + 1, step):
+        stop = min(start + step - 1, rows)
+        await execute(SEED_DOCS, start=start, stop=stop)
+        await execute(SEED_USERS, start=start, stop=stop)
+        print(f"   seeded {stop:,} / {rows:,}")
+    await execute("ANALYZE bench_search_docs")
+    await execute("ANALYZE bench_search_users")
+
+
+async def time_query(iterations: int, sql: str, **params) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await execute(sql, **params)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def report(name: str, samples: list):
+    samples = sorted(samples)
+    p95 = samples[max(int(len(samples) * 0.95) - 1, 0)]
+    print(f"   {name:<22} mean {statistics.mean(samples) * 1000:9.2f} ms   "
+          f"p50 {statistics.median(samples) * 1000:9.2f} ms   p95 {p95 * 1000:9.2f} ms")
+
+
+async def ingest(batches: int) -> list:
+    samples = []
+    for _ in range(batches):
+        started = time.perf_counter()
+        await execute(SEED_DOCS, start=1, stop=INGEST_BATCH)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def run(rows: int, iterations: int):
+    print(f"🌱 Seeding {rows:,} documents and users...")
+    try:
+        await seed(rows)
+        # A real email fragment, the kind admins type
+        pattern = f"%user{rows // 2}@%"
+        
+        results = {"users ILIKE (legacy)": await time_query(max(iterations // 5, 3), USER_SEARCH, pattern=pattern)}
+        
+        print("🗂️  Building GIN and trigram indexes...")
+        started = time.perf_counter()
+        await execute("CREATE INDEX bench_search_docs_vector ON bench_search_docs USING gin (search_vector)")
+        docs_index_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        await execute("CREATE INDEX bench_search_users_email ON bench_search_users USING gin (email gin_trgm_ops)")
+        await execute("CREATE INDEX bench_search_users_name ON bench_search_users USING gin (full_name gin_trgm_ops)")
+        users_index_seconds = time.perf_counter() - started
+        
+        candidates = settings.SEARCH_RANK_CANDIDATES
+        results["users trigram"] = await time_query(iterations, USER_SEARCH, pattern=pattern)
+        results["docs rare word"] = await time_query(iterations, DOC_SEARCH, term=f"w{VOCABULARY - 7}", candidates=candidates)
+        results["docs common word"] = await time_query(iterations, DOC_SEARCH, term="w1", candidates=candidates)
+        results["docs phrase"] = await time_query(iterations, DOC_SEARCH, term='"w2 w3" -w4', candidates=candidates)
+        results[f"ingest {INGEST_BATCH} rows"] = await ingest(iterations)
+        
+        print(f"\n🔎 search over {rows:,} rows (GIN build {docs_index_seconds:.1f} s, "
+              f"trigram build {users_index_seconds:.1f} s, {candidates:,} ranked candidates)")
+        for name, samples in results.items():
+            report(name, samples)
+    finally:
+        await execute("DROP TABLE IF EXISTS bench_search_docs, bench_search_users")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    
+    print("⏱️  Timing search...")
+    asyncio.run(run(args.rows, args.iterations))
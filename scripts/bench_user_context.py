@@ -0,0 +1,109 @@
+"""
+Benchmark - AI Chat User Context Latency
+Times building the chat user context three ways for one user:
+  rebuild   COUNT over today's submissions (what a turn needs without a snapshot)
+  snapshot  one ai_context_store row lookup (worker cache cold)
+  cached    snapshot reused from the worker cache (no query)
+
+Needs DATABASE_URL with migrations applied. Creates a throwaway user and
+removes it (and its snapshot) afterwards.
+
+Usage:
+    python scripts/bench_user_context.py
+    python scripts/bench_user_context.py --iterations 2000
+"""
+import sys
+import os
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import delete, func, select
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.security import get_password_hash
+from src.db.session import engine, AsyncSessionLocal
+from src.db.models import User, AIContextStore, Submission
+from src.services.user_context import UserContextStore
+
+
+async def create_user() -> User:
+    async with AsyncSessionLocal() as session:
+        user = User(
+            id=uuid4(),
+            email=f"bench-{uuid4().hex[:12]}@example.invalid",
+            hashed_password=get_password_hash("bench-password"),
+            full_name="User Context Bench",
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+        )
+        session.add(user)
+        await session.commit()
+        return user
+
+
+async def cleanup(user_id):
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(AIContextStore).where(AIContextStore.user_id == user_id))
+        await session.execute(delete(User).where(User.id == user_id))
+        await session.commit()
+
+
+async def time_path(iterations: int, call) -> list:
+    samples = []
+    for _ in range(iterations):
+        async with AsyncSessionLocal() as session:
+            started = time.perf_counter()
+            await call(session)
+            samples.append(time.perf_counter() - started)
+            await session.commit()
+    return samples
+
+
+def report(name: str, samples: list):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"   {name:<9} mean {statistics.mean(samples) * 1000:7.3f} ms   "
+          f"p50 {statistics.median(samples) * 1000:7.3f} ms   p95 {p95 * 1000:7.3f} ms")
+
+
+async def run(iterations: int):
+    user = await create_user()
+    try:
+        cold = UserContextStore(cache_seconds=0)
+        warm = UserContextStore()
+        
+        async def rebuild(session):
+            now = datetime.utcnow()
+            await session.scalar(
+                select(func.count(Submission.id)).where(
+                    Submission.user_id == user.id,
+                    Submission.submitted_at >= datetime(now.year, now.month, now.day),
+                )
+            )
+        
+        results = {
+            "rebuild": await time_path(iterations, rebuild),
+            "snapshot": await time_path(iterations, lambda session: cold.get(session, user)),
+            "cached": await time_path(iterations, lambda session: warm.get(session, user)),
+        }
+        print(f"\n🧠 chat user context, {iterations} turns")
+        for name, samples in results.items():
+            report(name, samples)
+    finally:
+        await cleanup(user.id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+    
+    print("⏱️  Timing chat user context...")
+    asyncio.run(run(args.iterations))
@@ -0,0 +1,42 @@
+"""
+Cleanup AI Context - Delete expired ai_context_store rows
+Chat user context snapshots expire at the latest at UTC midnight; run
+this daily (e.g. right after midnight) so the table stays one row per
+active user
+
+Usage:
+    python scripts/cleanup_ai_context.py
+"""
+import sys
+import os
+import argparse
+import asyncio
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db.session import AsyncSessionLocal, engine
+from src.services.user_context import user_context_store
+
+
+async def cleanup_ai_context():
+    """Delete expired context rows and print how many"""
+    try:
+        async with AsyncSessionLocal() as session:
+            deleted = await user_context_store.cleanup_expired(session)
+            await session.commit()
+        print(f"✅ Deleted {deleted} expired context rows")
+    
+    except Exception as e:
+        print(f"❌ Error cleaning up AI context: {e}")
+        raise
+    
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description=__doc__).parse_args()
+    
+    print("🧹 Cleaning up expired AI context...")
+    asyncio.run(cleanup_ai_context())
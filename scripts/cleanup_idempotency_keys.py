@@ -0,0 +1,52 @@
+"""
+Cleanup Idempotency Keys - Delete expired idempotency_keys rows
+Stored responses are replayed for IDEMPOTENCY_TTL_HOURS; run this daily
+so the table only holds keys a client may still retry with
+
+Usage:
+    python scripts/cleanup_idempotency_keys.py
+    python scripts/cleanup_idempotency_keys.py --batch-size 5000
+"""
+import sys
+import os
+import argparse
+import asyncio
+from typing import Optional
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.config import settings
+from src.db.session import AsyncSessionLocal, engine
+from src.services.idempotency import IdempotencyStore
+
+
+async def cleanup_idempotency_keys(batch_size: Optional[int]):
+    """Delete expired keys one batch per transaction and print how many"""
+    batch_size = batch_size or settings.IDEMPOTENCY_CLEANUP_BATCH
+    total = 0
+    try:
+        async with AsyncSessionLocal() as session:
+            while True:
+                deleted = await IdempotencyStore.cleanup_expired(session, batch_size)
+                await session.commit()
+                total += deleted
+                if deleted < batch_size:
+                    break
+        print(f"✅ Deleted {total} expired idempotency keys")
+    
+    except Exception as e:
+        print(f"❌ Error cleaning up idempotency keys: {e}")
+        raise
+    
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, help="Rows deleted per transaction (default IDEMPOTENCY_CLEANUP_BATCH)")
+    args = parser.parse_args()
+    
+    print("🧹 Cleaning up expired idempotency keys...")
+    asyncio.run(cleanup_idempotency_keys(args.batch_size))
@@ -0,0 +1,68 @@
+"""
+Cluster Proposals - Offline batch job
+Signs every AI proposal (MinHash of title and description) in one
+vectorized pass, groups near-duplicates and prints the largest clusters
+for admins to merge. With --store, proposals created before signatures
+existed get theirs, so new proposals find them as duplicates too.
+
+Usage:
+    python scripts/cluster_proposals.py
+    python scripts/cluster_proposals.py --threshold 0.4 --top 50 --output clusters.json
+    python scripts/cluster_proposals.py --store  # backfill missing signatures
+"""
+import sys
+import os
+import argparse
+import asyncio
+import json
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db.session import AsyncSessionLocal, engine
+from src.services.proposal_dedup import ProposalDedup
+
+
+async def run(threshold, top, output, store):
+    """Cluster the backlog and print a summary"""
+    try:
+        async with AsyncSessionLocal() as session:
+            groups, summary = await ProposalDedup.cluster_backlog(session, threshold, store_missing=store)
+            if store:
+                await session.commit()
+        
+        print(f"✅ Signed {summary['proposals']:,} proposals in {summary['sign_seconds']}s "
+              f"({summary['total_seconds']}s in all)")
+        print(f"   Clusters: {summary['clusters']:,}  Proposals that duplicate another: {summary['duplicates']:,}")
+        if store:
+            print(f"   Signatures stored: {summary['signatures_stored']:,}")
+        
+        for group in groups[:top]:
+            keep, *rest = group["proposals"]
+            print(f"   - {group['size']:>4} proposals  {group['upvotes']:>6} upvotes  keep {keep['id']} \"{keep['title']}\"")
+            for proposal in rest[:3]:
+                print(f"        {proposal['similarity']:.2f}  {proposal['id']} \"{proposal['title']}\"")
+        
+        if output:
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump({"summary": summary, "clusters": groups}, f, indent=2, default=str)
+            print(f"   Clusters written to {output}")
+    
+    except Exception as e:
+        print(f"❌ Error clustering proposals: {e}")
+        raise
+    
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threshold", type=float, help="Similarity to count as a duplicate (default PROPOSAL_DUPLICATE_THRESHOLD)")
+    parser.add_argument("--top", type=int, default=20, help="Clusters to print")
+    parser.add_argument("--output", help="Write every cluster to this JSON file")
+    parser.add_argument("--store", action="store_true", help="Store signatures of proposals that have none")
+    args = parser.parse_args()
+    
+    print("🧩 Clustering proposals...")
+    asyncio.run(run(args.threshold, args.top, args.output, args.store))
@@ -0,0 +1,42 @@
+"""
+Detect Duplicate Accounts - Offline batch job
+Flags accounts that share a face (plus device/IP overlap) for admin review
+
+Usage:
+    python scripts/detect_duplicate_accounts.py
+"""
+import sys
+import os
+import asyncio
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db.session import AsyncSessionLocal
+from src.services.duplicate_accounts import DuplicateAccountDetector
+
+
+async def detect_duplicate_accounts():
+    """Run the detector and print a summary"""
+    async with AsyncSessionLocal() as session:
+        try:
+            started = time.perf_counter()
+            summary = await DuplicateAccountDetector.run(session)
+            elapsed = time.perf_counter() - started
+            
+            print(f"✅ Scanned {summary['users_scanned']:,} users in {elapsed:.1f}s")
+            print(f"   Face pairs above threshold: {summary['face_pairs']:,}")
+            print(f"   Shared devices: {summary['shared_devices']:,}  Shared IPs: {summary['shared_ips']:,}")
+            print(f"   Groups flagged for review: {summary['groups_flagged']:,}")
+            print(f"   Groups already reviewed: {summary['groups_already_reviewed']:,}")
+        
+        except Exception as e:
+            await session.rollback()
+            print(f"❌ Error detecting duplicate accounts: {e}")
+            raise
+
+
+if __name__ == "__main__":
+    print("🔍 Detecting duplicate accounts...")
+    asyncio.run(detect_duplicate_accounts())
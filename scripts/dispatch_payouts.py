@@ -0,0 +1,61 @@
+"""
+Dispatch Payouts - Send pending withdrawals to payout providers
+Replaces the out-of-tree payout worker and its CSV logs; outcomes are
+written to the withdrawals table and logged as JSON lines
+
+Usage:
+    python scripts/dispatch_payouts.py            # one pass
+    python scripts/dispatch_payouts.py --loop 60  # one pass every 60 seconds
+"""
+import sys
+import os
+import argparse
+import asyncio
+import logging
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.config import settings
+from src.db.session import AsyncSessionLocal
+from src.services.payout_dispatcher import PayoutDispatcher, build_providers
+
+
+async def dispatch_payouts(loop_seconds: float):
+    """Run dispatcher passes until there is nothing left (or forever with --loop)"""
+    dispatcher = PayoutDispatcher(
+        build_providers(),
+        max_attempts=settings.PAYOUT_MAX_ATTEMPTS,
+        retry_base_seconds=settings.PAYOUT_RETRY_BASE_SECONDS,
+        retry_max_seconds=settings.PAYOUT_RETRY_MAX_SECONDS,
+    )
+    
+    while True:
+        try:
+            counts = await dispatcher.process_pending(AsyncSessionLocal, settings.PAYOUT_CLAIM_LIMIT)
+        except Exception as e:
+            print(f"❌ Error dispatching payouts: {e}")
+            raise
+        
+        print(
+            f"✅ Claimed {counts['claimed']}: {counts['completed']} completed, "
+            f"{counts['failed']} failed, {counts['pending']} retrying later"
+        )
+        if counts["unconfirmed"]:
+            print(f"⚠️  {counts['unconfirmed']} unconfirmed - check them with the provider (admin: resolve-payout)")
+        
+        if counts["claimed"] == settings.PAYOUT_CLAIM_LIMIT:
+            continue  # Backlog left - go again right away
+        if not loop_seconds:
+            return
+        await asyncio.sleep(loop_seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--loop", type=float, default=0, help="Seconds between passes (0 = run once)")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    print("💸 Dispatching payouts...")
+    asyncio.run(dispatch_payouts(args.loop))
@@ -0,0 +1,61 @@
+"""
+Generate Payout Batches - Bulk payout files for payday runs
+Groups pending withdrawals by payout method + currency and writes one
+provider file per group (see PAYOUT_FILE_METHODS / PAYOUT_BATCH_DIR)
+
+Usage:
+    python scripts/generate_payout_batches.py
+    python scripts/generate_payout_batches.py --methods bank_transfer,wave_money
+"""
+import sys
+import os
+import argparse
+import asyncio
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db.session import AsyncSessionLocal
+from src.services.payout_batches import PayoutBatchBuilder
+
+
+async def generate_payout_batches(methods):
+    """Write bulk payout files and print a summary"""
+    async with AsyncSessionLocal() as session:
+        try:
+            started = time.perf_counter()
+            summary = await PayoutBatchBuilder.build(session, methods=methods)
+            try:
+                await session.commit()
+            except Exception:
+                PayoutBatchBuilder.remove_files(summary["batches"])
+                raise
+            elapsed = time.perf_counter() - started
+            
+            total = sum(batch["item_count"] for batch in summary["batches"])
+            print(f"✅ {total:,} withdrawals in {len(summary['batches'])} batches ({elapsed:.1f}s)")
+            for batch in summary["batches"]:
+                print(
+                    f"   {batch['payout_method']:<14} {batch['currency_code']}  "
+                    f"{batch['item_count']:>6,} rows  {batch['total_amount_local']:>16,.2f}  {batch['file_path']}"
+                )
+            if summary["skipped_no_fx_rate"]:
+                print(f"⚠️  {summary['skipped_no_fx_rate']} withdrawals skipped (no FX rate for currency)")
+            if summary["skipped_invalid_details"]:
+                print(f"⚠️  {summary['skipped_invalid_details']} withdrawals skipped (invalid payout account)")
+        
+        except Exception as e:
+            await session.rollback()
+            print(f"❌ Error generating payout batches: {e}")
+            raise
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--methods", default="", help="Comma-separated payout methods (default PAYOUT_FILE_METHODS)")
+    args = parser.parse_args()
+    
+    methods = [m.strip() for m in args.methods.split(",") if m.strip()] or None
+    print("📄 Generating payout batches...")
+    asyncio.run(generate_payout_batches(methods))
@@ -0,0 +1,53 @@
+"""
+Manage Log Partitions - Daily maintenance for partitioned log tables
+Pre-creates upcoming monthly partitions and archives expired ones to
+PARTITION_ARCHIVE_DIR as .csv.gz before dropping them (RETENTION_* settings)
+
+Usage:
+    python scripts/manage_partitions.py
+    python scripts/manage_partitions.py --months-ahead 6
+"""
+import sys
+import os
+import argparse
+import asyncio
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db.session import engine
+from src.db.partitions import PartitionManager
+
+
+async def manage_partitions(months_ahead):
+    """Run partition maintenance and print a summary"""
+    try:
+        started = time.perf_counter()
+        summary = await PartitionManager.run(engine, months_ahead=months_ahead)
+        elapsed = time.perf_counter() - started
+        
+        for table, changes in summary.items():
+            if changes["created"]:
+                print(f"   {table:<24} created  {', '.join(changes['created'])}")
+            for path in changes["archived"]:
+                print(f"   {table:<24} archived {path}")
+        created = sum(len(changes["created"]) for changes in summary.values())
+        archived = sum(len(changes["archived"]) for changes in summary.values())
+        print(f"✅ {created} partitions created, {archived} archived and dropped ({elapsed:.1f}s)")
+    
+    except Exception as e:
+        print(f"❌ Error managing partitions: {e}")
+        raise
+    
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--months-ahead", type=int, default=None, help="Default PARTITION_PREMAKE_MONTHS")
+    args = parser.parse_args()
+    
+    print("🗂️  Managing log partitions...")
+    asyncio.run(manage_partitions(args.months_ahead))
@@ -0,0 +1,51 @@
+"""
+Rescore Withdrawals - Batch risk scoring of the pending queue
+Recomputes the fraud risk score of every pending withdrawal not yet
+reviewed or sent for payout, holding the ones at or above
+WITHDRAWAL_RISK_REVIEW_THRESHOLD for manual review and releasing held
+ones that no longer are. Run after changing the weights or threshold,
+and once after migration b6d3f8a24c57 to score the existing queue.
+
+Usage:
+    python scripts/rescore_withdrawals.py
+    python scripts/rescore_withdrawals.py --batch-size 10000
+"""
+import sys
+import os
+import argparse
+import asyncio
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.db.session import AsyncSessionLocal, engine
+from src.services.withdrawal_risk import WithdrawalRiskScorer
+
+
+async def rescore(batch_size):
+    """Score the pending queue in one transaction and print the counts"""
+    try:
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as session:
+            counts = await WithdrawalRiskScorer.rescore_pending(session, batch_size)
+            await session.commit()
+        
+        print(f"✅ Scored {counts['scored']:,} pending withdrawals in {time.perf_counter() - started:.1f}s")
+        print(f"   Newly held for review: {counts['held']:,}  Released: {counts['released']:,}")
+    
+    except Exception as e:
+        print(f"❌ Error rescoring withdrawals: {e}")
+        raise
+    
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, help="Withdrawals per round trip (default WITHDRAWAL_RISK_RESCORE_BATCH)")
+    args = parser.parse_args()
+    
+    print("🛡️  Rescoring pending withdrawals...")
+    asyncio.run(rescore(args.batch_size))
@@ -0,0 +1,74 @@
+"""
+Train Intent Model - Offline job
+Fits the hashed n-gram intent model on reviewed chat_intent learning
+events (plus the labelled fixture set) and saves it to INTENT_MODEL_PATH.
+Workers pick it up on their next start.
+
+Usage:
+    python scripts/train_intent_model.py
+    python scripts/train_intent_model.py --no-fixtures
+"""
+import sys
+import os
+import argparse
+import asyncio
+import json
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.config import settings
+from src.db.session import AsyncSessionLocal
+from src.services.intent_classifier import HashedNGramModel, load_training_examples
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'fixtures', 'chat_intents.jsonl')
+
+
+def load_fixture_examples():
+    with open(FIXTURES, encoding="utf-8") as f:
+        return [(row["message"], row["intent"]) for row in (json.loads(line) for line in f if line.strip())]
+
+
+async def train_intent_model(include_fixtures: bool):
+    """Load examples, fit, report training accuracy and save"""
+    async with AsyncSessionLocal() as session:
+        try:
+            examples = await load_training_examples(session)
+            print(f"   Reviewed learning events: {len(examples):,}")
+            if include_fixtures:
+                fixtures = load_fixture_examples()
+                examples += fixtures
+                print(f"   Fixture examples: {len(fixtures):,}")
+            if not examples:
+                print("⚠️  No training examples, model not written")
+                return
+            
+            messages = [message for message, _ in examples]
+            labels = [label for _, label in examples]
+            
+            started = time.perf_counter()
+            model = HashedNGramModel().fit(messages, labels)
+            elapsed = time.perf_counter() - started
+            
+            predicted = model.predict_proba(messages).argmax(axis=1)
+            correct = sum(model.intents[column] == label for column, label in zip(predicted, labels))
+            
+            model.save(settings.INTENT_MODEL_PATH)
+            print(f"✅ Trained on {len(examples):,} examples in {elapsed:.1f}s "
+                  f"(training accuracy {correct / len(examples):.3f})")
+            print(f"   Saved to {settings.INTENT_MODEL_PATH}")
+        
+        except Exception as e:
+            print(f"❌ Error training intent model: {e}")
+            raise
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--no-fixtures", action="store_true", help="Train on learning events only")
+    args = parser.parse_args()
+    
+    print("🧠 Training intent model...")
+    asyncio.run(train_intent_model(not args.no_fixtures))
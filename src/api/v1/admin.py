@@ -3,21 +3,39 @@ Admin Dashboard Endpoints
 """
 from datetime import datetime, timedelta
 from typing import List, Optional
+from uuid import UUID
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
-from pydantic import BaseModel
+from sqlalchemy import select, update, func, and_
+from pydantic import BaseModel, Field
 
-from src.db.session import get_db
+from src.db.session import get_db, get_read_db, UnitOfWorkRoute
 from src.db.models import (
     User, Task, Submission, Transaction, Withdrawal,
     SupportTicket, AIProposal, SubmissionStatusEnum,
-    TicketStatusEnum, TransactionStatusEnum
+    TicketStatusEnum, TransactionStatusEnum, TransactionTypeEnum, DuplicateAccountGroup, PayoutBatch
 )
 from src.core.deps import require_admin
+from src.core.pagination import encode_cursor, decode_cursor
+from src.services.payout_batches import PayoutBatchBuilder
+from src.services.payout_dispatcher import UNCONFIRMED, PayoutDispatcher, idempotency_key
+from src.services.referral_milestones import ReferralMilestones
+from src.services.support_inbox import SupportInbox
+from src.services.device_manager import DeviceManager
+from src.services.withdrawal_risk import WithdrawalRiskScorer
+from src.services.search import SearchService, SOURCES as SEARCH_SOURCES, user_filter
 
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
+
+
+class BulkTicketStatus(BaseModel):
+    ticket_ids: List[UUID] = Field(..., min_length=1, max_length=1000)
+    status: TicketStatusEnum
+
+
+class WithdrawalApproval(BaseModel):
+    withdrawal_ids: List[UUID] = Field(..., min_length=1, max_length=1000)
 
 
 class DashboardStats(BaseModel):
@@ -33,7 +51,7 @@ class DashboardStats(BaseModel):
 
 @router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     admin_user = Depends(require_admin)
 ):
     """
@@ -111,7 +129,7 @@ async def list_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     search: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     admin_user = Depends(require_admin)
 ):
     """
@@ -120,12 +138,7 @@ async def list_users(
     query = select(User)
     
     if search:
-        query = query.where(
-            or_(
-                User.email.ilike(f"%{search}%"),
-                User.full_name.ilike(f"%{search}%")
-            )
-        )
+        query = query.where(user_filter(search))
     
     query = query.order_by(User.created_at.desc())
     query = query.offset(skip).limit(limit)
@@ -140,7 +153,7 @@ async def list_users(
 async def get_pending_submissions(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     admin_user = Depends(require_admin)
 ):
     """
@@ -180,6 +193,7 @@ async def approve_submission(
         )
     
     # Approve submission
+    newly_approved = submission.status != SubmissionStatusEnum.APPROVED
     submission.status = SubmissionStatusEnum.APPROVED
     submission.reviewed_at = datetime.utcnow()
     submission.reviewed_by = admin_user.id
@@ -200,7 +214,9 @@ async def approve_submission(
     user.pending_balance_usd -= float(task.reward_usd)
     user.available_balance_usd += float(task.reward_usd)
     
-    await db.commit()
+    if newly_approved:
+        # Approved-task counter; pays the referral bonus at the milestone
+        await ReferralMilestones.record_approval(db, user.id)
     
     return {
         "message": "Submission approved successfully",
@@ -250,8 +266,6 @@ async def reject_submission(
     
     user.pending_balance_usd -= float(task.reward_usd)
     
-    await db.commit()
-    
     return {
         "message": "Submission rejected",
         "submission_id": submission_id,
@@ -263,7 +277,7 @@ async def reject_submission(
 async def get_pending_withdrawals(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     admin_user = Depends(require_admin)
 ):
     """
@@ -281,6 +295,143 @@ async def get_pending_withdrawals(
     return withdrawals
 
 
+@router.get("/withdrawals/review")
+async def get_withdrawals_for_review(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Withdrawals held for fraud review, riskiest first
+    """
+    result = await db.execute(
+        select(Withdrawal)
+        .where(Withdrawal.risk_hold == True)
+        .order_by(Withdrawal.risk_score.desc(), Withdrawal.created_at)
+        .offset(skip)
+        .limit(limit)
+    )
+    
+    withdrawals = result.scalars().all()
+    return withdrawals
+
+
+@router.post("/withdrawals/approve")
+async def approve_withdrawals(
+    request: WithdrawalApproval,
+    db: AsyncSession = Depends(get_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Approve pending withdrawals for payout
+    Held, already approved and no longer pending withdrawals are reported as skipped
+    """
+    approved = set(await PayoutDispatcher.approve(db, request.withdrawal_ids, admin_user.id))
+    
+    return {
+        "message": f"{len(approved)} withdrawals approved for payout",
+        "approved": [str(w) for w in request.withdrawal_ids if w in approved],
+        "skipped": [str(w) for w in request.withdrawal_ids if w not in approved],
+    }
+
+
+@router.get("/withdrawals/unconfirmed")
+async def get_unconfirmed_withdrawals(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Payouts whose outcome the provider never confirmed, oldest first
+    Check each with the provider (by its idempotency key), then resolve it
+    """
+    result = await db.execute(
+        select(Withdrawal)
+        .where(Withdrawal.payout_state == UNCONFIRMED)
+        .order_by(Withdrawal.updated_at)
+        .offset(skip)
+        .limit(limit)
+    )
+    
+    return [
+        {
+            "id": w.id,
+            "user_id": w.user_id,
+            "payout_method": w.payout_method,
+            "amount_local": w.amount_local,
+            "currency_code": w.currency_code,
+            "idempotency_key": idempotency_key(w.id),
+            "payout_attempts": w.payout_attempts,
+            "payout_error": w.payout_error,
+            "created_at": w.created_at,
+            "updated_at": w.updated_at,
+        }
+        for w in result.scalars().all()
+    ]
+
+
+@router.post("/withdrawals/{withdrawal_id}/resolve-payout")
+async def resolve_unconfirmed_payout(
+    withdrawal_id: UUID,
+    outcome: str = Query(..., pattern="^(paid|not_paid|retry)$"),
+    transaction_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Settle an unconfirmed payout after checking it with the provider
+    paid: completed with the provider's transaction id; not_paid: failed
+    and refunded; retry: sent again by the next dispatcher pass
+    """
+    from fastapi import HTTPException, status
+    if outcome == "paid" and not transaction_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="transaction_id is required for a paid payout"
+        )
+    
+    resolved = await PayoutDispatcher.resolve_unconfirmed(db, withdrawal_id, outcome, admin_user.id, transaction_id)
+    
+    if not resolved:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unconfirmed payout not found"
+        )
+    
+    return {
+        "message": f"Payout resolved: {outcome}",
+        "withdrawal_id": str(withdrawal_id)
+    }
+
+
+@router.post("/withdrawals/{withdrawal_id}/review")
+async def review_withdrawal(
+    withdrawal_id: UUID,
+    decision: str = Query(..., pattern="^(approved|rejected)$"),
+    db: AsyncSession = Depends(get_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Release a held withdrawal for payout, or reject it
+    Rejected withdrawals are cancelled and the amount returned to the user's balance
+    """
+    withdrawal = await WithdrawalRiskScorer.review(db, withdrawal_id, decision == "approved", admin_user.id)
+    
+    if not withdrawal:
+        from fastapi import HTTPException, status
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Held withdrawal not found"
+        )
+    
+    return {
+        "message": f"Withdrawal {decision}",
+        "withdrawal_id": str(withdrawal_id)
+    }
+
+
 @router.post("/withdrawals/{withdrawal_id}/complete")
 async def complete_withdrawal(
     withdrawal_id: str,
@@ -289,28 +440,344 @@ async def complete_withdrawal(
     admin_user = Depends(require_admin)
 ):
     """
-    Mark withdrawal as completed
+    Mark withdrawal as completed (paid outside the dispatcher)
+    Held withdrawals must be released through review first; ones being
+    dispatched, unconfirmed or in a payout file are settled there
     """
+    from fastapi import HTTPException, status
     result = await db.execute(
-        select(Withdrawal).where(Withdrawal.id == withdrawal_id)
+        select(Withdrawal).where(Withdrawal.id == withdrawal_id).with_for_update()
     )
     withdrawal = result.scalar_one_or_none()
     
     if not withdrawal:
-        from fastapi import HTTPException, status
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Withdrawal not found"
         )
     
-    withdrawal.status = TransactionStatusEnum.COMPLETED
-    withdrawal.processed_at = datetime.utcnow()
-    withdrawal.transaction_id = transaction_id
-    withdrawal.updated_at = datetime.utcnow()
+    if withdrawal.status != TransactionStatusEnum.PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Withdrawal is already {withdrawal.status.value}"
+        )
     
-    await db.commit()
+    if withdrawal.risk_hold:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Withdrawal is held for risk review; release it through review first"
+        )
+    
+    if withdrawal.payout_state is not None or withdrawal.payout_batch_id is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Withdrawal is being paid out by the dispatcher or a payout file"
+        )
+    
+    now = datetime.utcnow()
+    withdrawal.status = TransactionStatusEnum.COMPLETED
+    withdrawal.processed_at = now
+    withdrawal.payout_reference = transaction_id
+    withdrawal.approved_by = withdrawal.approved_by or admin_user.id
+    withdrawal.approved_at = withdrawal.approved_at or now
+    withdrawal.updated_at = now
+    await db.execute(
+        update(Transaction)
+        .where(
+            Transaction.transaction_type == TransactionTypeEnum.WITHDRAWAL,
+            Transaction.reference_id == str(withdrawal.id),
+        )
+        .values(status=TransactionStatusEnum.COMPLETED, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
     
     return {
         "message": "Withdrawal marked as completed",
         "withdrawal_id": withdrawal_id
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/payout-batches")
+async def list_payout_batches(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Bulk payout files, newest first
+    """
+    result = await db.execute(
+        select(PayoutBatch)
+        .order_by(PayoutBatch.created_at.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    
+    batches = result.scalars().all()
+    return batches
+
+
+@router.post("/payout-batches/{batch_id}/complete")
+async def complete_payout_batch(
+    batch_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Mark a bulk payout file as paid by the provider
+    Completes every withdrawal in the batch in one statement
+    """
+    completed = await PayoutBatchBuilder.mark_completed(db, batch_id)
+    
+    if completed is None:
+        from fastapi import HTTPException, status
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pending payout batch not found"
+        )
+    
+    return {
+        "message": "Payout batch marked as completed",
+        "batch_id": str(batch_id),
+        "withdrawals_completed": completed
+    }
+
+
+@router.post("/payout-batches/{batch_id}/fail")
+async def fail_payout_batch(
+    batch_id: UUID,
+    reason: str = Query(..., min_length=1, max_length=500),
+    db: AsyncSession = Depends(get_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Mark a bulk payout file as rejected by the provider
+    Fails every withdrawal in the batch and refunds the users
+    """
+    failed = await PayoutBatchBuilder.mark_failed(db, batch_id, reason)
+    
+    if failed is None:
+        from fastapi import HTTPException, status
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pending payout batch not found"
+        )
+    
+    return {
+        "message": "Payout batch marked as failed",
+        "batch_id": str(batch_id),
+        "withdrawals_failed": failed
+    }
+
+
+@router.get("/duplicate-groups")
+async def list_duplicate_groups(
+    status_filter: str = Query("pending", alias="status"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Suspected duplicate accounts from the detection job, riskiest first
+    """
+    result = await db.execute(
+        select(DuplicateAccountGroup)
+        .where(DuplicateAccountGroup.status == status_filter)
+        .order_by(DuplicateAccountGroup.score.desc(), DuplicateAccountGroup.detected_at.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    
+    groups = result.scalars().all()
+    return groups
+
+
+@router.post("/duplicate-groups/{group_id}/review")
+async def review_duplicate_group(
+    group_id: str,
+    decision: str = Query(..., pattern="^(confirmed|dismissed)$"),
+    notes: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Confirm or dismiss a suspected duplicate group
+    Reviewed groups are not re-flagged by later detection runs
+    """
+    result = await db.execute(
+        select(DuplicateAccountGroup).where(DuplicateAccountGroup.id == group_id)
+    )
+    group = result.scalar_one_or_none()
+    
+    if not group:
+        from fastapi import HTTPException, status
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Duplicate group not found"
+        )
+    
+    group.status = decision
+    group.reviewed_by = admin_user.id
+    group.reviewed_at = datetime.utcnow()
+    group.review_notes = notes
+    
+    return {
+        "message": f"Duplicate group {decision}",
+        "group_id": group_id
+    }
+
+
+@router.get("/support/queue")
+async def get_support_queue(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_read_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Unassigned open tickets, earliest reply deadline first
+    
+    Pass next_cursor back as cursor for the following page; it is null on
+    the last page.
+    """
+    rows = await SupportInbox.queue_page(db, decode_cursor(cursor), limit)
+    
+    last = rows[limit - 1] if len(rows) > limit else None
+    return {
+        "tickets": rows[:limit],
+        "next_cursor": encode_cursor(last.sla_due_at, last.id) if last else None,
+    }
+
+
+@router.post("/support/assign-next")
+async def assign_next_ticket(
+    db: AsyncSession = Depends(get_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Take the most urgent unassigned ticket
+    Agents calling this at the same time always get different tickets
+    """
+    ticket = await SupportInbox.assign_next(db, admin_user.id)
+    
+    if not ticket:
+        from fastapi import HTTPException, status
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Support queue is empty"
+        )
+    
+    return ticket
+
+
+@router.get("/support/assigned")
+async def get_assigned_tickets(
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Tickets the calling agent is working on, earliest deadline first
+    """
+    return await SupportInbox.assigned_to(db, admin_user.id, limit)
+
+
+@router.post("/support/tickets/bulk-status")
+async def bulk_update_ticket_status(
+    request: BulkTicketStatus,
+    db: AsyncSession = Depends(get_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Move many tickets to one status
+    Tickets that can't make the transition are reported as skipped
+    """
+    updated = await SupportInbox.bulk_transition(db, request.ticket_ids, request.status, admin_user.id)
+    
+    moved = set(updated)
+    return {
+        "message": f"{len(moved)} tickets moved to {request.status.value}",
+        "updated": [str(ticket_id) for ticket_id in request.ticket_ids if ticket_id in moved],
+        "skipped": [str(ticket_id) for ticket_id in request.ticket_ids if ticket_id not in moved],
+    }
+
+
+@router.post("/support/tickets/{ticket_id}/approve-device-change")
+async def approve_device_change(
+    ticket_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Approve a device change request
+    Releases the user's device so they can register the new one, and
+    resolves the ticket
+    """
+    approved = await DeviceManager.approve_device_change(ticket_id, admin_user.id, db)
+    
+    if not approved:
+        from fastapi import HTTPException, status
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Open device change request not found"
+        )
+    
+    return {
+        "message": "Device change approved",
+        **approved
+    }
+
+
+@router.get("/support/tickets/{ticket_id}/messages")
+async def get_support_ticket_messages(
+    ticket_id: str,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_read_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    A ticket's thread, oldest first, one page at a time
+    """
+    rows = await SupportInbox.thread_page(db, ticket_id, decode_cursor(cursor), limit)
+    
+    last = rows[limit - 1] if len(rows) > limit else None
+    return {
+        "messages": rows[:limit],
+        "next_cursor": encode_cursor(last.created_at, last.id) if last else None,
+    }
+
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=2, max_length=200),
+    sources: List[str] = Query(list(SEARCH_SOURCES)),
+    limit: int = Query(20, ge=1, le=50),
+    since: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db),
+    admin_user = Depends(require_admin)
+):
+    """
+    Search tickets, chat messages, proposals and users
+    
+    q takes web search syntax ("quoted phrase", -exclude, or). Results
+    come per source, best match first; highlights are escaped HTML with
+    matches wrapped in <mark>.
+    Chat is searched back to since (default: the last SEARCH_CHAT_DAYS).
+    """
+    unknown = set(sources) - set(SEARCH_SOURCES)
+    if unknown:
+        from fastapi import HTTPException, status
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown search sources: {', '.join(sorted(unknown))}"
+        )
+    
+    results = await SearchService.search(db, q, sources, limit, since)
+    
+    return {
+        "query": q,
+        "results": results
+    }
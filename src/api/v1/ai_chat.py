@@ -2,20 +2,30 @@
 AI Chat Assistant Endpoints
 """
 from datetime import datetime
-from uuid import uuid4
-from typing import List, Optional
+from uuid import UUID, uuid4
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import json
+import logging
+
+import anyio
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from pydantic import BaseModel
 
-from src.db.session import get_db
+from src.db.session import get_db, UnitOfWorkRoute
 from src.db.models import User, ChatMessage
 from src.core.deps import get_current_active_user
 from src.services.ai_chat import AIChat
+from src.services.chat_history import chat_history
+from src.services.chat_llm import chat_llm
+from src.services.user_context import user_context_store
+
 
+logger = logging.getLogger("dignilife.ai_chat")
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 
 class ChatMessageRequest(BaseModel):
@@ -24,6 +34,7 @@ class ChatMessageRequest(BaseModel):
 
 
 class ChatMessageResponse(BaseModel):
+    conversation_id: str
     message: str
     intent: str
     suggestions: List[str]
@@ -31,6 +42,59 @@ class ChatMessageResponse(BaseModel):
     timestamp: datetime
 
 
+async def _prepare_reply(
+    message: str,
+    conversation_id: Optional[str],
+    db: AsyncSession,
+    current_user: User,
+) -> Tuple[str, List[Dict], Dict[str, Any], Dict[str, Any]]:
+    """Conversation id, recent history, the user's context snapshot and AIChat's reply for one turn"""
+    # Recent history (ring buffer while current, else an indexed query)
+    if conversation_id:
+        conversation_history = await chat_history.get(db, current_user.id, conversation_id)
+    else:
+        conversation_id = str(uuid4())
+        chat_history.start(current_user.id, conversation_id)
+        conversation_history = []
+    
+    # Context snapshot (worker cache, else one row; no aggregates per turn)
+    user_context = await user_context_store.get(db, current_user)
+    
+    # Process message with AI
+    ai_response = await AIChat.process_message(
+        user_message=message,
+        user_context=user_context,
+        conversation_history=conversation_history
+    )
+    await user_context_store.record_intent(db, current_user.id, user_context, ai_response["intent"])
+    return conversation_id, conversation_history, user_context, ai_response
+
+
+async def _save_turn(
+    user_id: UUID,
+    conversation_id: str,
+    message: str,
+    reply: str,
+    ai_response: Dict[str, Any],
+    **metadata: Any,
+) -> None:
+    """Persist both messages of a turn (written in the background)"""
+    await chat_history.append(user_id, conversation_id, "user", message)
+    if reply:
+        await chat_history.append(
+            user_id,
+            conversation_id,
+            "assistant",
+            reply,
+            metadata={
+                "intent": ai_response["intent"],
+                "suggestions": ai_response["suggestions"],
+                "actions": ai_response["actions"],
+                **metadata,
+            },
+        )
+
+
 @router.post("/message", response_model=ChatMessageResponse)
 async def send_chat_message(
     request: ChatMessageRequest,
@@ -40,80 +104,120 @@ async def send_chat_message(
     """
     Send message to AI chat assistant
     """
-    # Get conversation history if conversation_id provided
-    conversation_history = []
-    if request.conversation_id:
-        history_result = await db.execute(
-            select(ChatMessage)
-            .where(ChatMessage.conversation_id == request.conversation_id)
-            .order_by(ChatMessage.created_at.asc())
-            .limit(10)  # Last 10 messages
-        )
-        history_messages = history_result.scalars().all()
-        conversation_history = [
-            {"role": msg.role, "content": msg.message}
-            for msg in history_messages
-        ]
-    
-    # Build user context
-    user_context = {
-        "subscription_tier": current_user.subscription_tier.value,
-        "total_earnings_usd": float(current_user.total_earnings_usd),
-        "available_balance_usd": float(current_user.available_balance_usd),
-        "current_streak_days": current_user.current_streak_days,
-        "is_verified": current_user.is_verified,
-        "kyc_verified": current_user.kyc_verified,
-        "tasks_today": 0,  # TODO: Calculate from today's submissions
-    }
-    
-    # Process message with AI
-    ai_response = await AIChat.process_message(
-        user_message=request.message,
-        user_context=user_context,
-        conversation_history=conversation_history
+    conversation_id, _, _, ai_response = await _prepare_reply(
+        request.message, request.conversation_id, db, current_user
     )
+    await _save_turn(current_user.id, conversation_id, request.message, ai_response["message"], ai_response)
     
-    # Save messages to database
-    conversation_id = request.conversation_id or str(uuid4())
-    
-    # Save user message
-    user_msg = ChatMessage(
-        id=uuid4(),
-        user_id=current_user.id,
+    return ChatMessageResponse(
         conversation_id=conversation_id,
-        role="user",
-        message=request.message,
-        created_at=datetime.utcnow(),
+        message=ai_response["message"],
+        intent=ai_response["intent"],
+        suggestions=ai_response["suggestions"],
+        actions=ai_response["actions"],
+        timestamp=datetime.utcnow(),
     )
-    db.add(user_msg)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """One Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _stream_events(
+    user_id: UUID,
+    message: str,
+    conversation_id: str,
+    conversation_history: List[Dict],
+    user_context: Dict[str, Any],
+    ai_response: Dict[str, Any],
+) -> AsyncIterator[str]:
+    """
+    meta, then one token event per chunk, then done (or error)
     
-    # Save AI response
-    ai_msg = ChatMessage(
-        id=uuid4(),
-        user_id=current_user.id,
-        conversation_id=conversation_id,
-        role="assistant",
-        message=ai_response["message"],
-        message_metadata={
+    If the client disconnects, Starlette cancels this generator at its
+    next await; the finally block closes the LLM stream and saves the
+    turn exactly once, with the partial reply marked incomplete.
+    """
+    yield _sse("meta", {"conversation_id": conversation_id, "intent": ai_response["intent"]})
+    
+    tokens = chat_llm.stream({
+        "message": message,
+        "history": conversation_history,
+        "context": user_context,
+        "intent": ai_response["intent"],
+        "draft": ai_response["message"],
+    })
+    parts: List[str] = []
+    completed = False
+    try:
+        async for token in tokens:
+            parts.append(token)
+            yield _sse("token", {"text": token})
+        completed = True
+        yield _sse("done", {
+            "conversation_id": conversation_id,
+            "message": "".join(parts),
             "intent": ai_response["intent"],
             "suggestions": ai_response["suggestions"],
             "actions": ai_response["actions"],
-        },
-        created_at=datetime.utcnow(),
+            "timestamp": datetime.utcnow(),
+        })
+    except Exception:
+        # The client only learns that the reply failed, not why
+        logger.exception(json.dumps({"event": "chat_stream_failed", "user_id": str(user_id), "conversation_id": conversation_id}))
+        yield _sse("error", {"detail": "The reply could not be completed. Please try again."})
+    finally:
+        # Cancellation is sticky inside anyio scopes; shield the cleanup
+        with anyio.CancelScope(shield=True):
+            await tokens.aclose()
+            await _save_turn(user_id, conversation_id, message, "".join(parts), ai_response, completed=completed)
+
+
+async def _stream_response(
+    message: str,
+    conversation_id: Optional[str],
+    db: AsyncSession,
+    current_user: User,
+) -> StreamingResponse:
+    conversation_id, conversation_history, user_context, ai_response = await _prepare_reply(
+        message, conversation_id, db, current_user
     )
-    db.add(ai_msg)
-    
-    await db.commit()
-    
-    return ChatMessageResponse(
-        message=ai_response["message"],
-        intent=ai_response["intent"],
-        suggestions=ai_response["suggestions"],
-        actions=ai_response["actions"],
-        timestamp=datetime.utcnow(),
+    # UnitOfWorkRoute commits the context snapshot before the stream
+    # starts, which also hands the connection back for its duration
+    return StreamingResponse(
+        _stream_events(current_user.id, message, conversation_id, conversation_history, user_context, ai_response),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+@router.post("/stream")
+async def stream_chat_message(
+    request: ChatMessageRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Send message to AI chat assistant, streaming the reply (SSE)
+    
+    Events: meta {conversation_id, intent}, token {text} per chunk,
+    then done (same fields as /message) or error {detail}.
+    """
+    return await _stream_response(request.message, request.conversation_id, db, current_user)
+
+
+@router.get("/stream")
+async def stream_chat_message_get(
+    message: str = Query(..., min_length=1),
+    conversation_id: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """GET form of /stream for EventSource-style clients"""
+    return await _stream_response(message, conversation_id, db, current_user)
+
+
 @router.get("/conversations")
 async def get_conversations(
     skip: int = Query(0, ge=0),
@@ -10,12 +10,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from pydantic import BaseModel
 
-from src.db.session import get_db
+from src.db.session import get_db, UnitOfWorkRoute
 from src.db.models import AIProposal, User, AIProposalStatusEnum
 from src.core.deps import get_current_active_user, require_admin
+from src.services.proposal_votes import ProposalVotes, proposal_leaderboard
+from src.services.proposal_dedup import ProposalDedup
 
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 
 class ProposalCreate(BaseModel):
@@ -24,6 +26,14 @@ class ProposalCreate(BaseModel):
     category: str  # feature, improvement, bug_fix, other
 
 
+class SimilarProposal(BaseModel):
+    id: str
+    title: str
+    status: AIProposalStatusEnum
+    upvotes: int
+    similarity: float  # Estimated share of words and word pairs in common
+
+
 class ProposalResponse(BaseModel):
     id: str
     title: str
@@ -32,6 +42,7 @@ class ProposalResponse(BaseModel):
     status: AIProposalStatusEnum
     upvotes: int
     created_at: datetime
+    similar_proposals: List[SimilarProposal] = []  # Near-duplicates to upvote or merge into, on create
     
     class Config:
         from_attributes = True
@@ -45,7 +56,12 @@ async def create_proposal(
 ):
     """
     Submit a new proposal/suggestion
+    The response lists existing near-duplicates, so the client can offer
+    to upvote one of them instead
     """
+    minhash, lsh_bands = ProposalDedup.fingerprint(proposal.title, proposal.description)
+    similar = await ProposalDedup.similar(db, minhash, lsh_bands)
+    
     new_proposal = AIProposal(
         id=uuid4(),
         user_id=current_user.id,
@@ -54,13 +70,13 @@ async def create_proposal(
         category=proposal.category,
         status=AIProposalStatusEnum.PENDING,
         upvotes=0,
+        minhash=minhash,
+        lsh_bands=lsh_bands,
         created_at=datetime.utcnow(),
         updated_at=datetime.utcnow(),
     )
     
     db.add(new_proposal)
-    await db.commit()
-    await db.refresh(new_proposal)
     
     return ProposalResponse(
         id=str(new_proposal.id),
@@ -70,6 +86,7 @@ async def create_proposal(
         status=new_proposal.status,
         upvotes=new_proposal.upvotes,
         created_at=new_proposal.created_at,
+        similar_proposals=similar,
     )
 
 
@@ -82,31 +99,12 @@ async def list_proposals(
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    List all proposals
+    List all proposals, most upvoted first
+    Served from the cached leaderboard, so counts may trail by a few seconds
     """
-    query = select(AIProposal)
-    
-    if status_filter:
-        query = query.where(AIProposal.status == status_filter)
+    proposals = await proposal_leaderboard.page(db, status_filter, skip, limit)
     
-    query = query.order_by(AIProposal.upvotes.desc(), AIProposal.created_at.desc())
-    query = query.offset(skip).limit(limit)
-    
-    result = await db.execute(query)
-    proposals = result.scalars().all()
-    
-    return [
-        ProposalResponse(
-            id=str(p.id),
-            title=p.title,
-            description=p.description,
-            category=p.category,
-            status=p.status,
-            upvotes=p.upvotes,
-            created_at=p.created_at,
-        )
-        for p in proposals
-    ]
+    return [ProposalResponse(**proposal) for proposal in proposals]
 
 
 @router.post("/{proposal_id}/upvote")
@@ -117,26 +115,22 @@ async def upvote_proposal(
 ):
     """
     Upvote a proposal
+    Each user's vote counts once; voting again changes nothing
     """
-    result = await db.execute(
-        select(AIProposal).where(AIProposal.id == proposal_id)
-    )
-    proposal = result.scalar_one_or_none()
+    voted = await ProposalVotes.upvote(db, proposal_id, current_user.id)
     
-    if not proposal:
+    if voted is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Proposal not found"
         )
     
-    proposal.upvotes += 1
-    proposal.updated_at = datetime.utcnow()
-    
-    await db.commit()
+    upvotes, counted = voted
+    proposal_leaderboard.record_vote(proposal_id, upvotes)
     
     return {
-        "message": "Upvoted successfully",
-        "upvotes": proposal.upvotes
+        "message": "Upvoted successfully" if counted else "Already upvoted",
+        "upvotes": upvotes
     }
 
 
@@ -4,24 +4,58 @@ Register: Email + Face (password optional)
 Login: Face FIRST (email/password fallback)
 """
 from datetime import datetime
+from typing import Optional
 from uuid import uuid4
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from src.db.session import get_db
+from src.db.session import get_db, UnitOfWorkRoute
 from src.db.models import User, Wallet, FaceLivenessLog, SubscriptionTier, UserRole
-from src.schemas.user import UserCreate, UserLogin, UserResponse, Token
+from src.schemas.user import UserCreate, UserLogin, UserResponse, Token, FaceEnroll
 from src.core.security import (
     verify_password, 
     get_password_hash,
     create_access_token,
     create_refresh_token
 )
+from src.core.deps import get_current_active_user
 from src.services.face_liveness import FaceLivenessDetector
+from src.services.face_embedding import FaceRecognition, embedding_to_bytes
+from src.services.log_sink import log_sink
 
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
+
+
+def _verify_face_for_user(user: Optional[User], face_embedding) -> Optional[User]:
+    """
+    1:1 face check for a known account
+    
+    Accounts without a stored embedding (those enrolled before binary
+    embeddings existed) never pass: a face login must not enroll, or
+    anyone knowing the email could claim the account with their own face.
+    They enroll after proving who they are - a password login that also
+    sends a live face, or POST /auth/face/enroll while signed in.
+    """
+    if not user or not user.face_verified or user.face_embedding is None:
+        return None
+    
+    if FaceRecognition.verify(face_embedding, user.face_embedding):
+        return user
+    return None
+
+
+def _enroll_missing_face(user: User, face_embedding) -> None:
+    """
+    Store the face of an account that has none, once it is authenticated
+    
+    Stored only: the request's commit makes it the account's face, and
+    every worker's index picks it up on its next refresh.
+    """
+    user.face_embedding = embedding_to_bytes(face_embedding)
+    user.face_verified = True
+    user.updated_at = datetime.utcnow()
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -55,6 +89,9 @@ async def register(
             detail="Face verification failed. Please try again with better lighting."
         )
     
+    # Extract face embedding for face-first login
+    face_embedding = FaceRecognition.extract_embedding(user_data.face_image_base64)
+    
     # Create user
     user = User(
         id=uuid4(),
@@ -67,7 +104,7 @@ async def register(
         is_active=True,
         is_verified=True,  # Auto-verified because face passed
         face_verified=True,  # Face is verified
-        face_embedding=user_data.face_image_base64[:500],  # Store partial for matching (or use hash)
+        face_embedding=embedding_to_bytes(face_embedding),
         created_at=datetime.utcnow(),
         updated_at=datetime.utcnow(),
     )
@@ -84,19 +121,20 @@ async def register(
     )
     db.add(wallet)
     
-    # Log face verification
-    face_log = FaceLivenessLog(
-        id=uuid4(),
+    # Committed here rather than by the route: the in-memory face index
+    # must only learn about users that exist in the database
+    await db.commit()
+    
+    FaceRecognition.enroll(user.id, face_embedding)
+    
+    # Log face verification (after commit: the log row references the user)
+    await log_sink.write(
+        FaceLivenessLog,
         user_id=user.id,
         is_live=True,
         confidence_score=liveness_result.get("confidence", 95),
         detection_details=liveness_result.get("details", {}),
-        created_at=datetime.utcnow(),
     )
-    db.add(face_log)
-    
-    await db.commit()
-    await db.refresh(user)
     
     return user
 
@@ -112,6 +150,7 @@ async def login(
     """
     user = None
     login_method = "face"
+    face_embedding = None
     
     # PRIMARY: Face Liveness Login
     liveness_result = await FaceLivenessDetector.verify_liveness(
@@ -120,25 +159,35 @@ async def login(
     )
     
     if FaceLivenessDetector.validate_liveness_result(liveness_result):
-        # Face verified! Now find user by face matching
-        # In production, you'd use face recognition to match face_embedding
-        # For now, if they provide email, use that
-        if login_data.email:
-            result = await db.execute(select(User).where(User.email == login_data.email))
+        # Face verified! Now identify the user by face (1:N)
+        face_embedding = FaceRecognition.extract_embedding(login_data.face_image_base64)
+        match = FaceRecognition.identify(face_embedding)
+        
+        if match:
+            result = await db.execute(select(User).where(User.id == match[0]))
             user = result.scalar_one_or_none()
             
-            if user and user.face_verified:
+            # Face belongs to someone else than the email given - don't guess
+            if user and login_data.email and user.email != login_data.email:
+                user = None
+        elif login_data.email:
+            # Not in the index - verify 1:1 against the stored embedding
+            result = await db.execute(select(User).where(User.email == login_data.email))
+            user = _verify_face_for_user(result.scalar_one_or_none(), face_embedding)
+        
+        if user:
+            if user.face_verified:
                 # Log successful face login
-                face_log = FaceLivenessLog(
-                    id=uuid4(),
+                await log_sink.write(
+                    FaceLivenessLog,
                     user_id=user.id,
                     is_live=True,
                     confidence_score=liveness_result.get("confidence", 95),
                     detection_details=liveness_result.get("details", {}),
-                    created_at=datetime.utcnow(),
                 )
-                db.add(face_log)
                 login_method = "face"
+            else:
+                user = None
     
     # FALLBACK: Email + Password (if face fails or not available)
     if not user and login_data.email and login_data.password:
@@ -152,6 +201,11 @@ async def login(
                     detail="Incorrect email or password",
                 )
             login_method = "email_password"
+            
+            # The password proved the account: a live face sent along
+            # becomes its face if it has none yet
+            if user.face_embedding is None and face_embedding is not None:
+                _enroll_missing_face(user, face_embedding)
         else:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -173,7 +227,6 @@ async def login(
     # Update last login
     user.last_login_at = datetime.utcnow()
     user.login_count += 1
-    await db.commit()
     
     # Create tokens
     access_token = create_access_token(data={"sub": str(user.id)})
@@ -208,30 +261,30 @@ async def login_face_only(
             detail="Face verification failed"
         )
     
-    # Get user
+    # Get user and match the face against their enrolled embedding
     result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
+    user = _verify_face_for_user(
+        result.scalar_one_or_none(),
+        FaceRecognition.extract_embedding(face_image),
+    )
     
     if not user or not user.face_verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found or face not registered"
+            detail="User not found or face not recognized"
         )
     
     # Log face login
-    face_log = FaceLivenessLog(
-        id=uuid4(),
+    await log_sink.write(
+        FaceLivenessLog,
         user_id=user.id,
         is_live=True,
         confidence_score=liveness_result.get("confidence", 95),
         detection_details=liveness_result.get("details", {}),
-        created_at=datetime.utcnow(),
     )
-    db.add(face_log)
     
     user.last_login_at = datetime.utcnow()
     user.login_count += 1
-    await db.commit()
     
     # Create tokens
     access_token = create_access_token(data={"sub": str(user.id)})
@@ -242,4 +295,45 @@ async def login_face_only(
         "refresh_token": refresh_token,
         "token_type": "bearer",
         "login_method": "face_only",
-    }
\ No newline at end of file
+    }
+
+
+@router.post("/face/enroll")
+async def enroll_face(
+    enroll_data: FaceEnroll,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Enroll a face for a signed-in account that has none stored
+    
+    Replacing an enrolled face goes through support (device/face change),
+    not a bearer token alone.
+    """
+    if current_user.face_embedding is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A face is already enrolled for this account"
+        )
+    
+    liveness_result = await FaceLivenessDetector.verify_liveness(
+        image_data=enroll_data.face_image_base64,
+        user_id=current_user.id,
+    )
+    if not FaceLivenessDetector.validate_liveness_result(liveness_result):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Face verification failed. Please try again with better lighting."
+        )
+    
+    _enroll_missing_face(current_user, FaceRecognition.extract_embedding(enroll_data.face_image_base64))
+    
+    await log_sink.write(
+        FaceLivenessLog,
+        user_id=current_user.id,
+        is_live=True,
+        confidence_score=liveness_result.get("confidence", 95),
+        detection_details=liveness_result.get("details", {}),
+    )
+    
+    return {"message": "Face enrolled"}
@@ -5,13 +5,13 @@ from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
-from src.db.session import get_db
+from src.db.session import get_db, UnitOfWorkRoute
 from src.db.models import User
 from src.core.deps import get_current_active_user
 from src.services.device_manager import DeviceManager
 
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 
 class DeviceRegistration(BaseModel):
@@ -35,6 +35,8 @@ async def register_device(
 ):
     """
     Register user's device (one device per user)
+    Every other signed-in request must then send its device_id in the
+    X-Device-Id header
     """
     # Get IP address
     ip_address = request.client.host
@@ -56,9 +58,9 @@ async def register_device(
     
     return {
         "message": "Device registered successfully",
-        "device_id": device.device_id,
+        "device_id": device.device_fingerprint,
         "device_name": device.device_name,
-        "registered_at": device.registered_at,
+        "registered_at": device.first_seen_at,
     }
 
 
@@ -83,11 +85,11 @@ async def get_my_device(
     
     return {
         "has_device": True,
-        "device_id": device.device_id,
+        "device_id": device.device_fingerprint,
         "device_name": device.device_name,
         "device_type": device.device_type,
-        "os": device.os,
-        "registered_at": device.registered_at,
+        "os": (device.device_info or {}).get("os"),
+        "registered_at": device.first_seen_at,
         "last_seen_at": device.last_seen_at,
     }
 
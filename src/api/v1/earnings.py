@@ -7,7 +7,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
 
-from src.db.session import get_db
+from src.db.session import get_read_db
 from src.db.models import EarningHistory, DailyEarningStat, User
 from src.core.deps import get_current_active_user
 from pydantic import BaseModel
@@ -41,7 +41,7 @@ class DailyStats(BaseModel):
 async def get_earning_history(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -62,7 +62,7 @@ async def get_earning_history(
 @router.get("/daily", response_model=List[DailyStats])
 async def get_daily_earnings(
     days: int = Query(30, ge=1, le=90),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -100,7 +100,7 @@ async def get_streak_info(
 
 @router.get("/summary")
 async def get_earning_summary(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
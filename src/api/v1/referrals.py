@@ -3,19 +3,22 @@ Referral System - Invite friends and earn bonuses
 """
 from datetime import datetime
 from uuid import uuid4
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 from pydantic import BaseModel
 import secrets
 
-from src.db.session import get_db
+from src.db.session import get_db, UnitOfWorkRoute
 from src.db.models import Referral, User, Transaction, TransactionTypeEnum, TransactionStatusEnum
 from src.core.deps import get_current_active_user
+from src.core.config import settings
+from src.core.pagination import encode_cursor, decode_cursor
+from src.services.referral_aggregates import ReferralAggregates
 
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 
 class ReferralStats(BaseModel):
@@ -53,12 +56,12 @@ async def get_referral_code(
             created_at=datetime.utcnow(),
         )
         db.add(referral_code_record)
-        await db.commit()
+        await ReferralAggregates.record_code(db, current_user.id, referral_code)
     
     return {
         "referral_code": referral_code_record.referral_code,
         "referral_link": f"https://dignilife.app/register?ref={referral_code_record.referral_code}",
-        "bonus_per_referral": "$5 when friend completes 10 tasks"
+        "bonus_per_referral": f"${settings.REFERRAL_BONUS_USD:g} when friend completes {settings.REFERRAL_BONUS_TASKS} tasks"
     }
 
 
@@ -68,82 +71,48 @@ async def get_referral_stats(
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Get referral statistics
+    Get referral statistics (one row from referral_aggregates)
     """
-    # Get referral code
-    code_result = await db.execute(
-        select(Referral).where(
-            Referral.referrer_id == current_user.id,
-            Referral.referred_user_id == None
-        )
-    )
-    code_record = code_result.scalar_one_or_none()
-    referral_code = code_record.referral_code if code_record else "N/A"
-    
-    # Count total referrals
-    total_result = await db.execute(
-        select(func.count(Referral.id)).where(
-            Referral.referrer_id == current_user.id,
-            Referral.referred_user_id != None
-        )
-    )
-    total_referrals = total_result.scalar() or 0
-    
-    # Count successful referrals (bonus earned)
-    successful_result = await db.execute(
-        select(func.count(Referral.id)).where(
-            Referral.referrer_id == current_user.id,
-            Referral.bonus_earned == True
-        )
-    )
-    successful_referrals = successful_result.scalar() or 0
-    
-    # Calculate total earned
-    earned_result = await db.execute(
-        select(func.sum(Referral.bonus_amount_usd)).where(
-            Referral.referrer_id == current_user.id,
-            Referral.bonus_earned == True
-        )
-    )
-    total_earned = earned_result.scalar() or 0
+    stats = await ReferralAggregates.stats(db, current_user.id)
     
     return ReferralStats(
-        total_referrals=total_referrals,
-        successful_referrals=successful_referrals,
-        total_earned_usd=float(total_earned),
-        referral_code=referral_code,
+        total_referrals=stats["total_referrals"],
+        successful_referrals=stats["successful_referrals"],
+        total_earned_usd=stats["total_earned_usd"],
+        referral_code=stats["referral_code"] or "N/A",
     )
 
 
 @router.get("/my-referrals")
 async def get_my_referrals(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=100),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Get list of referred users
+    Get list of referred users, newest first
+    
+    Pass next_cursor back as cursor for the following page; it is null on
+    the last page.
     """
-    result = await db.execute(
-        select(Referral, User)
-        .join(User, Referral.referred_user_id == User.id)
-        .where(
-            Referral.referrer_id == current_user.id,
-            Referral.referred_user_id != None
-        )
-        .order_by(Referral.created_at.desc())
-    )
+    rows = await ReferralAggregates.page(db, current_user.id, decode_cursor(cursor), limit)
     
     referrals = []
-    for referral, user in result:
+    for row in rows[:limit]:
         referrals.append({
-            "user_name": user.full_name,
-            "joined_at": referral.created_at,
-            "bonus_earned": referral.bonus_earned,
-            "bonus_amount_usd": float(referral.bonus_amount_usd) if referral.bonus_earned else 0,
-            "status": "Bonus Earned" if referral.bonus_earned else "In Progress"
+            "user_name": row.full_name,
+            "joined_at": row.created_at,
+            "bonus_earned": row.bonus_earned,
+            "bonus_amount_usd": float(row.bonus_amount_usd) if row.bonus_earned else 0,
+            "status": "Bonus Earned" if row.bonus_earned else "In Progress"
         })
     
-    return referrals
+    last = rows[limit - 1] if len(rows) > limit else None
+    return {
+        "referrals": referrals,
+        "next_cursor": encode_cursor(last.created_at, last.id) if last else None,
+    }
 
 
 @router.post("/apply-code")
@@ -165,6 +134,13 @@ async def apply_referral_code(
             detail="You have already used a referral code"
         )
     
+    # The bonus is paid when the milestone is crossed, so it must be ahead
+    if current_user.approved_tasks_count >= settings.REFERRAL_BONUS_TASKS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Referral codes must be applied before completing {settings.REFERRAL_BONUS_TASKS} tasks"
+        )
+    
     # Find referral code
     code_result = await db.execute(
         select(Referral).where(
@@ -198,9 +174,11 @@ async def apply_referral_code(
     )
     
     db.add(referral)
-    await db.commit()
-    
+    await ReferralAggregates.record_applied(db, code_record.referrer_id, code_record.referral_code)
     return {
         "message": "Referral code applied successfully!",
-        "bonus_info": "Complete 10 tasks to earn $5 bonus for you and your referrer!"
+        "bonus_info": (
+            f"Complete {settings.REFERRAL_BONUS_TASKS} tasks to earn ${settings.REFERRAL_BONUS_USD:g} bonus "
+            "for you and your referrer!"
+        )
     }
\ No newline at end of file
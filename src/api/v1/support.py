@@ -9,15 +9,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_
 from pydantic import BaseModel
 
-from src.db.session import get_db
+from src.db.session import get_db, UnitOfWorkRoute
 from src.db.models import (
     SupportTicket, SupportTicketMessage, User,
     TicketPriorityEnum, TicketStatusEnum
 )
 from src.core.deps import get_current_active_user, require_admin
+from src.core.pagination import encode_cursor, decode_cursor
+from src.services.support_inbox import SupportInbox, sla_due_at
 
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 
 class TicketCreate(BaseModel):
@@ -51,6 +53,7 @@ async def create_ticket(
     """
     Create a new support ticket
     """
+    now = datetime.utcnow()
     ticket = SupportTicket(
         id=uuid4(),
         user_id=current_user.id,
@@ -58,13 +61,12 @@ async def create_ticket(
         description=ticket_data.description,
         priority=ticket_data.priority,
         status=TicketStatusEnum.OPEN,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow(),
+        sla_due_at=sla_due_at(ticket_data.priority, current_user.subscription_tier, now),
+        created_at=now,
+        updated_at=now,
     )
     
     db.add(ticket)
-    await db.commit()
-    await db.refresh(ticket)
     
     return TicketResponse(
         id=str(ticket.id),
@@ -111,20 +113,12 @@ async def get_my_tickets(
     ]
 
 
-@router.get("/{ticket_id}")
-async def get_ticket_details(
-    ticket_id: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
-    """
-    Get ticket details with messages
-    """
-    # Get ticket
+async def get_own_ticket(db: AsyncSession, ticket_id: str, user: User) -> SupportTicket:
+    """The user's ticket or 404"""
     result = await db.execute(
         select(SupportTicket).where(
             SupportTicket.id == ticket_id,
-            SupportTicket.user_id == current_user.id
+            SupportTicket.user_id == user.id
         )
     )
     ticket = result.scalar_one_or_none()
@@ -134,21 +128,58 @@ async def get_ticket_details(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Ticket not found"
         )
+    return ticket
+
+
+async def message_page(db: AsyncSession, ticket_id, cursor: Optional[str], limit: int) -> dict:
+    """One page of a ticket's thread, oldest first"""
+    rows = await SupportInbox.thread_page(db, ticket_id, decode_cursor(cursor), limit)
+    last = rows[limit - 1] if len(rows) > limit else None
+    return {
+        "messages": rows[:limit],
+        "next_cursor": encode_cursor(last.created_at, last.id) if last else None,
+    }
+
+
+@router.get("/{ticket_id}")
+async def get_ticket_details(
+    ticket_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get ticket details with the first page of messages
     
-    # Get messages
-    messages_result = await db.execute(
-        select(SupportTicketMessage)
-        .where(SupportTicketMessage.ticket_id == ticket_id)
-        .order_by(SupportTicketMessage.created_at.asc())
-    )
-    messages = messages_result.scalars().all()
+    Fetch the rest of a long thread from /{ticket_id}/messages with
+    next_cursor.
+    """
+    ticket = await get_own_ticket(db, ticket_id, current_user)
     
     return {
         "ticket": ticket,
-        "messages": messages
+        **await message_page(db, ticket.id, None, limit)
     }
 
 
+@router.get("/{ticket_id}/messages")
+async def get_ticket_messages(
+    ticket_id: str,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get a ticket's messages, oldest first
+    
+    Pass next_cursor back as cursor for the following page; it is null on
+    the last page.
+    """
+    ticket = await get_own_ticket(db, ticket_id, current_user)
+    return await message_page(db, ticket.id, cursor, limit)
+
+
 @router.post("/{ticket_id}/message")
 async def add_ticket_message(
     ticket_id: str,
@@ -192,9 +223,6 @@ async def add_ticket_message(
     
     ticket.updated_at = datetime.utcnow()
     
-    await db.commit()
-    await db.refresh(message)
-    
     return {
         "message": "Message added successfully",
         "message_id": str(message.id)
@@ -228,8 +256,6 @@ async def close_ticket(
     ticket.resolved_at = datetime.utcnow()
     ticket.updated_at = datetime.utcnow()
     
-    await db.commit()
-    
     return {
         "message": "Ticket closed successfully"
     }
\ No newline at end of file
@@ -6,7 +6,7 @@ from uuid import uuid4
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, insert, and_, or_
 
 from src.db.session import get_db
 from src.db.models import (
@@ -18,10 +18,13 @@ from src.schemas.task import (
     SubmissionCreate, SubmissionResponse
 )
 from src.core.deps import get_current_active_user
+from src.services.referral_milestones import ReferralMilestones
+from src.services.user_context import user_context_store
+from src.services.idempotency import IdempotentRoute
 from src.db.models import User
 
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute)
 
 
 @router.get("/", response_model=List[TaskListResponse])
@@ -128,19 +131,18 @@ async def claim_task(
         )
     
     # Create assignment (lock for 30 minutes)
-    assignment = TaskAssignment(
-        id=uuid4(),
-        task_id=task.id,
-        user_id=current_user.id,
-        assigned_at=datetime.utcnow(),
-        expires_at=datetime.utcnow() + timedelta(minutes=30),
-        is_active=True,
-        created_at=datetime.utcnow(),
+    assignment = await db.scalar(
+        insert(TaskAssignment).returning(TaskAssignment),
+        [{
+            "id": uuid4(),
+            "task_id": task.id,
+            "user_id": current_user.id,
+            "assigned_at": datetime.utcnow(),
+            "expires_at": datetime.utcnow() + timedelta(minutes=30),
+            "is_active": True,
+            "created_at": datetime.utcnow(),
+        }],
     )
-    db.add(assignment)
-    
-    await db.commit()
-    await db.refresh(assignment)
     
     return {
         "message": "Task claimed successfully",
@@ -191,27 +193,27 @@ async def submit_task(
     completion_time = int((datetime.utcnow() - assignment.assigned_at).total_seconds())
     
     # Create submission
-    submission = Submission(
-        id=uuid4(),
-        task_id=task.id,
-        user_id=current_user.id,
-        data=submission_data,
-        status=SubmissionStatusEnum.PENDING,
-        completion_time_seconds=completion_time,
-        submitted_at=datetime.utcnow(),
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow(),
-    )
+    submission_values = {
+        "id": uuid4(),
+        "task_id": task.id,
+        "user_id": current_user.id,
+        "data": submission_data,
+        "status": SubmissionStatusEnum.PENDING,
+        "completion_time_seconds": completion_time,
+        "submitted_at": datetime.utcnow(),
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+    }
     
     # AI Validation (simplified - score between 70-100)
     import random
     ai_score = random.uniform(70, 100)
-    submission.ai_validation_score = ai_score
+    submission_values["ai_validation_score"] = ai_score
     
     # Auto-approve if score > 95
     if ai_score >= 95:
-        submission.status = SubmissionStatusEnum.APPROVED
-        submission.ai_auto_approved = True
+        submission_values["status"] = SubmissionStatusEnum.APPROVED
+        submission_values["ai_auto_approved"] = True
         
         # Calculate earnings
         from decimal import Decimal
@@ -230,7 +232,7 @@ async def submit_task(
         earning_record = EarningHistory(
             id=uuid4(),
             user_id=current_user.id,
-            submission_id=submission.id,
+            submission_id=submission_values["id"],
             base_reward=float(earnings["base_reward"]),
             quality_bonus=float(earnings["quality_bonus"]),
             speed_bonus=float(earnings["speed_bonus"]),
@@ -255,16 +257,26 @@ async def submit_task(
             current_user.longest_streak_days = current_user.current_streak_days
     
     else:
-        submission.ai_validation_notes = "Requires human review"
+        submission_values["ai_validation_notes"] = "Requires human review"
         current_user.pending_balance_usd += float(task.reward_usd)
     
     # Mark assignment as completed
     assignment.is_active = False
     assignment.completed_at = datetime.utcnow()
     
-    db.add(submission)
-    await db.commit()
-    await db.refresh(submission)
+    # INSERT ... RETURNING gives back the stored row in the same round trip;
+    # the earning record and balance updates are flushed by the route commit
+    submission = await db.scalar(
+        insert(Submission).returning(Submission),
+        [submission_values],
+    )
+    
+    if submission_values["status"] == SubmissionStatusEnum.APPROVED:
+        # Approved-task counter; pays the referral bonus at the milestone
+        await ReferralMilestones.record_approval(db, current_user.id)
+    
+    # Keep the AI chat context snapshot current (same transaction)
+    await user_context_store.record_submission(db, current_user)
     
     return submission
 
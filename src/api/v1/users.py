@@ -6,13 +6,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 
-from src.db.session import get_db
+from src.db.session import get_db, get_read_db, UnitOfWorkRoute
 from src.db.models import User, Submission, SubmissionStatusEnum
 from src.schemas.user import UserResponse, UserUpdate, UserStats
 from src.core.deps import get_current_user, get_current_active_user
 
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 
 @router.get("/me", response_model=UserResponse)
@@ -48,16 +48,13 @@ async def update_current_user(
     
     current_user.updated_at = datetime.utcnow()
     
-    await db.commit()
-    await db.refresh(current_user)
-    
     return current_user
 
 
 @router.get("/me/stats", response_model=UserStats)
 async def get_user_stats(
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get user statistics
@@ -129,9 +126,6 @@ async def upgrade_subscription(
     current_user.subscription_expires_at = datetime.utcnow() + timedelta(days=30)
     current_user.updated_at = datetime.utcnow()
     
-    await db.commit()
-    await db.refresh(current_user)
-    
     return {
         "message": f"Successfully upgraded to {tier.upper()} tier",
         "subscription_tier": current_user.subscription_tier,
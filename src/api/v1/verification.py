@@ -3,20 +3,20 @@ User Verification Endpoints (KYC & Face Liveness)
 UPDATED: Flexible ID system - accepts any ID type
 """
 from datetime import datetime
-from uuid import uuid4
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Optional
 from enum import Enum
 
-from src.db.session import get_db
+from src.db.session import get_db, UnitOfWorkRoute
 from src.db.models import User, FaceLivenessLog
 from src.core.deps import get_current_active_user
 from src.services.face_liveness import FaceLivenessDetector
+from src.services.log_sink import log_sink
 
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 
 class IDTypeEnum(str, Enum):
@@ -95,8 +95,6 @@ async def submit_kyc(
     
     current_user.updated_at = datetime.utcnow()
     
-    await db.commit()
-    
     return {
         "message": "KYC information submitted successfully",
         "status": "pending_review",
@@ -123,15 +121,13 @@ async def verify_face_liveness(
     )
     
     # Log the check
-    log = FaceLivenessLog(
-        id=uuid4(),
+    await log_sink.write(
+        FaceLivenessLog,
         user_id=current_user.id,
         is_live=liveness_result.get("is_live", False),
         confidence_score=liveness_result.get("confidence", 0),
         detection_details=liveness_result.get("details", {}),
-        created_at=datetime.utcnow(),
     )
-    db.add(log)
     
     # Validate result
     passed = FaceLivenessDetector.validate_liveness_result(liveness_result)
@@ -141,8 +137,6 @@ async def verify_face_liveness(
         current_user.is_verified = True
         current_user.updated_at = datetime.utcnow()
     
-    await db.commit()
-    
     return {
         "passed": passed,
         "is_live": liveness_result.get("is_live"),
@@ -7,7 +7,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from src.db.session import get_db
+from src.db.session import get_db, get_read_db
 from src.db.models import Wallet, Transaction, User, Currency, FXRate
 from src.schemas.wallet import BalanceResponse, TransactionResponse
 from src.core.deps import get_current_active_user
@@ -59,7 +59,7 @@ async def get_balance(
 async def get_transactions(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
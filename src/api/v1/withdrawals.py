@@ -5,11 +5,12 @@ from datetime import datetime
 from uuid import uuid4
 from typing import List
 from decimal import Decimal
+from functools import partial
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert
 
-from src.db.session import get_db
+from src.db.session import after_commit, get_db
 from src.db.models import (
     Withdrawal, WithdrawalFee, Transaction, FXRate, User,
     TransactionTypeEnum, TransactionStatusEnum
@@ -17,12 +18,17 @@ from src.db.models import (
 from src.schemas.wallet import (
     WithdrawalRequest, WithdrawalResponse, WithdrawalFeePreview
 )
+from src.core.config import settings
 from src.core.deps import get_current_active_user
 from src.api.v1.auth import FaceLivenessDetector, FaceLivenessLog
 from src.core.earning_engine import WithdrawalFeeCalculator
+from src.services.log_sink import log_sink
+from src.services.user_context import user_context_store
+from src.services.withdrawal_risk import withdrawal_risk
+from src.services.idempotency import IdempotentRoute
 
 
-router = APIRouter()
+router = APIRouter(route_class=IdempotentRoute)
 
 
 @router.post("/preview-fee", response_model=WithdrawalFeePreview)
@@ -106,8 +112,8 @@ async def request_withdrawal(
         )
     
     # Log face verification for withdrawal
-    face_log = FaceLivenessLog(
-        id=uuid4(),
+    await log_sink.write(
+        FaceLivenessLog,
         user_id=current_user.id,
         is_live=True,
         confidence_score=liveness_result.get("confidence", 95),
@@ -116,10 +122,8 @@ async def request_withdrawal(
             "purpose": "withdrawal_verification",
             "amount_usd": withdrawal_request.amount_usd,
         },
-        created_at=datetime.utcnow(),
     )
-    db.add(face_log)
-
+    
     """
     Request a withdrawal (with auto-cut fee)
     """
@@ -160,23 +164,36 @@ async def request_withdrawal(
     
     amount_local = float(fee_calc["net_amount"]) * exchange_rate
     
-    # Create withdrawal
-    withdrawal = Withdrawal(
-        id=uuid4(),
-        user_id=current_user.id,
-        gross_amount_usd=float(fee_calc["gross_amount"]),
-        fee_amount_usd=float(fee_calc["fee_amount"]),
-        net_amount_usd=float(fee_calc["net_amount"]),
-        amount_local=amount_local,
-        currency_code=withdrawal_request.currency_code.upper(),
-        exchange_rate=exchange_rate,
-        payout_method=withdrawal_request.payout_method,
-        payout_details=withdrawal_request.payout_details,
-        status=TransactionStatusEnum.PENDING,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow(),
+    # Fraud risk from the cached per-user features; high scores wait for an admin
+    risk_score = await withdrawal_risk.score(
+        db, current_user, withdrawal_request.amount_usd, liveness_result.get("confidence", 95)
+    )
+    risk_hold = withdrawal_risk.needs_review(risk_score)
+    # Low-risk withdrawals may skip the admin's payout approval (opt-in)
+    auto_approved = not risk_hold and risk_score < settings.PAYOUT_AUTO_APPROVE_MAX_RISK
+    
+    # Create withdrawal (INSERT ... RETURNING - no refresh needed)
+    withdrawal = await db.scalar(
+        insert(Withdrawal).returning(Withdrawal),
+        [{
+            "id": uuid4(),
+            "user_id": current_user.id,
+            "gross_amount_usd": float(fee_calc["gross_amount"]),
+            "fee_amount_usd": float(fee_calc["fee_amount"]),
+            "net_amount_usd": float(fee_calc["net_amount"]),
+            "amount_local": amount_local,
+            "currency_code": withdrawal_request.currency_code.upper(),
+            "exchange_rate": exchange_rate,
+            "payout_method": withdrawal_request.payout_method,
+            "payout_details": withdrawal_request.payout_details,
+            "status": TransactionStatusEnum.PENDING,
+            "risk_score": round(risk_score, 4),
+            "risk_hold": risk_hold,
+            "approved_at": datetime.utcnow() if auto_approved else None,
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+        }],
     )
-    db.add(withdrawal)
     
     # Create withdrawal fee record
     fee_record = WithdrawalFee(
@@ -214,8 +231,10 @@ async def request_withdrawal(
     current_user.lifetime_withdrawals_usd += float(fee_calc["net_amount"])
     current_user.updated_at = datetime.utcnow()
     
-    await db.commit()
-    await db.refresh(withdrawal)
+    # Keep the AI chat context snapshot current (same transaction)
+    await user_context_store.record_balance_change(db, current_user)
+    # The cached velocity only counts withdrawals that were stored
+    after_commit(db, partial(withdrawal_risk.record_withdrawal, current_user.id, withdrawal_request.amount_usd))
     
     return withdrawal
 
@@ -2,7 +2,7 @@
 DigniLife Platform - Configuration
 """
 from pydantic_settings import BaseSettings
-from typing import List, Union
+from typing import Dict, List, Tuple, Union
 
 
 class Settings(BaseSettings):
@@ -15,6 +15,63 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DATABASE_READ_URL: str = ""  # Read replica; empty = read from primary
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # Reads stay on primary after a user's write
+    REPLICA_MAX_LAG_SECONDS: float = 10.0  # Lagging replica is bypassed
+    REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    DB_POOL_SIZE: int = 10  # Persistent connections per worker
+    DB_MAX_OVERFLOW: int = 20  # Extra connections per worker under load
+    DB_MAX_CONNECTIONS: int = 0  # Budget for all workers together (0 = use the two above)
+    WEB_CONCURRENCY: int = 4  # uvicorn workers sharing DB_MAX_CONNECTIONS
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Retire connections before server/proxy idle timeouts
+    DB_HEALTH_CHECK_SECONDS: float = 30.0  # Background pool check (replaces pre-ping)
+    DB_PGBOUNCER: bool = False  # PgBouncer transaction pooling: no prepared statement cache
+    
+    # Log table partitioning (scripts/manage_partitions.py)
+    PARTITION_PREMAKE_MONTHS: int = 3  # Monthly partitions created ahead of time
+    PARTITION_ARCHIVE_DIR: str = "runtime/partition_archive"  # Expired partitions as .csv.gz
+    RETENTION_USER_ACTIVITY_LOGS_DAYS: int = 365  # 0 = keep forever
+    RETENTION_FACE_LIVENESS_LOGS_DAYS: int = 730  # Fraud evidence for duplicate detection
+    RETENTION_AI_DECISION_LOGS_DAYS: int = 365
+    RETENTION_AI_LEARNING_EVENTS_DAYS: int = 180
+    RETENTION_SYSTEM_HEALTH_METRICS_DAYS: int = 90
+    RETENTION_CHAT_MESSAGES_DAYS: int = 365
+    RETENTION_ADMIN_ACTIVITY_LOGS_DAYS: int = 0  # Admin audit trail
+    
+    # Buffered audit/activity log writes (src/services/log_sink.py)
+    LOG_SINK_FLUSH_INTERVAL_MS: int = 200  # Max time a record waits before its batch is written
+    LOG_SINK_BATCH_SIZE: int = 500  # Rows per multi-row INSERT
+    LOG_SINK_MAX_QUEUE: int = 10000  # Buffered records before writers wait (backpressure)
+    
+    # AI chat history (src/services/chat_history.py)
+    CHAT_HISTORY_MESSAGES: int = 10  # Recent messages kept per conversation and sent as context
+    CHAT_HISTORY_MAX_CONVERSATIONS: int = 10000  # Cached conversations per worker (LRU)
+    
+    # AI chat intent classification (src/services/intent_classifier.py)
+    INTENT_MODEL_PATH: str = "runtime/intent_model.npz"  # scripts/train_intent_model.py; keywords only if missing
+    INTENT_MODEL_THRESHOLD: float = 0.5  # Min model probability when no keyword matched
+    
+    # AI chat reply templates (src/services/chat_templates.py)
+    CHAT_TEMPLATES_DIR: str = "config/chat_templates"  # <language>.json per language (relative to the project root); en.json is the fallback
+    
+    # Referral milestone bonus (src/services/referral_milestones.py)
+    REFERRAL_BONUS_TASKS: int = 10  # Approved tasks the referred user needs
+    REFERRAL_BONUS_USD: float = 5.0  # Credited to both the referrer and the referred user
+    REFERRAL_BACKFILL_BATCH: int = 1000  # Referred users credited per backfill transaction
+    
+    # AI chat user context snapshot (src/services/user_context.py)
+    AI_CONTEXT_TTL_SECONDS: int = 3600  # Snapshot lifetime (also capped at the next UTC midnight)
+    AI_CONTEXT_CACHE_SECONDS: float = 30  # In-memory reuse per worker before re-reading the row
+    AI_CONTEXT_CACHE_MAX_USERS: int = 10000  # Cached snapshots per worker (LRU)
+    AI_CONTEXT_RECENT_INTENTS: int = 5  # Intents remembered per user
+    
+    # Device binding (src/services/device_binding.py)
+    DEVICE_BINDING_ENABLED: bool = True  # Signed-in API requests must carry the bound device's X-Device-Id
+    DEVICE_BINDING_TTL_SECONDS: float = 10  # Cached binding reused this long per worker; other workers accept a released device until then
+    DEVICE_BINDING_RECHECK_SECONDS: float = 5  # A mismatching device re-reads the binding at most this often per user
+    DEVICE_BINDING_FLUSH_SECONDS: float = 30  # Buffered last_seen_at/IP updates written this often
+    DEVICE_BINDING_MAX_USERS: int = 100000  # Cached bindings per worker (LRU)
     
     # Security
     SECRET_KEY: str
@@ -29,6 +86,68 @@ class Settings(BaseSettings):
     # Face Liveness API (placeholder for now)
     LIVENESS_API_URL: str = ""
     LIVENESS_API_KEY: str = ""
+    LIVENESS_MAX_IMAGE_BYTES: int = 5 * 1024 * 1024  # Decoded selfie size limit
+    LIVENESS_CACHE_TTL_SECONDS: int = 120  # Reuse verdicts for client retries
+    LIVENESS_CACHE_MAX_ENTRIES: int = 10000
+    
+    # Face Recognition (face-first login)
+    FACE_EMBEDDING_EXTRACTOR: str = "src.services.face_embedding:HashEmbeddingExtractor"
+    FACE_EMBEDDING_DIM: int = 128
+    FACE_MATCH_THRESHOLD: float = 0.8  # Cosine similarity
+    FACE_INDEX_NLISTS: int = 1024  # IVF buckets (~sqrt of enrolled users)
+    FACE_INDEX_NPROBE: int = 16  # Buckets scanned per lookup
+    FACE_INDEX_LOAD_ON_STARTUP: bool = True
+    FACE_INDEX_REFRESH_SECONDS: float = 30  # Embeddings enrolled on other workers are added to this one's index after this
+    
+    # Duplicate Account Detection (offline batch job)
+    DUPLICATE_FACE_THRESHOLD: float = 0.92  # Same face, flagged on its own
+    DUPLICATE_FACE_WEAK_THRESHOLD: float = 0.85  # Flagged only with a shared device/IP
+    DUPLICATE_IP_MAX_USERS: int = 20  # Ignore carrier/NAT IPs shared by more users
+    DUPLICATE_JOIN_BLOCK_SIZE: int = 4096  # Rows per similarity-join block
+    DUPLICATE_JOIN_NLISTS: int = 1024  # IVF candidate buckets (0 = exact N^2 join)
+    DUPLICATE_JOIN_NPROBE: int = 8  # Buckets each user is compared against
+    
+    # Referral graph analytics (src/services/referral_graph.py)
+    REFERRAL_GRAPH_STREAM_BATCH: int = 50000  # Referral rows fetched per round trip while building the graph
+    REFERRAL_RING_MIN_SIZE: int = 3  # Accounts a device/IP-linked referral group needs to be flagged (cycles always are)
+    
+    # Proposal voting (src/services/proposal_votes.py)
+    PROPOSAL_LEADERBOARD_SIZE: int = 200  # Top proposals cached per status filter; deeper pages query the database
+    PROPOSAL_LEADERBOARD_TTL_SECONDS: float = 15  # Ranking reloaded after this; this worker's votes update counts in place
+    
+    # Proposal deduplication (src/services/proposal_dedup.py)
+    PROPOSAL_DUPLICATE_THRESHOLD: float = 0.5  # Estimated Jaccard similarity of words and word pairs for a proposal to count as a near-duplicate
+    PROPOSAL_SIMILAR_LIMIT: int = 5  # Near-duplicates suggested when a proposal is created
+    PROPOSAL_SIMILAR_CANDIDATES: int = 500  # Bucket matches scored per lookup; caps the work for very common wording
+    
+    # Withdrawal risk scoring (src/services/withdrawal_risk.py)
+    WITHDRAWAL_RISK_REVIEW_THRESHOLD: float = 0.8  # Withdrawals scoring at least this are held for manual review
+    WITHDRAWAL_RISK_VELOCITY_HALF_LIFE_HOURS: float = 24  # Past withdrawals count half after this long
+    WITHDRAWAL_RISK_WINDOW_DAYS: int = 30  # Withdrawals and liveness checks loaded into a user's features
+    WITHDRAWAL_RISK_CACHE_SECONDS: float = 600  # Per-worker features reloaded after this (other workers' activity)
+    WITHDRAWAL_RISK_MAX_USERS: int = 100000  # Feature vectors kept per worker (LRU)
+    WITHDRAWAL_RISK_RESCORE_BATCH: int = 5000  # Pending withdrawals scored per batch re-score round trip
+    
+    # Idempotency keys (src/services/idempotency.py)
+    IDEMPOTENCY_TTL_HOURS: float = 24  # A key replays its stored response for this long after the first request
+    IDEMPOTENCY_CACHE_SIZE: int = 10000  # Stored responses kept in memory per worker (LRU)
+    IDEMPOTENCY_CLEANUP_BATCH: int = 10000  # Expired rows deleted per statement by the cleanup script
+    
+    # Admin search (src/services/search.py)
+    SEARCH_RANK_CANDIDATES: int = 5000  # Matches ranked per source; past this only the first ones found are ranked
+    SEARCH_CHAT_DAYS: int = 90  # Chat searched by default (partition pruning); older needs an explicit since
+    
+    # Payouts
+    PAYOUT_USE_FAKE_PROVIDERS: bool = True  # Local fake providers until live adapters exist
+    PAYOUT_MAX_ATTEMPTS: int = 5
+    PAYOUT_RETRY_BASE_SECONDS: float = 1.0
+    PAYOUT_RETRY_MAX_SECONDS: float = 60.0
+    PAYOUT_CLAIM_LIMIT: int = 5000  # Withdrawals claimed per dispatcher pass
+    PAYOUT_CLAIM_TIMEOUT_SECONDS: int = 900  # Claims older than this (crashed dispatcher) are sent again, under the same idempotency key
+    PAYOUT_AUTO_APPROVE_MAX_RISK: float = 0.0  # Withdrawals scoring below this are approved at request time; 0 = an admin approves each one
+    PAYOUT_FILE_METHODS: str = "bank_transfer"  # Paid via bulk files instead of API calls
+    PAYOUT_BATCH_DIR: str = "runtime/payout_batches"
+    PAYOUT_BATCH_MAX_ITEMS: int = 10000  # Rows per bulk file
     
     # Currency Exchange API
     FX_API_URL: str = "https://api.exchangerate-api.com/v4/latest/USD"
@@ -37,6 +156,9 @@ class Settings(BaseSettings):
     # AI Services (placeholder for now)
     AI_VALIDATION_API: str = ""
     AI_CHAT_API: str = ""
+    AI_CHAT_LLM: str = "src.services.chat_llm:FakeChatLLM"  # Streaming adapter for /ai-chat/stream
+    AI_CHAT_FAKE_FIRST_TOKEN_MS: int = 300  # FakeChatLLM: delay before the first token
+    AI_CHAT_FAKE_TOKEN_MS: int = 30  # FakeChatLLM: delay between tokens
     
     # Email (placeholder for now)
     SMTP_HOST: str = ""
@@ -51,6 +173,38 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
         return self.CORS_ORIGINS
     
+    @property
+    def sql_echo(self) -> bool:
+        """Log SQL statements (development only, whatever DEBUG says)"""
+        return self.DEBUG and self.ENVIRONMENT == "development"
+    
+    @property
+    def db_pool_limits(self) -> Tuple[int, int]:
+        """(pool_size, max_overflow) per worker"""
+        if self.DB_MAX_CONNECTIONS <= 0:
+            return self.DB_POOL_SIZE, self.DB_MAX_OVERFLOW
+        per_worker = max(1, self.DB_MAX_CONNECTIONS // max(1, self.WEB_CONCURRENCY))
+        pool_size = min(self.DB_POOL_SIZE, per_worker)
+        return pool_size, per_worker - pool_size
+    
+    @property
+    def partition_retention_days(self) -> Dict[str, int]:
+        """Retention per partitioned log table"""
+        return {
+            "user_activity_logs": self.RETENTION_USER_ACTIVITY_LOGS_DAYS,
+            "face_liveness_logs": self.RETENTION_FACE_LIVENESS_LOGS_DAYS,
+            "ai_decision_logs": self.RETENTION_AI_DECISION_LOGS_DAYS,
+            "ai_learning_events": self.RETENTION_AI_LEARNING_EVENTS_DAYS,
+            "system_health_metrics": self.RETENTION_SYSTEM_HEALTH_METRICS_DAYS,
+            "chat_messages": self.RETENTION_CHAT_MESSAGES_DAYS,
+            "admin_activity_logs": self.RETENTION_ADMIN_ACTIVITY_LOGS_DAYS,
+        }
+    
+    @property
+    def payout_file_methods_list(self) -> List[str]:
+        """Convert PAYOUT_FILE_METHODS to list"""
+        return [method.strip() for method in self.PAYOUT_FILE_METHODS.split(",") if method.strip()]
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
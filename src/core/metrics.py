@@ -0,0 +1,114 @@
+"""
+DigniLife Platform - Metrics
+Minimal Prometheus text-format metrics for the /metrics endpoint that
+ops/prometheus.yml scrapes. No client library; values are per worker.
+"""
+from typing import Callable, Dict, List, Sequence, Tuple
+from bisect import bisect_left
+import threading
+
+
+# Seconds; fine-grained at the low end where healthy pool waits live
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+_collectors: List[Callable[[], List[str]]] = []
+
+
+def register(collector: Callable[[], List[str]]) -> Callable[[], List[str]]:
+    """Add a callable returning exposition lines, rendered on every scrape"""
+    _collectors.append(collector)
+    return collector
+
+
+def render() -> str:
+    """All registered metrics in Prometheus text exposition format"""
+    lines: List[str] = []
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets
+    
+    observe() is O(log buckets) and safe to call from any thread (the
+    sync pool code SQLAlchemy runs in greenlets included).
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List] = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+        register(self.collect)
+    
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def snapshot(self, *label_values: str) -> Dict[str, object]:
+        """Cumulative bucket counts, sum and count for one label set"""
+        with self._lock:
+            counts, total, count = self._series.get(
+                label_values, [[0] * (len(self.buckets) + 1), 0.0, 0]
+            )
+            counts = list(counts)
+        cumulative, running = {}, 0
+        for bound, bucket_count in zip(list(self.buckets) + [float("inf")], counts):
+            running += bucket_count
+            cumulative[bound] = running
+        return {"buckets": cumulative, "sum": total, "count": count}
+    
+    def collect(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for label_values in sorted(self._series):
+            snapshot = self.snapshot(*label_values)
+            for bound, count in snapshot["buckets"].items():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.label_names, label_values, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {snapshot['sum']}")
+            lines.append(f"{self.name}_count{labels} {snapshot['count']}")
+        return lines
+
+
+def gauge_lines(
+    name: str,
+    documentation: str,
+    samples: List[Tuple[Dict[str, str], float]],
+    metric_type: str = "gauge",
+) -> List[str]:
+    """Exposition lines for a gauge (or running counter) read at scrape time"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {value}")
+    return lines
@@ -0,0 +1,182 @@
+"""
+DigniLife Platform - MinHash Signatures and LSH Buckets
+Near-duplicate detection for short texts on NumPy
+
+A text becomes a set of shingles (its words and word pairs), and its
+signature holds, for each of NUM_PERM hash functions, the smallest hash
+of any shingle. The share of positions where two signatures agree
+estimates the Jaccard similarity of the two shingle sets.
+
+Signatures are cut into BANDS bands of ROWS values and each band hashed
+to one 64-bit key. Two texts land in the same bucket of a band when the
+whole band agrees, which for Jaccard similarity s happens in at least
+one band with probability 1 - (1 - s^ROWS)^BANDS: about 0.5 at s = 0.5
+and above 0.99 at s = 0.8, while pairs at s = 0.2 rarely collide. A
+lookup touches only the texts sharing a bucket, not the whole corpus.
+
+Signatures and keys are stored, so the hash functions come from a fixed
+seed and must not change without recomputing them.
+"""
+from typing import List, Sequence, Tuple
+import re
+import zlib
+
+import numpy as np
+
+from src.core.referral_graph import connected_components
+
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Multiply-shift hashing: h(x) = (a * x + b) mod 2^64 >> 32, with odd a
+_rng = np.random.default_rng(20261020)
+_A = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+_SHIFT = np.uint64(32)
+_FNV_PRIME = np.uint64(0x100000001B3)
+_FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+_PAIR_MIX = np.uint64(0x9E3779B1)
+_LOW_32 = np.uint64(0xFFFFFFFF)
+MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def _shingle_hashes(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    32-bit hashes of every text's words and adjacent word pairs
+    
+    Each distinct word is hashed once (crc32); a pair's hash is mixed from
+    its two word hashes with array arithmetic, so the per-word Python
+    work is a dict lookup.
+    
+    Returns:
+        (word hashes, words per text, pair hashes, pairs per text), each
+        flat in text order
+    """
+    vocabulary = {}
+    ids, lengths = [], np.empty(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        words = TOKEN_PATTERN.findall(text.lower())
+        ids.extend([vocabulary.setdefault(word, len(vocabulary)) for word in words])
+        lengths[i] = len(words)
+    vocabulary_hashes = np.fromiter(
+        (zlib.crc32(word.encode()) for word in vocabulary), dtype=np.uint64, count=len(vocabulary)
+    )
+    words = vocabulary_hashes[np.asarray(ids, dtype=np.int64)]
+    
+    # Pairs are adjacent words that don't straddle two texts
+    same_text = np.ones(max(len(words) - 1, 0), dtype=bool)
+    ends = np.cumsum(lengths)
+    same_text[ends[(ends > 0) & (ends < len(words))] - 1] = False
+    pairs = (words[:-1][same_text] * _PAIR_MIX + words[1:][same_text]) & _LOW_32
+    return words, lengths, pairs, np.maximum(lengths - 1, 0)
+
+
+def signatures(texts: Sequence[str]) -> np.ndarray:
+    """
+    (N, NUM_PERM) uint32 signatures of many texts
+    
+    All shingles go into flat arrays; each hash function is one
+    vectorized pass over them and a minimum.reduceat per text, so memory
+    is a few bytes per shingle whatever N is. A text without words gets
+    the all-MAX_HASH signature.
+    """
+    words, word_counts, pairs, pair_counts = _shingle_hashes(texts)
+    result = np.full((len(texts), NUM_PERM), MAX_HASH, dtype=np.uint32)
+    for shingles, counts in ((words, word_counts), (pairs, pair_counts)):
+        # reduceat can't express an empty segment, so texts without any
+        # shingle of this kind are left out and keep MAX_HASH
+        present = counts > 0
+        if not present.any():
+            continue
+        starts = (np.cumsum(counts) - counts)[present]
+        hashed = np.empty_like(shingles)
+        for i in range(NUM_PERM):
+            np.multiply(shingles, _A[i], out=hashed)
+            hashed += _B[i]
+            hashed >>= _SHIFT
+            minimum = np.minimum.reduceat(hashed, starts)
+            result[present, i] = np.minimum(result[present, i], minimum)
+    return result
+
+
+def signature(text: str) -> np.ndarray:
+    """NUM_PERM uint32 signature of one text"""
+    return signatures([text])[0]
+
+
+def band_keys(sigs: np.ndarray) -> np.ndarray:
+    """
+    (N, BANDS) int64 bucket keys
+    
+    FNV-1a over each band's values, seeded with the band number so equal
+    values in different bands don't share a key. int64 to fit a BIGINT.
+    """
+    sigs = np.atleast_2d(sigs)
+    bands = sigs.reshape(len(sigs), BANDS, ROWS).astype(np.uint64)
+    keys = np.broadcast_to(_FNV_OFFSET ^ np.arange(BANDS, dtype=np.uint64), (len(sigs), BANDS)).copy()
+    for row in range(ROWS):
+        keys ^= bands[:, :, row]
+        keys *= _FNV_PRIME
+    return keys.view(np.int64)
+
+
+def similarity(sig: np.ndarray, sigs: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of one signature to each of sigs"""
+    return (np.atleast_2d(sigs) == sig).mean(axis=1)
+
+
+def to_bytes(sig: np.ndarray) -> bytes:
+    return np.asarray(sig, dtype="<u4").tobytes()
+
+
+def from_bytes(raw: bytes) -> np.ndarray:
+    return np.frombuffer(raw, dtype="<u4")
+
+
+def candidate_pairs(sigs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (first, other) pairs of texts sharing a bucket in some band
+    
+    Within a bucket each member is paired with the bucket's first text
+    only: enough to connect the bucket, linear in its size.
+    """
+    keys = band_keys(sigs)
+    firsts, others = [], []
+    for band in range(BANDS):
+        order = np.argsort(keys[:, band], kind="stable")
+        sorted_keys = keys[order, band]
+        new_bucket = np.empty(len(order), dtype=bool)
+        new_bucket[:1] = True
+        np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=new_bucket[1:])
+        bucket_first = order[np.flatnonzero(new_bucket)]
+        first_of = np.repeat(bucket_first, np.diff(np.append(np.flatnonzero(new_bucket), len(order))))
+        member = ~new_bucket
+        firsts.append(first_of[member])
+        others.append(order[member])
+    return np.concatenate(firsts), np.concatenate(others)
+
+
+def cluster(sigs: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Cluster label (a member's row number) for every text
+    
+    Bucket pairs whose estimated similarity reaches threshold are joined
+    and clusters are the connected components of those pairs; a text with
+    no such pair is its own cluster.
+    """
+    first, other = candidate_pairs(sigs)
+    keep = (sigs[first] == sigs[other]).mean(axis=1) >= threshold
+    return connected_components(len(sigs), first[keep].astype(np.int32), other[keep].astype(np.int32))
+
+
+def clusters(labels: np.ndarray, min_size: int = 2) -> List[np.ndarray]:
+    """Row numbers of each cluster with at least min_size members, largest first"""
+    order = np.argsort(labels, kind="stable")
+    _, starts, sizes = np.unique(labels[order], return_index=True, return_counts=True)
+    groups = [order[start:start + size] for start, size in zip(starts, sizes) if size >= min_size]
+    groups.sort(key=len, reverse=True)
+    return groups
@@ -0,0 +1,36 @@
+"""
+DigniLife Platform - Keyset Pagination
+Opaque cursors for lists ordered by (timestamp, id)
+
+An OFFSET page makes the database walk and discard every row before it,
+so deep pages of a large list get slower page by page. A cursor carries
+the sort key of the last row returned; the next page starts right after
+it with an index range scan.
+"""
+from typing import Optional, Tuple
+from datetime import datetime
+from uuid import UUID
+import base64
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(at: datetime, row_id: UUID) -> str:
+    """Cursor pointing just past this row"""
+    raw = f"{at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, UUID]]:
+    """(timestamp, id) from a cursor; None for the first page"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(at), UUID(row_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
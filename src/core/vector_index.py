@@ -0,0 +1,356 @@
+"""
+DigniLife Platform - Approximate Nearest-Neighbour Vector Index
+Inverted-file (IVF) index on NumPy for 1:N embedding lookup
+"""
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize a vector or a matrix of row vectors (float32)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+
+def similarity_pairs(
+    vectors: np.ndarray,
+    threshold: float,
+    block_size: int = 4096,
+    n_lists: int = 0,
+    n_probe: int = 4,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    All pairs of rows whose cosine similarity is at least threshold
+    
+    With n_lists=0 this is an exact self-join: a blocked matrix multiply
+    over the upper triangle, O(N^2 * dim) compute. With n_lists > 0 the
+    rows are bucketed IVF-style and each row is only compared with the
+    buckets of its n_probe nearest centroids, about n_probe * N / n_lists
+    candidates per row - the way to run this over millions of rows. Near
+    duplicates share their nearest centroids, so recall above a high
+    threshold stays close to exact.
+    
+    Either way each step multiplies at most block_size rows against one
+    block or bucket, so extra memory is bounded regardless of N.
+    
+    Args:
+        vectors: (N, dim) matrix, normalized on the way in
+        threshold: Minimum cosine similarity
+        block_size: Rows per block
+        n_lists: IVF buckets for candidate blocking (0 = exact)
+        n_probe: Buckets each row is compared against
+    
+    Returns:
+        (rows, cols, similarities) with rows < cols, each pair once
+    """
+    vectors = normalize(vectors)
+    if n_lists and len(vectors) >= n_lists * IVFIndex.MIN_POINTS_PER_LIST:
+        return _bucketed_pairs(vectors, threshold, block_size, n_lists, n_probe)
+    
+    rows, cols, sims = [], [], []
+    for row_start in range(0, len(vectors), block_size):
+        row_block = vectors[row_start:row_start + block_size]
+        for col_start in range(row_start, len(vectors), block_size):
+            scores = row_block @ vectors[col_start:col_start + block_size].T
+            matches = scores >= threshold
+            if col_start == row_start:
+                # Diagonal block: keep the strict upper triangle only
+                matches = np.triu(matches, k=1)
+            hit_rows, hit_cols = np.nonzero(matches)
+            if len(hit_rows):
+                rows.append(hit_rows + row_start)
+                cols.append(hit_cols + col_start)
+                sims.append(scores[hit_rows, hit_cols])
+    
+    return _concat_pairs(rows, cols, sims)
+
+
+def _bucketed_pairs(
+    vectors: np.ndarray,
+    threshold: float,
+    block_size: int,
+    n_lists: int,
+    n_probe: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """IVF-blocked self-join (see similarity_pairs)"""
+    index = IVFIndex(dim=vectors.shape[1], n_lists=n_lists, n_probe=n_probe)
+    index.centroids = index._train(vectors)
+    home = index._assign(vectors)
+    
+    # The n_probe nearest buckets of every row, grouped by bucket
+    n_probe = min(n_probe, n_lists)
+    probes = np.empty((len(vectors), n_probe), dtype=np.int64)
+    for start in range(0, len(vectors), index.ASSIGN_BATCH):
+        scores = vectors[start:start + index.ASSIGN_BATCH] @ index.centroids.T
+        probes[start:start + len(scores)] = np.argpartition(-scores, n_probe - 1, axis=1)[:, :n_probe]
+    probe_lists = probes.ravel()
+    by_probe = np.argsort(probe_lists, kind="stable")
+    probe_rows = by_probe // n_probe
+    probe_offsets = np.concatenate(([0], np.cumsum(np.bincount(probe_lists, minlength=n_lists))))
+    del probes, probe_lists, by_probe
+    
+    by_home = np.argsort(home, kind="stable")
+    home_offsets = np.concatenate(([0], np.cumsum(np.bincount(home, minlength=n_lists))))
+    
+    rows, cols, sims = [], [], []
+    for list_no in range(n_lists):
+        members = by_home[home_offsets[list_no]:home_offsets[list_no + 1]]
+        queries = probe_rows[probe_offsets[list_no]:probe_offsets[list_no + 1]]
+        if not len(members) or not len(queries):
+            continue
+        member_vectors = vectors[members]
+        for start in range(0, len(queries), block_size):
+            query_rows = queries[start:start + block_size]
+            scores = vectors[query_rows] @ member_vectors.T
+            hit_queries, hit_members = np.nonzero(scores >= threshold)
+            a = query_rows[hit_queries]
+            b = members[hit_members]
+            keep = a != b
+            if keep.any():
+                rows.append(np.minimum(a[keep], b[keep]))
+                cols.append(np.maximum(a[keep], b[keep]))
+                sims.append(scores[hit_queries[keep], hit_members[keep]])
+    
+    rows, cols, sims = _concat_pairs(rows, cols, sims)
+    # A pair is found from both sides when the rows probe each other's bucket
+    _, first = np.unique(rows * len(vectors) + cols, return_index=True)
+    return rows[first], cols[first], sims[first]
+
+
+def _concat_pairs(rows: list, cols: list, sims: list) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.float32)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(sims)
+
+
+class IVFIndex:
+    """
+    Inverted-file index over unit-length float32 vectors
+    
+    Vectors are bucketed by their nearest centroid (spherical k-means).
+    A query scans only the n_probe buckets whose centroids are closest,
+    so lookup cost grows with N / n_lists instead of N. Similarity is the
+    inner product, i.e. cosine similarity for normalized vectors.
+    
+    Until enough vectors exist to train centroids the index behaves as
+    a single flat bucket (exact search).
+    """
+    
+    # Minimum vectors per list before centroids are trained
+    MIN_POINTS_PER_LIST = 39
+    # Vectors sampled per list for k-means training
+    TRAIN_POINTS_PER_LIST = 64
+    KMEANS_ITERATIONS = 10
+    ASSIGN_BATCH = 65536
+    
+    def __init__(self, dim: int, n_lists: int = 1024, n_probe: int = 16, seed: int = 0):
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self._rng = np.random.default_rng(seed)
+        
+        self.centroids: Optional[np.ndarray] = None
+        self._vectors: List[np.ndarray] = [np.empty((0, dim), dtype=np.float32)]
+        self._ids: List[List[Hashable]] = [[]]
+        self._sizes: List[int] = [0]
+        self._where: Dict[Hashable, Tuple[int, int]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._where)
+    
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._where
+    
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+    
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+    
+    def build(self, ids: Sequence[Hashable], vectors: np.ndarray) -> None:
+        """
+        Replace the index contents with a bulk load
+        
+        Args:
+            ids: Item identifiers (one per row)
+            vectors: (N, dim) matrix, normalized on the way in
+        """
+        vectors = normalize(vectors).reshape(-1, self.dim)
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length")
+        
+        if len(vectors) >= self.n_lists * self.MIN_POINTS_PER_LIST:
+            self.centroids = self._train(vectors)
+            assignments = self._assign(vectors)
+        else:
+            self.centroids = None
+            assignments = np.zeros(len(vectors), dtype=np.int64)
+        
+        self._fill(ids, vectors, assignments)
+    
+    def add(self, item_id: Hashable, vector: np.ndarray) -> None:
+        """Insert or replace a single vector"""
+        vector = normalize(vector).reshape(self.dim)
+        
+        if item_id in self._where:
+            self.remove(item_id)
+        
+        list_no = int(np.argmax(self.centroids @ vector)) if self.is_trained else 0
+        size = self._sizes[list_no]
+        storage = self._vectors[list_no]
+        
+        if size == len(storage):
+            grown = np.empty((max(16, size * 2), self.dim), dtype=np.float32)
+            grown[:size] = storage[:size]
+            self._vectors[list_no] = storage = grown
+        
+        storage[size] = vector
+        self._ids[list_no].append(item_id)
+        self._sizes[list_no] = size + 1
+        self._where[item_id] = (list_no, size)
+        
+        # Flat index grew large enough - switch to IVF
+        if not self.is_trained and len(self._where) >= self.n_lists * self.MIN_POINTS_PER_LIST:
+            self.build(*self._export())
+    
+    def remove(self, item_id: Hashable) -> bool:
+        """Remove a vector (swap-with-last, O(1)). Returns False if unknown."""
+        location = self._where.pop(item_id, None)
+        if location is None:
+            return False
+        
+        list_no, pos = location
+        last = self._sizes[list_no] - 1
+        ids = self._ids[list_no]
+        
+        if pos != last:
+            moved_id = ids[last]
+            self._vectors[list_no][pos] = self._vectors[list_no][last]
+            ids[pos] = moved_id
+            self._where[moved_id] = (list_no, pos)
+        
+        ids.pop()
+        self._sizes[list_no] = last
+        return True
+    
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    
+    def search(self, query: np.ndarray, k: int = 1) -> List[Tuple[Hashable, float]]:
+        """
+        Find the k most similar vectors
+        
+        Args:
+            query: Query vector (normalized on the way in)
+            k: Number of results
+        
+        Returns:
+            List of (item_id, cosine_similarity), best first
+        """
+        query = normalize(query).reshape(self.dim)
+        
+        if self.is_trained:
+            if self.n_probe >= self.n_lists:
+                probe = range(self.n_lists)
+            else:
+                probe = np.argpartition(-(self.centroids @ query), self.n_probe - 1)[:self.n_probe]
+        else:
+            probe = (0,)
+        
+        scores = []
+        owners = []
+        for list_no in probe:
+            size = self._sizes[list_no]
+            if size:
+                scores.append(self._vectors[list_no][:size] @ query)
+                owners.append((list_no, size))
+        
+        if not scores:
+            return []
+        
+        scores = np.concatenate(scores)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        
+        # Map flat candidate positions back to (list, offset)
+        bounds = np.cumsum([size for _, size in owners])
+        results = []
+        for flat in top:
+            bucket = int(np.searchsorted(bounds, flat, side="right"))
+            offset = int(flat - (bounds[bucket - 1] if bucket else 0))
+            results.append((self._ids[owners[bucket][0]][offset], float(scores[flat])))
+        return results
+    
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    
+    def _train(self, vectors: np.ndarray) -> np.ndarray:
+        """Spherical k-means on a sample of the data"""
+        sample_size = min(len(vectors), self.n_lists * self.TRAIN_POINTS_PER_LIST)
+        sample = vectors[self._rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[self._rng.choice(sample_size, self.n_lists, replace=False)].copy()
+        
+        for _ in range(self.KMEANS_ITERATIONS):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            counts = np.bincount(assignments, minlength=self.n_lists)
+            
+            order = np.argsort(assignments, kind="stable")
+            non_empty = counts > 0
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[non_empty]
+            
+            sums = np.empty_like(centroids)
+            sums[non_empty] = np.add.reduceat(sample[order], starts, axis=0)
+            # Re-seed empty clusters from random sample points
+            sums[~non_empty] = sample[self._rng.choice(sample_size, int((~non_empty).sum()))]
+            centroids = normalize(sums)
+        
+        return centroids
+    
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        """Nearest centroid for every row, in bounded-memory batches"""
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), self.ASSIGN_BATCH):
+            batch = vectors[start:start + self.ASSIGN_BATCH]
+            assignments[start:start + len(batch)] = np.argmax(batch @ self.centroids.T, axis=1)
+        return assignments
+    
+    def _fill(self, ids: Sequence[Hashable], vectors: np.ndarray, assignments: np.ndarray) -> None:
+        """Lay vectors out contiguously per list"""
+        n_lists = self.n_lists if self.is_trained else 1
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_lists)
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        ordered = vectors[order]
+        
+        self._vectors = []
+        self._ids = []
+        self._sizes = []
+        self._where = {}
+        
+        for list_no in range(n_lists):
+            start, end = offsets[list_no], offsets[list_no + 1]
+            self._vectors.append(ordered[start:end].copy())
+            list_ids = [ids[i] for i in order[start:end]]
+            self._ids.append(list_ids)
+            self._sizes.append(end - start)
+            for pos, item_id in enumerate(list_ids):
+                self._where[item_id] = (list_no, pos)
+    
+    def _export(self) -> Tuple[List[Hashable], np.ndarray]:
+        """All ids and vectors currently stored"""
+        ids: List[Hashable] = []
+        chunks = []
+        for list_no, size in enumerate(self._sizes):
+            ids.extend(self._ids[list_no][:size])
+            chunks.append(self._vectors[list_no][:size])
+        return ids, np.concatenate(chunks) if chunks else np.empty((0, self.dim), dtype=np.float32)
@@ -1,6 +1,6 @@
 """Database package for DigniLife."""
 
 from src.db.base import Base
-from src.db.session import AsyncSessionLocal, engine, get_db
+from src.db.session import AsyncSessionLocal, engine, get_db, UnitOfWorkRoute
 
-__all__ = ["Base", "AsyncSessionLocal", "engine", "get_db"]
+__all__ = ["Base", "AsyncSessionLocal", "engine", "get_db", "UnitOfWorkRoute"]
@@ -7,13 +7,34 @@ from typing import Optional
 from uuid import uuid4
 import enum
 
-from sqlalchemy import Boolean, Column, DateTime, String, Text, Integer, ForeignKey, Numeric, Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import DDL, event, text, Computed, Index, Boolean, Column, DateTime, String, Text, Integer, BigInteger, ForeignKey, Numeric, LargeBinary, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR, ARRAY
+from sqlalchemy.orm import Mapped, mapped_column, relationship, deferred
 
 from src.db.base import Base
 
 
+# Text search configuration of the search_vector columns; queries must use
+# the same one (src/services/search.py). 'simple' doesn't stem or drop stop
+# words, so tickets and chat in any of the app's languages index alike.
+SEARCH_CONFIG = "simple"
+
+
+def search_document(*fields) -> Computed:
+    """
+    Stored tsvector of (column, weight) pairs
+    
+    Postgres recomputes it on every INSERT/UPDATE, whichever path writes
+    the row (ORM, log sink batches, COPY), so the GIN index over it never
+    lags behind. Mapped deferred: rows load without it.
+    """
+    parts = [
+        f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce({column}, '')), '{weight}')"
+        for column, weight in fields
+    ]
+    return Computed(" || ".join(parts), persisted=True)
+
+
 # ============================================================================
 # ENUMS
 # ============================================================================
@@ -110,6 +131,11 @@ class TicketStatusEnum(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Substring search on email/name (ILIKE '%term%') for admins
+        Index("ix_users_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+        Index("ix_users_full_name_trgm", "full_name", postgresql_using="gin", postgresql_ops={"full_name": "gin_trgm_ops"}),
+    )
     
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
@@ -120,7 +146,7 @@ class User(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     is_verified: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     face_verified: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)  # NEW!
-    face_embedding: Mapped[Optional[str]] = mapped_column(Text)  # Store face data for matching
+    face_embedding: Mapped[Optional[bytes]] = mapped_column(LargeBinary)  # float32 vector, see services/face_embedding.py
     is_suspended: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     suspension_reason: Mapped[Optional[str]] = mapped_column(Text)
     
@@ -149,11 +175,15 @@ class User(Base):
     current_streak_days: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     longest_streak_days: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     last_task_completed_date: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    approved_tasks_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # referral milestones
     
     user_metadata: Mapped[Optional[dict]] = mapped_column(JSONB)
     
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    # Relationships
+    chat_messages = relationship("ChatMessage", back_populates="user", lazy="noload")
 
 
 class UserDevice(Base):
@@ -229,6 +259,7 @@ class BiometricVerification(Base):
 
 class UserActivityLog(Base):
     __tablename__ = "user_activity_logs"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
     
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     user_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -237,7 +268,7 @@ class UserActivityLog(Base):
     activity_data: Mapped[Optional[dict]] = mapped_column(JSONB)
     ip_address: Mapped[Optional[str]] = mapped_column(String(45))
     user_agent: Mapped[Optional[str]] = mapped_column(Text)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False, index=True)
 
 
 # ============================================================================
@@ -417,6 +448,12 @@ class Transaction(Base):
 
 class Withdrawal(Base):
     __tablename__ = "withdrawals"
+    __table_args__ = (
+        # Manual review queue, riskiest first
+        Index("ix_withdrawals_risk_review", "risk_score", postgresql_where=text("risk_hold")),
+        # Payouts whose outcome an admin must confirm with the provider
+        Index("ix_withdrawals_payout_unconfirmed", "updated_at", postgresql_where=text("payout_state = 'unconfirmed'")),
+    )
     
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     user_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -434,6 +471,28 @@ class Withdrawal(Base):
     
     status: Mapped[str] = mapped_column(SQLEnum(TransactionStatusEnum), default=TransactionStatusEnum.PENDING, nullable=False)
     
+    payout_reference: Mapped[Optional[str]] = mapped_column(String(255))  # Provider transfer id
+    payout_attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    payout_error: Mapped[Optional[str]] = mapped_column(Text)
+    payout_batch_id: Mapped[Optional[UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("payout_batches.id", ondelete="SET NULL"), index=True)
+    
+    # Fraud risk at request time (src/services/withdrawal_risk.py); held
+    # withdrawals are not paid out until an admin approves them
+    risk_score: Mapped[Optional[float]] = mapped_column(Numeric(5, 4))
+    risk_hold: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    risk_reviewed_by: Mapped[Optional[UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"))
+    risk_reviewed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    
+    # Only approved withdrawals are paid out; low-risk ones can be approved
+    # at request time (PAYOUT_AUTO_APPROVE_MAX_RISK)
+    approved_by: Mapped[Optional[UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"))
+    approved_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    
+    # src/services/payout_dispatcher.py: "dispatching" while claimed by a
+    # dispatcher, "unconfirmed" when the provider's outcome is unknown
+    payout_state: Mapped[Optional[str]] = mapped_column(String(20))
+    payout_claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    
     processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -453,6 +512,30 @@ class WithdrawalFee(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
 
+class PayoutBatch(Base):
+    """Bulk payout file sent to a provider (one payout method + currency)"""
+    __tablename__ = "payout_batches"
+    
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    
+    payout_method: Mapped[str] = mapped_column(SQLEnum(PayoutMethodEnum), nullable=False)
+    currency_code: Mapped[str] = mapped_column(String(3), nullable=False)
+    exchange_rate: Mapped[float] = mapped_column(Numeric(18, 8), nullable=False)  # FX snapshot used for every row
+    
+    file_path: Mapped[str] = mapped_column(String(512), nullable=False)
+    file_format: Mapped[str] = mapped_column(String(20), nullable=False)  # csv, fixed_width
+    
+    item_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total_amount_usd: Mapped[float] = mapped_column(Numeric(15, 2), default=0, nullable=False)
+    total_amount_local: Mapped[float] = mapped_column(Numeric(18, 2), default=0, nullable=False)
+    
+    status: Mapped[str] = mapped_column(SQLEnum(TransactionStatusEnum), default=TransactionStatusEnum.PENDING, nullable=False)
+    
+    processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
 class PayoutMethod(Base):
     __tablename__ = "payout_methods"
     
@@ -593,6 +676,10 @@ class AIMessage(Base):
 
 class AIContextStore(Base):
     __tablename__ = "ai_context_store"
+    __table_args__ = (
+        # One snapshot per user and context type (upsert target)
+        Index("uq_ai_context_store_user_id_context_type", "user_id", "context_type", unique=True),
+    )
     
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     user_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -600,12 +687,13 @@ class AIContextStore(Base):
     context_type: Mapped[str] = mapped_column(String(100), nullable=False)
     context_data: Mapped[dict] = mapped_column(JSONB, nullable=False)
     
-    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
 
 class AILearningEvent(Base):
     __tablename__ = "ai_learning_events"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
     
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     
@@ -618,19 +706,40 @@ class AILearningEvent(Base):
     human_validated: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     human_feedback: Mapped[Optional[str]] = mapped_column(Text)
     
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False, index=True)
 
 
 class AIProposal(Base):
     __tablename__ = "ai_proposals"
+    __table_args__ = (
+        Index("ix_ai_proposals_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_ai_proposals_lsh_bands", "lsh_bands", postgresql_using="gin"),
+    )
     
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    user_id: Mapped[Optional[UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), index=True)  # None for AI-generated proposals
     
-    proposal_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    title: Mapped[str] = mapped_column(String(255), default="", nullable=False)
+    category: Mapped[Optional[str]] = mapped_column(String(50))  # feature, improvement, bug_fix, other
+    proposal_type: Mapped[Optional[str]] = mapped_column(String(100))
     description: Mapped[str] = mapped_column(Text, nullable=False)
     rationale: Mapped[Optional[str]] = mapped_column(Text)
     impact_analysis: Mapped[Optional[dict]] = mapped_column(JSONB)
     
+    # Count of proposal_votes rows, kept in step. Left unindexed so a vote is
+    # a HOT update that writes no index entries; lists read the cached
+    # leaderboard instead
+    upvotes: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR, search_document(("title", "A"), ("description", "B"), ("rationale", "C")), deferred=True
+    )
+    
+    # Near-duplicate lookup, see src/core/minhash.py: the MinHash signature
+    # of title + description and one LSH bucket key per band, matched with
+    # the GIN index's array overlap
+    minhash: Mapped[Optional[bytes]] = mapped_column(LargeBinary, deferred=True)
+    lsh_bands: Mapped[Optional[list]] = mapped_column(ARRAY(BigInteger), deferred=True)
+    
     status: Mapped[str] = mapped_column(SQLEnum(AIProposalStatusEnum), default=AIProposalStatusEnum.PENDING, nullable=False)
     
     reviewed_by: Mapped[Optional[UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"))
@@ -645,6 +754,7 @@ class AIProposal(Base):
 
 class AIDecisionLog(Base):
     __tablename__ = "ai_decision_logs"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
     
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     
@@ -658,11 +768,12 @@ class AIDecisionLog(Base):
     was_overridden: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     override_reason: Mapped[Optional[str]] = mapped_column(Text)
     
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False, index=True)
 
 
 class SystemHealthMetric(Base):
     __tablename__ = "system_health_metrics"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
     
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     
@@ -670,15 +781,32 @@ class SystemHealthMetric(Base):
     metric_value: Mapped[float] = mapped_column(Numeric(15, 2), nullable=False)
     metric_metadata: Mapped[Optional[dict]] = mapped_column(JSONB)
     
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False, index=True)
 
 
 # ============================================================================
 # SUPPORT MODELS (3 tables)
 # ============================================================================
 
+# Tickets waiting in the agent inbox. Queries spell it out literally so
+# the planner can match the partial index (bound parameters can't).
+SUPPORT_QUEUE_CONDITION = "assigned_to IS NULL AND status IN ('OPEN', 'IN_PROGRESS')"
+
+
 class SupportTicket(Base):
     __tablename__ = "support_tickets"
+    __table_args__ = (
+        # Agent inbox: unassigned live tickets, earliest SLA deadline first
+        Index(
+            "ix_support_tickets_queue",
+            "sla_due_at",
+            "id",
+            postgresql_where=text(SUPPORT_QUEUE_CONDITION),
+        ),
+        # An agent's own tickets
+        Index("ix_support_tickets_assigned_to_status", "assigned_to", "status"),
+        Index("ix_support_tickets_search_vector", "search_vector", postgresql_using="gin"),
+    )
     
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     user_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -690,8 +818,16 @@ class SupportTicket(Base):
     status: Mapped[str] = mapped_column(SQLEnum(TicketStatusEnum), default=TicketStatusEnum.OPEN, nullable=False)
     
     assigned_to: Mapped[Optional[UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"))
+    assigned_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
     ai_handled: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     
+    # Reply deadline from priority and the user's tier (src/services/support_inbox.py)
+    sla_due_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    resolved_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR, search_document(("subject", "A"), ("description", "B")), deferred=True
+    )
     ticket_metadata: Mapped[Optional[dict]] = mapped_column(JSONB)
     
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -699,6 +835,7 @@ class SupportTicket(Base):
 
 class AdminActivityLog(Base):
     __tablename__ = "admin_activity_logs"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
     
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     admin_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -711,7 +848,7 @@ class AdminActivityLog(Base):
     
     was_ai_suggested: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False, index=True)
 
 # Add after AIProposal class, before the end of file
 
@@ -721,30 +858,61 @@ class ChatMessage(Base):
     Stores conversation history
     """
     __tablename__ = "chat_messages"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    conversation_id = Column(String(100), nullable=False, index=True)
+    conversation_id = Column(String(100), nullable=False)
     role = Column(String(20), nullable=False)  # user, assistant
     message = Column(Text, nullable=False)
     message_metadata = Column(JSONB, default=dict)
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    search_vector = deferred(Column(TSVECTOR, search_document(("message", "D"))))
+    created_at = Column(DateTime, primary_key=True, nullable=False, default=datetime.utcnow)
     
     # Relationships
     user = relationship("User", back_populates="chat_messages")
     
     def __repr__(self):
         return f"<ChatMessage {self.id} - {self.role}>"
-    
+
+
+# Latest messages of a conversation first (chat history loads read the top N)
+Index(
+    "ix_chat_messages_conversation_id_created_at",
+    ChatMessage.conversation_id,
+    ChatMessage.created_at.desc(),
+)
+
+Index("ix_chat_messages_search_vector", ChatMessage.search_vector, postgresql_using="gin")
+
+
 class Referral(Base):
-    """Referral system - users invite friends"""
+    """
+    Referral system - users invite friends
+    
+    A referrer's code record has referred_user_id NULL; each applied code
+    adds a row carrying the same referral_code.
+    """
     __tablename__ = "referrals"
+    __table_args__ = (
+        # Per-referrer lookups and counts (leading column covers referrer_id alone)
+        Index("ix_referrals_referrer_id_referred_user_id", "referrer_id", "referred_user_id"),
+        # Keyset pages of a referrer's referrals, newest first
+        Index("ix_referrals_referrer_id_created_at_id", "referrer_id", "created_at", "id"),
+        # A code belongs to one code record; applied rows repeat it
+        Index(
+            "uq_referrals_referral_code_code_record",
+            "referral_code",
+            unique=True,
+            postgresql_where=text("referred_user_id IS NULL"),
+        ),
+    )
     
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    referrer_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    referrer_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     referred_user_id: Mapped[Optional[UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), index=True)
     
-    referral_code: Mapped[str] = mapped_column(String(50), unique=True, nullable=False, index=True)
+    referral_code: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
     
     bonus_earned: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     bonus_amount_usd: Mapped[float] = mapped_column(Numeric(10, 2), default=0, nullable=False)
@@ -752,6 +920,36 @@ class Referral(Base):
     
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
+
+class ProposalVote(Base):
+    """One upvote per user and proposal (src/services/proposal_votes.py)"""
+    __tablename__ = "proposal_votes"
+    
+    proposal_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("ai_proposals.id", ondelete="CASCADE"), primary_key=True)
+    user_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ReferralAggregate(Base):
+    """
+    Per-referrer referral counters (src/services/referral_aggregates.py)
+    
+    Kept in step with referrals by the apply-code and bonus flows, so the
+    stats endpoint reads one row instead of counting a promoter's referrals.
+    """
+    __tablename__ = "referral_aggregates"
+    
+    referrer_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    referral_code: Mapped[Optional[str]] = mapped_column(String(50))
+    
+    total_referrals: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    successful_referrals: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total_earned_usd: Mapped[float] = mapped_column(Numeric(12, 2), default=0, nullable=False)
+    
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
 class ResearchSponsor(Base):
     """Research sponsors - OpenAI, Anthropic, Google, etc."""
     __tablename__ = "research_sponsors"
@@ -833,6 +1031,7 @@ class DataLicensingAgreement(Base):
 class FaceLivenessLog(Base):
     """Log of face liveness verification attempts"""
     __tablename__ = "face_liveness_logs"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
     
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     user_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -841,17 +1040,81 @@ class FaceLivenessLog(Base):
     confidence_score: Mapped[float] = mapped_column(Numeric(5, 2), nullable=False)
     detection_details: Mapped[dict] = mapped_column(JSONB, nullable=False)
     
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False)
 
 class SupportTicketMessage(Base):
     """Messages in support tickets"""
     __tablename__ = "support_ticket_messages"
+    __table_args__ = (
+        # Keyset pages of a thread, oldest first
+        Index("ix_support_ticket_messages_ticket_id_created_at_id", "ticket_id", "created_at", "id"),
+    )
     
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    ticket_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("support_tickets.id", ondelete="CASCADE"), nullable=False, index=True)
+    ticket_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("support_tickets.id", ondelete="CASCADE"), nullable=False)
     user_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     message: Mapped[str] = mapped_column(Text, nullable=False)
     is_staff: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class DuplicateAccountGroup(Base):
+    """Suspected duplicate accounts (same person) awaiting admin review"""
+    __tablename__ = "duplicate_account_groups"
+    
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    group_key: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)  # sha256 of sorted member ids
+    
+    user_ids: Mapped[list] = mapped_column(JSONB, nullable=False)
+    member_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    score: Mapped[float] = mapped_column(Numeric(5, 2), nullable=False)  # 0-100
+    max_face_similarity: Mapped[Optional[float]] = mapped_column(Numeric(5, 4))
+    evidence: Mapped[dict] = mapped_column(JSONB, nullable=False)  # face pairs, shared devices/IPs
+    
+    status: Mapped[str] = mapped_column(String(20), default="pending", nullable=False, index=True)  # pending, confirmed, dismissed
+    reviewed_by: Mapped[Optional[UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"))
+    reviewed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    review_notes: Mapped[Optional[str]] = mapped_column(Text)
+    
+    detected_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class IdempotencyKey(Base):
+    """
+    Stored response of a request sent with an Idempotency-Key header
+    (src/services/idempotency.py)
+    
+    Written in the request's own transaction, so it exists exactly when
+    the request's effects do. Expired rows are deleted by
+    scripts/cleanup_idempotency_keys.py.
+    """
+    __tablename__ = "idempotency_keys"
+    
+    user_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    
+    endpoint: Mapped[str] = mapped_column(String(255), nullable=False)  # "POST /api/v1/withdrawals/request"
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)  # sha256 of query string and body
+    status_code: Mapped[int] = mapped_column(Integer, nullable=False)
+    response_body: Mapped[str] = mapped_column(Text, nullable=False)
+    
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+# Trigram indexes on users need pg_trgm before the tables are created
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+# Partitioned log tables get a DEFAULT partition when created from metadata
+# (tests, fresh dev databases); monthly partitions come from src/db/partitions.py
+for _model in (
+    UserActivityLog, FaceLivenessLog, AIDecisionLog, AILearningEvent,
+    SystemHealthMetric, ChatMessage, AdminActivityLog,
+):
+    event.listen(
+        _model.__table__,
+        "after_create",
+        DDL(f"CREATE TABLE {_model.__tablename__}_default PARTITION OF {_model.__tablename__} DEFAULT"),
+    )
\ No newline at end of file
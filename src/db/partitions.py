@@ -0,0 +1,188 @@
+"""
+DigniLife Platform - Log Table Partitioning
+Monthly range partitions on created_at for the append-only log tables.
+Upcoming partitions are created ahead of time, and expired ones are
+archived to gzip'd CSV and dropped, per the RETENTION_* settings.
+"""
+from typing import Dict, List, Optional
+from datetime import date, datetime, timedelta
+import gzip
+import os
+import re
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from src.core.config import settings
+
+
+# Converted by migration a7d3f1c9e215; each also has a <table>_default partition
+PARTITIONED_TABLES = (
+    "user_activity_logs",
+    "face_liveness_logs",
+    "ai_decision_logs",
+    "ai_learning_events",
+    "system_health_metrics",
+    "chat_messages",
+    "admin_activity_logs",
+)
+
+# Partition DDL takes a brief exclusive lock on the parent; don't queue
+# behind long transactions (and block inserts while waiting)
+LOCK_TIMEOUT = "5s"
+
+
+def add_months(month: date, count: int) -> date:
+    """First day of the month `count` months after `month`"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def partition_month(table: str, name: str) -> Optional[date]:
+    """Month a monthly partition covers (None for the default partition)"""
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})(\d{{2}})", name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def months_to_create(today: date, months_ahead: int) -> List[date]:
+    """Current month plus months_ahead upcoming months"""
+    current = today.replace(day=1)
+    return [add_months(current, offset) for offset in range(months_ahead + 1)]
+
+
+def is_expired(month: date, retention_days: int, today: date) -> bool:
+    """A partition expires once its newest possible row is past retention"""
+    if retention_days <= 0:
+        return False
+    return add_months(month, 1) <= today - timedelta(days=retention_days)
+
+
+class PartitionManager:
+    """
+    Maintenance job for partitioned log tables (scripts/manage_partitions.py)
+    
+    Run daily. Each partition change is its own short transaction.
+    """
+    
+    @staticmethod
+    async def list_partitions(conn: AsyncConnection, table: str) -> List[str]:
+        result = await conn.execute(
+            text("""
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = :table
+            """),
+            {"table": table},
+        )
+        return sorted(result.scalars().all())
+    
+    @staticmethod
+    async def create_partition(conn: AsyncConnection, table: str, month: date) -> None:
+        """
+        Create and attach one monthly partition
+        
+        Rows that landed in the default partition for that month (the job
+        didn't run in time) are moved into it first, otherwise ATTACH
+        would fail.
+        """
+        name = partition_name(table, month)
+        start, end = month.isoformat(), add_months(month, 1).isoformat()
+        await conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+        await conn.execute(text(
+            f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)"
+        ))
+        # Generated columns (search_vector) can't be inserted; they recompute
+        columns = (await conn.execute(
+            text("""
+                SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position)
+                FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = :table AND is_generated = 'NEVER'
+            """),
+            {"table": table},
+        )).scalar_one()
+        await conn.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {table}_default
+                WHERE created_at >= '{start}' AND created_at < '{end}'
+                RETURNING {columns}
+            )
+            INSERT INTO {name} ({columns}) SELECT {columns} FROM moved
+        """))
+        await conn.execute(text(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"
+        ))
+    
+    @staticmethod
+    async def archive_partition(conn: AsyncConnection, table: str, name: str, archive_dir: str) -> str:
+        """Stream a partition to <archive_dir>/<table>/<name>.csv.gz via COPY"""
+        directory = os.path.join(archive_dir, table)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{name}.csv.gz")
+        partial = path + ".partial"
+        
+        raw = await conn.get_raw_connection()
+        with gzip.open(partial, "wb") as archive:
+            async def write(chunk: bytes) -> None:
+                archive.write(chunk)
+            
+            await raw.driver_connection.copy_from_table(name, output=write, format="csv", header=True)
+            archive.flush()
+            os.fsync(archive.fileobj.fileno())
+        os.replace(partial, path)
+        return path
+    
+    @staticmethod
+    async def run(
+        engine: AsyncEngine,
+        today: Optional[date] = None,
+        months_ahead: Optional[int] = None,
+        archive_dir: Optional[str] = None,
+        retention_days: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Pre-create upcoming partitions and retire expired ones on every table
+        
+        Expired partitions are archived before they are detached and
+        dropped, so a failed archive leaves the data in place.
+        
+        Returns:
+            {table: {"created": [...], "archived": [paths]}}
+        """
+        today = today or datetime.utcnow().date()
+        months_ahead = settings.PARTITION_PREMAKE_MONTHS if months_ahead is None else months_ahead
+        archive_dir = archive_dir or settings.PARTITION_ARCHIVE_DIR
+        retention_days = retention_days or settings.partition_retention_days
+        
+        summary: Dict[str, Dict[str, List[str]]] = {}
+        for table in PARTITIONED_TABLES:
+            created: List[str] = []
+            archived: List[str] = []
+            
+            async with engine.connect() as conn:
+                existing = set(await PartitionManager.list_partitions(conn, table))
+            
+            for month in months_to_create(today, months_ahead):
+                if partition_name(table, month) not in existing:
+                    async with engine.begin() as conn:
+                        await PartitionManager.create_partition(conn, table, month)
+                    created.append(partition_name(table, month))
+            
+            for name in sorted(existing):
+                month = partition_month(table, name)
+                if month is None or not is_expired(month, retention_days.get(table, 0), today):
+                    continue
+                async with engine.begin() as conn:
+                    path = await PartitionManager.archive_partition(conn, table, name, archive_dir)
+                    await conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+                    await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                    await conn.execute(text(f"DROP TABLE {name}"))
+                archived.append(path)
+            
+            summary[table] = {"created": created, "archived": archived}
+        return summary
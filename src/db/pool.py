@@ -0,0 +1,153 @@
+"""
+DigniLife Platform - Connection Pool
+Engine factory driven by Settings, checkout wait-time telemetry and a
+background health check that replaces pool_pre_ping
+"""
+from typing import Any, Dict, List
+from uuid import uuid4
+import asyncio
+import json
+import logging
+import time
+
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.core.config import settings
+from src.core import metrics
+
+
+logger = logging.getLogger("dignilife.db")
+
+POOL_WAIT_SECONDS = metrics.Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to obtain a pooled connection (queue wait plus connect)",
+    label_names=("pool",),
+)
+
+# name -> engine, for scrape-time gauges and health state
+_engines: Dict[str, AsyncEngine] = {}
+_healthy: Dict[str, bool] = {}
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait time per pool"""
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - started, self.logging_name or "default")
+
+
+def create_engine(url: str, name: str) -> AsyncEngine:
+    """
+    Async engine with pool settings from Settings
+    
+    - Pool size from DB_POOL_SIZE / DB_MAX_OVERFLOW, or derived from the
+      DB_MAX_CONNECTIONS budget shared by WEB_CONCURRENCY workers
+    - No pre-ping round trip per checkout; see monitor_pool_health
+    - DB_PGBOUNCER: no asyncpg prepared statement caching and unique
+      statement names, as transaction pooling requires
+    """
+    pool_size, max_overflow = settings.db_pool_limits
+    connect_args: Dict[str, Any] = {}
+    if settings.DB_PGBOUNCER:
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    
+    engine = create_async_engine(
+        url,
+        echo=settings.sql_echo,
+        poolclass=TimedAsyncQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=False,
+        pool_logging_name=name,
+        connect_args=connect_args,
+    )
+    _engines[name] = engine
+    _healthy[name] = True
+    return engine
+
+
+def is_connection_error(error: Exception) -> bool:
+    """True if the error means the pooled connections are broken, not just busy"""
+    if isinstance(error, OSError):
+        return True
+    if isinstance(error, exc.DBAPIError):
+        return error.connection_invalidated or isinstance(error, (exc.OperationalError, exc.InterfaceError))
+    return False
+
+
+async def check_pool_health(engine: AsyncEngine, name: str) -> bool:
+    """
+    One SELECT 1
+    
+    On a connection failure the pool is disposed so stale connections go.
+    A checkout timeout only means the pool is busy: its connections are
+    kept, since disposing would make every request reconnect at once.
+    """
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        healthy = True
+    except Exception as e:
+        disposed = is_connection_error(e)
+        if _healthy.get(name, True):
+            logger.warning(json.dumps({
+                "event": "pool_health_check_failed",
+                "pool": name,
+                "disposed": disposed,
+                "detail": f"{type(e).__name__}: {e}",
+            }))
+        if disposed:
+            await engine.dispose()
+        healthy = False
+    _healthy[name] = healthy
+    return healthy
+
+
+async def monitor_pool_health(engine: AsyncEngine, name: str, interval_seconds: float) -> None:
+    """
+    Background task replacing pool_pre_ping
+    
+    Pre-ping costs a round trip on every checkout. Instead one probe runs
+    per interval; connections dropped by the server are caught by this
+    probe or by SQLAlchemy's disconnect handling (which invalidates the
+    whole pool), and pool_recycle retires idle ones before server or
+    proxy timeouts do.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await check_pool_health(engine, name)
+
+
+@metrics.register
+def _pool_gauges() -> List[str]:
+    status = [(name, engine.pool) for name, engine in _engines.items()]
+    return (
+        metrics.gauge_lines(
+            "db_pool_size", "Configured persistent connections",
+            [({"pool": name}, pool.size()) for name, pool in status],
+        )
+        + metrics.gauge_lines(
+            "db_pool_checked_out", "Connections currently in use",
+            [({"pool": name}, pool.checkedout()) for name, pool in status],
+        )
+        + metrics.gauge_lines(
+            "db_pool_overflow", "Connections open beyond pool_size (negative = not yet opened)",
+            [({"pool": name}, pool.overflow()) for name, pool in status],
+        )
+        + metrics.gauge_lines(
+            "db_pool_healthy", "1 if the last background health check passed",
+            [({"pool": name}, int(_healthy.get(name, True))) for name in _engines],
+        )
+    )
@@ -0,0 +1,147 @@
+"""
+DigniLife Platform - Read Replica Routing
+Decides per request whether read-only queries may use the replica
+"""
+from typing import Optional
+from collections import OrderedDict
+import asyncio
+import math
+import time
+
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.core.config import settings
+from src.core.security import decode_token
+
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# Set after a successful write so stickiness also holds across uvicorn workers
+LAST_WRITE_COOKIE = "dl_last_write"
+
+# Replay delay on a streaming replica. Zero when the replica has replayed
+# everything it received (an idle primary must not look like lag), and
+# zero on a primary, so one instance behind two URLs works for local testing.
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def request_user_key(request: Request) -> Optional[str]:
+    """User id from the bearer token, if any (no database access)"""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_token(token)
+    return payload.get("sub") if payload else None
+
+
+class ReadRouter:
+    """
+    Replica routing policy
+    - Read-your-writes: a user who wrote within sticky_seconds reads
+      from the primary (tracked per user and via a cookie)
+    - Lag awareness: while measured replica lag exceeds max_lag_seconds,
+      or the replica can't be reached, every read goes to the primary
+    """
+    
+    def __init__(
+        self,
+        enabled: bool,
+        sticky_seconds: float,
+        max_lag_seconds: float,
+        max_tracked_users: int = 100000,
+    ):
+        self.enabled = enabled
+        self.sticky_seconds = sticky_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self.max_tracked_users = max_tracked_users
+        self.replica_lag: Optional[float] = None  # None = not measured / unreachable
+        self._last_write: "OrderedDict[str, float]" = OrderedDict()
+    
+    @property
+    def replica_healthy(self) -> bool:
+        return self.replica_lag is not None and self.replica_lag <= self.max_lag_seconds
+    
+    def record_write(self, user_key: str) -> None:
+        """Pin a user's reads to the primary for sticky_seconds"""
+        self._last_write[user_key] = time.monotonic()
+        self._last_write.move_to_end(user_key)
+        while len(self._last_write) > self.max_tracked_users:
+            self._last_write.popitem(last=False)
+    
+    def recently_wrote(self, user_key: str) -> bool:
+        written_at = self._last_write.get(user_key)
+        if written_at is None:
+            return False
+        if time.monotonic() - written_at >= self.sticky_seconds:
+            del self._last_write[user_key]
+            return False
+        return True
+    
+    def use_replica(self, request: Request) -> bool:
+        """True if this request's reads may be served by the replica"""
+        if not self.enabled or not self.replica_healthy:
+            return False
+        
+        cookie = request.cookies.get(LAST_WRITE_COOKIE)
+        if cookie:
+            try:
+                if time.time() - float(cookie) < self.sticky_seconds:
+                    return False
+            except ValueError:
+                pass
+        
+        user_key = request_user_key(request)
+        return not (user_key and self.recently_wrote(user_key))
+    
+    async def check_lag(self, engine: AsyncEngine) -> Optional[float]:
+        """Measure replica lag in seconds (None if unreachable)"""
+        try:
+            async with engine.connect() as conn:
+                lag = (await conn.execute(REPLICA_LAG_SQL)).scalar()
+            self.replica_lag = float(lag or 0)
+        except Exception as e:
+            if self.replica_lag is not None:
+                print(f"⚠️  Read replica unavailable, reading from primary: {e}")
+            self.replica_lag = None
+        return self.replica_lag
+    
+    async def monitor_lag(self, engine: AsyncEngine, interval_seconds: float) -> None:
+        """Background task: re-measure lag every interval_seconds"""
+        while True:
+            await self.check_lag(engine)
+            await asyncio.sleep(interval_seconds)
+
+
+read_router = ReadRouter(
+    enabled=bool(settings.DATABASE_READ_URL),
+    sticky_seconds=settings.READ_YOUR_WRITES_SECONDS,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+)
+
+
+async def read_your_writes_middleware(request: Request, call_next):
+    """Record successful writes so the writer's next reads hit the primary"""
+    response = await call_next(request)
+    
+    if read_router.enabled and request.method in WRITE_METHODS and response.status_code < 400:
+        user_key = request_user_key(request)
+        if user_key:
+            read_router.record_write(user_key)
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            f"{time.time():.3f}",
+            max_age=math.ceil(read_router.sticky_seconds),
+            httponly=True,
+            samesite="lax",
+        )
+    
+    return response
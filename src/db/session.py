@@ -1,20 +1,18 @@
 """
 DigniLife Platform - Database Session
 """
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy import text
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Callable
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
 
 from src.core.config import settings
+from src.db.pool import create_engine
+from src.db.routing import read_router
 
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
-)
+engine = create_engine(settings.DATABASE_URL, "primary")
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -24,20 +22,111 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Read replica (falls back to the primary engine when not configured)
+read_engine = create_engine(settings.DATABASE_READ_URL, "replica") if settings.DATABASE_READ_URL else engine
+
+AsyncReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
+
+AFTER_COMMIT = "after_commit"
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """
+    Run callback once the session's pending writes have committed
+    
+    For per-worker state (caches, counters) that must not reflect writes
+    which fail to commit or are rolled back; those drop the callbacks.
+    """
+    session.info.setdefault(AFTER_COMMIT, []).append(callback)
+
+
+async def commit_session(session: AsyncSession) -> None:
+    """Commit, then run the callbacks registered with after_commit"""
+    callbacks = session.info.pop(AFTER_COMMIT, [])
+    await session.commit()
+    for callback in callbacks:
+        callback()
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Database session dependency"""
+
+async def rollback_session(session: AsyncSession) -> None:
+    """Roll back, dropping the callbacks registered with after_commit"""
+    session.info.pop(AFTER_COMMIT, None)
+    await session.rollback()
+
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Database session dependency
+    
+    The session is shared by every dependency of the request (the
+    current user is loaded through it too) and exposed on
+    request.state.db for UnitOfWorkRoute.
+    """
     async with AsyncSessionLocal() as session:
+        request.state.db = session
         try:
             yield session
-            await session.commit()
+            await commit_session(session)
         except Exception:
-            await session.rollback()
+            await rollback_session(session)
             raise
         finally:
             await session.close()
 
 
+class UnitOfWorkRoute(APIRoute):
+    """
+    Route class for write endpoints: one transaction per request
+    
+    Handlers only add / flush / execute and never commit. The request's
+    get_db session is committed once, after the handler has returned and
+    the response has been rendered but before it is sent, so a failed
+    commit surfaces as an error instead of a 2xx followed by a rollback
+    (get_db's own commit runs after the response has gone out).
+    
+    Usage: APIRouter(route_class=UnitOfWorkRoute)
+    """
+    
+    async def commit(self, request: Request, response: Response) -> Response:
+        """Commit the request's session; returns the response to send"""
+        session = getattr(request.state, "db", None)
+        if session is not None and session.in_transaction():
+            await commit_session(session)
+        return response
+    
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        
+        async def unit_of_work_handler(request: Request):
+            return await self.commit(request, await handler(request))
+        
+        return unit_of_work_handler
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Read-only database session dependency
+    
+    Served by the read replica unless the caller wrote recently
+    (read-your-writes) or the replica is lagging/unreachable. Never
+    commits - use get_db for anything that writes.
+    """
+    session_factory = AsyncReadSessionLocal if read_router.use_replica(request) else AsyncSessionLocal
+    async with session_factory() as session:
+        try:
+            yield session
+        finally:
+            await session.rollback()
+            await session.close()
+
+
 async def init_db() -> None:
     """Initialize database"""
     async with AsyncSessionLocal() as session:
@@ -48,4 +137,6 @@ async def init_db() -> None:
 async def close_db() -> None:
     """Close database connections"""
     await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
     print("👋 Database closed")
\ No newline at end of file
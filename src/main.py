@@ -3,11 +3,19 @@ DigniLife Platform - Main Application
 COMPLETE Phase 3 with ALL features
 """
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 
 from src.core.config import settings
-from src.db.session import init_db, close_db
+from src.core import metrics
+from src.db.session import init_db, close_db, AsyncSessionLocal, engine, read_engine
+from src.db.pool import monitor_pool_health
+from src.db.routing import read_router, read_your_writes_middleware
+from src.services.face_embedding import FaceRecognition, refresh_index_periodically
+from src.services.log_sink import log_sink
+from src.services.device_binding import device_bindings, device_binding_middleware
 
 # Import ALL routers
 from src.api.v1 import (
@@ -21,11 +29,43 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler"""
     # Startup
     await init_db()
+    face_index_refresher = None
+    if settings.FACE_INDEX_LOAD_ON_STARTUP:
+        async with AsyncSessionLocal() as session:
+            enrolled = await FaceRecognition.load_index(session)
+        print(f"🧑 Face index loaded: {enrolled} enrolled users")
+        face_index_refresher = asyncio.create_task(
+            refresh_index_periodically(AsyncSessionLocal, settings.FACE_INDEX_REFRESH_SECONDS)
+        )
+    log_sink.start(engine)
+    device_bindings.start(engine)
+    health_monitors = [
+        asyncio.create_task(monitor_pool_health(engine, "primary", settings.DB_HEALTH_CHECK_SECONDS))
+    ]
+    if read_engine is not engine:
+        health_monitors.append(
+            asyncio.create_task(monitor_pool_health(read_engine, "replica", settings.DB_HEALTH_CHECK_SECONDS))
+        )
+    lag_monitor = None
+    if read_router.enabled:
+        lag_monitor = asyncio.create_task(
+            read_router.monitor_lag(read_engine, settings.REPLICA_LAG_CHECK_SECONDS)
+        )
+        print("📖 Read replica routing enabled")
     print("🚀 DigniLife API started")
     print(f"📍 Environment: {settings.ENVIRONMENT}")
     print(f"🗄️  Database: Connected")
     yield
     # Shutdown
+    if face_index_refresher:
+        face_index_refresher.cancel()
+    if lag_monitor:
+        lag_monitor.cancel()
+    for monitor in health_monitors:
+        monitor.cancel()
+    # Buffered log rows and last-seen updates need the pool, so drain before closing it
+    await log_sink.stop()
+    await device_bindings.stop()
     await close_db()
     print("👋 DigniLife API stopped")
 
@@ -46,6 +86,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Read-your-writes tracking for replica routing
+app.middleware("http")(read_your_writes_middleware)
+
+# One device per user, checked from a per-worker cache
+app.middleware("http")(device_binding_middleware)
+
 # Include ALL routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
@@ -101,6 +147,12 @@ async def root():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (per worker process)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
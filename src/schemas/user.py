@@ -82,6 +82,11 @@ class UserLogin(BaseModel):
     password: Optional[str] = None  # Fallback if face fails
 
 
+class FaceEnroll(BaseModel):
+    """Enroll a face for a signed-in account that has none stored"""
+    face_image_base64: str
+
+
 class Token(BaseModel):
     """JWT Token response"""
     access_token: str
@@ -0,0 +1,125 @@
+"""
+Chat History Service
+Recent messages per conversation for the AI chat assistant
+
+Each conversation keeps its last CHAT_HISTORY_MESSAGES messages in a
+ring buffer (deque with maxlen), evicted LRU beyond
+CHAT_HISTORY_MAX_CONVERSATIONS. chat_messages stays the source of truth:
+a cached history is used only while the conversation's newest stored
+message is one this worker knows (a one-row probe of the
+(conversation_id, created_at DESC) index), so turns handled by another
+worker are picked up on the next turn. Misses load the last messages off
+the same index; new messages are persisted through the log sink.
+"""
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from collections import OrderedDict, deque
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.db.models import ChatMessage
+from src.services.log_sink import log_sink
+
+
+def conversation_filter(user_id: UUID, conversation_id: str) -> Tuple[Any, ...]:
+    """One user's messages in a conversation (conversation ids come from clients)"""
+    return (ChatMessage.conversation_id == conversation_id, ChatMessage.user_id == user_id)
+
+
+class ChatHistoryStore:
+    """
+    Bounded in-memory history cache
+    
+    Per-turn cost is O(CHAT_HISTORY_MESSAGES) whatever the conversation
+    length: a hit is one single-row index probe plus the deque, a miss
+    reads at most that many rows off the index, and writes don't wait
+    for the database.
+    """
+    
+    def __init__(
+        self,
+        max_messages: Optional[int] = None,
+        max_conversations: Optional[int] = None,
+    ):
+        self.max_messages = max_messages or settings.CHAT_HISTORY_MESSAGES
+        self.max_conversations = max_conversations or settings.CHAT_HISTORY_MAX_CONVERSATIONS
+        # (user_id, conversation_id) -> messages with their id and created_at
+        self._conversations: "OrderedDict[Tuple[str, str], Deque[Dict[str, Any]]]" = OrderedDict()
+    
+    def _store(self, key: Tuple[str, str], messages: List[Dict[str, Any]]) -> Deque[Dict[str, Any]]:
+        ring = deque(messages, maxlen=self.max_messages)
+        self._conversations[key] = ring
+        self._conversations.move_to_end(key)
+        while len(self._conversations) > self.max_conversations:
+            self._conversations.popitem(last=False)
+        return ring
+    
+    async def get(self, db: AsyncSession, user_id: UUID, conversation_id: str) -> List[Dict[str, str]]:
+        """Last messages of a conversation, oldest first ({"role", "content"})"""
+        key = (str(user_id), conversation_id)
+        messages = self._conversations.get(key)
+        if messages is not None:
+            latest = await db.scalar(
+                select(ChatMessage.id)
+                .where(*conversation_filter(user_id, conversation_id))
+                .order_by(ChatMessage.created_at.desc())
+                .limit(1)
+            )
+            if latest is None or any(message["id"] == latest for message in messages):
+                self._conversations.move_to_end(key)
+            else:
+                messages = None  # Another worker added to it
+        
+        if messages is None:
+            result = await db.execute(
+                select(ChatMessage.id, ChatMessage.created_at, ChatMessage.role, ChatMessage.message)
+                .where(*conversation_filter(user_id, conversation_id))
+                .order_by(ChatMessage.created_at.desc())
+                .limit(self.max_messages)
+            )
+            loaded = [
+                {"id": row.id, "created_at": row.created_at, "role": row.role, "content": row.message}
+                for row in reversed(result.all())
+            ]
+            # Keep this worker's messages the log sink hasn't written yet
+            # (older ones that merely fell out of the window sort first and
+            # drop off the ring)
+            stored = {message["id"] for message in loaded}
+            unwritten = [message for message in self._conversations.get(key, ()) if message["id"] not in stored]
+            messages = self._store(key, sorted(loaded + unwritten, key=lambda message: message["created_at"]))
+        return [{"role": message["role"], "content": message["content"]} for message in messages]
+    
+    def start(self, user_id: UUID, conversation_id: str) -> None:
+        """Register a brand-new conversation (nothing to load)"""
+        self._store((str(user_id), conversation_id), [])
+    
+    async def append(
+        self,
+        user_id: UUID,
+        conversation_id: str,
+        role: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Add a message to the ring buffer and queue it for persistence"""
+        message_id, created_at = uuid4(), datetime.utcnow()
+        messages = self._conversations.get((str(user_id), conversation_id))
+        if messages is not None:
+            messages.append({"id": message_id, "created_at": created_at, "role": role, "content": content})
+        
+        await log_sink.write(
+            ChatMessage,
+            id=message_id,
+            created_at=created_at,
+            user_id=user_id,
+            conversation_id=conversation_id,
+            role=role,
+            message=content,
+            message_metadata=metadata or {},
+        )
+
+
+chat_history = ChatHistoryStore()
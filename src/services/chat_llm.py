@@ -0,0 +1,62 @@
+"""
+Chat LLM Service
+Token-streaming language model adapters for the AI chat assistant
+
+AIChat still decides the intent and drafts a grounded reply (balances,
+fees, tiers); the LLM turns that into the streamed answer. AI_CHAT_LLM
+selects the adapter as "module:ClassName"; FakeChatLLM streams the draft
+back with configurable latency for development and TTFB measurements.
+"""
+from typing import Any, AsyncIterator, Dict, Optional
+from abc import ABC, abstractmethod
+import asyncio
+import importlib
+import re
+
+from src.core.config import settings
+
+
+class ChatLLM(ABC):
+    """
+    Base adapter for a streaming chat model
+    
+    stream() receives {"message", "history", "context", "intent",
+    "draft"}: the user's message, the recent conversation, the user's
+    context snapshot (tier, balances, streak), and AIChat's intent and
+    grounded draft reply. It yields text chunks and must stop cleanly
+    when closed (the client went away), e.g. by closing its upstream
+    request in a finally block.
+    """
+    
+    @abstractmethod
+    async def stream(self, prompt: Dict[str, Any]) -> AsyncIterator[str]:
+        ...
+
+
+class FakeChatLLM(ChatLLM):
+    """
+    Local stand-in: streams the draft word by word
+    
+    Sleeps first_token_ms before the first chunk (prompt processing)
+    and token_ms between chunks (generation).
+    """
+    
+    def __init__(self, first_token_ms: Optional[int] = None, token_ms: Optional[int] = None):
+        self.first_token_ms = settings.AI_CHAT_FAKE_FIRST_TOKEN_MS if first_token_ms is None else first_token_ms
+        self.token_ms = settings.AI_CHAT_FAKE_TOKEN_MS if token_ms is None else token_ms
+    
+    async def stream(self, prompt: Dict[str, Any]) -> AsyncIterator[str]:
+        await asyncio.sleep(self.first_token_ms / 1000)
+        for index, token in enumerate(re.findall(r"\s*\S+", prompt["draft"])):
+            if index:
+                await asyncio.sleep(self.token_ms / 1000)
+            yield token
+
+
+def load_chat_llm(path: str) -> ChatLLM:
+    """Load an adapter class from a "module:ClassName" path"""
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+chat_llm = load_chat_llm(settings.AI_CHAT_LLM)
@@ -0,0 +1,252 @@
+"""
+Chat Templates Service
+Localized AIChat replies, compiled once from data files
+
+Each CHAT_TEMPLATES_DIR/<language>.json maps an intent to {"message"
+(list of lines), "suggestions", "actions"}; "<intent>.<tier>" overrides
+the intent for one subscription tier. A language file only needs the
+entries it translates - the rest come from en.json.
+
+At load every (language, intent, tier) is compiled: tier fields (fees,
+multipliers, next tier) come from the earning engine tables and are
+substituted up front, so a reply only fills the per-user fields
+(balance, streak, tasks today) with str.format_map. Suggestions and
+actions are then constant; they are built once as tuples/read-only
+dicts and shared by every reply.
+
+CHAT_TEMPLATES_DIR is relative to the project root, not the working
+directory.
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+import json
+import os
+import string
+
+from src.core.config import settings
+from src.core.earning_engine import EarningEngine, WithdrawalFeeCalculator
+from src.db.models import SubscriptionTier
+from src.services.intent_classifier import DEFAULT_INTENT, INTENTS
+
+
+DEFAULT_LANGUAGE = "en"
+
+# Cheapest to most expensive; the upgrade path
+TIER_ORDER = (SubscriptionTier.FREE, SubscriptionTier.PRO, SubscriptionTier.PREMIUM)
+
+# Fields filled per reply: name -> fn(AIChat context, tier's withdrawal fee rate)
+USER_FIELDS: Dict[str, Callable[[Dict[str, Any], float], Any]] = {
+    "balance": lambda context, fee_rate: context["available_balance"],
+    "net_balance": lambda context, fee_rate: context["available_balance"] * (1 - fee_rate),
+    "streak": lambda context, fee_rate: context["current_streak"],
+    "streak_bonus": lambda context, fee_rate: min(context["current_streak"], 30),
+    "tasks_today": lambda context, fee_rate: context["tasks_completed_today"],
+}
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Resolved (language, intent, tier) lookups kept beyond the exact keys
+MAX_ALIASES = 4096
+
+_formatter = string.Formatter()
+
+
+class ReadOnlyDict(dict):
+    """A dict that can be shared between replies (serializes like a dict)"""
+    
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("chat template actions are shared and read-only")
+    
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    
+    def __hash__(self):
+        return id(self)
+
+
+def tier_fields(tier: SubscriptionTier) -> Dict[str, Any]:
+    """Fields fixed by the subscription tier"""
+    def fee_pct(t: SubscriptionTier) -> int:
+        return int(WithdrawalFeeCalculator.FEE_RATES[t] * 100)
+    
+    fee_rate = float(WithdrawalFeeCalculator.FEE_RATES[tier])
+    fields = {
+        "tier": tier.value.upper(),
+        "fee_pct": fee_pct(tier),
+        "multiplier": float(EarningEngine.TIER_MULTIPLIERS[tier]),
+        "example_net": 100 * (1 - fee_rate),
+        **{f"fee_pct_{t.value}": fee_pct(t) for t in TIER_ORDER},
+    }
+    position = TIER_ORDER.index(tier)
+    if position + 1 < len(TIER_ORDER):
+        next_tier = TIER_ORDER[position + 1]
+        fields.update({
+            "next_tier": next_tier.value.upper(),
+            "next_fee_pct": fee_pct(next_tier),
+            "next_multiplier": float(EarningEngine.TIER_MULTIPLIERS[next_tier]),
+            "next_example_net": 100 * (1 - float(WithdrawalFeeCalculator.FEE_RATES[next_tier])),
+        })
+    return fields
+
+
+def bind(text: str, fields: Dict[str, Any]) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Substitute the given fields, keep the others as placeholders
+    
+    Returns (format string, names still to fill); with nothing left to
+    fill the string is final.
+    """
+    parts = []
+    remaining = []
+    for literal, name, spec, conversion in _formatter.parse(text):
+        parts.append(literal.replace("{", "{{").replace("}", "}}"))
+        if name is None:
+            continue
+        if name in fields:
+            value = _formatter.convert_field(fields[name], conversion) if conversion else fields[name]
+            parts.append(format(value, spec).replace("{", "{{").replace("}", "}}"))
+        else:
+            remaining.append(name)
+            parts.append("{" + name + (f"!{conversion}" if conversion else "") + (f":{spec}" if spec else "") + "}")
+    bound = "".join(parts)
+    if not remaining:
+        return bound.format_map({}), ()
+    return bound, tuple(dict.fromkeys(remaining))
+
+
+def compile_message(text: str, fee_rate: float, where: str) -> Callable[[Dict[str, Any]], str]:
+    """
+    Turn a format string over USER_FIELDS into fn(context) -> str
+    
+    Fields are checked here, so rendering is one format_map over the
+    fields the message uses.
+    """
+    names = []
+    for _, name, spec, _ in _formatter.parse(text):
+        if name is None:
+            continue
+        if name not in USER_FIELDS:
+            raise ValueError(f"{where}: unknown template field {name!r}")
+        if "{" in spec:
+            raise ValueError(f"{where}: unsupported format for {name!r}")
+        names.append(name)
+    fields = tuple((name, USER_FIELDS[name]) for name in dict.fromkeys(names))
+    
+    def render(context: Dict[str, Any]) -> str:
+        return text.format_map({name: field(context, fee_rate) for name, field in fields})
+    
+    # Fail at load on a bad format spec, not on a user's reply
+    try:
+        render({"available_balance": 0.0, "current_streak": 0, "tasks_completed_today": 0})
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"{where}: {e}") from e
+    return render
+
+
+def templates_dir(directory: str) -> str:
+    """CHAT_TEMPLATES_DIR as an absolute path (relative ones from the project root)"""
+    return directory if os.path.isabs(directory) else os.path.join(PROJECT_ROOT, directory)
+
+
+class CompiledTemplate:
+    """One intent's reply for one language and tier"""
+    
+    __slots__ = ("intent", "message", "render_message", "suggestions", "actions")
+    
+    def __init__(self, intent: str, raw: Dict[str, Any], tier: SubscriptionTier, where: str):
+        fixed = tier_fields(tier)
+        self.intent = intent
+        self.message, fields = bind("\n".join(raw["message"]), fixed)
+        self.render_message = (
+            compile_message(self.message, float(WithdrawalFeeCalculator.FEE_RATES[tier]), where) if fields else None
+        )
+        
+        def constant(text: str) -> str:
+            value, left = bind(text, fixed)
+            if left:
+                raise ValueError(f"{where}: suggestions and actions can only use tier fields, got {list(left)}")
+            return value
+        
+        self.suggestions = tuple(constant(text) for text in raw.get("suggestions", ()))
+        self.actions = tuple(
+            ReadOnlyDict((key, constant(value)) for key, value in action.items())
+            for action in raw.get("actions", ())
+        )
+    
+    def render(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "message": self.render_message(context) if self.render_message else self.message,
+            "intent": self.intent,
+            "suggestions": self.suggestions,
+            "actions": self.actions,
+        }
+
+
+class ChatTemplates:
+    """Compiled templates keyed by (language, intent, tier value)"""
+    
+    def __init__(self, templates: Dict[Tuple[str, str, str], CompiledTemplate]):
+        self.templates = templates
+        self._languages = frozenset(language for language, _, _ in templates)
+        # Exact keys plus resolved aliases ("es-MX", None tier, ...)
+        self._lookup = dict(templates)
+    
+    @classmethod
+    def load(cls, directory: str) -> "ChatTemplates":
+        """Compile every <language>.json in the directory"""
+        raw = {}
+        for filename in sorted(os.listdir(directory)):
+            language, extension = os.path.splitext(filename)
+            if extension == ".json":
+                with open(os.path.join(directory, filename), encoding="utf-8") as f:
+                    raw[language.lower()] = json.load(f)
+        if DEFAULT_LANGUAGE not in raw:
+            raise ValueError(f"{directory}: {DEFAULT_LANGUAGE}.json is required")
+        
+        templates = {}
+        for language, entries in raw.items():
+            merged = {**raw[DEFAULT_LANGUAGE], **entries}
+            for intent in INTENTS:
+                if intent not in merged:
+                    raise ValueError(f"{directory}: no template for intent {intent!r}")
+                for tier in TIER_ORDER:
+                    key = f"{intent}.{tier.value}" if f"{intent}.{tier.value}" in merged else intent
+                    templates[(language, intent, tier.value)] = CompiledTemplate(
+                        intent, merged[key], tier, f"{language}.json {key}"
+                    )
+        return cls(templates)
+    
+    @property
+    def languages(self) -> Tuple[str, ...]:
+        return tuple(sorted(self._languages))
+    
+    def resolve_language(self, language: Optional[str]) -> str:
+        """Exact match, then the primary subtag ("pt-BR" -> "pt"), then English"""
+        if language:
+            language = language.lower().replace("_", "-")
+            if language in self._languages:
+                return language
+            primary = language.split("-", 1)[0]
+            if primary in self._languages:
+                return primary
+        return DEFAULT_LANGUAGE
+    
+    def render(
+        self,
+        intent: str,
+        context: Dict[str, Any],
+        language: Optional[str] = None,
+        tier: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Reply for an intent in the user's language and tier"""
+        key = (language, intent, tier)
+        template = self._lookup.get(key)
+        if template is None:
+            resolved = self.resolve_language(language)
+            tier_value = tier if (resolved, DEFAULT_INTENT, tier) in self.templates else SubscriptionTier.FREE.value
+            template = self.templates.get((resolved, intent, tier_value)) or self.templates[(resolved, DEFAULT_INTENT, tier_value)]
+            if len(self._lookup) < len(self.templates) + MAX_ALIASES:
+                self._lookup[key] = template
+        return template.render(context)
+
+
+chat_templates = ChatTemplates.load(templates_dir(settings.CHAT_TEMPLATES_DIR))
@@ -0,0 +1,225 @@
+"""
+Device Binding Service
+One-device enforcement on every request, without a write per request
+
+Each worker caches user_id -> bound device (the device_fingerprint of the
+user's active user_devices row) for DEVICE_BINDING_TTL_SECONDS, so the
+X-Device-Id check is a dict lookup for all but one request per user per
+TTL. A mismatch re-reads the row before rejecting - at most every
+DEVICE_BINDING_RECHECK_SECONDS per user - so a new device bound on
+another worker is accepted right away. Approving a device change drops
+the binding on the approving worker only; the others keep accepting the
+released device until their cached binding expires, which is why the
+TTL is seconds, not minutes.
+
+Accepted requests only record last-seen time, IP and a hit count in
+memory; a background task writes them every
+DEVICE_BINDING_FLUSH_SECONDS as one batched UPDATE. Started and drained
+by the app lifespan.
+"""
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime
+from uuid import UUID
+import asyncio
+import json
+import logging
+import time
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.core.config import settings
+from src.db.models import UserDevice
+from src.db.routing import request_user_key
+
+
+logger = logging.getLogger("dignilife.device_binding")
+
+DEVICE_HEADER = "X-Device-Id"
+
+# Reachable without a bound device: signing in, and registering or
+# changing the device itself. Admin endpoints are checked by role.
+EXEMPT_PREFIXES = ("/api/v1/auth", "/api/v1/devices", "/api/v1/admin")
+
+
+def is_uuid(value: str) -> bool:
+    try:
+        UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+class DeviceBindings:
+    """Per-worker binding cache and last-seen write buffer"""
+    
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        recheck_seconds: Optional[float] = None,
+        flush_seconds: Optional[float] = None,
+        max_users: Optional[int] = None,
+    ):
+        self.ttl_seconds = settings.DEVICE_BINDING_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.recheck_seconds = settings.DEVICE_BINDING_RECHECK_SECONDS if recheck_seconds is None else recheck_seconds
+        self.flush_seconds = flush_seconds or settings.DEVICE_BINDING_FLUSH_SECONDS
+        self.max_users = max_users or settings.DEVICE_BINDING_MAX_USERS
+        # user_id -> (loaded_at, device_fingerprint or None when no device is bound)
+        self._bindings: "OrderedDict[str, Tuple[float, Optional[str]]]" = OrderedDict()
+        # (user_id, device) -> (last seen, last IP, requests since the last flush)
+        self._seen: Dict[Tuple[str, str], Tuple[datetime, Optional[str], int]] = {}
+        self._engine: Optional[AsyncEngine] = None
+        self._task: Optional[asyncio.Task] = None
+        self.rows_written = 0
+    
+    @property
+    def pending(self) -> int:
+        return len(self._seen)
+    
+    def bind(self, user_id, device_id: Optional[str]) -> None:
+        """Cache a user's bound device (None: no device registered)"""
+        key = str(user_id)
+        self._bindings[key] = (time.monotonic(), device_id)
+        self._bindings.move_to_end(key)
+        while len(self._bindings) > self.max_users:
+            self._bindings.popitem(last=False)
+    
+    def invalidate(self, user_id) -> None:
+        """Forget a user's binding, e.g. when a device change is approved"""
+        self._bindings.pop(str(user_id), None)
+    
+    async def bound_device(self, user_id, db=None, max_age: Optional[float] = None) -> Optional[str]:
+        """
+        The user's active device
+        
+        Read from db (a session or connection) or the engine when the
+        cached binding is older than max_age (default: the TTL).
+        """
+        key = str(user_id)
+        max_age = self.ttl_seconds if max_age is None else max_age
+        entry = self._bindings.get(key)
+        if entry is not None and time.monotonic() - entry[0] < max_age:
+            self._bindings.move_to_end(key)
+            return entry[1]
+        
+        devices = UserDevice.__table__
+        statement = (
+            select(devices.c.device_fingerprint)
+            .where(devices.c.user_id == UUID(key), devices.c.is_active == True)
+            .limit(1)
+        )
+        if db is None:
+            async with self._engine.connect() as conn:
+                device_id = await conn.scalar(statement)
+        else:
+            device_id = await db.scalar(statement)
+        self.bind(user_id, device_id)
+        return device_id
+    
+    def touch(self, user_id, device_id: str, ip_address: Optional[str] = None) -> None:
+        """Record a request from the bound device; written on the next flush"""
+        key = (str(user_id), device_id)
+        _, last_ip, hits = self._seen.get(key, (None, None, 0))
+        self._seen[key] = (datetime.utcnow(), ip_address or last_ip, hits + 1)
+    
+    async def check(self, user_id, device_id: Optional[str], ip_address: Optional[str] = None, db=None) -> bool:
+        """
+        True if the request may proceed
+        
+        Users without a registered device pass (they register first);
+        otherwise device_id must be the bound device.
+        """
+        bound = await self.bound_device(user_id, db)
+        if bound is not None and device_id != bound:
+            # Maybe changed since it was cached
+            bound = await self.bound_device(user_id, db, max_age=self.recheck_seconds)
+        if bound is None:
+            return True
+        if device_id != bound:
+            return False
+        self.touch(user_id, device_id, ip_address)
+        return True
+    
+    def start(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop the flush task and write what is still buffered"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.flush()
+    
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+    
+    async def flush(self) -> int:
+        """
+        Write buffered last-seen times in one executemany UPDATE
+        
+        GREATEST keeps the latest time when several workers flush the same
+        device. A failed batch is logged and dropped: it only delays
+        last_seen_at until the device's next request.
+        """
+        if not self._seen:
+            return 0
+        batch, self._seen = self._seen, {}
+        
+        devices = UserDevice.__table__
+        statement = (
+            update(devices)
+            .where(
+                devices.c.user_id == bindparam("device_user_id"),
+                devices.c.device_fingerprint == bindparam("device_id"),
+            )
+            .values(
+                last_seen_at=func.greatest(devices.c.last_seen_at, bindparam("seen_at", type_=devices.c.last_seen_at.type)),
+                ip_address=func.coalesce(bindparam("ip", type_=devices.c.ip_address.type), devices.c.ip_address),
+                access_count=devices.c.access_count + bindparam("hits", type_=devices.c.access_count.type),
+            )
+        )
+        rows = [
+            {"device_user_id": UUID(user_id), "device_id": device_id, "seen_at": seen_at, "ip": ip, "hits": hits}
+            for (user_id, device_id), (seen_at, ip, hits) in batch.items()
+        ]
+        try:
+            async with self._engine.begin() as conn:
+                await conn.execute(statement, rows)
+            self.rows_written += len(rows)
+        except Exception as e:
+            logger.warning(json.dumps({"event": "flush_failed", "devices": len(rows), "error": str(e)}))
+            return 0
+        return len(rows)
+
+
+device_bindings = DeviceBindings()
+
+
+async def device_binding_middleware(request: Request, call_next):
+    """Reject signed-in requests that don't come from the user's bound device"""
+    path = request.url.path
+    if not settings.DEVICE_BINDING_ENABLED or not path.startswith("/api/") or path.startswith(EXEMPT_PREFIXES):
+        return await call_next(request)
+    
+    user_key = request_user_key(request)
+    if user_key and is_uuid(user_key):
+        ip_address = request.client.host if request.client else None
+        if not await device_bindings.check(user_key, request.headers.get(DEVICE_HEADER), ip_address):
+            return JSONResponse(
+                status_code=403,
+                content={"detail": "This account is bound to another device. Please use your registered device or request a device change."},
+                headers={"X-Device-Limit": "mismatch"},
+            )
+    
+    return await call_next(request)
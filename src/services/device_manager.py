@@ -5,11 +5,13 @@ One device per user - Security enforcement
 from typing import Optional, Dict, Any
 from datetime import datetime
 from uuid import UUID, uuid4
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from fastapi import HTTPException, status
 
 from src.db.models import UserDevice
+from src.services.device_binding import device_bindings
 
 
 class DeviceManager:
@@ -24,7 +26,10 @@ class DeviceManager:
         db: AsyncSession
     ) -> UserDevice:
         """
-        Register a new device for user
+        Register a new device for user; the caller commits
+        
+        A device the user had released (device change) gets its old row
+        back: fingerprints are unique, so it can't be inserted again.
         
         Args:
             user_id: User ID
@@ -40,7 +45,8 @@ class DeviceManager:
             UserDevice object
         
         Raises:
-            HTTPException: If user already has a device registered
+            HTTPException: 403 if user already has a device registered,
+                409 if the device belongs to another account
         """
         # Check if user already has a device
         result = await db.execute(
@@ -53,11 +59,10 @@ class DeviceManager:
         
         if existing_device:
             # Check if it's the same device
-            if existing_device.device_id == device_info.get("device_id"):
-                # Update last seen
-                existing_device.last_seen_at = datetime.utcnow()
-                existing_device.last_ip_address = device_info.get("ip_address")
-                await db.commit()
+            if existing_device.device_fingerprint == device_info.get("device_id"):
+                # Last seen is written in the next batch, not here
+                device_bindings.bind(user_id, existing_device.device_fingerprint)
+                device_bindings.touch(user_id, existing_device.device_fingerprint, device_info.get("ip_address"))
                 return existing_device
             else:
                 raise HTTPException(
@@ -66,26 +71,54 @@ class DeviceManager:
                     headers={"X-Device-Limit": "reached"}
                 )
         
-        # Register new device
-        device = UserDevice(
-            id=uuid4(),
-            user_id=user_id,
-            device_id=device_info.get("device_id"),
-            device_name=device_info.get("device_name", "Unknown Device"),
-            device_type=device_info.get("device_type", "unknown"),
-            os=device_info.get("os"),
-            browser=device_info.get("browser"),
-            ip_address=device_info.get("ip_address"),
-            last_ip_address=device_info.get("ip_address"),
-            is_active=True,
-            registered_at=datetime.utcnow(),
-            last_seen_at=datetime.utcnow(),
-            created_at=datetime.utcnow(),
+        now = datetime.utcnow()
+        result = await db.execute(
+            select(UserDevice).where(UserDevice.device_fingerprint == device_info.get("device_id"))
         )
+        device = result.scalar_one_or_none()
+        if device is not None and device.user_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This device is registered to another account. Please contact support.",
+                headers={"X-Device-Limit": "taken"}
+            )
         
-        db.add(device)
-        await db.commit()
-        await db.refresh(device)
+        if device is not None:
+            # Released earlier: bind it again
+            device.is_active = True
+            device.device_name = device_info.get("device_name", device.device_name)
+            device.device_type = device_info.get("device_type", device.device_type)
+            device.device_info = {"os": device_info.get("os"), "browser": device_info.get("browser")}
+            device.ip_address = device_info.get("ip_address")
+            device.last_seen_at = now
+            device.updated_at = now
+        else:
+            # Register new device
+            device = UserDevice(
+                id=uuid4(),
+                user_id=user_id,
+                device_fingerprint=device_info.get("device_id"),
+                device_name=device_info.get("device_name", "Unknown Device"),
+                device_type=device_info.get("device_type", "unknown"),
+                device_info={"os": device_info.get("os"), "browser": device_info.get("browser")},
+                ip_address=device_info.get("ip_address"),
+                is_active=True,
+                first_seen_at=now,
+                last_seen_at=now,
+                created_at=now,
+                updated_at=now,
+            )
+            db.add(device)
+        
+        try:
+            await db.flush()
+        except IntegrityError:
+            # Registered by another request in the meantime
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This device was just registered. Please try again.",
+            )
+        device_bindings.bind(user_id, device.device_fingerprint)
         
         return device
     
@@ -106,22 +139,13 @@ class DeviceManager:
         Returns:
             True if device is valid, False otherwise
         """
-        result = await db.execute(
-            select(UserDevice).where(
-                UserDevice.user_id == user_id,
-                UserDevice.device_id == device_id,
-                UserDevice.is_active == True
-            )
-        )
-        device = result.scalar_one_or_none()
-        
-        if device:
-            # Update last seen
-            device.last_seen_at = datetime.utcnow()
-            await db.commit()
-            return True
+        # Cached binding; last seen is written in the next batch
+        bound = await device_bindings.bound_device(user_id, db)
+        if bound is None or bound != device_id:
+            return False
         
-        return False
+        device_bindings.touch(user_id, device_id)
+        return True
     
     @staticmethod
     async def get_user_device(
@@ -144,7 +168,7 @@ class DeviceManager:
         db: AsyncSession
     ) -> Dict[str, Any]:
         """
-        Request to change device (creates support ticket)
+        Request to change device (creates support ticket); the caller commits
         
         Args:
             user_id: User ID
@@ -154,7 +178,13 @@ class DeviceManager:
         Returns:
             Dict with ticket information
         """
-        from src.db.models import SupportTicket, TicketPriorityEnum, TicketStatusEnum
+        from src.db.models import SupportTicket, TicketPriorityEnum, TicketStatusEnum, User
+        from src.services.support_inbox import sla_due_at
+        
+        tier = (await db.execute(
+            select(User.subscription_tier).where(User.id == user_id)
+        )).scalar_one()
+        now = datetime.utcnow()
         
         # Create support ticket
         ticket = SupportTicket(
@@ -165,16 +195,69 @@ class DeviceManager:
             priority=TicketPriorityEnum.HIGH,
             status=TicketStatusEnum.OPEN,
             ticket_metadata={"type": "device_change", "reason": reason},
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
+            sla_due_at=sla_due_at(TicketPriorityEnum.HIGH, tier, now),
+            created_at=now,
+            updated_at=now,
         )
         
         db.add(ticket)
-        await db.commit()
-        await db.refresh(ticket)
         
         return {
             "ticket_id": str(ticket.id),
             "message": "Device change request submitted. Our team will review it within 24 hours.",
             "status": "pending_review"
-        }
\ No newline at end of file
+        }
+    
+    @staticmethod
+    async def approve_device_change(
+        ticket_id: UUID,
+        admin_id: UUID,
+        db: AsyncSession
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Approve a device change request
+        
+        Releases the user's current device so the next registration binds
+        the new one, and resolves the ticket. The caller commits.
+        
+        Returns:
+            Dict with the released device, or None if the ticket is not an
+            open device change request
+        """
+        from sqlalchemy import update
+        from src.db.models import SupportTicket, TicketStatusEnum
+        from src.services.withdrawal_risk import withdrawal_risk
+        
+        result = await db.execute(
+            select(SupportTicket).where(
+                SupportTicket.id == ticket_id,
+                SupportTicket.status.in_([TicketStatusEnum.OPEN, TicketStatusEnum.IN_PROGRESS])
+            )
+        )
+        ticket = result.scalar_one_or_none()
+        
+        if not ticket or (ticket.ticket_metadata or {}).get("type") != "device_change":
+            return None
+        
+        now = datetime.utcnow()
+        released = (await db.execute(
+            update(UserDevice)
+            .where(UserDevice.user_id == ticket.user_id, UserDevice.is_active == True)
+            .values(is_active=False, updated_at=now)
+            .returning(UserDevice.device_fingerprint)
+        )).scalars().all()
+        
+        ticket.status = TicketStatusEnum.RESOLVED
+        ticket.assigned_to = ticket.assigned_to or admin_id
+        ticket.resolved_at = now
+        ticket.updated_at = now
+        
+        # Other workers re-read the binding within DEVICE_BINDING_TTL_SECONDS
+        device_bindings.invalidate(ticket.user_id)
+        withdrawal_risk.record_device_change(ticket.user_id)
+        
+        return {
+            "ticket_id": str(ticket.id),
+            "user_id": str(ticket.user_id),
+            "released_devices": released,
+        }
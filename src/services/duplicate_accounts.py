@@ -0,0 +1,311 @@
+"""
+Duplicate Account Detection Service
+Offline batch job: same face on different accounts, combined with
+shared device / IP overlap, grouped for admin review
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+from datetime import datetime
+from uuid import UUID
+import hashlib
+
+import numpy as np
+from sqlalchemy import select, delete, insert, func, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.vector_index import similarity_pairs
+from src.db.models import (
+    DuplicateAccountGroup, FaceLivenessLog, UserDevice, UserSession
+)
+from src.services.face_embedding import load_embeddings
+
+
+# Evidence stored per group is capped so one huge ring can't bloat a row
+MAX_EVIDENCE_PAIRS = 50
+# Keep IN (...) lists and multi-row INSERTs to a bounded size
+QUERY_CHUNK = 5000
+
+
+class _DisjointSet:
+    """Union-find over dense integer ids (path halving, union by size)"""
+    
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+    
+    def find(self, node: int) -> int:
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+    
+    def union(self, a: int, b: int) -> None:
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+
+def group_key(user_ids: Iterable[UUID]) -> str:
+    """Stable identity of a group: hash of its sorted member ids"""
+    return hashlib.sha256(",".join(sorted(str(u) for u in user_ids)).encode()).hexdigest()
+
+
+def find_duplicate_groups(
+    user_ids: Sequence[UUID],
+    face_rows: np.ndarray,
+    face_cols: np.ndarray,
+    face_sims: np.ndarray,
+    shared_devices: Dict[str, List[UUID]],
+    shared_ips: Dict[str, List[UUID]],
+    strong_threshold: float,
+) -> List[Dict[str, Any]]:
+    """
+    Combine face matches with device/IP overlap into account groups
+    
+    Links that put two accounts in the same group:
+    - face similarity >= strong_threshold
+    - a weaker face match (any pair passed in) plus a shared device or IP
+    - the same device fingerprint
+    A shared IP on its own never links accounts (carrier NAT, cafes),
+    it only adds to the score of a group.
+    
+    Args:
+        user_ids: Users behind the embedding rows (face_rows/face_cols index it)
+        face_rows, face_cols, face_sims: Candidate face pairs from similarity_pairs
+        shared_devices: device fingerprint -> users seen on it
+        shared_ips: IP address -> users seen on it
+        strong_threshold: Face similarity that links accounts on its own
+    
+    Returns:
+        Groups (2+ users) with score and evidence, highest score first
+    """
+    # Dense ids for every user that appears anywhere
+    index: Dict[UUID, int] = {user_id: i for i, user_id in enumerate(user_ids)}
+    members: List[UUID] = list(user_ids)
+    for users in list(shared_devices.values()) + list(shared_ips.values()):
+        for user_id in users:
+            if user_id not in index:
+                index[user_id] = len(members)
+                members.append(user_id)
+    
+    devices_of: Dict[int, Set[str]] = {}
+    for fingerprint, users in shared_devices.items():
+        for user_id in users:
+            devices_of.setdefault(index[user_id], set()).add(fingerprint)
+    ips_of: Dict[int, Set[str]] = {}
+    for ip_address, users in shared_ips.items():
+        for user_id in users:
+            ips_of.setdefault(index[user_id], set()).add(ip_address)
+    
+    def overlap(a: int, b: int) -> bool:
+        return bool(
+            devices_of.get(a, set()) & devices_of.get(b, set())
+            or ips_of.get(a, set()) & ips_of.get(b, set())
+        )
+    
+    groups = _DisjointSet(len(members))
+    face_links = []
+    for a, b, similarity in zip(face_rows.tolist(), face_cols.tolist(), face_sims.tolist()):
+        if similarity >= strong_threshold or overlap(a, b):
+            groups.union(a, b)
+            face_links.append((a, b, similarity))
+    
+    for users in shared_devices.values():
+        first = index[users[0]]
+        for user_id in users[1:]:
+            groups.union(first, index[user_id])
+    
+    # Collect members and evidence per root
+    by_root: Dict[int, List[int]] = {}
+    for node in range(len(members)):
+        root = groups.find(node)
+        if groups.size[root] > 1:
+            by_root.setdefault(root, []).append(node)
+    
+    face_by_root: Dict[int, List[tuple]] = {}
+    for a, b, similarity in face_links:
+        face_by_root.setdefault(groups.find(a), []).append((a, b, similarity))
+    
+    results = []
+    for root, nodes in by_root.items():
+        pairs = sorted(face_by_root.get(root, []), key=lambda pair: -pair[2])
+        max_similarity = pairs[0][2] if pairs else None
+        
+        devices = _shared_within(nodes, devices_of)
+        ips = _shared_within(nodes, ips_of)
+        
+        score = 0.0
+        if max_similarity is not None:
+            score += 50.0 if max_similarity >= strong_threshold else 30.0
+        if devices:
+            score += 30.0
+        if ips:
+            score += 20.0
+        
+        group_users = [members[node] for node in nodes]
+        results.append({
+            "user_ids": group_users,
+            "score": min(score, 100.0),
+            "max_face_similarity": max_similarity,
+            "evidence": {
+                "face_pairs": [
+                    {"user_a": str(members[a]), "user_b": str(members[b]), "similarity": round(similarity, 4)}
+                    for a, b, similarity in pairs[:MAX_EVIDENCE_PAIRS]
+                ],
+                "face_pair_count": len(pairs),
+                "shared_devices": {key: [str(members[n]) for n in users] for key, users in devices.items()},
+                "shared_ips": {key: [str(members[n]) for n in users] for key, users in ips.items()},
+            },
+        })
+    
+    results.sort(key=lambda group: (-group["score"], -len(group["user_ids"])))
+    return results
+
+
+def _shared_within(nodes: List[int], keys_of: Dict[int, Set[str]]) -> Dict[str, List[int]]:
+    """Device/IP keys used by at least two members of a group"""
+    seen: Dict[str, List[int]] = {}
+    for node in nodes:
+        for key in keys_of.get(node, ()):
+            seen.setdefault(key, []).append(node)
+    return {key: users for key, users in seen.items() if len(users) > 1}
+
+
+class DuplicateAccountDetector:
+    """
+    Batch job that writes DuplicateAccountGroup rows for admin review
+    
+    Run offline (scripts/detect_duplicate_accounts.py). The face join is
+    a blocked matrix multiply restricted to IVF candidate buckets
+    (DUPLICATE_JOIN_NLISTS / NPROBE), so millions of users fit in one
+    run with O(N * dim) memory.
+    """
+    
+    @staticmethod
+    async def load_shared_devices(db: AsyncSession) -> Dict[str, List[UUID]]:
+        """Device fingerprints registered to more than one account"""
+        result = await db.execute(
+            select(UserDevice.device_fingerprint, func.array_agg(func.distinct(UserDevice.user_id)))
+            .group_by(UserDevice.device_fingerprint)
+            .having(func.count(func.distinct(UserDevice.user_id)) > 1)
+        )
+        return {fingerprint: list(users) for fingerprint, users in result.all()}
+    
+    @staticmethod
+    async def load_shared_ips(db: AsyncSession, max_users: int) -> Dict[str, List[UUID]]:
+        """
+        IPs seen on 2..max_users accounts (devices and sessions)
+        
+        IPs shared by more accounts are carrier/NAT/public Wi-Fi
+        addresses and carry no signal.
+        """
+        seen = union_all(
+            select(UserDevice.ip_address.label("ip_address"), UserDevice.user_id.label("user_id"))
+            .where(UserDevice.ip_address != None),
+            select(UserSession.ip_address.label("ip_address"), UserSession.user_id.label("user_id"))
+            .where(UserSession.ip_address != None),
+        ).subquery()
+        
+        user_count = func.count(func.distinct(seen.c.user_id))
+        result = await db.execute(
+            select(seen.c.ip_address, func.array_agg(func.distinct(seen.c.user_id)))
+            .group_by(seen.c.ip_address)
+            .having(user_count > 1, user_count <= max_users)
+        )
+        return {ip_address: list(users) for ip_address, users in result.all()}
+    
+    @staticmethod
+    async def failed_liveness_counts(db: AsyncSession, user_ids: List[UUID]) -> Dict[UUID, int]:
+        """Failed liveness attempts per flagged user (spoofing evidence)"""
+        counts: Dict[UUID, int] = {}
+        for start in range(0, len(user_ids), QUERY_CHUNK):
+            result = await db.execute(
+                select(FaceLivenessLog.user_id, func.count(FaceLivenessLog.id))
+                .where(
+                    FaceLivenessLog.user_id.in_(user_ids[start:start + QUERY_CHUNK]),
+                    FaceLivenessLog.is_live == False,
+                )
+                .group_by(FaceLivenessLog.user_id)
+            )
+            counts.update(dict(result.all()))
+        return counts
+    
+    @staticmethod
+    async def run(db: AsyncSession, block_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Detect duplicate accounts and replace the pending review queue
+        
+        Groups an admin already confirmed or dismissed (same members) are
+        not re-flagged.
+        
+        Returns:
+            Summary counts for logging
+        """
+        user_ids, vectors = await load_embeddings(db)
+        rows, cols, sims = similarity_pairs(
+            vectors,
+            settings.DUPLICATE_FACE_WEAK_THRESHOLD,
+            block_size=block_size or settings.DUPLICATE_JOIN_BLOCK_SIZE,
+            n_lists=settings.DUPLICATE_JOIN_NLISTS,
+            n_probe=settings.DUPLICATE_JOIN_NPROBE,
+        )
+        del vectors
+        
+        shared_devices = await DuplicateAccountDetector.load_shared_devices(db)
+        shared_ips = await DuplicateAccountDetector.load_shared_ips(db, settings.DUPLICATE_IP_MAX_USERS)
+        
+        groups = find_duplicate_groups(
+            user_ids, rows, cols, sims,
+            shared_devices, shared_ips,
+            strong_threshold=settings.DUPLICATE_FACE_THRESHOLD,
+        )
+        
+        reviewed = await db.execute(
+            select(DuplicateAccountGroup.group_key).where(DuplicateAccountGroup.status != "pending")
+        )
+        reviewed_keys = set(reviewed.scalars().all())
+        
+        flagged = [user_id for group in groups for user_id in group["user_ids"]]
+        failed_liveness = await DuplicateAccountDetector.failed_liveness_counts(db, flagged)
+        
+        now = datetime.utcnow()
+        new_rows = []
+        for group in groups:
+            key = group_key(group["user_ids"])
+            if key in reviewed_keys:
+                continue
+            evidence = group["evidence"]
+            evidence["failed_liveness"] = {
+                str(user_id): failed_liveness[user_id]
+                for user_id in group["user_ids"] if user_id in failed_liveness
+            }
+            new_rows.append({
+                "group_key": key,
+                "user_ids": [str(user_id) for user_id in group["user_ids"]],
+                "member_count": len(group["user_ids"]),
+                "score": group["score"],
+                "max_face_similarity": group["max_face_similarity"],
+                "evidence": evidence,
+                "status": "pending",
+                "detected_at": now,
+                "created_at": now,
+            })
+        
+        await db.execute(delete(DuplicateAccountGroup).where(DuplicateAccountGroup.status == "pending"))
+        for start in range(0, len(new_rows), QUERY_CHUNK):
+            await db.execute(insert(DuplicateAccountGroup), new_rows[start:start + QUERY_CHUNK])
+        await db.commit()
+        
+        return {
+            "users_scanned": len(user_ids),
+            "face_pairs": len(rows),
+            "shared_devices": len(shared_devices),
+            "shared_ips": len(shared_ips),
+            "groups_flagged": len(new_rows),
+            "groups_already_reviewed": len(groups) - len(new_rows),
+        }
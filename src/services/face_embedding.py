@@ -0,0 +1,225 @@
+"""
+Face Embedding Service
+Face-first login: embedding extraction + in-memory 1:N identification
+
+Every worker holds its own index. Enrollments on one worker reach the
+others through refresh_index_periodically, which adds embeddings stored
+since its last pass every FACE_INDEX_REFRESH_SECONDS; until then the
+other workers still match the new face 1:1 when the login gives an
+email.
+"""
+from typing import List, Optional, Tuple
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from uuid import UUID
+import asyncio
+import hashlib
+import importlib
+import json
+import logging
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.vector_index import IVFIndex, normalize
+from src.db.models import User
+from src.services.face_liveness import decode_image
+
+
+logger = logging.getLogger("dignilife.face_embedding")
+
+
+# Embeddings are stored in users.face_embedding as little-endian float32
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+
+def embedding_to_bytes(embedding: np.ndarray) -> bytes:
+    """Serialize an embedding for the users.face_embedding column"""
+    return np.asarray(embedding, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def embedding_from_bytes(data: bytes) -> np.ndarray:
+    """Deserialize users.face_embedding (zero-copy, read-only)"""
+    return np.frombuffer(data, dtype=EMBEDDING_DTYPE)
+
+
+class FaceEmbeddingExtractor(ABC):
+    """
+    Base class for face embedding models
+    Subclasses turn decoded image bytes into a unit-length float32 vector
+    """
+    
+    def __init__(self, dim: int):
+        self.dim = dim
+    
+    @abstractmethod
+    def extract(self, image_bytes: bytes) -> np.ndarray:
+        ...
+
+
+class HashEmbeddingExtractor(FaceEmbeddingExtractor):
+    """
+    Deterministic stub extractor for development and tests
+    Identical image bytes map to identical vectors; it has no notion of
+    faces, so only the exact same selfie will match. Configure
+    FACE_EMBEDDING_EXTRACTOR with a real model for production.
+    """
+    
+    def extract(self, image_bytes: bytes) -> np.ndarray:
+        seed = int.from_bytes(hashlib.sha256(image_bytes).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim)
+        return normalize(vector)
+
+
+def load_extractor(path: str, dim: int) -> FaceEmbeddingExtractor:
+    """Load an extractor class from a "module:ClassName" path"""
+    module_name, _, class_name = path.partition(":")
+    extractor_class = getattr(importlib.import_module(module_name), class_name)
+    return extractor_class(dim=dim)
+
+
+async def load_embeddings(
+    db: AsyncSession,
+    batch_size: int = 10000,
+) -> Tuple[List[UUID], np.ndarray]:
+    """
+    Load every active user's face embedding
+    
+    Rows are streamed in batches straight into one preallocated float32
+    matrix, so memory stays at ~4 * dim bytes per user.
+    
+    Returns:
+        (user_ids, (N, dim) float32 matrix) in the same order
+    """
+    dim = settings.FACE_EMBEDDING_DIM
+    ids: List[UUID] = []
+    vectors = np.empty((batch_size, dim), dtype=np.float32)
+    
+    result = await db.stream(
+        select(User.id, User.face_embedding)
+        .where(User.face_embedding != None, User.is_active == True)
+        .execution_options(yield_per=batch_size)
+    )
+    async for rows in result.partitions(batch_size):
+        for user_id, data in rows:
+            if len(data) != dim * EMBEDDING_DTYPE.itemsize:
+                continue  # Embedding from a different model/dimension
+            if len(ids) == len(vectors):
+                vectors = np.resize(vectors, (len(vectors) * 2, dim))
+            vectors[len(ids)] = embedding_from_bytes(data)
+            ids.append(user_id)
+    
+    return ids, vectors[:len(ids)]
+
+
+_extractor = load_extractor(settings.FACE_EMBEDDING_EXTRACTOR, settings.FACE_EMBEDDING_DIM)
+_index = IVFIndex(
+    dim=settings.FACE_EMBEDDING_DIM,
+    n_lists=settings.FACE_INDEX_NLISTS,
+    n_probe=settings.FACE_INDEX_NPROBE,
+)
+
+
+class FaceRecognition:
+    """
+    Face recognition for login
+    - 1:N identification against every enrolled user (IVF index in memory)
+    - 1:1 verification against a single stored embedding
+    """
+    
+    @staticmethod
+    def extract_embedding(image_data: str) -> np.ndarray:
+        """
+        Extract a face embedding from a base64 selfie
+        
+        Raises:
+            HTTPException: If the image is too large or not valid base64
+        """
+        image_bytes = decode_image(image_data, settings.LIVENESS_MAX_IMAGE_BYTES)
+        return _extractor.extract(image_bytes)
+    
+    @staticmethod
+    def enroll(user_id: UUID, embedding: np.ndarray) -> None:
+        """
+        Add or replace a user's embedding in this worker's index
+        
+        Only once users.face_embedding is committed; other workers pick
+        it up on their next refresh_index.
+        """
+        _index.add(user_id, embedding)
+    
+    @staticmethod
+    def identify(embedding: np.ndarray) -> Optional[Tuple[UUID, float]]:
+        """
+        Find the enrolled user whose face best matches
+        
+        Returns:
+            (user_id, similarity) if the best match clears
+            FACE_MATCH_THRESHOLD, otherwise None
+        """
+        matches = _index.search(embedding, k=1)
+        if matches and matches[0][1] >= settings.FACE_MATCH_THRESHOLD:
+            return matches[0]
+        return None
+    
+    @staticmethod
+    def verify(embedding: np.ndarray, stored: Optional[bytes]) -> bool:
+        """1:1 check of an embedding against users.face_embedding"""
+        if not stored:
+            return False
+        similarity = float(normalize(embedding_from_bytes(stored)) @ normalize(embedding))
+        return similarity >= settings.FACE_MATCH_THRESHOLD
+    
+    @staticmethod
+    async def load_index(db: AsyncSession, batch_size: int = 10000) -> int:
+        """
+        Build the in-memory index from users.face_embedding
+        
+        Returns:
+            Number of enrolled users loaded
+        """
+        ids, vectors = await load_embeddings(db, batch_size)
+        _index.build(ids, vectors)
+        return len(ids)
+    
+    @staticmethod
+    async def refresh_index(db: AsyncSession, since: datetime) -> int:
+        """
+        Add embeddings of users updated since `since` to the index
+        
+        Returns:
+            Number of embeddings added or replaced
+        """
+        dim = settings.FACE_EMBEDDING_DIM
+        result = await db.execute(
+            select(User.id, User.face_embedding)
+            .where(User.face_embedding != None, User.is_active == True, User.updated_at >= since)
+        )
+        added = 0
+        for user_id, data in result.all():
+            if len(data) == dim * EMBEDDING_DTYPE.itemsize:
+                _index.add(user_id, embedding_from_bytes(data))
+                added += 1
+        return added
+
+
+async def refresh_index_periodically(session_factory, interval_seconds: float) -> None:
+    """
+    Background task keeping this worker's index in step with the others
+    
+    Each pass looks back one extra interval, so rows whose transaction
+    committed a little after their updated_at are not missed; re-adding
+    an embedding just replaces it.
+    """
+    since = datetime.utcnow()
+    while True:
+        await asyncio.sleep(interval_seconds)
+        started = datetime.utcnow()
+        try:
+            async with session_factory() as session:
+                await FaceRecognition.refresh_index(session, since - timedelta(seconds=interval_seconds))
+            since = started
+        except Exception as e:
+            logger.warning(json.dumps({"event": "index_refresh_failed", "error": str(e)}))
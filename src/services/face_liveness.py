@@ -2,15 +2,215 @@
 Face Liveness Detection Service
 Prevents photo-based fraud
 """
-from typing import Dict, Any, Optional
-import base64
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
+from collections import OrderedDict
+import asyncio
+import binascii
+import hashlib
+import time
 from datetime import datetime
 from uuid import UUID
 import httpx
+from fastapi import HTTPException, status
 
 from src.core.config import settings
 
 
+# Base64 is decoded in slices whose length is a multiple of 4, so every slice
+# decodes on its own and the full image never has to exist in memory at once
+_DECODE_CHUNK_CHARS = 64 * 1024
+
+
+def _stream_base64(payload: str, start: int, max_bytes: int, sink) -> None:
+    """Stream-decode base64 from `start` into sink.update, enforcing max_bytes"""
+    total = 0
+    
+    for offset in range(start, len(payload), _DECODE_CHUNK_CHARS):
+        chunk = binascii.a2b_base64(
+            payload[offset:offset + _DECODE_CHUNK_CHARS],
+            strict_mode=True,
+        )
+        total += len(chunk)
+        if total > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Face image too large. Maximum size is {max_bytes // 1024} KB."
+            )
+        sink.update(chunk)
+    
+    if total == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Face image is empty"
+        )
+
+
+def _decode_base64(image_data: str, max_bytes: int, new_sink: Callable[[], Any]) -> Any:
+    """
+    Decode a base64 selfie (optionally a data: URI) into a fresh sink
+    
+    An oversized image is rejected as soon as max_bytes is passed, before
+    the rest is decoded.
+    
+    Raises:
+        HTTPException: 413 if the image is too large, 400 if it is not valid base64
+    """
+    start = 0
+    if image_data.startswith("data:"):
+        start = image_data.find(",") + 1
+    
+    try:
+        sink = new_sink()
+        _stream_base64(image_data, start, max_bytes, sink)
+        return sink
+    except (binascii.Error, ValueError):
+        pass
+    
+    # Slow path: line-wrapped base64 (MIME style) - strip whitespace once
+    try:
+        sink = new_sink()
+        _stream_base64("".join(image_data[start:].split()), 0, max_bytes, sink)
+        return sink
+    except (binascii.Error, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Face image is not valid base64"
+        )
+
+
+class _ImageBuffer(bytearray):
+    """bytearray with the hashlib-style update() that _stream_base64 feeds"""
+    update = bytearray.extend
+
+
+def fingerprint_image(image_data: str, max_bytes: int) -> str:
+    """
+    Content hash of a base64 selfie (hash of the decoded bytes)
+    
+    The image is hashed chunk by chunk and never held decoded in full.
+    
+    Args:
+        image_data: Base64 encoded image, optionally as a data: URI
+        max_bytes: Maximum decoded image size
+    
+    Returns:
+        Hex SHA-256 digest of the decoded image
+    
+    Raises:
+        HTTPException: 413 if the image is too large, 400 if it is not valid base64
+    """
+    return _decode_base64(image_data, max_bytes, hashlib.sha256).hexdigest()
+
+
+def decode_image(image_data: str, max_bytes: int) -> bytes:
+    """
+    Decode a base64 selfie into raw image bytes
+    
+    Args:
+        image_data: Base64 encoded image, optionally as a data: URI
+        max_bytes: Maximum decoded image size
+    
+    Returns:
+        Decoded image bytes
+    
+    Raises:
+        HTTPException: 413 if the image is too large, 400 if it is not valid base64
+    """
+    return bytes(_decode_base64(image_data, max_bytes, _ImageBuffer))
+
+
+class LivenessVerdictCache:
+    """
+    Short-TTL cache of liveness verdicts keyed by image hash + user
+    Concurrent lookups for the same key share a single provider call
+    """
+    
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached verdict, or None if missing/expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return result
+    
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a verdict, evicting least recently used entries"""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all cached verdicts"""
+        self._entries.clear()
+    
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Tuple[Dict[str, Any], bool]]],
+    ) -> Dict[str, Any]:
+        """
+        Return the cached verdict for key, or compute it exactly once
+        
+        Args:
+            key: Cache key
+            compute: Coroutine factory returning (verdict, cacheable)
+        
+        Returns:
+            Verdict dict (shared - callers must not mutate it)
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        
+        # The call runs as its own task, so no single caller (the first
+        # one included) can cancel it for the others; each caller only
+        # stops waiting on its own cancellation
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(key, compute))
+            task.add_done_callback(_retrieve_exception)
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+    
+    async def _compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Tuple[Dict[str, Any], bool]]],
+    ) -> Dict[str, Any]:
+        try:
+            result, cacheable = await compute()
+            if cacheable:
+                self.put(key, result)
+            return result
+        finally:
+            del self._inflight[key]
+
+
+def _retrieve_exception(task: asyncio.Future) -> None:
+    """Mark a failed call retrieved when every waiter has gone"""
+    if not task.cancelled():
+        task.exception()
+
+
+_verdict_cache = LivenessVerdictCache(
+    ttl_seconds=settings.LIVENESS_CACHE_TTL_SECONDS,
+    max_entries=settings.LIVENESS_CACHE_MAX_ENTRIES,
+)
+
+
 class FaceLivenessDetector:
     """
     Face Liveness Detection Service
@@ -20,25 +220,57 @@ class FaceLivenessDetector:
     @staticmethod
     async def verify_liveness(
         image_data: str,
-        user_id: UUID,
+        user_id: Optional[UUID],
     ) -> Dict[str, Any]:
         """
         Verify face liveness from image
         
+        Retries with the same selfie (same decoded bytes, same user) within
+        LIVENESS_CACHE_TTL_SECONDS reuse the earlier verdict instead of
+        calling the provider again.
+        
         Args:
             image_data: Base64 encoded image
-            user_id: User ID for logging
+            user_id: User ID for logging (None during registration/login)
         
         Returns:
             Dict with:
                 - is_live: bool
                 - confidence: float (0-100)
                 - details: dict with detection info
+        
+        Raises:
+            HTTPException: If the image is too large or not valid base64
+        """
+        image_hash = fingerprint_image(image_data, settings.LIVENESS_MAX_IMAGE_BYTES)
+        cache_key = f"{user_id or 'anonymous'}:{image_hash}"
+        
+        result = await _verdict_cache.get_or_compute(
+            cache_key,
+            lambda: FaceLivenessDetector._check_liveness(image_data, user_id),
+        )
+        
+        # Hand out a copy so one request can't alter another's verdict
+        return {**result, "details": dict(result.get("details", {}))}
+    
+    @staticmethod
+    async def _check_liveness(
+        image_data: str,
+        user_id: Optional[UUID],
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Run the liveness check against the provider
+        
+        Returns:
+            (result, cacheable) - only provider verdicts are cached. Mock
+            verdicts are random and provider errors fall back to the mock,
+            so neither is kept: one bad roll must not reject the same
+            selfie for the whole TTL
         """
         
         # If no API configured, use mock validation
         if not settings.LIVENESS_API_URL or not settings.LIVENESS_API_KEY:
-            return FaceLivenessDetector._mock_liveness_check(image_data)
+            return FaceLivenessDetector._mock_liveness_check(image_data), False
         
         try:
             # Call external liveness API
@@ -63,15 +295,15 @@ class FaceLivenessDetector:
                         "confidence": data.get("confidence", 0),
                         "details": data.get("details", {}),
                         "api_response": "success"
-                    }
+                    }, True
                 else:
                     # Fallback to mock on API error
-                    return FaceLivenessDetector._mock_liveness_check(image_data)
+                    return FaceLivenessDetector._mock_liveness_check(image_data), False
         
         except Exception as e:
             # Fallback to mock on exception
             print(f"Liveness API error: {e}")
-            return FaceLivenessDetector._mock_liveness_check(image_data)
+            return FaceLivenessDetector._mock_liveness_check(image_data), False
     
     @staticmethod
     def _mock_liveness_check(image_data: str) -> Dict[str, Any]:
@@ -0,0 +1,266 @@
+"""
+Idempotency Service
+Retried write requests get their original response back instead of
+running again
+
+Clients on poor networks retry POSTs whose response never arrived. When
+such a request carries an Idempotency-Key header, its 2xx response is
+stored under (user, key) in the same transaction as the handler's own
+writes, and a retry with the same key is answered from the stored
+response without the handler running: no second liveness check, fee
+calculation or balance debit.
+
+- The response row commits together with the request's effects, so one
+  exists exactly when the other does. Failed requests store nothing (they
+  changed nothing) and may simply be retried.
+- Each worker keeps recent responses in memory (LRU, until they expire);
+  other workers' responses are one primary-key lookup away.
+- A retry arriving while the original still runs on the same worker
+  waits for it. On different workers both run, but the later INSERT of
+  the key waits on the earlier one's row lock and then conflicts: that
+  request rolls back and returns the first response.
+- Reusing a key for a different endpoint or body is rejected (422).
+
+Keys live IDEMPOTENCY_TTL_HOURS; scripts/cleanup_idempotency_keys.py
+deletes the expired rows.
+"""
+from typing import Dict, NamedTuple, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from uuid import UUID
+import asyncio
+import hashlib
+import json
+import logging
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.core.config import settings
+from src.db.models import IdempotencyKey
+from src.db.routing import request_user_key
+from src.db.session import UnitOfWorkRoute, engine as primary_engine, rollback_session
+
+
+logger = logging.getLogger("dignilife.idempotency")
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# Safe methods are never stored: repeating them is harmless anyway
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class StoredResponse(NamedTuple):
+    endpoint: str
+    request_hash: str
+    status_code: int
+    body: str
+    expires_at: datetime
+
+
+def request_hash(query: str, body: bytes) -> str:
+    """What must match for a key to be replayed: query string and body"""
+    digest = hashlib.sha256(query.encode())
+    digest.update(b"\n")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def replay(stored: StoredResponse, endpoint: str, fingerprint: str) -> Response:
+    """The stored response, or 422 when the key was used for another request"""
+    if stored.endpoint != endpoint or stored.request_hash != fingerprint:
+        return JSONResponse(
+            status_code=422,
+            content={"detail": f"This {IDEMPOTENCY_HEADER} was already used for a different request"},
+        )
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+class IdempotencyStore:
+    """Stored responses: per-worker cache over the idempotency_keys table"""
+    
+    def __init__(
+        self,
+        engine: Optional[AsyncEngine] = None,
+        ttl_hours: Optional[float] = None,
+        cache_size: Optional[int] = None,
+    ):
+        self.engine = engine or primary_engine
+        self.ttl_hours = ttl_hours or settings.IDEMPOTENCY_TTL_HOURS
+        self.cache_size = cache_size or settings.IDEMPOTENCY_CACHE_SIZE
+        self._cache: "OrderedDict[Tuple[str, str], StoredResponse]" = OrderedDict()
+        # Requests running on this worker, by (user_id, key)
+        self.in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.replays = 0
+    
+    def remember(self, user_id: str, key: str, stored: StoredResponse) -> None:
+        slot = (user_id, key)
+        self._cache[slot] = stored
+        self._cache.move_to_end(slot)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    async def find(self, user_id: str, key: str) -> Optional[StoredResponse]:
+        """The unexpired stored response for a key, if any"""
+        slot = (user_id, key)
+        now = datetime.utcnow()
+        stored = self._cache.get(slot)
+        if stored is not None:
+            if stored.expires_at > now:
+                self._cache.move_to_end(slot)
+                return stored
+            del self._cache[slot]
+        
+        keys = IdempotencyKey.__table__
+        async with self.engine.connect() as conn:
+            row = (await conn.execute(
+                select(
+                    keys.c.endpoint, keys.c.request_hash, keys.c.status_code,
+                    keys.c.response_body, keys.c.expires_at,
+                )
+                .where(keys.c.user_id == UUID(user_id), keys.c.key == key, keys.c.expires_at > now)
+            )).first()
+        if row is None:
+            return None
+        stored = StoredResponse(*row)
+        self.remember(user_id, key, stored)
+        return stored
+    
+    async def save(self, db: AsyncSession, user_id: str, key: str, stored: StoredResponse) -> bool:
+        """
+        Insert a response in the request's transaction
+        
+        Blocks while another transaction holds the same key uncommitted.
+        An expired row for the key is overwritten.
+        
+        Returns:
+            False if an unexpired response for the key already exists
+        """
+        keys = IdempotencyKey.__table__
+        statement = insert(keys).values(
+            user_id=UUID(user_id),
+            key=key,
+            endpoint=stored.endpoint,
+            request_hash=stored.request_hash,
+            status_code=stored.status_code,
+            response_body=stored.body,
+            expires_at=stored.expires_at,
+            created_at=datetime.utcnow(),
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[keys.c.user_id, keys.c.key],
+            set_={
+                column: statement.excluded[column]
+                for column in ("endpoint", "request_hash", "status_code", "response_body", "expires_at", "created_at")
+            },
+            where=keys.c.expires_at <= datetime.utcnow(),
+        ).returning(keys.c.key)
+        return await db.scalar(statement) is not None
+    
+    @staticmethod
+    async def cleanup_expired(db: AsyncSession, batch_size: Optional[int] = None) -> int:
+        """Delete up to batch_size expired rows; returns the count"""
+        batch_size = batch_size or settings.IDEMPOTENCY_CLEANUP_BATCH
+        keys = IdempotencyKey.__table__
+        expired = (
+            select(keys.c.user_id, keys.c.key)
+            .where(keys.c.expires_at <= datetime.utcnow())
+            .limit(batch_size)
+        )
+        result = await db.execute(
+            delete(keys).where(tuple_(keys.c.user_id, keys.c.key).in_(expired))
+        )
+        return result.rowcount
+
+
+idempotency_store = IdempotencyStore()
+
+
+class IdempotentRoute(UnitOfWorkRoute):
+    """
+    UnitOfWorkRoute that honours the Idempotency-Key header
+    
+    Requests without the header (or without a signed-in user, which the
+    handler rejects anyway) run as usual.
+    
+    Usage: APIRouter(route_class=IdempotentRoute)
+    """
+    
+    store = idempotency_store
+    
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        
+        async def idempotent_handler(request: Request):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            user_id = request_user_key(request) if key and request.method not in SAFE_METHODS else None
+            try:
+                UUID(user_id or "")
+            except ValueError:
+                return await handler(request)
+            if len(key) > MAX_KEY_LENGTH:
+                return JSONResponse(
+                    status_code=400,
+                    content={"detail": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters"},
+                )
+            
+            slot = (user_id, key)
+            endpoint = f"{request.method} {request.url.path}"
+            fingerprint = request_hash(request.url.query, await request.body())
+            
+            # A retry of a request still running here waits for its outcome
+            while slot in self.store.in_flight:
+                await asyncio.shield(self.store.in_flight[slot])
+            
+            stored = await self.store.find(user_id, key)
+            if stored is not None:
+                self.store.replays += 1
+                return replay(stored, endpoint, fingerprint)
+            
+            self.store.in_flight[slot] = asyncio.get_running_loop().create_future()
+            request.state.idempotency = (user_id, key, endpoint, fingerprint)
+            try:
+                return await handler(request)
+            finally:
+                self.store.in_flight.pop(slot).set_result(None)
+        
+        return idempotent_handler
+    
+    async def commit(self, request: Request, response: Response) -> Response:
+        pending = getattr(request.state, "idempotency", None)
+        session = getattr(request.state, "db", None)
+        body = getattr(response, "body", None)
+        if pending is None or session is None or body is None or not 200 <= response.status_code < 300:
+            return await super().commit(request, response)
+        
+        user_id, key, endpoint, fingerprint = pending
+        stored = StoredResponse(
+            endpoint=endpoint,
+            request_hash=fingerprint,
+            status_code=response.status_code,
+            body=body.decode(),
+            expires_at=datetime.utcnow() + timedelta(hours=self.store.ttl_hours),
+        )
+        if not await self.store.save(session, user_id, key, stored):
+            # The same request committed first on another worker: undo
+            # this run and answer like that one did
+            await rollback_session(session)
+            logger.info(json.dumps({"event": "concurrent_duplicate", "user_id": user_id, "endpoint": endpoint}))
+            first = await self.store.find(user_id, key)
+            if first is None:
+                return JSONResponse(status_code=409, content={"detail": "A request with this key was just processed"})
+            return replay(first, endpoint, fingerprint)
+        
+        response = await super().commit(request, response)
+        self.store.remember(user_id, key, stored)
+        return response
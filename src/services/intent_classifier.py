@@ -0,0 +1,335 @@
+"""
+Intent Classifier Service
+Chat message -> intent for the AI assistant
+
+Fast path: one compiled regex (keyword trie) over multilingual keyword
+lists, scored per intent. Messages with no keyword, or a tie between
+intents, go to an optional hashed character n-gram model trained from
+validated AILearningEvent rows (scripts/train_intent_model.py).
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import os
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.db.models import AILearningEvent
+
+
+# Priority order: breaks keyword ties when there is no model
+INTENTS = (
+    "help_request",
+    "task_inquiry",
+    "withdrawal_inquiry",
+    "subscription_inquiry",
+    "problem_report",
+    "suggestion",
+    "general_conversation",
+)
+DEFAULT_INTENT = "general_conversation"
+
+# AILearningEvent.event_type for chat intents. Rows are written for
+# messages the keywords couldn't decide; once reviewed (human_validated)
+# they become training data, with human_feedback holding the correct
+# intent when the logged one was wrong.
+INTENT_EVENT_TYPE = "chat_intent"
+
+# Lowercase keywords per intent. "word" matches whole words, "word*"
+# matches words starting with it. Keywords in scripts without word
+# separators or with combining marks (Myanmar, Thai, Devanagari) match
+# anywhere in the message.
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+    "help_request": [
+        "help", "how", "what", "guide*", "explain*",  # en
+        "ayuda", "ayúdame", "cómo", "como", "guía",  # es
+        "aide", "aidez", "comment",  # fr
+        "bantu*", "bagaimana", "cara", "panduan",  # id
+        "मदद", "कैसे", "सहायता",  # hi
+        "အကူအညီ", "ကူညီ", "ဘယ်လို",  # my
+        "ช่วย", "อย่างไร", "ยังไง", "วิธี",  # th
+    ],
+    "task_inquiry": [
+        "task*", "work", "job*", "earn*",  # en
+        "tarea*", "trabajo*", "ganar", "gano",  # es
+        "tâche*", "travail", "gagner",  # fr
+        "tugas", "kerja", "pekerjaan", "penghasilan",  # id
+        "काम", "कार्य", "कमाई",  # hi
+        "အလုပ်", "ဝင်ငွေ",  # my
+        "งาน", "รายได้",  # th
+    ],
+    "withdrawal_inquiry": [
+        "withdraw*", "payout*", "money", "cash*",  # en
+        "retir*", "dinero", "efectivo", "pago*",  # es
+        "retrait*", "argent", "paiement*",  # fr
+        "tarik", "penarikan", "uang", "pencairan",  # id
+        "निकासी", "पैसे", "पैसा", "भुगतान",  # hi
+        "ငွေထုတ်", "ပိုက်ဆံ",  # my
+        "ถอน", "เงิน",  # th
+    ],
+    "subscription_inquiry": [
+        "upgrad*", "premium", "pro", "subscri*", "tier*",  # en
+        "suscrip*", "suscribir*",  # es
+        "abonnement*", "abonner",  # fr
+        "langganan",  # id
+        "सदस्यता", "अपग्रेड",  # hi
+        "အဆင့်မြှင့်",  # my
+        "อัปเกรด", "สมาชิก",  # th
+    ],
+    "problem_report": [
+        "problem*", "issue*", "error*", "not working", "doesn't work", "broken", "bug*", "fail*", "stuck",  # en
+        "problema*", "no funciona", "falla*",  # es
+        "problème*", "erreur*", "ne marche pas", "ne fonctionne pas",  # fr
+        "masalah", "tidak bisa", "gagal", "rusak",  # id
+        "समस्या", "दिक्कत", "त्रुटि",  # hi
+        "ပြဿနာ", "အမှား",  # my
+        "ปัญหา", "ผิดพลาด", "ใช้ไม่ได้",  # th
+    ],
+    "suggestion": [
+        "suggest*", "improv*", "feature*", "idea*",  # en
+        "sugerencia*", "sugiero", "mejorar", "mejora*",  # es
+        "idée*", "améliorer", "amélioration*",  # fr
+        "saran", "usul*", "ide", "fitur",  # id
+        "सुझाव", "विचार",  # hi
+        "အကြံပြု", "အကြံဉာဏ်",  # my
+        "แนะนำ", "ข้อเสนอ", "ไอเดีย",  # th
+    ],
+}
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Regex alternation built as a trie ("cash", "cash out" -> cash(?: out)?)
+    
+    re tries alternatives one by one; sharing prefixes keeps matching
+    roughly linear in message length however many keywords there are.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+    
+    return build(trie)
+
+
+# Scripts written without spaces between words
+_UNSPACED_SCRIPTS = ("THAI", "LAO", "KHMER", "MYANMAR", "CJK", "HIRAGANA", "KATAKANA")
+
+
+def _has_word_boundaries(keyword: str) -> bool:
+    """Whether a keyword can be matched as a whole word"""
+    return all(
+        char in " '" or (char.isalnum() and not unicodedata.name(char, "").startswith(_UNSPACED_SCRIPTS))
+        for char in keyword
+    )
+
+
+class KeywordMatcher:
+    """Compiled multilingual keyword matcher"""
+    
+    def __init__(self, keywords: Dict[str, List[str]]):
+        self._intents_by_keyword: Dict[str, List[str]] = {}
+        words, prefixes, anywhere = set(), set(), set()
+        for intent, intent_keywords in keywords.items():
+            for keyword in intent_keywords:
+                keyword = keyword.casefold()
+                if keyword.endswith("*"):
+                    keyword = keyword[:-1]
+                    (prefixes if _has_word_boundaries(keyword) else anywhere).add(keyword)
+                else:
+                    (words if _has_word_boundaries(keyword) else anywhere).add(keyword)
+                self._intents_by_keyword.setdefault(keyword, []).append(intent)
+        
+        alternatives = []
+        if words:
+            alternatives.append(rf"(?<!\w){_trie_pattern(words)}(?!\w)")
+        if prefixes:
+            alternatives.append(rf"(?<!\w){_trie_pattern(prefixes)}")
+        if anywhere:
+            alternatives.append(_trie_pattern(anywhere))
+        self._pattern = re.compile("|".join(alternatives) or r"(?!)")
+    
+    def scores(self, message: str) -> Dict[str, int]:
+        """Keyword hits per intent"""
+        scores: Dict[str, int] = {}
+        for match in self._pattern.finditer(message.casefold()):
+            for intent in self._intents_by_keyword.get(match.group(), ()):
+                scores[intent] = scores.get(intent, 0) + 1
+        return scores
+
+
+class HashedNGramModel:
+    """
+    Multinomial naive Bayes over hashed character n-grams
+    
+    Character n-grams need no tokenizer, so one model covers every
+    language in the training data. Features are hashed (crc32, stable
+    across processes) into n_features buckets; the model is a
+    (n_features, n_intents) float32 matrix plus a bias per intent.
+    """
+    
+    def __init__(
+        self,
+        intents: Sequence[str] = INTENTS,
+        n_features: int = 2 ** 18,
+        ngram_range: Tuple[int, int] = (2, 4),
+    ):
+        self.intents = list(intents)
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.weights = np.zeros((n_features, len(self.intents)), dtype=np.float32)
+        self.bias = np.zeros(len(self.intents), dtype=np.float32)
+    
+    def features(self, message: str) -> np.ndarray:
+        text = f" {' '.join(message.casefold().split())} "
+        low, high = self.ngram_range
+        hashes = [
+            zlib.crc32(text[start:start + size].encode())
+            for size in range(low, high + 1)
+            for start in range(len(text) - size + 1)
+        ]
+        return np.asarray(hashes, dtype=np.int64) % self.n_features
+    
+    def fit(self, messages: Sequence[str], labels: Sequence[str], alpha: float = 0.1) -> "HashedNGramModel":
+        counts = np.zeros((self.n_features, len(self.intents)), dtype=np.float64)
+        documents = np.zeros(len(self.intents), dtype=np.float64)
+        for message, label in zip(messages, labels):
+            column = self.intents.index(label)
+            np.add.at(counts[:, column], self.features(message), 1)
+            documents[column] += 1
+        
+        totals = counts.sum(axis=0) + alpha * self.n_features
+        self.weights = np.log((counts + alpha) / totals).astype(np.float32)
+        self.bias = np.log((documents + 1) / (documents.sum() + len(self.intents))).astype(np.float32)
+        return self
+    
+    def predict_proba(self, messages: Sequence[str]) -> np.ndarray:
+        """(len(messages), n_intents) probabilities, one matrix gather per batch"""
+        if not messages:
+            return np.zeros((0, len(self.intents)), dtype=np.float32)
+        features = [self.features(message) for message in messages]
+        offsets = np.cumsum([0] + [len(f) for f in features[:-1]])
+        logits = np.add.reduceat(self.weights[np.concatenate(features)], offsets, axis=0) + self.bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+    
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                weights=self.weights,
+                bias=self.bias,
+                intents=np.array(self.intents),
+                ngram_range=np.array(self.ngram_range),
+            )
+    
+    @classmethod
+    def load(cls, path: str) -> "HashedNGramModel":
+        with np.load(path, allow_pickle=False) as data:
+            model = cls(
+                intents=[str(intent) for intent in data["intents"]],
+                n_features=data["weights"].shape[0],
+                ngram_range=tuple(int(n) for n in data["ngram_range"]),
+            )
+            model.weights = data["weights"]
+            model.bias = data["bias"]
+        return model
+
+
+class IntentClassifier:
+    """
+    Keywords first, model for what they can't decide
+    
+    Results are {"intent", "source", "confidence"} with source one of
+    "keywords", "model" or "default" (no keyword, no confident model).
+    """
+    
+    def __init__(
+        self,
+        matcher: KeywordMatcher,
+        model: Optional[HashedNGramModel] = None,
+        model_threshold: float = 0.5,
+    ):
+        self.matcher = matcher
+        self.model = model
+        self.model_threshold = model_threshold
+    
+    def classify(self, message: str) -> Dict[str, object]:
+        return self.classify_many([message])[0]
+    
+    def classify_many(self, messages: Sequence[str]) -> List[Dict[str, object]]:
+        """Classify a batch; undecided messages share one model call"""
+        results: List[Optional[Dict[str, object]]] = []
+        undecided: List[Tuple[int, List[str]]] = []  # (index, tied intents or [] for none)
+        
+        for index, message in enumerate(messages):
+            scores = self.matcher.scores(message)
+            best = max(scores.values(), default=0)
+            leaders = [intent for intent in INTENTS if scores.get(intent) == best] if best else []
+            if len(leaders) == 1:
+                results.append({"intent": leaders[0], "source": "keywords", "confidence": 1.0})
+            else:
+                results.append(None)
+                undecided.append((index, leaders))
+        
+        probabilities = None
+        if undecided and self.model is not None:
+            probabilities = self.model.predict_proba([messages[index] for index, _ in undecided])
+        
+        for row, (index, leaders) in enumerate(undecided):
+            result = {"intent": leaders[0] if leaders else DEFAULT_INTENT, "source": "default", "confidence": 0.0}
+            if probabilities is not None:
+                candidates = [
+                    (float(probabilities[row, column]), intent)
+                    for column, intent in enumerate(self.model.intents)
+                    if not leaders or intent in leaders
+                ]
+                confidence, intent = max(candidates)
+                if leaders or confidence >= self.model_threshold:
+                    result = {"intent": intent, "source": "model", "confidence": confidence}
+            results[index] = result
+        return results
+
+
+async def load_training_examples(db: AsyncSession) -> List[Tuple[str, str]]:
+    """(message, intent) pairs from reviewed chat_intent learning events"""
+    result = await db.execute(
+        select(AILearningEvent.input_data, AILearningEvent.ai_response, AILearningEvent.human_feedback)
+        .where(
+            AILearningEvent.event_type == INTENT_EVENT_TYPE,
+            AILearningEvent.human_validated == True,
+        )
+    )
+    examples = []
+    for input_data, ai_response, feedback in result.all():
+        feedback = (feedback or "").strip()
+        label = feedback if feedback in INTENTS else ai_response.get("intent")
+        if label in INTENTS and input_data.get("message"):
+            examples.append((input_data["message"], label))
+    return examples
+
+
+def load_classifier() -> IntentClassifier:
+    """Keyword matcher plus the trained model, if one has been saved"""
+    model = None
+    if settings.INTENT_MODEL_PATH and os.path.exists(settings.INTENT_MODEL_PATH):
+        model = HashedNGramModel.load(settings.INTENT_MODEL_PATH)
+    return IntentClassifier(KeywordMatcher(INTENT_KEYWORDS), model, settings.INTENT_MODEL_THRESHOLD)
+
+
+intent_classifier = load_classifier()
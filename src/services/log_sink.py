@@ -0,0 +1,200 @@
+"""
+Log Sink Service
+Buffered writer for append-only audit/activity logs (FaceLivenessLog,
+UserActivityLog, AdminActivityLog, AIDecisionLog)
+
+Requests enqueue rows instead of adding them to their own session; a
+background task writes them in multi-row INSERTs every
+LOG_SINK_FLUSH_INTERVAL_MS or LOG_SINK_BATCH_SIZE rows, whichever
+comes first. Started and drained by the app lifespan.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import defaultdict
+import asyncio
+import json
+import logging
+import time
+
+from sqlalchemy import Column, Table, insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.core.config import settings
+from src.core import metrics
+
+
+logger = logging.getLogger("dignilife.log_sink")
+
+FLUSH_SECONDS = metrics.Histogram(
+    "log_sink_flush_seconds",
+    "Time to write one batch of buffered log rows",
+)
+
+_STOP = object()
+
+
+def database_filled(column: Column) -> bool:
+    """Generated, or server-defaulted with no Python default"""
+    return column.computed is not None or (column.server_default is not None and column.default is None)
+
+
+def build_row(table: Table, values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Full column -> value dict for one row
+    
+    Column defaults (id, created_at) are evaluated now, at enqueue time,
+    so timestamps record when the event happened rather than when the
+    batch was written. Every row of a table has the same keys, which a
+    multi-row VALUES clause needs. Columns the database fills (generated
+    columns, server defaults without a Python default) are left out:
+    Postgres rejects any value but DEFAULT for a generated column.
+    """
+    columns = [column for column in table.columns if not database_filled(column)]
+    unknown = set(values) - {column.name for column in columns}
+    if unknown:
+        raise ValueError(f"Unknown columns for {table.name}: {', '.join(sorted(unknown))}")
+    
+    row = {}
+    for column in columns:
+        if column.name in values:
+            row[column.name] = values[column.name]
+        elif column.default is not None and column.default.is_callable:
+            row[column.name] = column.default.arg(None)
+        elif column.default is not None and column.default.is_scalar:
+            row[column.name] = column.default.arg
+        else:
+            row[column.name] = None
+    return row
+
+
+class LogSink:
+    """
+    In-process queue plus one writer task
+    
+    The queue is bounded by LOG_SINK_MAX_QUEUE: when the database falls
+    behind, write() waits for space instead of growing memory, which
+    slows callers down rather than dropping audit rows.
+    """
+    
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        max_queue: Optional[int] = None,
+    ):
+        self.batch_size = batch_size or settings.LOG_SINK_BATCH_SIZE
+        self.flush_interval = (flush_interval_ms or settings.LOG_SINK_FLUSH_INTERVAL_MS) / 1000
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue or settings.LOG_SINK_MAX_QUEUE)
+        self._engine: Optional[AsyncEngine] = None
+        self._task: Optional[asyncio.Task] = None
+        self.rows_written = 0
+        self.rows_failed = 0
+    
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+    
+    async def write(self, model: Any, **values: Any) -> None:
+        """Enqueue one row for model; waits only when the buffer is full"""
+        table = model.__table__
+        await self._queue.put((table, build_row(table, values)))
+    
+    def start(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Write everything still buffered, then stop the writer task"""
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        
+        # Anything enqueued after the stop marker
+        leftover = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            await self._flush(leftover)
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            await self._flush(batch)
+    
+    async def _flush(self, batch: List[Tuple[Table, Dict[str, Any]]]) -> None:
+        """
+        One transaction, one INSERT per table
+        
+        If the batch fails (e.g. a row whose user was deleted meanwhile),
+        rows are retried one by one so a bad row only costs itself; rows
+        that still fail are logged in full so they can be replayed.
+        """
+        rows_by_table: Dict[Table, List[Dict[str, Any]]] = defaultdict(list)
+        for table, row in batch:
+            rows_by_table[table].append(row)
+        
+        started = time.perf_counter()
+        try:
+            async with self._engine.begin() as conn:
+                for table, rows in rows_by_table.items():
+                    await conn.execute(insert(table).values(rows))
+            self.rows_written += len(batch)
+        except Exception as e:
+            logger.warning(json.dumps({"event": "batch_failed", "rows": len(batch), "error": str(e)}))
+            for table, row in batch:
+                try:
+                    async with self._engine.begin() as conn:
+                        await conn.execute(insert(table).values([row]))
+                    self.rows_written += 1
+                except Exception as row_error:
+                    self.rows_failed += 1
+                    logger.error(json.dumps(
+                        {"event": "row_failed", "table": table.name, "row": row, "error": str(row_error)},
+                        default=str,
+                    ))
+        finally:
+            FLUSH_SECONDS.observe(time.perf_counter() - started)
+
+
+log_sink = LogSink()
+
+
+@metrics.register
+def _log_sink_gauges() -> List[str]:
+    return (
+        metrics.gauge_lines(
+            "log_sink_pending_rows", "Log rows buffered and not yet written",
+            [({}, log_sink.pending)],
+        )
+        + metrics.gauge_lines(
+            "log_sink_rows_written_total", "Log rows written by the sink",
+            [({}, log_sink.rows_written)], metric_type="counter",
+        )
+        + metrics.gauge_lines(
+            "log_sink_rows_failed_total", "Log rows that could not be written (logged instead)",
+            [({}, log_sink.rows_failed)], metric_type="counter",
+        )
+    )
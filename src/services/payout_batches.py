@@ -0,0 +1,425 @@
+"""
+Payout Batch Service
+Bulk payout files for providers that accept them (bank transfer, wallets)
+
+Accounts and names come from users' payout_details and end up in files a
+bank or spreadsheet parses: control characters are stripped, accounts
+must match ACCOUNT_PATTERN (withdrawals that don't are skipped and
+reported) and CSV cells are escaped against formula injection.
+"""
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from uuid import UUID, uuid4
+import csv
+import os
+import re
+import unicodedata
+
+from sqlalchemy import select, update, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.db.models import (
+    Withdrawal, PayoutBatch, FXRate, Transaction, PayoutMethodEnum,
+    TransactionTypeEnum, TransactionStatusEnum
+)
+from src.services.payout_dispatcher import log_event, refund
+
+
+# File layout each provider accepts
+FILE_FORMATS: Dict[PayoutMethodEnum, str] = {
+    PayoutMethodEnum.BANK_TRANSFER: "fixed_width",
+    PayoutMethodEnum.PAYPAL: "csv",
+    PayoutMethodEnum.WAVE_MONEY: "csv",
+    PayoutMethodEnum.KBZ_PAY: "csv",
+    PayoutMethodEnum.CB_PAY: "csv",
+    PayoutMethodEnum.AYA_PAY: "csv",
+}
+
+CENT = Decimal("0.01")
+
+# Account numbers, phone numbers (+959...) and e-mail addresses
+ACCOUNT_PATTERN = re.compile(r"\+?[A-Za-z0-9][A-Za-z0-9@._+-]*")
+
+# Leading characters a spreadsheet evaluates as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def convert_amount(amount_usd: Any, rate: Decimal) -> Decimal:
+    """USD -> local currency, rounded to cents"""
+    return (Decimal(str(amount_usd)) * rate).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def payout_account(details: Dict[str, Any]) -> str:
+    """Destination account from Withdrawal.payout_details"""
+    for key in ("account_number", "phone_number", "phone", "email", "account"):
+        if details.get(key):
+            return str(details[key])
+    return ""
+
+
+def clean_text(value: Any) -> str:
+    """Text without control, format or line/paragraph separator characters"""
+    text = "".join(
+        " " if unicodedata.category(char) in ("Cc", "Zl", "Zp") else char
+        for char in str(value)
+        if unicodedata.category(char) not in ("Cf", "Co", "Cs", "Cn")
+    )
+    return " ".join(text.split())
+
+
+def valid_account(account: str, max_length: int) -> Optional[str]:
+    """The account with spaces removed, or None if it isn't a plausible account"""
+    account = str(account).replace(" ", "")
+    if len(account) > max_length or not ACCOUNT_PATTERN.fullmatch(account):
+        return None
+    return account
+
+
+def csv_cell(value: str) -> str:
+    """Quote a cell a spreadsheet would otherwise run as a formula"""
+    return "'" + value if value.startswith(FORMULA_PREFIXES) else value
+
+
+class CSVPayoutFile:
+    """Mobile wallet / PayPal bulk CSV"""
+    
+    extension = ".csv"
+    max_account_length = 254
+    
+    def __init__(self, path: str, batch_id: UUID, currency_code: str):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(["reference", "account", "account_name", "amount", "currency"])
+    
+    def write(self, reference: str, account: str, name: str, amount: Decimal, currency_code: str) -> None:
+        self._writer.writerow([
+            csv_cell(reference), csv_cell(account), csv_cell(clean_text(name)), f"{amount:.2f}", currency_code,
+        ])
+    
+    def close(self, item_count: int, total: Decimal) -> None:
+        self._file.close()
+    
+    def abort(self) -> None:
+        self._file.close()
+
+
+class FixedWidthPayoutFile:
+    """
+    Bank bulk transfer file (fixed-width records)
+    H  batch id(36) date(8) currency(3)
+    D  reference(32) account(34) name(35) amount in cents(15) currency(3)
+    T  item count(10) total in cents(18)
+    """
+    
+    extension = ".txt"
+    max_account_length = 34
+    
+    def __init__(self, path: str, batch_id: UUID, currency_code: str):
+        self._file = open(path, "w", encoding="ascii", errors="replace", newline="\n")
+        self._file.write(f"H{str(batch_id):<36}{datetime.utcnow():%Y%m%d}{currency_code:<3}\n")
+    
+    def write(self, reference: str, account: str, name: str, amount: Decimal, currency_code: str) -> None:
+        cents = int(amount * 100)
+        account, name = clean_text(account), clean_text(name)
+        self._file.write(
+            f"D{reference[:32]:<32}{account[:34]:<34}{name[:35]:<35}{cents:015d}{currency_code:<3}\n"
+        )
+    
+    def close(self, item_count: int, total: Decimal) -> None:
+        self._file.write(f"T{item_count:010d}{int(total * 100):018d}\n")
+        self._file.close()
+    
+    def abort(self) -> None:
+        self._file.close()
+
+
+FILE_WRITERS = {
+    "csv": CSVPayoutFile,
+    "fixed_width": FixedWidthPayoutFile,
+}
+
+
+class PayoutBatchBuilder:
+    """
+    Groups pending withdrawals into provider bulk files
+    - One batch per payout_method + currency_code (split at PAYOUT_BATCH_MAX_ITEMS)
+    - Every amount converted with one FX snapshot taken at the start
+    - Rows are streamed from the database straight into the files, and
+      batch ids are written back in chunks, so memory stays flat
+    """
+    
+    @staticmethod
+    async def load_fx_snapshot(db: AsyncSession) -> Dict[str, Decimal]:
+        """Latest USD -> currency rate for every currency, in one query"""
+        result = await db.execute(
+            select(FXRate.to_currency, FXRate.rate)
+            .where(FXRate.from_currency == "USD")
+            .distinct(FXRate.to_currency)
+            .order_by(FXRate.to_currency, FXRate.created_at.desc())
+        )
+        snapshot = {"USD": Decimal("1")}
+        snapshot.update({currency: Decimal(str(rate)) for currency, rate in result.all()})
+        return snapshot
+    
+    @staticmethod
+    async def build(
+        db: AsyncSession,
+        methods: Optional[List[str]] = None,
+        output_dir: Optional[str] = None,
+        max_items: Optional[int] = None,
+        chunk_size: int = 2000,
+    ) -> Dict[str, Any]:
+        """
+        Write bulk payout files for all approved, pending, unbatched withdrawals
+        
+        The caller commits; if that fails, remove_files() the batches.
+        Withdrawals whose account isn't valid for the file are left out
+        (and logged) so one bad payout_details can't corrupt a file.
+        
+        Args:
+            methods: Payout methods to batch (default PAYOUT_FILE_METHODS)
+            output_dir: Directory for the files (default PAYOUT_BATCH_DIR)
+            max_items: Rows per file (default PAYOUT_BATCH_MAX_ITEMS)
+            chunk_size: Rows fetched / updated per round trip
+        
+        Returns:
+            {"batches": [...], "skipped_no_fx_rate": int, "skipped_invalid_details": int}
+        """
+        methods = [PayoutMethodEnum(m) for m in (methods or settings.payout_file_methods_list)]
+        unsupported = [m.value for m in methods if m not in FILE_FORMATS]
+        if unsupported:
+            raise ValueError(f"No bulk file format for: {', '.join(unsupported)}")
+        
+        output_dir = output_dir or settings.PAYOUT_BATCH_DIR
+        max_items = max_items or settings.PAYOUT_BATCH_MAX_ITEMS
+        os.makedirs(output_dir, exist_ok=True)
+        
+        snapshot = await PayoutBatchBuilder.load_fx_snapshot(db)
+        now = datetime.utcnow()
+        
+        batches: List[Dict[str, Any]] = []
+        current: Optional[Dict[str, Any]] = None
+        pending_updates: List[Dict[str, Any]] = []
+        skipped = 0
+        invalid = 0
+        
+        async def flush_updates():
+            if pending_updates:
+                await db.execute(update(Withdrawal), pending_updates)
+                pending_updates.clear()
+        
+        async def close_batch(batch: Dict[str, Any]):
+            await flush_updates()
+            batch["writer"].close(batch["item_count"], batch["total_amount_local"])
+            await db.execute(
+                update(PayoutBatch)
+                .where(PayoutBatch.id == batch["id"])
+                .values(
+                    item_count=batch["item_count"],
+                    total_amount_usd=batch["total_amount_usd"],
+                    total_amount_local=batch["total_amount_local"],
+                    updated_at=now,
+                )
+            )
+        
+        async def open_batch(method: PayoutMethodEnum, currency_code: str) -> Dict[str, Any]:
+            batch_id = uuid4()
+            file_format = FILE_FORMATS[method]
+            writer_class = FILE_WRITERS[file_format]
+            path = os.path.join(output_dir, f"{method.value}_{currency_code}_{batch_id}{writer_class.extension}")
+            
+            await db.execute(insert(PayoutBatch).values(
+                id=batch_id,
+                payout_method=method,
+                currency_code=currency_code,
+                exchange_rate=snapshot[currency_code],
+                file_path=path,
+                file_format=file_format,
+                item_count=0,
+                total_amount_usd=0,
+                total_amount_local=0,
+                status=TransactionStatusEnum.PENDING,
+                created_at=now,
+                updated_at=now,
+            ))
+            batch = {
+                "id": batch_id,
+                "payout_method": method.value,
+                "currency_code": currency_code,
+                "exchange_rate": snapshot[currency_code],
+                "file_path": path,
+                "writer": writer_class(path, batch_id, currency_code),
+                "item_count": 0,
+                "total_amount_usd": Decimal("0"),
+                "total_amount_local": Decimal("0"),
+            }
+            batches.append(batch)
+            return batch
+        
+        result = await db.stream(
+            select(
+                Withdrawal.id, Withdrawal.payout_method, Withdrawal.currency_code,
+                Withdrawal.net_amount_usd, Withdrawal.payout_details,
+            )
+            .where(
+                Withdrawal.status == TransactionStatusEnum.PENDING,
+                Withdrawal.payout_batch_id == None,
+                Withdrawal.risk_hold == False,
+                Withdrawal.approved_at != None,
+                Withdrawal.payout_method.in_(methods),
+            )
+            .order_by(Withdrawal.payout_method, Withdrawal.currency_code, Withdrawal.created_at)
+            .with_for_update(skip_locked=True)
+            .execution_options(yield_per=chunk_size)
+        )
+        
+        try:
+            async for rows in result.partitions(chunk_size):
+                for withdrawal_id, method, currency_code, net_amount_usd, details in rows:
+                    rate = snapshot.get(currency_code)
+                    if rate is None:
+                        skipped += 1
+                        continue
+                    
+                    details = details or {}
+                    writer_class = FILE_WRITERS[FILE_FORMATS[method]]
+                    account = valid_account(payout_account(details), writer_class.max_account_length)
+                    if account is None:
+                        invalid += 1
+                        log_event("payout_invalid_details", withdrawal_id=withdrawal_id, method=method.value)
+                        continue
+                    
+                    if (
+                        current is None
+                        or current["payout_method"] != method.value
+                        or current["currency_code"] != currency_code
+                        or current["item_count"] >= max_items
+                    ):
+                        if current is not None:
+                            await close_batch(current)
+                        current = await open_batch(method, currency_code)
+                    
+                    amount_local = convert_amount(net_amount_usd, rate)
+                    current["writer"].write(
+                        str(withdrawal_id).replace("-", ""),
+                        account,
+                        str(details.get("account_name", "")),
+                        amount_local,
+                        currency_code,
+                    )
+                    current["item_count"] += 1
+                    current["total_amount_usd"] += Decimal(str(net_amount_usd))
+                    current["total_amount_local"] += amount_local
+                    
+                    pending_updates.append({
+                        "id": withdrawal_id,
+                        "payout_batch_id": current["id"],
+                        "amount_local": amount_local,
+                        "exchange_rate": rate,
+                        "updated_at": now,
+                    })
+                    if len(pending_updates) >= chunk_size:
+                        await flush_updates()
+            
+            if current is not None:
+                await close_batch(current)
+        
+        except Exception:
+            # Don't leave files behind for batches that were rolled back
+            for batch in batches:
+                batch["writer"].abort()
+            PayoutBatchBuilder.remove_files(batches)
+            raise
+        
+        return {
+            "batches": [
+                {key: value for key, value in batch.items() if key != "writer"}
+                for batch in batches
+            ],
+            "skipped_no_fx_rate": skipped,
+            "skipped_invalid_details": invalid,
+        }
+    
+    @staticmethod
+    def remove_files(batches: List[Dict[str, Any]]) -> None:
+        """Delete the files of batches that were not committed"""
+        for batch in batches:
+            if os.path.exists(batch["file_path"]):
+                os.remove(batch["file_path"])
+    
+    @staticmethod
+    async def settle(
+        db: AsyncSession,
+        batch_id: UUID,
+        status: TransactionStatusEnum,
+        error: Optional[str] = None,
+    ) -> Optional[List[Any]]:
+        """
+        Move a pending batch and its pending withdrawals to status
+        
+        Returns:
+            The withdrawals settled (id, user_id, gross and net amount), or
+            None if the batch isn't pending (already settled, or unknown)
+        """
+        now = datetime.utcnow()
+        settled = await db.scalar(
+            update(PayoutBatch)
+            .where(PayoutBatch.id == batch_id, PayoutBatch.status == TransactionStatusEnum.PENDING)
+            .values(status=status, processed_at=now, updated_at=now)
+            .returning(PayoutBatch.id)
+        )
+        if settled is None:
+            return None
+        
+        withdrawals = Withdrawal.__table__
+        result = await db.execute(
+            update(withdrawals)
+            .where(
+                withdrawals.c.payout_batch_id == batch_id,
+                withdrawals.c.status == TransactionStatusEnum.PENDING,
+            )
+            .values(status=status, payout_error=error, processed_at=now, updated_at=now)
+            .returning(withdrawals.c.id, withdrawals.c.user_id, withdrawals.c.gross_amount_usd, withdrawals.c.net_amount_usd)
+        )
+        rows = result.all()
+        if rows:
+            await db.execute(
+                update(Transaction)
+                .where(
+                    Transaction.transaction_type == TransactionTypeEnum.WITHDRAWAL,
+                    Transaction.reference_id.in_([str(row.id) for row in rows]),
+                )
+                .values(status=status, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        log_event("payout_batch_" + status.value, batch_id=batch_id, withdrawals=len(rows), detail=error)
+        return rows
+    
+    @staticmethod
+    async def mark_completed(db: AsyncSession, batch_id: UUID) -> Optional[int]:
+        """
+        Mark a pending batch and its withdrawals as paid (provider confirmed
+        the file); the caller commits
+        
+        Returns:
+            Number of withdrawals completed, None if the batch isn't pending
+        """
+        rows = await PayoutBatchBuilder.settle(db, batch_id, TransactionStatusEnum.COMPLETED)
+        return None if rows is None else len(rows)
+    
+    @staticmethod
+    async def mark_failed(db: AsyncSession, batch_id: UUID, reason: str) -> Optional[int]:
+        """
+        Mark a pending batch and its withdrawals as failed (provider rejected
+        the file) and refund the users; the caller commits
+        
+        Returns:
+            Number of withdrawals failed, None if the batch isn't pending
+        """
+        rows = await PayoutBatchBuilder.settle(db, batch_id, TransactionStatusEnum.FAILED, reason)
+        if rows is None:
+            return None
+        await refund(db, rows, datetime.utcnow())
+        return len(rows)
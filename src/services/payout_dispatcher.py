@@ -0,0 +1,526 @@
+"""
+Payout Dispatcher Service
+Sends pending withdrawals to payout providers (Wave, KBZ, PayPal, ...)
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from uuid import UUID
+import asyncio
+import hashlib
+import json
+import logging
+import random
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.db.models import (
+    Withdrawal, Transaction, User, PayoutMethodEnum,
+    TransactionTypeEnum, TransactionStatusEnum
+)
+
+
+logger = logging.getLogger("dignilife.payouts")
+
+# withdrawals.payout_state
+DISPATCHING = "dispatching"  # Claimed; a dispatcher is sending it
+UNCONFIRMED = "unconfirmed"  # Provider outcome unknown after PAYOUT_MAX_ATTEMPTS; an admin checks it
+
+
+# Per-provider limits: concurrent requests and payouts per request.
+# batch_size > 1 means the provider accepts bulk payout requests/files.
+PROVIDER_LIMITS: Dict[PayoutMethodEnum, Dict[str, int]] = {
+    PayoutMethodEnum.WAVE_MONEY: {"max_concurrency": 8, "batch_size": 1},
+    PayoutMethodEnum.KBZ_PAY: {"max_concurrency": 8, "batch_size": 1},
+    PayoutMethodEnum.CB_PAY: {"max_concurrency": 4, "batch_size": 1},
+    PayoutMethodEnum.AYA_PAY: {"max_concurrency": 4, "batch_size": 1},
+    PayoutMethodEnum.ONEPAY: {"max_concurrency": 4, "batch_size": 1},
+    PayoutMethodEnum.PAYPAL: {"max_concurrency": 4, "batch_size": 500},
+    PayoutMethodEnum.WESTERN_UNION: {"max_concurrency": 2, "batch_size": 1},
+    PayoutMethodEnum.MONEYGRAM: {"max_concurrency": 2, "batch_size": 1},
+    PayoutMethodEnum.BANK_TRANSFER: {"max_concurrency": 1, "batch_size": 1000},
+}
+
+
+def idempotency_key(withdrawal_id: Any) -> str:
+    """
+    Provider idempotency key for a withdrawal
+    
+    Derived from the withdrawal id only, so every retry - in this run or
+    a later one - is recognised by the provider as the same payout.
+    """
+    return hashlib.sha256(f"dignilife-payout:{withdrawal_id}".encode()).hexdigest()[:32]
+
+
+def log_event(event: str, **fields: Any) -> None:
+    """Emit one structured (JSON) payout log line"""
+    logger.info(json.dumps({"event": event, **fields}, default=str))
+
+
+async def refund(db: AsyncSession, withdrawals: Sequence[Any], now: datetime) -> None:
+    """Give failed withdrawals' money back to their users (one UPDATE per user)"""
+    totals: Dict[Any, List[Decimal]] = defaultdict(lambda: [Decimal("0"), Decimal("0")])
+    for withdrawal in withdrawals:
+        total = totals[withdrawal.user_id]
+        total[0] += Decimal(str(withdrawal.gross_amount_usd))
+        total[1] += Decimal(str(withdrawal.net_amount_usd))
+    
+    for user_id, (gross, net) in totals.items():
+        await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                available_balance_usd=User.available_balance_usd + gross,
+                lifetime_withdrawals_usd=User.lifetime_withdrawals_usd - net,
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+class PayoutProviderError(Exception):
+    """
+    Whole-request provider failure
+    
+    retryable=True for timeouts, 5xx and rate limits; False for errors
+    that will never succeed (bad credentials, unsupported currency).
+    """
+    
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class PayoutProvider(ABC):
+    """
+    Base adapter for one payout channel
+    
+    send_batch receives up to batch_size payouts and returns one result
+    per payout: {"withdrawal_id", "ok", "reference", "error"}.
+    Declined payouts come back with ok=False; request-level failures
+    raise PayoutProviderError.
+    """
+    
+    def __init__(self, method: PayoutMethodEnum, max_concurrency: int = 4, batch_size: int = 1):
+        self.method = method
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+    
+    @abstractmethod
+    async def send_batch(self, payouts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        ...
+
+
+class FakePayoutProvider(PayoutProvider):
+    """
+    Local stand-in for a provider API (development, tests, benchmarks)
+    
+    Simulates request latency, transient outages and per-payout declines,
+    and honours idempotency keys like a real provider: replaying a key
+    returns the original reference without paying twice.
+    """
+    
+    def __init__(
+        self,
+        method: PayoutMethodEnum,
+        max_concurrency: int = 4,
+        batch_size: int = 1,
+        latency_seconds: float = 0.0,
+        transient_failure_rate: float = 0.0,
+        decline_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(method, max_concurrency, batch_size)
+        self.latency_seconds = latency_seconds
+        self.transient_failure_rate = transient_failure_rate
+        self.decline_rate = decline_rate
+        self._random = random.Random(seed)
+        self.paid: Dict[str, str] = {}  # idempotency key -> reference
+        self.requests = 0
+    
+    async def send_batch(self, payouts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.requests += 1
+        await asyncio.sleep(self.latency_seconds)
+        
+        if self._random.random() < self.transient_failure_rate:
+            raise PayoutProviderError(f"{self.method.value} temporarily unavailable")
+        
+        results = []
+        for payout in payouts:
+            key = payout["idempotency_key"]
+            if key not in self.paid and self._random.random() < self.decline_rate:
+                results.append({
+                    "withdrawal_id": payout["withdrawal_id"],
+                    "ok": False,
+                    "reference": None,
+                    "error": "Declined by provider",
+                })
+                continue
+            
+            reference = self.paid.setdefault(key, f"{self.method.value.upper()}-{key[:12]}")
+            results.append({
+                "withdrawal_id": payout["withdrawal_id"],
+                "ok": True,
+                "reference": reference,
+                "error": None,
+            })
+        return results
+
+
+def build_providers() -> Dict[PayoutMethodEnum, PayoutProvider]:
+    """Adapters for every payout method"""
+    if not settings.PAYOUT_USE_FAKE_PROVIDERS:
+        raise RuntimeError("No live payout adapters configured. Set PAYOUT_USE_FAKE_PROVIDERS=true.")
+    
+    return {
+        method: FakePayoutProvider(method, **limits)
+        for method, limits in PROVIDER_LIMITS.items()
+    }
+
+
+class PayoutDispatcher:
+    """
+    Async payout worker pool
+    - Payouts are grouped per provider and chunked to its batch_size
+    - A semaphore per provider caps concurrent requests
+    - Failed requests retry with exponential backoff + jitter
+    """
+    
+    def __init__(
+        self,
+        providers: Dict[PayoutMethodEnum, PayoutProvider],
+        max_attempts: int = 5,
+        retry_base_seconds: float = 1.0,
+        retry_max_seconds: float = 60.0,
+    ):
+        self.providers = providers
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._limits = {
+            method: asyncio.Semaphore(provider.max_concurrency)
+            for method, provider in providers.items()
+        }
+    
+    async def dispatch(self, payouts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Send payouts through their providers
+        
+        Args:
+            payouts: Dicts with withdrawal_id, idempotency_key, payout_method,
+                amount, currency_code, amount_usd, destination
+        
+        Returns:
+            One result per payout: withdrawal_id, status ("completed",
+            "failed" or "pending" when retries ran out), reference, error,
+            attempts
+        """
+        by_method: Dict[PayoutMethodEnum, List[Dict[str, Any]]] = defaultdict(list)
+        for payout in payouts:
+            by_method[PayoutMethodEnum(payout["payout_method"])].append(payout)
+        
+        jobs = []
+        for method, method_payouts in by_method.items():
+            provider = self.providers[method]
+            for start in range(0, len(method_payouts), provider.batch_size):
+                jobs.append(self._send(provider, method_payouts[start:start + provider.batch_size]))
+        
+        results = []
+        for batch_results in await asyncio.gather(*jobs):
+            results.extend(batch_results)
+        return results
+    
+    async def _send(self, provider: PayoutProvider, payouts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send one request's worth of payouts, retrying request-level failures"""
+        method = provider.method.value
+        
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                async with self._limits[provider.method]:
+                    responses = await provider.send_batch(payouts)
+            except Exception as e:
+                retryable = getattr(e, "retryable", True)
+                if not retryable or attempt == self.max_attempts:
+                    status = "pending" if retryable else "failed"
+                    for payout in payouts:
+                        log_event(
+                            "payout_error", method=method, withdrawal_id=payout["withdrawal_id"],
+                            status=status, attempts=attempt, detail=str(e),
+                        )
+                    return [
+                        {
+                            "withdrawal_id": payout["withdrawal_id"],
+                            "status": status,
+                            "reference": None,
+                            "error": str(e),
+                            "attempts": attempt,
+                        }
+                        for payout in payouts
+                    ]
+                
+                delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempt - 1))
+                delay *= random.uniform(0.5, 1.0)
+                log_event(
+                    "payout_retry", method=method, batch_size=len(payouts),
+                    attempt=attempt, delay_seconds=round(delay, 3), detail=str(e),
+                )
+                await asyncio.sleep(delay)
+                continue
+            
+            results = []
+            for payout, response in zip(payouts, responses):
+                status = "completed" if response["ok"] else "failed"
+                log_event(
+                    "payout_" + status, method=method, withdrawal_id=payout["withdrawal_id"],
+                    amount=payout["amount"], currency=payout["currency_code"],
+                    reference=response["reference"], attempts=attempt, detail=response["error"],
+                )
+                results.append({
+                    "withdrawal_id": payout["withdrawal_id"],
+                    "status": status,
+                    "reference": response["reference"],
+                    "error": response["error"],
+                    "attempts": attempt,
+                })
+            return results
+    
+    @staticmethod
+    def to_payout(withdrawal: Withdrawal) -> Dict[str, Any]:
+        """Provider-facing payout for a withdrawal"""
+        return {
+            "withdrawal_id": str(withdrawal.id),
+            "idempotency_key": idempotency_key(withdrawal.id),
+            "payout_method": withdrawal.payout_method,
+            "amount": str(withdrawal.amount_local),
+            "currency_code": withdrawal.currency_code,
+            "amount_usd": str(withdrawal.net_amount_usd),
+            "destination": withdrawal.payout_details,
+        }
+    
+    async def process_pending(self, session_factory: Callable[[], AsyncSession], limit: int) -> Dict[str, int]:
+        """
+        Claim approved withdrawals, pay them out and record the outcome
+        
+        Three short transactions, none open while a provider is called:
+        claim (status stays pending, payout_state "dispatching"), send,
+        record. Claims are taken with SKIP LOCKED, so dispatchers can run
+        side by side; a claim left behind by a crashed dispatcher is sent
+        again after PAYOUT_CLAIM_TIMEOUT_SECONDS under the same idempotency
+        key. Methods paid through bulk files (PAYOUT_FILE_METHODS) are left
+        to PayoutBatchBuilder; withdrawals held for risk review or not yet
+        approved are skipped.
+        
+        Only clear rejections (declined payouts, non-retryable errors) fail
+        and refund the user's balance. A timeout may still have paid the
+        withdrawal: it is sent again on later passes and after
+        PAYOUT_MAX_ATTEMPTS left "unconfirmed" for an admin to check with
+        the provider (resolve_unconfirmed).
+        
+        Returns:
+            Counts per outcome
+        """
+        async with session_factory() as db:
+            claimed = await self.claim(db, limit)
+            await db.commit()
+        counts = {"claimed": len(claimed), "completed": 0, "failed": 0, "pending": 0, "unconfirmed": 0}
+        if not claimed:
+            return counts
+        
+        results = await self.dispatch([self.to_payout(row) for row in claimed])
+        
+        async with session_factory() as db:
+            try:
+                counts.update(await self.record(db, claimed, results))
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+        log_event("payout_pass", **counts)
+        return counts
+    
+    @staticmethod
+    async def claim(db: AsyncSession, limit: int) -> List[Any]:
+        """Mark up to limit approved pending withdrawals "dispatching"; returns them"""
+        now = datetime.utcnow()
+        withdrawals = Withdrawal.__table__
+        claimable = (
+            select(withdrawals.c.id)
+            .where(
+                withdrawals.c.status == TransactionStatusEnum.PENDING,
+                withdrawals.c.payout_batch_id == None,
+                withdrawals.c.risk_hold == False,
+                withdrawals.c.approved_at != None,
+                withdrawals.c.payout_method.notin_(
+                    [PayoutMethodEnum(m) for m in settings.payout_file_methods_list]
+                ),
+                or_(
+                    withdrawals.c.payout_state == None,
+                    and_(
+                        withdrawals.c.payout_state == DISPATCHING,
+                        withdrawals.c.payout_claimed_at < now - timedelta(seconds=settings.PAYOUT_CLAIM_TIMEOUT_SECONDS),
+                    ),
+                ),
+            )
+            .order_by(withdrawals.c.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(withdrawals)
+            .where(withdrawals.c.id.in_(claimable.scalar_subquery()))
+            .values(payout_state=DISPATCHING, payout_claimed_at=now, updated_at=now)
+            .returning(
+                withdrawals.c.id, withdrawals.c.user_id, withdrawals.c.payout_method,
+                withdrawals.c.amount_local, withdrawals.c.currency_code, withdrawals.c.payout_details,
+                withdrawals.c.gross_amount_usd, withdrawals.c.net_amount_usd, withdrawals.c.payout_attempts,
+            )
+        )
+        return result.all()
+    
+    @staticmethod
+    async def record(db: AsyncSession, claimed: List[Any], results: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Write dispatch results of claimed withdrawals; the caller commits
+        
+        Each update only matches a withdrawal still claimed, so a result
+        already recorded by another dispatcher (after a claim timeout) is
+        not applied - or refunded - twice.
+        """
+        now = datetime.utcnow()
+        withdrawals = Withdrawal.__table__
+        by_id = {str(row.id): row for row in claimed}
+        counts = {"completed": 0, "failed": 0, "pending": 0, "unconfirmed": 0}
+        finished: Dict[TransactionStatusEnum, List[str]] = defaultdict(list)
+        refunds = []
+        
+        for outcome in results:
+            row = by_id[outcome["withdrawal_id"]]
+            attempts = row.payout_attempts + 1
+            values = {"payout_attempts": attempts, "payout_error": outcome["error"], "payout_state": None, "updated_at": now}
+            status = outcome["status"]
+            if status == "completed":
+                values.update(status=TransactionStatusEnum.COMPLETED, payout_reference=outcome["reference"], processed_at=now)
+            elif status == "failed":
+                values.update(status=TransactionStatusEnum.FAILED, processed_at=now)
+            elif attempts >= settings.PAYOUT_MAX_ATTEMPTS:
+                status = "unconfirmed"
+                values.update(payout_state=UNCONFIRMED)
+            
+            recorded = await db.scalar(
+                update(withdrawals)
+                .where(
+                    withdrawals.c.id == row.id,
+                    withdrawals.c.status == TransactionStatusEnum.PENDING,
+                    withdrawals.c.payout_state == DISPATCHING,
+                )
+                .values(**values)
+                .returning(withdrawals.c.id)
+            )
+            if recorded is None:
+                continue
+            counts[status] += 1
+            if "status" in values:
+                finished[values["status"]].append(outcome["withdrawal_id"])
+            if status == "failed":
+                refunds.append(row)
+            elif status == "unconfirmed":
+                log_event("payout_unconfirmed", withdrawal_id=outcome["withdrawal_id"], attempts=attempts, detail=outcome["error"])
+        
+        for status, reference_ids in finished.items():
+            await db.execute(
+                update(Transaction)
+                .where(
+                    Transaction.transaction_type == TransactionTypeEnum.WITHDRAWAL,
+                    Transaction.reference_id.in_(reference_ids),
+                )
+                .values(status=status, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        await refund(db, refunds, now)
+        return counts
+    
+    @staticmethod
+    async def approve(db: AsyncSession, withdrawal_ids: Sequence[UUID], admin_id: UUID) -> List[UUID]:
+        """
+        Approve pending withdrawals for payout; the caller commits
+        
+        Held (risk review) and already approved withdrawals are left alone.
+        Returns the ids approved.
+        """
+        if not withdrawal_ids:
+            return []
+        now = datetime.utcnow()
+        result = await db.execute(
+            update(Withdrawal)
+            .where(
+                Withdrawal.id.in_(list(withdrawal_ids)),
+                Withdrawal.status == TransactionStatusEnum.PENDING,
+                Withdrawal.risk_hold == False,
+                Withdrawal.approved_at == None,
+            )
+            .values(approved_by=admin_id, approved_at=now, updated_at=now)
+            .returning(Withdrawal.id)
+            .execution_options(synchronize_session=False)
+        )
+        return list(result.scalars())
+    
+    @staticmethod
+    async def resolve_unconfirmed(
+        db: AsyncSession,
+        withdrawal_id: UUID,
+        outcome: str,
+        admin_id: UUID,
+        reference: Optional[str] = None,
+    ) -> Optional[Any]:
+        """
+        Settle an unconfirmed payout after checking it with the provider
+        (by its idempotency key); the caller commits
+        
+        outcome: "paid" (completed, with the provider's reference),
+        "not_paid" (failed and refunded) or "retry" (sent again by the
+        next dispatcher pass, same idempotency key).
+        
+        Returns:
+            The withdrawal row, or None if it isn't an unconfirmed payout
+        """
+        now = datetime.utcnow()
+        withdrawals = Withdrawal.__table__
+        values: Dict[str, Any] = {"payout_state": None, "updated_at": now}
+        if outcome == "paid":
+            values.update(status=TransactionStatusEnum.COMPLETED, payout_reference=reference, processed_at=now)
+        elif outcome == "not_paid":
+            values.update(status=TransactionStatusEnum.FAILED, processed_at=now)
+        else:
+            values.update(payout_attempts=0, payout_error=None)
+        
+        row = (await db.execute(
+            update(withdrawals)
+            .where(
+                withdrawals.c.id == withdrawal_id,
+                withdrawals.c.status == TransactionStatusEnum.PENDING,
+                withdrawals.c.payout_state == UNCONFIRMED,
+            )
+            .values(**values)
+            .returning(withdrawals.c.id, withdrawals.c.user_id, withdrawals.c.gross_amount_usd, withdrawals.c.net_amount_usd)
+        )).first()
+        if row is None:
+            return None
+        
+        if "status" in values:
+            await db.execute(
+                update(Transaction)
+                .where(
+                    Transaction.transaction_type == TransactionTypeEnum.WITHDRAWAL,
+                    Transaction.reference_id == str(withdrawal_id),
+                )
+                .values(status=values["status"], updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        if outcome == "not_paid":
+            await refund(db, [row], now)
+        log_event("payout_resolved", withdrawal_id=str(withdrawal_id), outcome=outcome, admin_id=str(admin_id))
+        return row
@@ -0,0 +1,180 @@
+"""
+Proposal Deduplication Service
+Near-duplicate proposals by MinHash signature and LSH bucket lookup
+
+Every proposal stores the MinHash signature of its title and description
+and one bucket key per band (src/core/minhash.py). Creating a proposal
+looks up the proposals sharing any bucket through the GIN index on
+lsh_bands - a handful of rows whatever the backlog size - scores them on
+their signatures and suggests the close ones for merging.
+
+The offline pass signs the whole backlog at once, stores missing
+signatures, and clusters near-duplicates for admins to merge
+(scripts/cluster_proposals.py).
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import time
+
+import numpy as np
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.minhash import band_keys, cluster, clusters, from_bytes, signatures, similarity, to_bytes
+from src.db.models import AIProposal
+
+STORE_BATCH = 1000
+
+
+def proposal_text(title: Optional[str], description: Optional[str]) -> str:
+    """What a proposal's signature is computed over"""
+    return f"{title or ''}\n{description or ''}"
+
+
+class ProposalDedup:
+    """Near-duplicate lookup and backlog clustering"""
+    
+    @staticmethod
+    def fingerprint(title: str, description: str) -> Tuple[bytes, List[int]]:
+        """
+        Stored signature and bucket keys of one proposal
+        
+        Returns:
+            (minhash, lsh_bands) as the ai_proposals columns take them
+        """
+        sig = signatures([proposal_text(title, description)])
+        return to_bytes(sig[0]), band_keys(sig)[0].tolist()
+    
+    @staticmethod
+    async def similar(
+        db: AsyncSession,
+        minhash: bytes,
+        lsh_bands: List[int],
+        limit: Optional[int] = None,
+        threshold: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Proposals close to a signature, most similar first
+        
+        Only proposals sharing a bucket are read, at most
+        PROPOSAL_SIMILAR_CANDIDATES of them; similarity is estimated from
+        the stored signatures.
+        """
+        limit = limit or settings.PROPOSAL_SIMILAR_LIMIT
+        threshold = settings.PROPOSAL_DUPLICATE_THRESHOLD if threshold is None else threshold
+        proposals = AIProposal.__table__
+        
+        result = await db.execute(
+            select(
+                proposals.c.id, proposals.c.title, proposals.c.status,
+                proposals.c.upvotes, proposals.c.minhash,
+            )
+            .where(proposals.c.lsh_bands.overlap(lsh_bands))
+            .limit(settings.PROPOSAL_SIMILAR_CANDIDATES)
+        )
+        rows = [row for row in result.all() if row.minhash]
+        if not rows:
+            return []
+        
+        scores = similarity(from_bytes(minhash), np.stack([from_bytes(row.minhash) for row in rows]))
+        ranked = sorted(
+            (i for i in range(len(rows)) if scores[i] >= threshold),
+            key=lambda i: (-scores[i], -rows[i].upvotes),
+        )
+        return [
+            {
+                "id": str(rows[i].id),
+                "title": rows[i].title,
+                "status": rows[i].status,
+                "upvotes": rows[i].upvotes,
+                "similarity": round(float(scores[i]), 3),
+            }
+            for i in ranked[:limit]
+        ]
+    
+    @staticmethod
+    async def store(db: AsyncSession, ids: List[Any], sigs: np.ndarray) -> int:
+        """Write signatures and bucket keys of the given proposals"""
+        proposals = AIProposal.__table__
+        statement = (
+            update(proposals)
+            .where(proposals.c.id == bindparam("proposal_id"))
+            .values(minhash=bindparam("minhash"), lsh_bands=bindparam("lsh_bands"))
+        )
+        keys = band_keys(sigs)
+        for start in range(0, len(ids), STORE_BATCH):
+            await db.execute(statement, [
+                {"proposal_id": ids[i], "minhash": to_bytes(sigs[i]), "lsh_bands": keys[i].tolist()}
+                for i in range(start, min(start + STORE_BATCH, len(ids)))
+            ])
+        return len(ids)
+    
+    @staticmethod
+    async def cluster_backlog(
+        db: AsyncSession,
+        threshold: Optional[float] = None,
+        min_size: int = 2,
+        store_missing: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Cluster every proposal with its near-duplicates
+        
+        All signatures are computed from the text in one vectorized pass,
+        so proposals that predate the minhash column are included (and
+        stored, with store_missing).
+        
+        Returns:
+            (clusters largest first, each listing its proposals most
+            upvoted first - the natural one to merge the rest into;
+            summary)
+        """
+        threshold = settings.PROPOSAL_DUPLICATE_THRESHOLD if threshold is None else threshold
+        proposals = AIProposal.__table__
+        started = time.perf_counter()
+        
+        result = await db.execute(
+            select(
+                proposals.c.id, proposals.c.title, proposals.c.description, proposals.c.status,
+                proposals.c.upvotes, proposals.c.minhash.is_(None).label("unsigned"),
+            )
+            .order_by(proposals.c.created_at)
+        )
+        rows = result.all()
+        loaded_at = time.perf_counter()
+        sigs = signatures([proposal_text(row.title, row.description) for row in rows])
+        signed_at = time.perf_counter()
+        
+        stored = 0
+        if store_missing:
+            unsigned = [i for i, row in enumerate(rows) if row.unsigned]
+            stored = await ProposalDedup.store(db, [rows[i].id for i in unsigned], sigs[unsigned])
+        
+        groups = []
+        for members in clusters(cluster(sigs, threshold), min_size) if rows else []:
+            members = sorted(members, key=lambda i: -rows[i].upvotes)
+            scores = similarity(sigs[members[0]], sigs[members])
+            groups.append({
+                "size": len(members),
+                "upvotes": sum(rows[i].upvotes for i in members),
+                "proposals": [
+                    {
+                        "id": str(rows[i].id),
+                        "title": rows[i].title,
+                        "status": rows[i].status,
+                        "upvotes": rows[i].upvotes,
+                        "similarity": round(float(score), 3),
+                    }
+                    for i, score in zip(members, scores)
+                ],
+            })
+        
+        summary = {
+            "proposals": len(rows),
+            "clusters": len(groups),
+            "duplicates": sum(group["size"] - 1 for group in groups),
+            "signatures_stored": stored,
+            "load_seconds": round(loaded_at - started, 3),
+            "sign_seconds": round(signed_at - loaded_at, 3),
+            "total_seconds": round(time.perf_counter() - started, 3),
+        }
+        return groups, summary
@@ -0,0 +1,149 @@
+"""
+Proposal Votes Service
+One vote per user and proposal, exact counts, cached leaderboard
+
+A vote is one statement: insert the (proposal, user) row, and only if
+that inserted something, add one to the proposal's upvotes in SQL. The
+primary key turns repeat votes into no-ops and the increment happens
+under the row lock, so concurrent votes are neither lost nor doubled
+and upvotes always equals the number of vote rows.
+
+Proposal lists are read from a per-worker leaderboard of the top
+PROPOSAL_LEADERBOARD_SIZE proposals, reloaded every
+PROPOSAL_LEADERBOARD_TTL_SECONDS, so a burst of votes and list views
+doesn't turn into a burst of sorts over ai_proposals.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from uuid import UUID
+import asyncio
+import time
+
+from sqlalchemy import select, update, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.db.models import AIProposal, ProposalVote, AIProposalStatusEnum
+
+
+def proposal_fields(proposal) -> Dict[str, Any]:
+    """What proposal lists show"""
+    return {
+        "id": str(proposal.id),
+        "title": proposal.title,
+        "description": proposal.description,
+        "category": proposal.category,
+        "status": proposal.status,
+        "upvotes": proposal.upvotes,
+        "created_at": proposal.created_at,
+    }
+
+
+class ProposalVotes:
+    """Deduplicated, atomic upvotes"""
+    
+    @staticmethod
+    async def upvote(db: AsyncSession, proposal_id: UUID, user_id: UUID) -> Optional[Tuple[int, bool]]:
+        """
+        Count the user's vote once
+        
+        Returns:
+            (upvotes, counted) - counted is False when the user had already
+            voted; None when there is no such proposal
+        """
+        proposals = AIProposal.__table__
+        votes = ProposalVote.__table__
+        now = datetime.utcnow()
+        
+        inserted = (
+            insert(votes)
+            .from_select(
+                ["proposal_id", "user_id", "created_at"],
+                select(proposals.c.id, literal(user_id, votes.c.user_id.type), literal(now))
+                .where(proposals.c.id == proposal_id),
+            )
+            .on_conflict_do_nothing(index_elements=["proposal_id", "user_id"])
+            .returning(votes.c.proposal_id)
+            .cte("inserted")
+        )
+        upvotes = await db.scalar(
+            update(proposals)
+            .where(proposals.c.id.in_(select(inserted.c.proposal_id)))
+            .values(upvotes=proposals.c.upvotes + 1, updated_at=now)
+            .returning(proposals.c.upvotes)
+        )
+        if upvotes is not None:
+            return upvotes, True
+        
+        upvotes = await db.scalar(select(proposals.c.upvotes).where(proposals.c.id == proposal_id))
+        if upvotes is None:
+            return None
+        return upvotes, False
+
+
+class ProposalLeaderboard:
+    """Per-worker cache of the most upvoted proposals per status filter"""
+    
+    def __init__(self, size: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.size = size or settings.PROPOSAL_LEADERBOARD_SIZE
+        self.ttl_seconds = settings.PROPOSAL_LEADERBOARD_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        # status filter -> (loaded_at, proposals best first, id -> proposal)
+        self._boards: Dict[Optional[str], Tuple[float, List[Dict[str, Any]], Dict[str, Dict[str, Any]]]] = {}
+        self._locks: Dict[Optional[str], asyncio.Lock] = {}
+    
+    @staticmethod
+    async def _load(
+        db: AsyncSession,
+        status_filter: Optional[AIProposalStatusEnum],
+        skip: int,
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        query = select(AIProposal)
+        if status_filter:
+            query = query.where(AIProposal.status == status_filter)
+        query = query.order_by(AIProposal.upvotes.desc(), AIProposal.created_at.desc())
+        result = await db.execute(query.offset(skip).limit(limit))
+        return [proposal_fields(proposal) for proposal in result.scalars()]
+    
+    def _fresh(self, key: Optional[str]):
+        board = self._boards.get(key)
+        if board is None or time.monotonic() - board[0] >= self.ttl_seconds:
+            return None
+        return board
+    
+    async def page(
+        self,
+        db: AsyncSession,
+        status_filter: Optional[AIProposalStatusEnum],
+        skip: int,
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """Proposals skip..skip+limit, most upvoted first"""
+        if skip + limit > self.size:
+            return await self._load(db, status_filter, skip, limit)
+        
+        key = status_filter.value if status_filter else None
+        board = self._fresh(key)
+        if board is None:
+            # One reload per worker when the board expires, not one per request
+            async with self._locks.setdefault(key, asyncio.Lock()):
+                board = self._fresh(key)
+                if board is None:
+                    proposals = await self._load(db, status_filter, 0, self.size)
+                    board = (time.monotonic(), proposals, {proposal["id"]: proposal for proposal in proposals})
+                    self._boards[key] = board
+        return board[1][skip:skip + limit]
+    
+    def record_vote(self, proposal_id: UUID, upvotes: int) -> None:
+        """Show this worker's votes right away; the order catches up on reload"""
+        for _, _, by_id in self._boards.values():
+            proposal = by_id.get(str(proposal_id))
+            if proposal is not None:
+                proposal["upvotes"] = max(proposal["upvotes"], upvotes)
+    
+    def clear(self) -> None:
+        self._boards.clear()
+
+
+proposal_leaderboard = ProposalLeaderboard()
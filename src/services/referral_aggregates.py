@@ -0,0 +1,187 @@
+"""
+Referral Aggregates Service
+Per-referrer referral counters and keyset referral listings
+
+The stats endpoint used to run four queries per call (code lookup, two
+COUNTs and a SUM over the referrer's referrals) - linear in the size of a
+promoter's downline. referral_aggregates keeps one row per referrer
+instead, upserted in the same transaction as the event that changes it:
+  code created   the row is created with the code
+  code applied   total_referrals + 1
+  bonus paid     successful_referrals + n, total_earned_usd + n * bonus
+so stats are a single primary key read. rebuild() recomputes every row
+from referrals in one statement (migration backfill, drift repair).
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+from sqlalchemy import select, func, case, literal, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import Referral, ReferralAggregate, User
+
+
+class ReferralAggregates:
+    """Counter upserts, one-row stats and referral pages"""
+    
+    @staticmethod
+    async def record_code(db: AsyncSession, referrer_id: UUID, referral_code: str) -> None:
+        """The referrer's code was created"""
+        stmt = insert(ReferralAggregate).values(
+            referrer_id=referrer_id,
+            referral_code=referral_code,
+            total_referrals=0,
+            successful_referrals=0,
+            total_earned_usd=0,
+            updated_at=datetime.utcnow(),
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ReferralAggregate.referrer_id],
+                set_={"referral_code": stmt.excluded.referral_code, "updated_at": stmt.excluded.updated_at},
+            )
+        )
+    
+    @staticmethod
+    async def record_applied(db: AsyncSession, referrer_id: UUID, referral_code: str) -> None:
+        """Someone applied the referrer's code"""
+        stmt = insert(ReferralAggregate).values(
+            referrer_id=referrer_id,
+            referral_code=referral_code,
+            total_referrals=1,
+            successful_referrals=0,
+            total_earned_usd=0,
+            updated_at=datetime.utcnow(),
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ReferralAggregate.referrer_id],
+                set_={
+                    "total_referrals": ReferralAggregate.total_referrals + 1,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+        )
+    
+    @staticmethod
+    async def record_paid(db: AsyncSession, paid_per_referrer: Dict[UUID, int], bonus: Decimal) -> None:
+        """Bonuses were paid for this many referrals per referrer"""
+        if not paid_per_referrer:
+            return
+        now = datetime.utcnow()
+        # Sorted so concurrent batches lock aggregate rows in the same order
+        stmt = insert(ReferralAggregate).values([
+            {
+                "referrer_id": referrer_id,
+                "total_referrals": 0,
+                "successful_referrals": count,
+                "total_earned_usd": bonus * count,
+                "updated_at": now,
+            }
+            for referrer_id, count in sorted(paid_per_referrer.items(), key=lambda item: str(item[0]))
+        ])
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ReferralAggregate.referrer_id],
+                set_={
+                    "successful_referrals": ReferralAggregate.successful_referrals + stmt.excluded.successful_referrals,
+                    "total_earned_usd": ReferralAggregate.total_earned_usd + stmt.excluded.total_earned_usd,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+        )
+    
+    @staticmethod
+    async def stats(db: AsyncSession, referrer_id: UUID) -> Dict[str, Any]:
+        """The referrer's counters in one round trip (zeros if none yet)"""
+        row = (await db.execute(
+            select(
+                ReferralAggregate.referral_code,
+                ReferralAggregate.total_referrals,
+                ReferralAggregate.successful_referrals,
+                ReferralAggregate.total_earned_usd,
+            ).where(ReferralAggregate.referrer_id == referrer_id)
+        )).first()
+        if row is None:
+            return {"referral_code": None, "total_referrals": 0, "successful_referrals": 0, "total_earned_usd": 0.0}
+        return {
+            "referral_code": row.referral_code,
+            "total_referrals": row.total_referrals,
+            "successful_referrals": row.successful_referrals,
+            "total_earned_usd": float(row.total_earned_usd),
+        }
+    
+    @staticmethod
+    async def page(
+        db: AsyncSession,
+        referrer_id: UUID,
+        after: Optional[Tuple[datetime, UUID]],
+        limit: int,
+    ) -> List[Any]:
+        """
+        Up to limit + 1 of the referrer's referrals, newest first, strictly
+        after the (created_at, id) key; the extra row tells the caller
+        there is a next page
+        """
+        query = (
+            select(
+                Referral.id,
+                Referral.created_at,
+                Referral.bonus_earned,
+                Referral.bonus_amount_usd,
+                User.full_name,
+            )
+            .join(User, Referral.referred_user_id == User.id)
+            .where(
+                Referral.referrer_id == referrer_id,
+                Referral.referred_user_id != None,
+            )
+            .order_by(Referral.created_at.desc(), Referral.id.desc())
+            .limit(limit + 1)
+        )
+        if after is not None:
+            created_at, referral_id = after
+            query = query.where(
+                tuple_(Referral.created_at, Referral.id) < tuple_(literal(created_at), literal(referral_id))
+            )
+        return list((await db.execute(query)).all())
+    
+    @staticmethod
+    async def rebuild(db: AsyncSession) -> int:
+        """
+        Recompute every referrer's row from referrals (one statement);
+        returns the number of rows written
+        """
+        counts = (
+            select(
+                Referral.referrer_id,
+                func.max(case((Referral.referred_user_id == None, Referral.referral_code))).label("referral_code"),
+                func.count(Referral.referred_user_id).label("total_referrals"),
+                func.count(case((Referral.bonus_earned == True, 1))).label("successful_referrals"),
+                func.coalesce(
+                    func.sum(case((Referral.bonus_earned == True, Referral.bonus_amount_usd))), 0
+                ).label("total_earned_usd"),
+                literal(datetime.utcnow()).label("updated_at"),
+            )
+            .group_by(Referral.referrer_id)
+        )
+        stmt = insert(ReferralAggregate).from_select(
+            ["referrer_id", "referral_code", "total_referrals", "successful_referrals", "total_earned_usd", "updated_at"],
+            counts,
+        )
+        result = await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ReferralAggregate.referrer_id],
+                set_={
+                    "referral_code": stmt.excluded.referral_code,
+                    "total_referrals": stmt.excluded.total_referrals,
+                    "successful_referrals": stmt.excluded.successful_referrals,
+                    "total_earned_usd": stmt.excluded.total_earned_usd,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+        )
+        return result.rowcount
@@ -0,0 +1,204 @@
+"""
+Referral Graph Service
+Multi-level referral analytics and referral ring detection
+
+Builds the in-memory referral graph (src/core/referral_graph.py) from one
+streamed scan of referrals, then looks for rings: accounts joined by
+referrals whose two ends also share a device fingerprint or an IP (the
+same person inviting themselves), and referral cycles (A referred B, B
+referred A), which no honest pair of users can produce. Run offline by
+scripts/analyze_referral_graph.py.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+import json
+import logging
+import time
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.referral_graph import ReferralGraph, connected_components, uuid_keys
+from src.db.models import Referral
+from src.services.duplicate_accounts import DuplicateAccountDetector
+
+
+logger = logging.getLogger("dignilife.referrals")
+
+# Members listed per ring; member_count always has the full size
+MAX_RING_MEMBERS = 200
+
+
+def signal_links(graph: ReferralGraph, groups: Dict[str, List[UUID]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(node, key) pairs for users of the graph seen on each shared device/IP"""
+    nodes, keys = [], []
+    for key, user_ids in enumerate(groups.values()):
+        found = graph.indices_of(uuid_keys(user_ids))
+        found = found[found >= 0]
+        nodes.append(found)
+        keys.append(np.full(len(found), key, dtype=np.int64))
+    if not nodes:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+    return np.concatenate(nodes), np.concatenate(keys)
+
+
+def shared_edges(
+    graph: ReferralGraph,
+    src: np.ndarray,
+    dst: np.ndarray,
+    nodes: np.ndarray,
+    keys: np.ndarray,
+) -> np.ndarray:
+    """Mask of edges whose referrer and referred user share one of the keys"""
+    shared = np.zeros(len(src), dtype=bool)
+    if not len(nodes):
+        return shared
+    key_count = int(keys.max()) + 1
+    pairs = np.unique(nodes.astype(np.int64) * key_count + keys)
+    
+    # Each referred user's keys, checked against (referrer, key) pairs
+    order = np.argsort(nodes, kind="stable")
+    sorted_keys = keys[order]
+    per_node = np.bincount(nodes, minlength=graph.node_count)
+    starts = np.concatenate([[0], np.cumsum(per_node)[:-1]])
+    candidates = np.flatnonzero(per_node[dst])
+    counts = per_node[dst[candidates]]
+    total = int(counts.sum())
+    ends = np.cumsum(counts)
+    offsets = np.arange(total) + np.repeat(starts[dst[candidates]] - (ends - counts), counts)
+    edge_ids = np.repeat(candidates, counts)
+    
+    wanted = src[edge_ids].astype(np.int64) * key_count + sorted_keys[offsets]
+    found = np.minimum(np.searchsorted(pairs, wanted), len(pairs) - 1)
+    shared[edge_ids[pairs[found] == wanted]] = True
+    return shared
+
+
+def find_referral_rings(
+    graph: ReferralGraph,
+    shared_devices: Dict[str, List[UUID]],
+    shared_ips: Dict[str, List[UUID]],
+    min_size: int,
+) -> List[Dict[str, Any]]:
+    """
+    Referral rings, highest score first
+    
+    Ring edges are referrals whose two ends share a device or an IP, and
+    referrals within a cycle (not the honest downline below one). A ring is a connected group of ring edges with
+    at least min_size accounts; a cycle is a ring at any size.
+    
+    Args:
+        graph: The referral graph
+        shared_devices: device fingerprint -> users seen on it
+        shared_ips: IP address -> users seen on it
+        min_size: Accounts a ring needs without a cycle
+    """
+    src, dst = graph.edges()
+    device_edge = shared_edges(graph, src, dst, *signal_links(graph, shared_devices))
+    ip_edge = shared_edges(graph, src, dst, *signal_links(graph, shared_ips))
+    cycles = graph.cycles()
+    cycle_edge = (cycles[src] >= 0) & (cycles[src] == cycles[dst])
+    ring_edge = device_edge | ip_edge | cycle_edge
+    if not ring_edge.any():
+        return []
+    
+    ring_src, ring_dst = src[ring_edge], dst[ring_edge]
+    labels = connected_components(graph.node_count, ring_src, ring_dst)
+    members = np.unique(np.concatenate([ring_src, ring_dst]))
+    ring_labels, sizes = np.unique(labels[members], return_counts=True)
+    by_ring = members[np.argsort(labels[members], kind="stable")]
+    
+    edge_ring = np.searchsorted(ring_labels, labels[ring_src])
+    
+    def per_ring(mask: np.ndarray) -> np.ndarray:
+        return np.bincount(edge_ring[mask[ring_edge]], minlength=len(ring_labels))
+    
+    device_counts = per_ring(device_edge)
+    ip_counts = per_ring(ip_edge)
+    cycle_counts = per_ring(cycle_edge)
+    edge_counts = np.bincount(edge_ring, minlength=len(ring_labels))
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    
+    rings = []
+    for ring in np.flatnonzero((sizes >= min_size) | (cycle_counts > 0)):
+        nodes = by_ring[offsets[ring]:offsets[ring + 1]]
+        top = int(nodes[np.argmax(graph.downline_size[nodes])])
+        score = 40.0 * bool(cycle_counts[ring]) + 40.0 * bool(device_counts[ring]) + 20.0 * bool(ip_counts[ring])
+        rings.append({
+            "user_ids": [graph.user_id(int(node)) for node in nodes[:MAX_RING_MEMBERS]],
+            "member_count": int(sizes[ring]),
+            "score": min(score, 100.0),
+            "evidence": {
+                "referral_edges": int(edge_counts[ring]),
+                "shared_device_edges": int(device_counts[ring]),
+                "shared_ip_edges": int(ip_counts[ring]),
+                "cycle_edges": int(cycle_counts[ring]),
+                "top_referrer": str(graph.user_id(top)),
+                "top_referrer_downline": int(graph.downline_size[top]),
+                "referral_component_size": int(graph.component_counts[graph.component[top]]),
+            },
+        })
+    
+    rings.sort(key=lambda ring: (-ring["score"], -ring["member_count"]))
+    return rings
+
+
+class ReferralGraphAnalyzer:
+    """Loads the referral graph and reports rings for admin review"""
+    
+    @staticmethod
+    async def load_graph(db: AsyncSession, batch_size: Optional[int] = None) -> ReferralGraph:
+        """
+        Build the graph from one streamed scan of applied referrals
+        
+        Rows arrive in batches and are appended as raw 16-byte keys, so
+        nothing per row outlives its batch.
+        """
+        batch_size = batch_size or settings.REFERRAL_GRAPH_STREAM_BATCH
+        referrers, referred = [], []
+        
+        result = await db.stream(
+            select(Referral.referrer_id, Referral.referred_user_id)
+            .where(Referral.referred_user_id != None)
+            .execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions(batch_size):
+            referrers.append(b"".join(row[0].bytes for row in rows))
+            referred.append(b"".join(row[1].bytes for row in rows))
+        
+        return ReferralGraph.from_edges(
+            np.frombuffer(b"".join(referrers), dtype="S16"),
+            np.frombuffer(b"".join(referred), dtype="S16"),
+        )
+    
+    @staticmethod
+    async def run(db: AsyncSession) -> Tuple[ReferralGraph, List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Build the graph and find rings
+        
+        Returns:
+            (graph, rings highest score first, summary counts for logging)
+        """
+        started = time.perf_counter()
+        graph = await ReferralGraphAnalyzer.load_graph(db)
+        build_seconds = time.perf_counter() - started
+        
+        shared_devices = await DuplicateAccountDetector.load_shared_devices(db)
+        shared_ips = await DuplicateAccountDetector.load_shared_ips(db, settings.DUPLICATE_IP_MAX_USERS)
+        rings = find_referral_rings(graph, shared_devices, shared_ips, settings.REFERRAL_RING_MIN_SIZE)
+        
+        summary = {
+            "users": graph.node_count,
+            "referrals": graph.edge_count,
+            "build_seconds": round(build_seconds, 2),
+            "graph_mb": round(graph.nbytes / 1e6, 1),
+            "max_depth": int(graph.depth.max()) if graph.node_count else 0,
+            "largest_downline": int(graph.downline_size.max()) if graph.node_count else 0,
+            "components": len(graph.component_sizes()),
+            "cyclic_users": int(graph.cyclic.sum()),
+            "rings": len(rings),
+        }
+        logger.info(json.dumps({"event": "referral_graph_analyzed", **summary}))
+        return graph, rings, summary
@@ -0,0 +1,192 @@
+"""
+Referral Milestone Service
+Pays the referral bonus when a referred user reaches REFERRAL_BONUS_TASKS
+approved tasks
+
+Every approval (auto-approval in submit_task, admin approval) increments
+users.approved_tasks_count with one UPDATE ... RETURNING; the milestone is
+crossed when the returned count equals the threshold, so nothing is
+counted per approval. Crediting flips referrals.bonus_earned with a
+conditional UPDATE - only the transaction that flips a row pays it, so
+retries, concurrent approvals and the backfill can't pay twice - and
+credits both parties in the same transaction (with the referrer's
+referral_aggregates counters).
+"""
+from typing import Any, Dict, List, Optional, Sequence
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+import json
+import logging
+
+from sqlalchemy import select, update, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.db.models import (
+    User, Referral, Submission, Transaction, SubmissionStatusEnum,
+    TransactionTypeEnum, TransactionStatusEnum
+)
+from src.services.referral_aggregates import ReferralAggregates
+
+
+logger = logging.getLogger("dignilife.referrals")
+
+
+class ReferralMilestones:
+    """Approval counter, milestone detection and idempotent bonus credits"""
+    
+    @staticmethod
+    async def record_approval(db: AsyncSession, user_id: UUID) -> bool:
+        """
+        Count one newly approved submission; pay the referral bonus if this
+        approval reaches the milestone. Returns True if a bonus was paid.
+        """
+        approved = await db.scalar(
+            update(User)
+            .where(User.id == user_id)
+            .values(approved_tasks_count=User.approved_tasks_count + 1)
+            .returning(User.approved_tasks_count)
+            .execution_options(synchronize_session=False)
+        )
+        if approved != settings.REFERRAL_BONUS_TASKS:
+            return False
+        return bool(await ReferralMilestones.credit(db, [user_id]))
+    
+    @staticmethod
+    async def credit(db: AsyncSession, referred_user_ids: Sequence[UUID]) -> List[Dict[str, Any]]:
+        """
+        Pay the bonus for these referred users' referrals, once
+        
+        Set-based: one UPDATE flips every unpaid referral, balances are
+        incremented in place (one UPDATE per distinct amount, so concurrent
+        credits and withdrawals aren't lost), one batched INSERT writes the
+        BONUS transactions and one upsert bumps the referrers' aggregates.
+        Referrals already paid are skipped. Returns the referrals paid.
+        """
+        if not referred_user_ids:
+            return []
+        # Balance edits pending on loaded users must reach the database
+        # before the increments, or the commit's flush writes their stale
+        # totals over them
+        await db.flush()
+        now = datetime.utcnow()
+        bonus = Decimal(str(settings.REFERRAL_BONUS_USD))
+        
+        result = await db.execute(
+            update(Referral)
+            .where(
+                Referral.referred_user_id.in_(list(referred_user_ids)),
+                Referral.bonus_earned == False,
+            )
+            .values(bonus_earned=True, bonus_amount_usd=bonus, bonus_paid_at=now)
+            .returning(Referral.id, Referral.referrer_id, Referral.referred_user_id)
+            .execution_options(synchronize_session=False)
+        )
+        paid = [
+            {"referral_id": row.id, "referrer_id": row.referrer_id, "referred_user_id": row.referred_user_id}
+            for row in result.all()
+        ]
+        if not paid:
+            return []
+        
+        # A referrer can be paid for several referrals in one batch
+        credits = Counter()
+        per_referrer = Counter()
+        for referral in paid:
+            credits[referral["referrer_id"]] += 1
+            credits[referral["referred_user_id"]] += 1
+            per_referrer[referral["referrer_id"]] += 1
+        by_count: Dict[int, List[UUID]] = {}
+        for user_id, count in credits.items():
+            by_count.setdefault(count, []).append(user_id)
+        for count, user_ids in by_count.items():
+            amount = bonus * count
+            await db.execute(
+                update(User)
+                .where(User.id.in_(user_ids))
+                .values(
+                    available_balance_usd=User.available_balance_usd + amount,
+                    total_earnings_usd=User.total_earnings_usd + amount,
+                    updated_at=now,
+                )
+                .execution_options(synchronize_session=False)
+            )
+        # Users loaded in this session see their credited balances
+        loaded = [
+            instance for instance in db.identity_map.values()
+            if isinstance(instance, User) and instance.id in credits
+        ]
+        for user in loaded:
+            await db.refresh(user, ["available_balance_usd", "total_earnings_usd", "updated_at"])
+        
+        await db.execute(
+            insert(Transaction),
+            [
+                {
+                    "user_id": referral[user_key],
+                    "amount_usd": bonus,
+                    "transaction_type": TransactionTypeEnum.BONUS,
+                    "status": TransactionStatusEnum.COMPLETED,
+                    "reference_id": f"referral:{referral['referral_id']}:{role}",
+                    "trans_metadata": {
+                        "referral_id": str(referral["referral_id"]),
+                        "role": role,
+                        "milestone_tasks": settings.REFERRAL_BONUS_TASKS,
+                    },
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for referral in paid
+                for role, user_key in (("referrer", "referrer_id"), ("referred", "referred_user_id"))
+            ],
+        )
+        await ReferralAggregates.record_paid(db, per_referrer, bonus)
+        
+        logger.info(json.dumps({
+            "event": "referral_bonus_paid",
+            "referrals": len(paid),
+            "bonus_usd": float(bonus),
+        }))
+        return paid
+    
+    @staticmethod
+    async def recount_approved(db: AsyncSession) -> int:
+        """
+        Reset every user's approved_tasks_count from submissions (one
+        set-based UPDATE); returns how many counters changed
+        """
+        counts = (
+            select(Submission.user_id, func.count(Submission.id).label("approved"))
+            .where(Submission.status == SubmissionStatusEnum.APPROVED)
+            .group_by(Submission.user_id)
+            .subquery()
+        )
+        result = await db.execute(
+            update(User)
+            .where(User.id == counts.c.user_id, User.approved_tasks_count != counts.c.approved)
+            .values(approved_tasks_count=counts.c.approved)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+    
+    @staticmethod
+    async def eligible_batch(db: AsyncSession, after: Optional[UUID], limit: int) -> List[UUID]:
+        """
+        Next referred users (keyset by id) who reached the milestone but
+        whose referral is unpaid
+        """
+        query = (
+            select(Referral.referred_user_id)
+            .join(User, User.id == Referral.referred_user_id)
+            .where(
+                Referral.bonus_earned == False,
+                User.approved_tasks_count >= settings.REFERRAL_BONUS_TASKS,
+            )
+            .order_by(Referral.referred_user_id)
+            .limit(limit)
+        )
+        if after is not None:
+            query = query.where(Referral.referred_user_id > after)
+        return list((await db.execute(query)).scalars())
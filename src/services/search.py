@@ -0,0 +1,153 @@
+"""
+Search Service
+Ranked, highlighted admin search over tickets, chat, proposals and users
+
+Tickets, chat messages and proposals carry a stored search_vector column
+(src/db/models.py) that Postgres recomputes on every write, each with a
+GIN index; there is no separate indexer to run or fall behind. A search
+takes the matches from the index, ranks at most SEARCH_RANK_CANDIDATES
+of them per source, and builds highlights (ts_headline, which re-parses
+the text) only for the rows returned.
+
+Highlights are HTML: the text is escaped and the matched words wrapped in
+<mark>. ts_headline marks matches with sentinel characters instead of
+the tags themselves, since it returns the rest of the text unescaped.
+
+Users are found by substring of email or name; the trigram indexes make
+ILIKE '%term%' an index scan for terms of 3+ characters, and results are
+ordered by trigram similarity.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+from datetime import datetime, timedelta
+import html
+
+from sqlalchemy import select, func, or_
+from sqlalchemy.dialects.postgresql import websearch_to_tsquery, ts_headline
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from src.core.config import settings
+from src.db.models import SupportTicket, ChatMessage, AIProposal, User, SEARCH_CONFIG
+
+
+SOURCES = ("tickets", "chat", "proposals", "users")
+
+# ts_headline wraps matched words in these; highlight_html turns them into <mark>
+START_SEL = "\x02"
+STOP_SEL = "\x03"
+HEADLINE_OPTIONS = f'StartSel="{START_SEL}", StopSel="{STOP_SEL}", MaxWords=35, MinWords=15, MaxFragments=2'
+
+# source -> (table, highlighted columns, plain columns)
+DOCUMENTS = {
+    "tickets": (SupportTicket.__table__, ("subject", "description"), ("user_id", "status", "priority")),
+    "chat": (ChatMessage.__table__, ("message",), ("user_id", "conversation_id", "role")),
+    "proposals": (AIProposal.__table__, ("title", "description"), ("user_id", "status", "upvotes")),
+}
+
+
+def escape_like(term: str) -> str:
+    """Match the term literally inside a LIKE pattern"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def highlight_html(headline: Optional[str]) -> Optional[str]:
+    """ts_headline output as safe HTML: text escaped, matches in <mark>"""
+    if headline is None:
+        return None
+    return html.escape(headline).replace(START_SEL, "<mark>").replace(STOP_SEL, "</mark>")
+
+
+def user_filter(term: str) -> ColumnElement:
+    """Users whose email or full name contains the term (trigram indexed)"""
+    users = User.__table__
+    pattern = f"%{escape_like(term)}%"
+    return or_(users.c.email.ilike(pattern, escape="\\"), users.c.full_name.ilike(pattern, escape="\\"))
+
+
+def document_query(source: str, term: str, limit: int, filters: Sequence[ColumnElement] = ()):
+    """
+    Top matches of one source by rank, with highlights
+    
+    The innermost select only reads the GIN index and the matching rows
+    (capped at SEARCH_RANK_CANDIDATES); ranking sorts that set, and
+    ts_headline runs on the final `limit` rows alone.
+    """
+    table, highlighted, plain = DOCUMENTS[source]
+    query = websearch_to_tsquery(SEARCH_CONFIG, term)
+    
+    candidates = (
+        select(table.c.id, table.c.created_at, table.c.search_vector, *(table.c[name] for name in highlighted + plain))
+        .where(table.c.search_vector.op("@@")(query), *filters)
+        .limit(settings.SEARCH_RANK_CANDIDATES)
+        .subquery()
+    )
+    # Normalization 32 maps ranks into [0, 1)
+    rank = func.ts_rank_cd(candidates.c.search_vector, query, 32)
+    top = (
+        select(candidates, rank.label("rank"))
+        .order_by(rank.desc(), candidates.c.created_at.desc())
+        .limit(limit)
+        .subquery()
+    )
+    return select(
+        top.c.id,
+        top.c.created_at,
+        top.c.rank,
+        *(top.c[name] for name in plain),
+        *(ts_headline(SEARCH_CONFIG, top.c[name], query, HEADLINE_OPTIONS).label(name) for name in highlighted),
+    ).order_by(top.c.rank.desc(), top.c.created_at.desc())
+
+
+def user_query(term: str, limit: int):
+    """Users containing the term, closest email/name first"""
+    users = User.__table__
+    rank = func.greatest(func.similarity(users.c.email, term), func.similarity(users.c.full_name, term))
+    return (
+        select(users.c.id, users.c.email, users.c.full_name, users.c.created_at, rank.label("rank"))
+        .where(user_filter(term))
+        .order_by(rank.desc(), users.c.created_at.desc())
+        .limit(limit)
+    )
+
+
+class SearchService:
+    """Admin search across sources"""
+    
+    @staticmethod
+    async def search(
+        db: AsyncSession,
+        term: str,
+        sources: Sequence[str] = SOURCES,
+        limit: int = 20,
+        since: Optional[datetime] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Search each source; results per source, best match first
+        
+        Ranks are comparable within a source. Chat is searched back to
+        `since` (default SEARCH_CHAT_DAYS), which also prunes its monthly
+        partitions.
+        """
+        results = {}
+        for source in sources:
+            if source == "users":
+                statement = user_query(term, limit)
+                highlighted = ()
+            else:
+                filters = []
+                if source == "chat":
+                    since = since or datetime.utcnow() - timedelta(days=settings.SEARCH_CHAT_DAYS)
+                    filters.append(ChatMessage.__table__.c.created_at >= since)
+                statement = document_query(source, term, limit, filters)
+                highlighted = DOCUMENTS[source][1]
+            
+            rows = (await db.execute(statement)).mappings().all()
+            results[source] = [
+                {
+                    **{key: value for key, value in row.items() if key not in highlighted},
+                    "rank": round(float(row["rank"]), 4),
+                    "highlights": {name: highlight_html(row[name]) for name in highlighted},
+                }
+                for row in rows
+            ]
+        return results
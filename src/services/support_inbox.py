@@ -0,0 +1,185 @@
+"""
+Support Inbox Service
+Agent queue, atomic assignment, thread pages and bulk status changes
+
+Every ticket gets a reply deadline when it is created: SLA_HOURS for its
+priority, shortened for paid tiers. The inbox is the unassigned live
+tickets ordered by that deadline (then id), so priority, age and tier
+are one sort key served by the partial index ix_support_tickets_queue -
+an urgent ticket jumps the queue, and a low one that has waited long
+enough still comes up. Reading the head of the queue or a page of it
+stays an index range scan however many tickets are open.
+
+"Assign next" claims the head with FOR UPDATE SKIP LOCKED inside one
+UPDATE, so agents pressing it at the same time get different tickets
+instead of queueing on the same row lock.
+"""
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import select, update, func, literal, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import (
+    SupportTicket, SupportTicketMessage, SubscriptionTier,
+    TicketPriorityEnum, TicketStatusEnum, SUPPORT_QUEUE_CONDITION
+)
+
+
+# Hours to the first reply by priority (migration a8e2f71c4d90 backfills with these)
+SLA_HOURS = {
+    TicketPriorityEnum.URGENT: 2,
+    TicketPriorityEnum.HIGH: 8,
+    TicketPriorityEnum.MEDIUM: 24,
+    TicketPriorityEnum.LOW: 72,
+}
+
+# Paid tiers get a share of the deadline
+TIER_SLA_FACTOR = {
+    SubscriptionTier.FREE: 1.0,
+    SubscriptionTier.PRO: 0.75,
+    SubscriptionTier.PREMIUM: 0.5,
+}
+
+# Target status -> statuses a ticket may move to it from
+TRANSITIONS: Dict[TicketStatusEnum, FrozenSet[TicketStatusEnum]] = {
+    TicketStatusEnum.OPEN: frozenset({TicketStatusEnum.IN_PROGRESS, TicketStatusEnum.RESOLVED}),
+    TicketStatusEnum.IN_PROGRESS: frozenset({TicketStatusEnum.OPEN}),
+    TicketStatusEnum.RESOLVED: frozenset({TicketStatusEnum.OPEN, TicketStatusEnum.IN_PROGRESS}),
+    TicketStatusEnum.CLOSED: frozenset({
+        TicketStatusEnum.OPEN, TicketStatusEnum.IN_PROGRESS, TicketStatusEnum.RESOLVED
+    }),
+}
+
+
+def sla_due_at(priority: TicketPriorityEnum, tier: SubscriptionTier, created_at: datetime) -> datetime:
+    """Reply deadline of a ticket"""
+    hours = SLA_HOURS[TicketPriorityEnum(priority)] * TIER_SLA_FACTOR[SubscriptionTier(tier)]
+    return created_at + timedelta(hours=hours)
+
+
+class SupportInbox:
+    """Queue reads and writes for support agents"""
+    
+    @staticmethod
+    async def queue_page(
+        db: AsyncSession,
+        after: Optional[Tuple[datetime, UUID]],
+        limit: int,
+    ) -> List[SupportTicket]:
+        """Up to limit + 1 waiting tickets, earliest deadline first, past the key"""
+        query = (
+            select(SupportTicket)
+            .where(text(SUPPORT_QUEUE_CONDITION))
+            .order_by(SupportTicket.sla_due_at, SupportTicket.id)
+            .limit(limit + 1)
+        )
+        if after is not None:
+            query = query.where(
+                tuple_(SupportTicket.sla_due_at, SupportTicket.id) > tuple_(literal(after[0]), literal(after[1]))
+            )
+        return list((await db.execute(query)).scalars())
+    
+    @staticmethod
+    async def assign_next(db: AsyncSession, agent_id: UUID) -> Optional[SupportTicket]:
+        """Claim the head of the queue for this agent; None when it is empty"""
+        now = datetime.utcnow()
+        head = (
+            select(SupportTicket.id)
+            .where(text(SUPPORT_QUEUE_CONDITION))
+            .order_by(SupportTicket.sla_due_at, SupportTicket.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            update(SupportTicket)
+            .where(SupportTicket.id == head)
+            .values(
+                assigned_to=agent_id,
+                assigned_at=now,
+                status=TicketStatusEnum.IN_PROGRESS,
+                updated_at=now,
+            )
+            .returning(SupportTicket)
+            .execution_options(synchronize_session=False)
+        )
+        return result.scalar_one_or_none()
+    
+    @staticmethod
+    async def assigned_to(db: AsyncSession, agent_id: UUID, limit: int) -> List[SupportTicket]:
+        """The agent's tickets in progress, earliest deadline first"""
+        result = await db.execute(
+            select(SupportTicket)
+            .where(
+                SupportTicket.assigned_to == agent_id,
+                SupportTicket.status == TicketStatusEnum.IN_PROGRESS,
+            )
+            .order_by(SupportTicket.sla_due_at, SupportTicket.id)
+            .limit(limit)
+        )
+        return list(result.scalars())
+    
+    @staticmethod
+    async def thread_page(
+        db: AsyncSession,
+        ticket_id: UUID,
+        after: Optional[Tuple[datetime, UUID]],
+        limit: int,
+    ) -> List[SupportTicketMessage]:
+        """Up to limit + 1 messages of a ticket, oldest first, past the key"""
+        query = (
+            select(SupportTicketMessage)
+            .where(SupportTicketMessage.ticket_id == ticket_id)
+            .order_by(SupportTicketMessage.created_at, SupportTicketMessage.id)
+            .limit(limit + 1)
+        )
+        if after is not None:
+            query = query.where(
+                tuple_(SupportTicketMessage.created_at, SupportTicketMessage.id)
+                > tuple_(literal(after[0]), literal(after[1]))
+            )
+        return list((await db.execute(query)).scalars())
+    
+    @staticmethod
+    async def bulk_transition(
+        db: AsyncSession,
+        ticket_ids: Sequence[UUID],
+        target: TicketStatusEnum,
+        agent_id: UUID,
+    ) -> List[UUID]:
+        """
+        Move tickets to target in one UPDATE; returns the ids that moved
+        
+        Tickets whose current status can't move to target (see
+        TRANSITIONS), already there, or missing are left alone.
+        Reopening returns a ticket to the queue; taking one in progress
+        assigns it to the agent unless someone already has it.
+        """
+        if not ticket_ids:
+            return []
+        now = datetime.utcnow()
+        values = {"status": target, "updated_at": now}
+        if target == TicketStatusEnum.OPEN:
+            values.update(assigned_to=None, assigned_at=None, resolved_at=None)
+        elif target == TicketStatusEnum.IN_PROGRESS:
+            values.update(
+                assigned_to=func.coalesce(SupportTicket.assigned_to, agent_id),
+                assigned_at=func.coalesce(SupportTicket.assigned_at, now),
+                resolved_at=None,
+            )
+        else:
+            values["resolved_at"] = func.coalesce(SupportTicket.resolved_at, now)
+        
+        result = await db.execute(
+            update(SupportTicket)
+            .where(
+                SupportTicket.id.in_(list(ticket_ids)),
+                SupportTicket.status.in_(list(TRANSITIONS[target])),
+            )
+            .values(**values)
+            .returning(SupportTicket.id)
+            .execution_options(synchronize_session=False)
+        )
+        return list(result.scalars())
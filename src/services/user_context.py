@@ -0,0 +1,192 @@
+"""
+User Context Service
+Per-user context snapshot for the AI chat assistant
+
+A chat turn used to rebuild the user's context from scratch (and would
+have needed a COUNT over today's submissions for tasks_today). The
+snapshot is one ai_context_store row per user (context_type
+"chat_user_context") holding tier, balances, streak, verification state,
+tasks done today and the last few intents. The submission and withdrawal
+flows update it in their own transaction, so a turn reads one row - or
+nothing at all when this worker cached it in the last
+AI_CONTEXT_CACHE_SECONDS.
+
+Snapshots expire after AI_CONTEXT_TTL_SECONDS and never outlive the UTC
+day, so tasks_today restarts at midnight; an expired snapshot is rebuilt
+on the next turn and deleted by scripts/cleanup_ai_context.py.
+"""
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from uuid import UUID
+import time
+
+from sqlalchemy import select, update, delete, func, literal
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.db.models import AIContextStore, Submission, User
+
+
+CONTEXT_TYPE = "chat_user_context"
+
+
+def snapshot_expires_at(now: datetime, ttl_seconds: Optional[int] = None) -> datetime:
+    """now + TTL, capped at the next UTC midnight"""
+    ttl = settings.AI_CONTEXT_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    midnight = datetime(now.year, now.month, now.day) + timedelta(days=1)
+    return min(now + timedelta(seconds=ttl), midnight)
+
+
+def user_fields(user: User) -> Dict[str, Any]:
+    """The snapshot fields that live on the user row"""
+    return {
+        "subscription_tier": user.subscription_tier.value,
+        "total_earnings_usd": float(user.total_earnings_usd),
+        "available_balance_usd": float(user.available_balance_usd),
+        "pending_balance_usd": float(user.pending_balance_usd),
+        "current_streak_days": user.current_streak_days,
+        "is_verified": user.is_verified,
+        "kyc_verified": user.kyc_verified,
+        "face_verified": user.face_verified,
+        "preferred_language": user.preferred_language,
+    }
+
+
+class UserContextStore:
+    """
+    Snapshot reads and incremental updates
+    
+    The request's current_user is already loaded, so its fields are laid
+    over the snapshot on read; what the snapshot saves is the aggregate
+    (tasks_today) and the intent history.
+    """
+    
+    def __init__(
+        self,
+        cache_seconds: Optional[float] = None,
+        max_users: Optional[int] = None,
+        recent_intents: Optional[int] = None,
+    ):
+        self.cache_seconds = settings.AI_CONTEXT_CACHE_SECONDS if cache_seconds is None else cache_seconds
+        self.max_users = max_users or settings.AI_CONTEXT_CACHE_MAX_USERS
+        self.recent_intents = recent_intents or settings.AI_CONTEXT_RECENT_INTENTS
+        # user_id -> (loaded_at, expires_at, snapshot)
+        self._snapshots: "OrderedDict[str, Tuple[float, datetime, Dict[str, Any]]]" = OrderedDict()
+    
+    def _cached(self, user_id: UUID) -> Optional[Dict[str, Any]]:
+        key = str(user_id)
+        entry = self._snapshots.get(key)
+        if entry is None:
+            return None
+        loaded_at, expires_at, snapshot = entry
+        if time.monotonic() - loaded_at >= self.cache_seconds or datetime.utcnow() >= expires_at:
+            del self._snapshots[key]
+            return None
+        self._snapshots.move_to_end(key)
+        return snapshot
+    
+    def _store(self, user_id: UUID, expires_at: datetime, snapshot: Dict[str, Any]) -> None:
+        key = str(user_id)
+        self._snapshots[key] = (time.monotonic(), expires_at, snapshot)
+        self._snapshots.move_to_end(key)
+        while len(self._snapshots) > self.max_users:
+            self._snapshots.popitem(last=False)
+    
+    async def _build(self, db: AsyncSession, user: User, now: datetime) -> Tuple[datetime, Dict[str, Any]]:
+        """Fresh snapshot from the submissions table, upserted"""
+        tasks_today = await db.scalar(
+            select(func.count(Submission.id)).where(
+                Submission.user_id == user.id,
+                Submission.submitted_at >= datetime(now.year, now.month, now.day),
+            )
+        )
+        snapshot = {**user_fields(user), "tasks_today": tasks_today or 0, "recent_intents": []}
+        expires_at = snapshot_expires_at(now)
+        
+        stmt = insert(AIContextStore).values(
+            user_id=user.id,
+            context_type=CONTEXT_TYPE,
+            context_data=snapshot,
+            expires_at=expires_at,
+            created_at=now,
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[AIContextStore.user_id, AIContextStore.context_type],
+                set_={
+                    "context_data": stmt.excluded.context_data,
+                    "expires_at": stmt.excluded.expires_at,
+                    "created_at": stmt.excluded.created_at,
+                },
+            )
+        )
+        return expires_at, snapshot
+    
+    async def get(self, db: AsyncSession, user: User) -> Dict[str, Any]:
+        """The user's chat context: cached snapshot, stored row, or rebuilt"""
+        snapshot = self._cached(user.id)
+        if snapshot is None:
+            now = datetime.utcnow()
+            row = (await db.execute(
+                select(AIContextStore.context_data, AIContextStore.expires_at).where(
+                    AIContextStore.user_id == user.id,
+                    AIContextStore.context_type == CONTEXT_TYPE,
+                    AIContextStore.expires_at > now,
+                )
+            )).first()
+            if row is not None:
+                expires_at, snapshot = row.expires_at, row.context_data
+            else:
+                expires_at, snapshot = await self._build(db, user, now)
+            self._store(user.id, expires_at, snapshot)
+        
+        return {**snapshot, **user_fields(user)}
+    
+    async def _update(self, db: AsyncSession, user_id: UUID, changes: Dict[str, Any], tasks_delta: int = 0) -> None:
+        """Merge changes into an unexpired snapshot (no-op if there is none)"""
+        data = AIContextStore.context_data.op("||")(literal(changes, JSONB))
+        if tasks_delta:
+            data = data.op("||")(func.jsonb_build_object(
+                "tasks_today",
+                func.coalesce(AIContextStore.context_data["tasks_today"].as_integer(), 0) + tasks_delta,
+            ))
+        
+        row = (await db.execute(
+            update(AIContextStore)
+            .where(
+                AIContextStore.user_id == user_id,
+                AIContextStore.context_type == CONTEXT_TYPE,
+                AIContextStore.expires_at > datetime.utcnow(),
+            )
+            .values(context_data=data)
+            .returning(AIContextStore.context_data, AIContextStore.expires_at)
+        )).first()
+        if row is not None:
+            self._store(user_id, row.expires_at, row.context_data)
+        else:
+            self._snapshots.pop(str(user_id), None)
+    
+    async def record_submission(self, db: AsyncSession, user: User) -> None:
+        """Submission flow: one more task today, new balances and streak"""
+        await self._update(db, user.id, user_fields(user), tasks_delta=1)
+    
+    async def record_balance_change(self, db: AsyncSession, user: User) -> None:
+        """Withdrawal flow: new balances"""
+        await self._update(db, user.id, user_fields(user))
+    
+    async def record_intent(self, db: AsyncSession, user_id: UUID, context: Dict[str, Any], intent: str) -> None:
+        """Remember the turn's intent (context is what get() returned)"""
+        recent = (list(context.get("recent_intents", [])) + [intent])[-self.recent_intents:]
+        await self._update(db, user_id, {"recent_intents": recent})
+    
+    async def cleanup_expired(self, db: AsyncSession) -> int:
+        """Delete expired context rows (all context types); returns the count"""
+        result = await db.execute(
+            delete(AIContextStore).where(AIContextStore.expires_at <= datetime.utcnow())
+        )
+        return result.rowcount
+
+
+user_context_store = UserContextStore()
@@ -3,7 +3,10 @@ Test Configuration - Pytest Fixtures
 """
 import pytest
 import asyncio
+from contextlib import asynccontextmanager
 from typing import AsyncGenerator
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import util as sql_util
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.pool import NullPool
 
@@ -69,4 +72,157 @@ def sample_user_data():
         "password": "TestPassword123!",
         "full_name": "Test User",
         "phone_number": "+959123456789",
-    }
\ No newline at end of file
+    }
+
+# In-memory stand-ins for tests that need no database
+
+def statement_tables(statement) -> set:
+    """Names of the tables a statement writes, or reads from"""
+    table = getattr(statement, "table", None)
+    if table is not None:
+        return {table.name}
+    names = set()
+    for source in getattr(statement, "get_final_froms", list)():
+        names.update(t.name for t in sql_util.find_tables(source, include_joins=True) if hasattr(t, "name"))
+    return names
+
+
+def compiled_params(statement) -> dict:
+    return statement.compile(dialect=postgresql.dialect()).params
+
+
+class FakeResult:
+    """Query result over rows (tuples, objects or dicts)"""
+    
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.rowcount = len(self.rows)
+    
+    def __iter__(self):
+        return iter(self.rows)
+    
+    def all(self):
+        return list(self.rows)
+    
+    def first(self):
+        return self.rows[0] if self.rows else None
+    
+    one_or_none = first
+    
+    def scalar(self):
+        row = self.first()
+        return row[0] if isinstance(row, tuple) else row
+    
+    scalar_one_or_none = scalar
+    
+    def scalars(self):
+        return FakeResult(row[0] if isinstance(row, tuple) else row for row in self.rows)
+    
+    def mappings(self):
+        return self
+
+
+class FakeSession:
+    """
+    AsyncSession stand-in answering statements from `answers`
+    
+    Keys are "<kind> <table>" (kind: select, insert, update or delete);
+    a statement gets the first answer of its kind whose table it reads
+    or writes, so tests don't depend on the order of the queries. An
+    answer is a list of rows, or a callable taking the statement (and
+    executemany parameters) and returning rows. Unanswered statements
+    return no rows. Writes count as committed once commit() is called.
+    """
+    
+    def __init__(self, answers=None):
+        self.answers = dict(answers or {})
+        self.executed = []
+        self.uncommitted = []
+        self.committed = []
+        self.added = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.dirty = False
+        self.identity_map = {}
+        self.info = {}
+    
+    def answer(self, statement, params=None) -> FakeResult:
+        kind = statement.__visit_name__
+        tables = statement_tables(statement)
+        for key, rows in self.answers.items():
+            key_kind, table = key.split(" ", 1)
+            if key_kind == kind and table in tables:
+                self.executed.append((key, statement, params))
+                return FakeResult(rows(statement, params) if callable(rows) else rows)
+        self.executed.append((f"{kind} {'+'.join(sorted(tables))}", statement, params))
+        return FakeResult()
+    
+    def count(self, key: str) -> int:
+        """How many statements were answered under a key"""
+        return sum(1 for executed, _, _ in self.executed if executed == key)
+    
+    def written(self, key: str, committed: bool = False) -> list:
+        """Parameters written by the statements answered under a key"""
+        rows = []
+        for executed, statement, params in self.committed if committed else self.executed:
+            if executed == key:
+                rows.extend(params if params is not None else [compiled_params(statement)])
+        return rows
+    
+    async def execute(self, statement, params=None):
+        result = self.answer(statement, params)
+        if statement.__visit_name__ != "select":
+            self.dirty = True
+            self.uncommitted.append(self.executed[-1])
+        return result
+    
+    async def scalar(self, statement, params=None):
+        return (await self.execute(statement, params)).scalar()
+    
+    async def scalars(self, statement, params=None):
+        return (await self.execute(statement, params)).scalars()
+    
+    def add(self, instance):
+        self.added.append(instance)
+        self.dirty = True
+    
+    async def flush(self):
+        pass
+    
+    async def refresh(self, instance, attribute_names=None):
+        pass
+    
+    def in_transaction(self) -> bool:
+        return self.dirty
+    
+    async def commit(self):
+        if not self.dirty:
+            return  # Like AsyncSession: nothing begun, no COMMIT sent
+        self.commits += 1
+        self.committed.extend(self.uncommitted)
+        self.uncommitted = []
+        self.dirty = False
+    
+    async def rollback(self):
+        self.rollbacks += 1
+        self.uncommitted = []
+        self.dirty = False
+    
+    async def close(self):
+        pass
+
+
+class FakeEngine:
+    """AsyncEngine stand-in whose connections are one FakeSession"""
+    
+    def __init__(self, answers=None):
+        self.session = FakeSession(answers)
+    
+    @asynccontextmanager
+    async def connect(self):
+        yield self.session
+    
+    @asynccontextmanager
+    async def begin(self):
+        yield self.session
+        await self.session.commit()
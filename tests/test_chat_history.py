@@ -0,0 +1,114 @@
+"""
+Tests for the chat history ring buffer (fake session, no database)
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from src.services import chat_history as chat_history_module
+from src.services.chat_history import ChatHistoryStore
+from src.services.log_sink import LogSink
+from tests.conftest import FakeSession
+
+
+def stored(*messages):
+    """chat_messages rows, newest first like the DESC index scan"""
+    start = datetime(2026, 10, 1)
+    return [
+        SimpleNamespace(id=uuid4(), created_at=start + timedelta(minutes=-index), role="assistant", message=message)
+        for index, message in enumerate(messages)
+    ]
+
+
+def history_session(rows):
+    """Answers the newest-id probe and the history load from the same rows"""
+    def chat_messages(statement, params):
+        if len(statement.selected_columns) == 1:
+            return [(row.id,) for row in rows[:1]]
+        return rows
+    return FakeSession({"select chat_messages": chat_messages})
+
+
+def loads(db: FakeSession) -> int:
+    return sum(
+        1 for key, statement, _ in db.executed
+        if key == "select chat_messages" and len(statement.selected_columns) > 1
+    )
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    sink = LogSink(max_queue=1000)
+    monkeypatch.setattr(chat_history_module, "log_sink", sink)
+    return sink
+
+
+async def test_miss_loads_newest_rows_oldest_first(sink):
+    store = ChatHistoryStore(max_messages=3)
+    db = history_session(stored("m9", "m8", "m7"))
+    
+    history = await store.get(db, uuid4(), "conv")
+    
+    assert [m["content"] for m in history] == ["m7", "m8", "m9"]
+
+
+async def test_hits_skip_the_database_and_keep_the_last_n(sink):
+    store = ChatHistoryStore(max_messages=4)
+    user_id = uuid4()
+    store.start(user_id, "conv")
+    db = history_session([])
+    
+    for turn in range(5):
+        await store.append(user_id, "conv", "user", f"q{turn}")
+        await store.append(user_id, "conv", "assistant", f"a{turn}")
+    history = await store.get(db, user_id, "conv")
+    
+    assert loads(db) == 0
+    assert [m["content"] for m in history] == ["q3", "a3", "q4", "a4"]
+    assert sink.pending == 10
+
+
+async def test_conversations_are_per_user(sink):
+    store = ChatHistoryStore(max_messages=4)
+    owner = uuid4()
+    store.start(owner, "conv")
+    await store.append(owner, "conv", "user", "private")
+    
+    history = await store.get(history_session([]), uuid4(), "conv")
+    
+    assert history == []
+
+
+async def test_least_recently_used_conversation_is_evicted(sink):
+    store = ChatHistoryStore(max_messages=4, max_conversations=2)
+    user_id = uuid4()
+    for conversation_id in ("a", "b", "c"):
+        store.start(user_id, conversation_id)
+    
+    db = history_session([])
+    await store.get(db, user_id, "c")
+    await store.get(db, user_id, "a")
+    
+    assert loads(db) == 1
+
+
+async def test_turns_written_by_another_worker_are_reloaded(sink):
+    store = ChatHistoryStore(max_messages=4)
+    user_id = uuid4()
+    store.start(user_id, "conv")
+    await store.append(user_id, "conv", "user", "unwritten")
+    
+    # Still the newest stored message this worker knows: cached history
+    db = history_session([])
+    assert [m["content"] for m in await store.get(db, user_id, "conv")] == ["unwritten"]
+    assert loads(db) == 0
+    
+    # Another worker's turn was stored since: reloaded, keeping this
+    # worker's message the log sink hasn't written yet
+    db = history_session(stored("elsewhere"))
+    history = await store.get(db, user_id, "conv")
+    
+    assert loads(db) == 1
+    assert [m["content"] for m in history] == ["elsewhere", "unwritten"]
@@ -0,0 +1,146 @@
+"""
+Tests for the SSE chat stream (fake LLM, no database)
+"""
+import json
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.v1 import ai_chat
+from src.core.deps import get_current_active_user
+from src.db.models import SubscriptionTier
+from src.db.session import get_db
+from src.services import ai_chat as ai_chat_service
+from src.services import chat_history as chat_history_module
+from src.services.chat_llm import ChatLLM, FakeChatLLM, load_chat_llm
+from src.services.log_sink import LogSink
+from tests.conftest import FakeSession
+
+
+def make_user():
+    return SimpleNamespace(
+        id=uuid4(),
+        subscription_tier=SubscriptionTier.FREE,
+        total_earnings_usd=12.5,
+        available_balance_usd=7.25,
+        pending_balance_usd=0,
+        current_streak_days=3,
+        is_verified=True,
+        kyc_verified=False,
+        face_verified=False,
+        preferred_language="en",
+    )
+
+
+def parse_events(body: str):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    sink = LogSink(max_queue=1000)
+    monkeypatch.setattr(chat_history_module, "log_sink", sink)
+    monkeypatch.setattr(ai_chat_service, "log_sink", sink)
+    monkeypatch.setattr(ai_chat, "chat_llm", FakeChatLLM(first_token_ms=0, token_ms=0))
+    return sink
+
+
+def saved_messages(sink: LogSink):
+    rows = []
+    while not sink._queue.empty():
+        _, row = sink._queue.get_nowait()
+        rows.append(row)
+    return rows
+
+
+def test_stream_sends_meta_tokens_done_and_saves_once(sink):
+    user = make_user()
+    
+    async def fake_db():
+        yield FakeSession()
+    
+    app = FastAPI()
+    app.include_router(ai_chat.router, prefix="/ai-chat")
+    app.dependency_overrides[get_db] = fake_db
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    
+    response = TestClient(app).post("/ai-chat/stream", json={"message": "Show me available tasks"})
+    
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "meta" and names[-1] == "done"
+    assert names.count("token") > 1
+    
+    done = events[-1][1]
+    assert done["intent"] == "task_inquiry"
+    assert done["message"] == "".join(data["text"] for name, data in events if name == "token")
+    
+    rows = saved_messages(sink)
+    assert [row["role"] for row in rows] == ["user", "assistant"]
+    assert rows[1]["message"] == done["message"]
+    assert rows[1]["message_metadata"]["completed"] is True
+
+
+async def test_disconnect_closes_llm_and_saves_partial_reply(sink, monkeypatch):
+    closed = []
+    
+    class SlowLLM(FakeChatLLM):
+        async def stream(self, prompt):
+            try:
+                for token in ("one", " two", " three"):
+                    yield token
+            finally:
+                closed.append(True)
+    
+    monkeypatch.setattr(ai_chat, "chat_llm", SlowLLM())
+    ai_response = {"intent": "general_conversation", "message": "one two three", "suggestions": [], "actions": []}
+    events = ai_chat._stream_events(uuid4(), "hi", "conv", [], {}, ai_response)
+    
+    assert (await events.__anext__()).startswith("event: meta")
+    assert (await events.__anext__()).startswith("event: token")
+    await events.aclose()
+    
+    assert closed == [True]
+    rows = saved_messages(sink)
+    assert rows[1]["message"] == "one"
+    assert rows[1]["message_metadata"]["completed"] is False
+
+
+async def test_llm_failure_is_logged_not_sent_to_the_client(sink, monkeypatch, caplog):
+    prompts = []
+    
+    class BrokenLLM(FakeChatLLM):
+        async def stream(self, prompt):
+            prompts.append(prompt)
+            yield "one"
+            raise RuntimeError("upstream 502 from 10.0.0.7")
+    
+    monkeypatch.setattr(ai_chat, "chat_llm", BrokenLLM())
+    ai_response = {"intent": "general_conversation", "message": "one two", "suggestions": [], "actions": []}
+    history = [{"role": "user", "message": "earlier"}]
+    frames = [frame async for frame in ai_chat._stream_events(uuid4(), "hi", "conv", history, {"tier": "free"}, ai_response)]
+    
+    name, data = parse_events("".join(frames))[-1]
+    assert name == "error"
+    assert "10.0.0.7" not in data["detail"]
+    assert "upstream 502 from 10.0.0.7" in caplog.text
+    assert prompts[0]["history"] == history
+    assert prompts[0]["context"] == {"tier": "free"}
+    assert saved_messages(sink)[1]["message_metadata"]["completed"] is False
+
+
+class Unfinished(ChatLLM):
+    pass
+
+
+def test_adapter_without_stream_fails_when_loaded():
+    with pytest.raises(TypeError):
+        load_chat_llm(f"{__name__}:Unfinished")
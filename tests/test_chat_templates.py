@@ -0,0 +1,115 @@
+"""
+Tests for the precompiled chat reply templates
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.services.chat_templates import ChatTemplates, chat_templates
+from src.services.intent_classifier import INTENTS
+
+
+CONTEXT = {
+    "user_tier": "free",
+    "available_balance": 40.0,
+    "current_streak": 42,
+    "tasks_completed_today": 3,
+}
+
+
+def write_templates(directory, **languages):
+    for language, entries in languages.items():
+        (directory / f"{language}.json").write_text(json.dumps(entries), encoding="utf-8")
+
+
+def test_tier_and_user_fields_are_filled():
+    reply = chat_templates.render("withdrawal_inquiry", CONTEXT, language="en", tier="free")
+    
+    assert "Your Tier: **FREE**" in reply["message"]
+    assert "Withdrawal Fee: **15%**" in reply["message"]
+    assert "Net amount after 15% fee: **$34.00**" in reply["message"]
+    
+    task_reply = chat_templates.render("task_inquiry", CONTEXT, language="en", tier="free")
+    assert "- Streak: 42 days (30% bonus!)" in task_reply["message"]
+
+
+def test_top_tier_uses_its_own_variant():
+    upgrade = chat_templates.render("subscription_inquiry", CONTEXT, language="en", tier="pro")
+    top = chat_templates.render("subscription_inquiry", CONTEXT, language="en", tier="premium")
+    
+    assert upgrade["actions"][0]["target"] == "PREMIUM"
+    assert "the highest tier" in top["message"]
+    assert top["actions"] == ()
+
+
+def test_language_resolution_falls_back_to_primary_subtag_then_english():
+    assert chat_templates.resolve_language("es-MX") == "es"
+    assert chat_templates.resolve_language("FR") == "fr"
+    assert chat_templates.resolve_language("xx") == "en"
+    assert chat_templates.resolve_language(None) == "en"
+    
+    reply = chat_templates.render("general_conversation", CONTEXT, language="es", tier="free")
+    assert reply["message"].startswith("👋 ¡Hola!")
+
+
+def test_suggestions_and_actions_are_shared_and_read_only():
+    first = chat_templates.render("task_inquiry", CONTEXT, language="en", tier="free")
+    second = chat_templates.render("task_inquiry", {**CONTEXT, "available_balance": 1.0}, language="en", tier="free")
+    
+    assert first["actions"] is second["actions"]
+    assert first["suggestions"] is second["suggestions"]
+    with pytest.raises(TypeError):
+        first["actions"][0]["target"] = "/elsewhere"
+    assert json.loads(json.dumps(first["actions"]))[0]["target"] == "/tasks"
+
+
+def test_every_language_compiles_every_intent():
+    for language in chat_templates.languages:
+        for intent in INTENTS:
+            for tier in ("free", "pro", "premium"):
+                reply = chat_templates.render(intent, CONTEXT, language=language, tier=tier)
+                assert reply["intent"] == intent and reply["message"]
+
+
+def test_unknown_field_fails_at_load(tmp_path):
+    entry = {"message": ["Hi {nickname}"], "suggestions": [], "actions": []}
+    write_templates(tmp_path, en={intent: entry for intent in INTENTS})
+    
+    with pytest.raises(ValueError, match="nickname"):
+        ChatTemplates.load(str(tmp_path))
+
+
+def test_partial_language_falls_back_per_intent(tmp_path):
+    entry = {"message": ["Balance ${balance:.2f}"], "suggestions": [], "actions": []}
+    write_templates(
+        tmp_path,
+        en={intent: entry for intent in INTENTS},
+        de={"help_request": {"message": ["Hallo {tier}"], "suggestions": [], "actions": []}},
+    )
+    templates = ChatTemplates.load(str(tmp_path))
+    
+    assert templates.render("help_request", CONTEXT, language="de", tier="pro")["message"] == "Hallo PRO"
+    assert templates.render("suggestion", CONTEXT, language="de", tier="pro")["message"] == "Balance $40.00"
+
+
+def test_bad_format_spec_fails_at_load(tmp_path):
+    entry = {"message": ["Streak: {streak:.2x}"], "suggestions": [], "actions": []}
+    write_templates(tmp_path, en={intent: entry for intent in INTENTS})
+    
+    with pytest.raises(ValueError, match="en.json"):
+        ChatTemplates.load(str(tmp_path))
+
+
+def test_templates_load_from_any_working_directory(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": root}
+    result = subprocess.run(
+        [sys.executable, "-c", "from src.services.chat_templates import chat_templates; print(len(chat_templates.languages))"],
+        cwd=tmp_path, env=env, capture_output=True, text=True,
+    )
+    
+    assert result.returncode == 0, result.stderr
+    assert int(result.stdout) >= 1
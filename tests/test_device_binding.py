@@ -0,0 +1,169 @@
+"""
+Tests for cached device binding and batched last-seen writes (no database)
+"""
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from src.core.security import create_access_token
+from src.db.models import UserDevice
+from src.services import device_binding, device_manager
+from src.services.device_binding import DEVICE_HEADER, DeviceBindings, device_binding_middleware
+from src.services.device_manager import DeviceManager
+from tests.conftest import FakeEngine, FakeSession, compiled_params
+
+
+def binding_session(device_id):
+    """Answers binding lookups from a list the test can change"""
+    bound = [(device_id,)]
+    return bound, FakeSession({"select user_devices": bound})
+
+
+async def test_bound_device_is_checked_from_cache_and_visits_are_buffered():
+    user_id = str(uuid4())
+    _, db = binding_session("phone-1")
+    bindings = DeviceBindings(ttl_seconds=60, recheck_seconds=60)
+    
+    for _ in range(100):
+        assert await bindings.check(user_id, "phone-1", "10.0.0.1", db=db)
+    assert await bindings.check(user_id, "phone-1", None, db=db)
+    
+    assert db.count("select user_devices") == 1
+    assert bindings.pending == 1
+    seen_at, ip, hits = bindings._seen[(user_id, "phone-1")]
+    assert (ip, hits) == ("10.0.0.1", 101)
+
+
+async def test_mismatch_rechecks_the_binding_at_most_every_recheck_interval():
+    user_id = str(uuid4())
+    bound, db = binding_session("phone-1")
+    bindings = DeviceBindings(ttl_seconds=60, recheck_seconds=5)
+    await bindings.check(user_id, "phone-1", db=db)
+    
+    # Changed device on another worker: the first mismatch right away is
+    # still rejected from the cache, the next one after the interval re-reads
+    bound[:] = [("phone-2",)]
+    assert not await bindings.check(user_id, "phone-2", db=db)
+    assert not await bindings.check(user_id, None, db=db)
+    assert db.count("select user_devices") == 1
+    loaded_at, device_id = bindings._bindings[user_id]
+    bindings._bindings[user_id] = (loaded_at - 6, device_id)
+    assert await bindings.check(user_id, "phone-2", db=db)
+    assert db.count("select user_devices") == 2
+    
+    # Released (change approved): nothing bound, anything passes until registration
+    bindings.invalidate(user_id)
+    bound[:] = []
+    assert await bindings.check(user_id, "tablet", db=db)
+    # Only visits from the bound device were recorded
+    assert set(bindings._seen) == {(user_id, "phone-1"), (user_id, "phone-2")}
+
+
+async def test_flush_writes_all_buffered_devices_in_one_update():
+    engine = FakeEngine()
+    bindings = DeviceBindings()
+    bindings._engine = engine
+    users = [str(uuid4()) for _ in range(3)]
+    for user_id in users:
+        bindings.touch(user_id, "device", "10.0.0.2")
+    bindings.touch(users[0], "device")
+    
+    assert await bindings.flush() == 3
+    assert await bindings.flush() == 0
+    
+    assert engine.session.count("update user_devices") == 1
+    _, statement, rows = engine.session.executed[0]
+    assert sorted(row["hits"] for row in rows) == [1, 1, 2]
+    assert all(row["ip"] == "10.0.0.2" for row in rows)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "greatest(user_devices.last_seen_at" in sql and "access_count=(user_devices.access_count +" in sql
+
+
+def test_middleware_rejects_other_devices_and_skips_exempt_paths(monkeypatch):
+    bindings = DeviceBindings(ttl_seconds=60, recheck_seconds=60)
+    monkeypatch.setattr(device_binding, "device_bindings", bindings)
+    user_id = str(uuid4())
+    bindings.bind(user_id, "phone-1")
+    
+    app = FastAPI()
+    app.middleware("http")(device_binding_middleware)
+    
+    @app.get("/api/v1/wallet/balance")
+    async def balance():
+        return {"ok": True}
+    
+    @app.post("/api/v1/devices/request-change")
+    async def request_change():
+        return {"ok": True}
+    
+    client = TestClient(app)
+    auth = {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+    
+    assert client.get("/api/v1/wallet/balance", headers={**auth, DEVICE_HEADER: "phone-1"}).status_code == 200
+    rejected = client.get("/api/v1/wallet/balance", headers={**auth, DEVICE_HEADER: "phone-2"})
+    assert rejected.status_code == 403 and rejected.headers["X-Device-Limit"] == "mismatch"
+    assert client.get("/api/v1/wallet/balance", headers=auth).status_code == 403
+    assert client.post("/api/v1/devices/request-change", headers={**auth, DEVICE_HEADER: "phone-2"}).status_code == 200
+    # Not signed in: left to the endpoint's own auth
+    assert client.get("/api/v1/wallet/balance").status_code == 200
+    assert bindings._seen[(user_id, "phone-1")][2] == 1
+
+
+def registration_session(known_device=None):
+    """No active device for the user; known_device is the row with the fingerprint, if any"""
+    def user_devices(statement, params):
+        if "device_fingerprint_1" in compiled_params(statement):
+            return [known_device] if known_device is not None else []
+        return []
+    return FakeSession({"select user_devices": user_devices})
+
+
+@pytest.fixture
+def bindings(monkeypatch):
+    bindings = DeviceBindings(ttl_seconds=60, recheck_seconds=60)
+    monkeypatch.setattr(device_manager, "device_bindings", bindings)
+    return bindings
+
+
+DEVICE_INFO = {"device_id": "phone-1", "device_name": "Pixel", "device_type": "mobile", "os": "Android", "browser": "Chrome"}
+
+
+async def test_released_device_is_registered_again_on_its_old_row(bindings):
+    user_id = uuid4()
+    released = UserDevice(id=uuid4(), user_id=user_id, device_fingerprint="phone-1", is_active=False)
+    db = registration_session(released)
+    
+    device = await DeviceManager.register_device(user_id, DEVICE_INFO, db)
+    
+    assert device is released and device.is_active
+    assert db.added == [] and db.commits == 0
+    assert bindings._bindings[str(user_id)][1] == "phone-1"
+
+
+async def test_another_accounts_device_is_a_conflict(bindings):
+    db = registration_session(UserDevice(id=uuid4(), user_id=uuid4(), device_fingerprint="phone-1", is_active=False))
+    
+    with pytest.raises(HTTPException) as error:
+        await DeviceManager.register_device(uuid4(), DEVICE_INFO, db)
+    
+    assert error.value.status_code == 409
+    assert db.added == []
+
+
+async def test_concurrent_registration_of_the_device_is_a_conflict(bindings):
+    db = registration_session()
+    
+    async def duplicate_fingerprint():
+        raise IntegrityError("INSERT INTO user_devices", {}, Exception("duplicate key value"))
+    
+    db.flush = duplicate_fingerprint
+    
+    with pytest.raises(HTTPException) as error:
+        await DeviceManager.register_device(uuid4(), DEVICE_INFO, db)
+    
+    assert error.value.status_code == 409
+    assert bindings.pending == 0 and not bindings._bindings
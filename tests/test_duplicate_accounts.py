@@ -0,0 +1,80 @@
+"""
+Tests for duplicate-account detection (similarity join + grouping)
+"""
+from uuid import uuid4
+
+import numpy as np
+
+from src.core.vector_index import normalize, similarity_pairs
+from src.services.duplicate_accounts import find_duplicate_groups, group_key
+
+
+def test_similarity_pairs_matches_brute_force():
+    """Blocked join returns exactly the upper-triangle pairs above threshold"""
+    rng = np.random.default_rng(3)
+    base = normalize(rng.standard_normal((40, 8)))
+    vectors = np.concatenate([base, base[:10] + 0.05 * rng.standard_normal((10, 8))])
+    
+    rows, cols, sims = similarity_pairs(vectors, 0.9, block_size=7)
+    
+    full = normalize(vectors) @ normalize(vectors).T
+    expected = {(i, j) for i, j in zip(*np.nonzero(np.triu(full >= 0.9, k=1)))}
+    assert set(zip(rows.tolist(), cols.tolist())) == expected
+    assert np.all(rows < cols)
+    assert np.allclose(sims, full[rows, cols], atol=1e-5)
+
+
+def test_bucketed_join_finds_near_duplicates():
+    """IVF-blocked join finds planted duplicates, each pair once, rows < cols"""
+    rng = np.random.default_rng(4)
+    vectors = normalize(rng.standard_normal((4 * 39 * 2, 16)))
+    vectors[-20:] = normalize(vectors[:20] + 0.01 * rng.standard_normal((20, 16)))
+    
+    rows, cols, _ = similarity_pairs(vectors, 0.95, block_size=32, n_lists=4, n_probe=2)
+    
+    pairs = set(zip(rows.tolist(), cols.tolist()))
+    assert len(pairs) == len(rows)
+    assert np.all(rows < cols)
+    assert {(i, len(vectors) - 20 + i) for i in range(20)} <= pairs
+
+
+def test_weak_face_match_needs_shared_ip():
+    """A borderline face match only links accounts that also share an IP"""
+    users = [uuid4() for _ in range(4)]
+    rows = np.array([0, 2])
+    cols = np.array([1, 3])
+    sims = np.array([0.86, 0.86])
+    
+    groups = find_duplicate_groups(
+        users, rows, cols, sims,
+        shared_devices={},
+        shared_ips={"10.0.0.1": [users[0], users[1]]},
+        strong_threshold=0.92,
+    )
+    
+    assert len(groups) == 1
+    assert set(groups[0]["user_ids"]) == {users[0], users[1]}
+    assert groups[0]["score"] == 50.0
+    assert "10.0.0.1" in groups[0]["evidence"]["shared_ips"]
+
+
+def test_strong_face_and_device_links_merge():
+    """Strong face matches and shared devices chain into one group"""
+    users = [uuid4() for _ in range(3)]
+    outsider = uuid4()
+    groups = find_duplicate_groups(
+        users, np.array([0]), np.array([1]), np.array([0.97]),
+        shared_devices={"fp-1": [users[1], outsider]},
+        shared_ips={"10.0.0.2": [users[2], outsider]},
+        strong_threshold=0.92,
+    )
+    
+    assert len(groups) == 1
+    assert set(groups[0]["user_ids"]) == {users[0], users[1], outsider}
+    assert groups[0]["score"] == 80.0
+    assert groups[0]["max_face_similarity"] == 0.97
+
+
+def test_group_key_is_order_independent():
+    a, b = uuid4(), uuid4()
+    assert group_key([a, b]) == group_key([b, a])
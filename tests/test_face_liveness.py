@@ -0,0 +1,179 @@
+"""
+Test Face Liveness Verdict Cache
+"""
+import asyncio
+import base64
+import pytest
+from types import SimpleNamespace
+from uuid import uuid4
+from fastapi import HTTPException
+
+from src.api.v1.auth import _verify_face_for_user
+from src.services.face_embedding import FaceEmbeddingExtractor, FaceRecognition, embedding_to_bytes, load_extractor
+from src.services.face_liveness import (
+    FaceLivenessDetector, LivenessVerdictCache, decode_image, fingerprint_image, _verdict_cache
+)
+
+
+IMAGE_BYTES = b"\xff\xd8\xff\xe0" + bytes(range(256)) * 400
+IMAGE_B64 = base64.b64encode(IMAGE_BYTES).decode()
+
+
+@pytest.fixture(autouse=True)
+def clear_verdict_cache():
+    _verdict_cache.clear()
+    yield
+    _verdict_cache.clear()
+
+
+def test_fingerprint_ignores_encoding_variants():
+    """Data URI prefix and MIME line wrapping hash to the same image"""
+    plain = fingerprint_image(IMAGE_B64, max_bytes=1024 * 1024)
+    data_uri = fingerprint_image("data:image/jpeg;base64," + IMAGE_B64, max_bytes=1024 * 1024)
+    wrapped = fingerprint_image(base64.encodebytes(IMAGE_BYTES).decode(), max_bytes=1024 * 1024)
+    
+    assert plain == data_uri == wrapped
+
+
+def test_decode_accepts_the_same_variants_and_limits():
+    assert decode_image(IMAGE_B64, max_bytes=1024 * 1024) == IMAGE_BYTES
+    assert decode_image(base64.encodebytes(IMAGE_BYTES).decode(), max_bytes=1024 * 1024) == IMAGE_BYTES
+    
+    with pytest.raises(HTTPException) as error:
+        decode_image(IMAGE_B64, max_bytes=1024)
+    assert error.value.status_code == 413
+
+
+def test_fingerprint_rejects_oversized_image():
+    """Decoding stops with 413 once the size limit is crossed"""
+    with pytest.raises(HTTPException) as exc:
+        fingerprint_image(IMAGE_B64, max_bytes=1024)
+    
+    assert exc.value.status_code == 413
+
+
+def test_fingerprint_rejects_invalid_base64():
+    """Garbage payloads are rejected with 400"""
+    with pytest.raises(HTTPException) as exc:
+        fingerprint_image("not base64 at all!!", max_bytes=1024)
+    
+    assert exc.value.status_code == 400
+
+
+async def test_concurrent_identical_requests_share_one_call():
+    """Single-flight: concurrent lookups for the same key compute once"""
+    cache = LivenessVerdictCache(ttl_seconds=60, max_entries=10)
+    calls = 0
+    
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"is_live": True, "confidence": 95.0, "details": {}}, True
+    
+    results = await asyncio.gather(*[cache.get_or_compute("key", compute) for _ in range(20)])
+    
+    assert calls == 1
+    assert all(r is results[0] for r in results)
+    
+    # Later retries are served from the cache
+    await cache.get_or_compute("key", compute)
+    assert calls == 1
+
+
+async def test_uncacheable_results_are_recomputed():
+    """Provider fallbacks are not cached"""
+    cache = LivenessVerdictCache(ttl_seconds=60, max_entries=10)
+    calls = 0
+    
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return {"is_live": False, "confidence": 0, "details": {}}, False
+    
+    await cache.get_or_compute("key", compute)
+    await cache.get_or_compute("key", compute)
+    
+    assert calls == 2
+
+
+def test_cache_evicts_least_recently_used():
+    """Cache stays within max_entries"""
+    cache = LivenessVerdictCache(ttl_seconds=60, max_entries=2)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    cache.get("a")
+    cache.put("c", {"n": 3})
+    
+    assert cache.get("a") == {"n": 1}
+    assert cache.get("b") is None
+    assert cache.get("c") == {"n": 3}
+
+
+async def test_verify_liveness_retry_reuses_verdict(monkeypatch):
+    """A retried selfie for the same user gets the provider's verdict again without a call"""
+    calls = []
+    
+    async def provider(image_data, user_id):
+        calls.append(user_id)
+        return {"is_live": False, "confidence": 41.0, "details": {}, "api_response": "success"}, True
+    
+    monkeypatch.setattr(FaceLivenessDetector, "_check_liveness", provider)
+    user_id = uuid4()
+    
+    first = await FaceLivenessDetector.verify_liveness(IMAGE_B64, user_id)
+    retry = await FaceLivenessDetector.verify_liveness("data:image/jpeg;base64," + IMAGE_B64, user_id)
+    
+    assert first == retry
+    assert first is not retry
+    assert len(calls) == 1
+
+
+async def test_mock_verdicts_are_not_cached():
+    """A random rejection from the mock doesn't stick to the selfie"""
+    user_id = uuid4()
+    await FaceLivenessDetector.verify_liveness(IMAGE_B64, user_id)
+    
+    assert _verdict_cache.get(f"{user_id}:{fingerprint_image(IMAGE_B64, 10**7)}") is None
+
+
+async def test_cancelled_first_caller_does_not_cancel_the_others():
+    cache = LivenessVerdictCache(ttl_seconds=60, max_entries=10)
+    release = asyncio.Event()
+    
+    async def compute():
+        await release.wait()
+        return {"is_live": True}, True
+    
+    first = asyncio.create_task(cache.get_or_compute("key", compute))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_or_compute("key", compute))
+    await asyncio.sleep(0)
+    
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    
+    assert await waiter == {"is_live": True}
+    assert first.cancelled()
+    assert cache.get("key") == {"is_live": True}
+
+
+def test_face_login_never_enrolls_an_account_without_a_face():
+    """Knowing the email must not be enough to become the account's face"""
+    face = FaceRecognition.extract_embedding(IMAGE_B64)
+    unenrolled = SimpleNamespace(id=uuid4(), face_verified=True, face_embedding=None)
+    enrolled = SimpleNamespace(id=uuid4(), face_verified=True, face_embedding=embedding_to_bytes(face))
+    
+    assert _verify_face_for_user(unenrolled, face) is None
+    assert unenrolled.face_embedding is None
+    assert _verify_face_for_user(enrolled, face) is enrolled
+
+
+class Unfinished(FaceEmbeddingExtractor):
+    pass
+
+
+def test_extractor_without_extract_fails_when_loaded():
+    with pytest.raises(TypeError):
+        load_extractor(f"{__name__}:Unfinished", dim=8)
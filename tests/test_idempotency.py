@@ -0,0 +1,174 @@
+"""
+Tests for Idempotency-Key replays (fake session and engine, no database)
+"""
+import asyncio
+from uuid import uuid4
+
+import httpx
+from fastapi import APIRouter, Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+
+from src.core.security import create_access_token
+from src.services.idempotency import IDEMPOTENCY_HEADER, REPLAYED_HEADER, IdempotencyStore, IdempotentRoute
+from tests.conftest import FakeEngine, FakeSession, compiled_params
+
+
+class KeyTable:
+    """idempotency_keys: rows committed by the request sessions, or by another worker"""
+    
+    def __init__(self):
+        self.sessions = []
+        self.elsewhere = {}
+        self.engine = FakeEngine({"select idempotency_keys": self.lookup})
+    
+    @property
+    def rows(self) -> dict:
+        rows = dict(self.elsewhere)
+        for session in self.sessions:
+            for row in session.written("insert idempotency_keys", committed=True):
+                rows.setdefault((str(row["user_id"]), row["key"]), row)
+        return rows
+    
+    @property
+    def lookups(self) -> int:
+        return self.engine.session.count("select idempotency_keys")
+    
+    def session(self) -> FakeSession:
+        session = FakeSession({"insert idempotency_keys": self.insert})
+        self.sessions.append(session)
+        return session
+    
+    def lookup(self, statement, params):
+        values = compiled_params(statement)
+        row = self.rows.get((str(values["user_id_1"]), values["key_1"]))
+        if row is None:
+            return []
+        return [(row["endpoint"], row["request_hash"], row["status_code"], row["response_body"], row["expires_at"])]
+    
+    def insert(self, statement, params):
+        values = compiled_params(statement)
+        if (str(values["user_id"]), values["key"]) in self.rows:
+            return []
+        return [(values["key"],)]
+
+
+def make_app(table: KeyTable, calls: list, gate: asyncio.Event = None) -> FastAPI:
+    class Route(IdempotentRoute):
+        store = IdempotencyStore(engine=table.engine)
+    
+    async def fake_db(request: Request):
+        session = table.session()
+        request.state.db = session
+        yield session
+        await session.commit()
+    
+    router = APIRouter(route_class=Route)
+    
+    @router.post("/withdrawals/request")
+    async def request_withdrawal(payload: dict, db: FakeSession = Depends(fake_db)):
+        calls.append(payload)
+        db.add(payload)
+        if gate is not None:
+            await gate.wait()
+        return {"id": len(calls), "amount_usd": payload["amount_usd"]}
+    
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+def headers(user_id: str, key: str = None) -> dict:
+    result = {"Authorization": f"Bearer {create_access_token({'sub': user_id})}"}
+    if key is not None:
+        result[IDEMPOTENCY_HEADER] = key
+    return result
+
+
+def test_retry_returns_the_stored_response_without_running_again():
+    table, calls = KeyTable(), []
+    client = TestClient(make_app(table, calls))
+    user_id = str(uuid4())
+    
+    first = client.post("/withdrawals/request", json={"amount_usd": 25}, headers=headers(user_id, "retry-1"))
+    retry = client.post("/withdrawals/request", json={"amount_usd": 25}, headers=headers(user_id, "retry-1"))
+    
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json() == {"id": 1, "amount_usd": 25}
+    assert REPLAYED_HEADER not in first.headers
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert len(calls) == 1
+    # Stored in the handler's transaction, then served from the cache
+    assert table.sessions[0].commits == 1
+    assert table.lookups == 1
+    
+    # Another worker finds it in the table
+    other = TestClient(make_app(table, calls))
+    replayed = other.post("/withdrawals/request", json={"amount_usd": 25}, headers=headers(user_id, "retry-1"))
+    assert replayed.json() == first.json()
+    assert len(calls) == 1
+
+
+def test_key_reuse_and_requests_without_a_key():
+    table, calls = KeyTable(), []
+    client = TestClient(make_app(table, calls))
+    user_id = str(uuid4())
+    
+    client.post("/withdrawals/request", json={"amount_usd": 25}, headers=headers(user_id, "k"))
+    reused = client.post("/withdrawals/request", json={"amount_usd": 90}, headers=headers(user_id, "k"))
+    assert reused.status_code == 422
+    
+    # Keys are per user
+    other_user = client.post("/withdrawals/request", json={"amount_usd": 25}, headers=headers(str(uuid4()), "k"))
+    assert other_user.status_code == 200 and REPLAYED_HEADER not in other_user.headers
+    
+    for _ in range(2):
+        client.post("/withdrawals/request", json={"amount_usd": 25}, headers=headers(user_id))
+    assert len(calls) == 4
+    assert len(table.rows) == 2
+
+
+def test_duplicate_committed_elsewhere_first_is_rolled_back(monkeypatch):
+    table, calls = KeyTable(), []
+    app = make_app(table, calls)
+    user_id = str(uuid4())
+    
+    # The other worker's response commits while this request runs
+    winner = {
+        "user_id": user_id, "key": "k", "endpoint": "POST /withdrawals/request",
+        "request_hash": None, "status_code": 200, "response_body": '{"id": 99, "amount_usd": 25}',
+    }
+    insert = table.insert
+    
+    def insert_after_winner(statement, params):
+        stored = compiled_params(statement)
+        table.elsewhere[(user_id, "k")] = dict(winner, request_hash=stored["request_hash"], expires_at=stored["expires_at"])
+        return insert(statement, params)
+    
+    monkeypatch.setattr(table, "insert", insert_after_winner)
+    response = TestClient(app).post("/withdrawals/request", json={"amount_usd": 25}, headers=headers(user_id, "k"))
+    
+    assert response.json() == {"id": 99, "amount_usd": 25}
+    assert response.headers[REPLAYED_HEADER] == "true"
+    assert (table.sessions[0].commits, table.sessions[0].rollbacks) == (0, 1)
+
+
+async def test_concurrent_retries_on_one_worker_run_the_handler_once():
+    table, calls, gate = KeyTable(), [], asyncio.Event()
+    app = make_app(table, calls, gate)
+    user_id = str(uuid4())
+    
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        requests = [
+            asyncio.create_task(
+                client.post("/withdrawals/request", json={"amount_usd": 25}, headers=headers(user_id, "tap-tap"))
+            )
+            for _ in range(5)
+        ]
+        while not calls:
+            await asyncio.sleep(0.01)
+        gate.set()
+        responses = await asyncio.gather(*requests)
+    
+    assert len(calls) == 1
+    assert {response.json()["id"] for response in responses} == {1}
+    assert sum(REPLAYED_HEADER in response.headers for response in responses) == 4
@@ -0,0 +1,82 @@
+"""
+Tests for the chat intent classifier
+"""
+import json
+import os
+
+from src.services.intent_classifier import (
+    INTENT_KEYWORDS, HashedNGramModel, IntentClassifier, KeywordMatcher
+)
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "chat_intents.jsonl")
+
+
+def load_fixture():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def keywords_only() -> IntentClassifier:
+    return IntentClassifier(KeywordMatcher(INTENT_KEYWORDS))
+
+
+def test_keywords_match_whole_words_not_substrings():
+    classifier = keywords_only()
+    # "show" contains "how", "problem" contains "pro", "working" contains "work"
+    assert classifier.classify("Show me available tasks")["intent"] == "task_inquiry"
+    assert classifier.classify("I have a problem")["intent"] == "problem_report"
+    assert classifier.classify("the app is not working")["intent"] == "problem_report"
+
+
+def test_keywords_in_unspaced_scripts():
+    classifier = keywords_only()
+    assert classifier.classify("อยากถอนเงิน")["intent"] == "withdrawal_inquiry"
+    assert classifier.classify("ငွေထုတ်ချင်ပါတယ်")["intent"] == "withdrawal_inquiry"
+
+
+def test_undecided_without_model_uses_priority_then_default():
+    classifier = keywords_only()
+    tie = classifier.classify("how do I withdraw")
+    assert tie == {"intent": "help_request", "source": "default", "confidence": 0.0}
+    assert classifier.classify("hello there")["intent"] == "general_conversation"
+
+
+def test_model_decides_ties_within_the_tied_intents():
+    examples = load_fixture()
+    model = HashedNGramModel(n_features=2 ** 14).fit(
+        [row["message"] for row in examples], [row["intent"] for row in examples]
+    )
+    classifier = IntentClassifier(KeywordMatcher(INTENT_KEYWORDS), model)
+    
+    result = classifier.classify("सदस्यता कैसे लें")
+    
+    assert result["source"] == "model"
+    assert result["intent"] == "subscription_inquiry"
+
+
+def test_classify_many_matches_classify():
+    classifier = keywords_only()
+    messages = [row["message"] for row in load_fixture()]
+    assert classifier.classify_many(messages) == [classifier.classify(m) for m in messages]
+
+
+def test_fixture_accuracy_keywords_only():
+    examples = load_fixture()
+    results = keywords_only().classify_many([row["message"] for row in examples])
+    correct = sum(result["intent"] == row["intent"] for result, row in zip(results, examples))
+    assert correct / len(examples) >= 0.95
+
+
+def test_model_round_trips_through_file(tmp_path):
+    examples = load_fixture()
+    model = HashedNGramModel(n_features=2 ** 12).fit(
+        [row["message"] for row in examples], [row["intent"] for row in examples]
+    )
+    path = str(tmp_path / "intent_model.npz")
+    model.save(path)
+    
+    loaded = HashedNGramModel.load(path)
+    
+    assert loaded.intents == model.intents
+    assert (loaded.predict_proba(["bonjour"]) == model.predict_proba(["bonjour"])).all()
@@ -0,0 +1,108 @@
+"""
+Tests for the buffered log sink (fake engine, no database)
+"""
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from src.db.models import AIDecisionLog, ChatMessage, FaceLivenessLog
+from src.services.log_sink import LogSink, build_row
+from tests.conftest import FakeEngine
+
+
+def batches(engine: FakeEngine):
+    """(table, rows) of each multi-row INSERT the sink sent"""
+    return [(key.split(" ", 1)[1], len(statement._multi_values[0])) for key, statement, _ in engine.session.executed]
+
+
+def failing_for(bad_user):
+    def insert_rows(statement, params):
+        if any(row.get("user_id") == bad_user for row in statement._multi_values[0]):
+            raise RuntimeError("foreign key violation")
+        return []
+    return insert_rows
+
+
+async def write_face_logs(sink: LogSink, count: int, user_id=None):
+    for _ in range(count):
+        await sink.write(
+            FaceLivenessLog,
+            user_id=user_id or uuid4(),
+            is_live=True,
+            confidence_score=95,
+            detection_details={},
+        )
+
+
+async def test_full_batches_are_one_insert_each():
+    engine = FakeEngine()
+    sink = LogSink(batch_size=10, flush_interval_ms=60000, max_queue=100)
+    sink.start(engine)
+    
+    await write_face_logs(sink, 25)
+    await sink.stop()
+    
+    assert batches(engine) == [("face_liveness_logs", 10), ("face_liveness_logs", 10), ("face_liveness_logs", 5)]
+    assert sink.rows_written == 25
+
+
+async def test_partial_batch_flushes_after_interval():
+    engine = FakeEngine()
+    sink = LogSink(batch_size=100, flush_interval_ms=20, max_queue=100)
+    sink.start(engine)
+    
+    await write_face_logs(sink, 3)
+    await sink.write(AIDecisionLog, decision_type="withdrawal", decision_context={}, decision_made="approve")
+    await asyncio.sleep(0.1)
+    
+    assert sorted(batches(engine)) == [("ai_decision_logs", 1), ("face_liveness_logs", 3)]
+    await sink.stop()
+
+
+async def test_full_buffer_makes_writers_wait():
+    sink = LogSink(batch_size=10, flush_interval_ms=20, max_queue=2)
+    
+    # Not started: nothing drains the queue
+    await write_face_logs(sink, 2)
+    blocked = asyncio.create_task(write_face_logs(sink, 1))
+    await asyncio.sleep(0.05)
+    assert not blocked.done()
+    
+    engine = FakeEngine()
+    sink.start(engine)
+    await asyncio.wait_for(blocked, 1)
+    await sink.stop()
+    assert sink.rows_written == 3
+
+
+async def test_bad_row_does_not_lose_the_rest_of_its_batch():
+    bad_user = uuid4()
+    engine = FakeEngine({"insert face_liveness_logs": failing_for(bad_user)})
+    sink = LogSink(batch_size=10, flush_interval_ms=60000, max_queue=100)
+    sink.start(engine)
+    
+    await write_face_logs(sink, 4)
+    await write_face_logs(sink, 1, user_id=bad_user)
+    await sink.stop()
+    
+    assert sink.rows_written == 4
+    assert sink.rows_failed == 1
+
+
+async def test_defaults_are_filled_at_enqueue_time():
+    sink = LogSink(max_queue=10)
+    await write_face_logs(sink, 1)
+    
+    _, row = sink._queue.get_nowait()
+    assert row["id"] is not None
+    assert row["created_at"] is not None
+
+
+def test_rows_leave_generated_columns_to_the_database():
+    row = build_row(ChatMessage.__table__, {"user_id": uuid4(), "conversation_id": "c", "role": "user", "message": "hi"})
+    
+    assert "search_vector" not in row
+    assert row["id"] is not None and row["created_at"] is not None
+    with pytest.raises(ValueError):
+        build_row(ChatMessage.__table__, {"search_vector": "'hi':1"})
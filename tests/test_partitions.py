@@ -0,0 +1,36 @@
+"""
+Tests for log partition date math (no database)
+"""
+from datetime import date
+
+from src.db.partitions import (
+    add_months, is_expired, months_to_create, partition_month, partition_name
+)
+
+
+def test_add_months_crosses_years():
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_partition_names_round_trip():
+    name = partition_name("chat_messages", date(2026, 3, 1))
+    assert name == "chat_messages_p202603"
+    assert partition_month("chat_messages", name) == date(2026, 3, 1)
+    assert partition_month("chat_messages", "chat_messages_default") is None
+    assert partition_month("user_activity_logs", name) is None
+
+
+def test_months_to_create_includes_current_month():
+    assert months_to_create(date(2026, 12, 15), 2) == [
+        date(2026, 12, 1), date(2027, 1, 1), date(2027, 2, 1)
+    ]
+
+
+def test_partition_expires_after_its_last_day_passes_retention():
+    today = date(2026, 10, 19)
+    # September 2025 ends 2025-10-01, which is > 365 days ago
+    assert is_expired(date(2025, 9, 1), 365, today)
+    # October 2025 still holds rows younger than 365 days
+    assert not is_expired(date(2025, 10, 1), 365, today)
+    assert not is_expired(date(2000, 1, 1), 0, today)
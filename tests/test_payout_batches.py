@@ -0,0 +1,103 @@
+"""
+Tests for bulk payout file writers
+"""
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+from src.db.models import TransactionStatusEnum
+from src.services.payout_batches import (
+    CSVPayoutFile, FixedWidthPayoutFile, PayoutBatchBuilder, convert_amount, payout_account, valid_account
+)
+from tests.conftest import FakeSession
+
+
+def test_convert_amount_rounds_half_up():
+    assert convert_amount(10.005, Decimal("1")) == Decimal("10.01")
+    assert convert_amount("4.75", Decimal("2100.5")) == Decimal("9977.38")
+
+
+def test_payout_account_prefers_account_number():
+    assert payout_account({"phone": "0911", "account_number": "123"}) == "123"
+    assert payout_account({"email": "a@b.c"}) == "a@b.c"
+    assert payout_account({}) == ""
+
+
+def test_csv_file(tmp_path):
+    path = tmp_path / "batch.csv"
+    writer = CSVPayoutFile(str(path), uuid4(), "MMK")
+    writer.write("ref1", "0911", "Aung Aung", Decimal("9977.38"), "MMK")
+    writer.close(1, Decimal("9977.38"))
+    
+    lines = path.read_text().splitlines()
+    assert lines[0] == "reference,account,account_name,amount,currency"
+    assert lines[1] == "ref1,0911,Aung Aung,9977.38,MMK"
+
+
+def test_fixed_width_file(tmp_path):
+    path = tmp_path / "batch.txt"
+    batch_id = uuid4()
+    writer = FixedWidthPayoutFile(str(path), batch_id, "THB")
+    writer.write("ref1", "123456", "Somchai", Decimal("150.25"), "THB")
+    writer.write("ref2", "654321", "A" * 50, Decimal("49.75"), "THB")
+    writer.close(2, Decimal("200.00"))
+    
+    header, first, second, trailer = path.read_text().splitlines()
+    assert header.startswith("H" + str(batch_id)) and header.endswith("THB")
+    assert len(first) == len(second) == 1 + 32 + 34 + 35 + 15 + 3
+    assert first[102:117] == "000000000015025"
+    assert trailer == "T" + "0000000002" + "000000000000020000"
+
+
+def test_valid_account():
+    assert valid_account("+959 123 456", 34) == "+959123456"
+    assert valid_account("someone+payouts@example.com", 254) == "someone+payouts@example.com"
+    assert valid_account("123\nD00000", 34) is None
+    assert valid_account("=HYPERLINK(1)", 254) is None
+    assert valid_account("1" * 35, 34) is None
+
+
+def test_user_text_cannot_forge_records_or_formulas(tmp_path):
+    path = tmp_path / "batch.txt"
+    writer = FixedWidthPayoutFile(str(path), uuid4(), "THB")
+    writer.write("ref1", "123456", "Somchai\nD" + "9" * 100 + "\u2028T", Decimal("1.00"), "THB")
+    writer.close(1, Decimal("1.00"))
+    assert [line[0] for line in path.read_text().splitlines()] == ["H", "D", "T"]
+    
+    path = tmp_path / "batch.csv"
+    writer = CSVPayoutFile(str(path), uuid4(), "MMK")
+    writer.write("ref1", "+959123", "=cmd|' /C calc'!A0", Decimal("1.00"), "MMK")
+    writer.close(1, Decimal("1.00"))
+    assert path.read_text().splitlines()[1] == "ref1,'+959123,'=cmd|' /C calc'!A0,1.00,MMK"
+
+
+def batch_session(pending: bool, withdrawals: list) -> FakeSession:
+    return FakeSession({
+        "update payout_batches": [(uuid4(),)] if pending else [],
+        "update withdrawals": withdrawals,
+    })
+
+
+async def test_settled_batches_cannot_be_settled_again():
+    db = batch_session(pending=False, withdrawals=[])
+    assert await PayoutBatchBuilder.mark_completed(db, uuid4()) is None
+    assert await PayoutBatchBuilder.mark_failed(db, uuid4(), "rejected") is None
+    assert db.count("update withdrawals") == 0 and db.commits == 0
+
+
+async def test_failed_batch_refunds_its_withdrawals():
+    user_id = uuid4()
+    rows = [
+        SimpleNamespace(id=uuid4(), user_id=user_id, gross_amount_usd=Decimal("5.50"), net_amount_usd=Decimal("5.00"))
+        for _ in range(2)
+    ]
+    db = batch_session(pending=True, withdrawals=rows)
+    
+    assert await PayoutBatchBuilder.mark_failed(db, uuid4(), "Unknown account format") == 2
+    
+    withdrawals, = db.written("update withdrawals")
+    assert withdrawals["status"] == TransactionStatusEnum.FAILED
+    assert withdrawals["payout_error"] == "Unknown account format"
+    refund, = db.written("update users")
+    assert refund["id_1"] == user_id
+    assert db.commits == 0  # Left to the caller's unit of work
@@ -0,0 +1,175 @@
+"""
+Tests for the payout dispatcher (fake providers, no database)
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from src.core.config import settings
+from src.db.models import PayoutMethodEnum, TransactionStatusEnum
+from src.services.payout_dispatcher import (
+    DISPATCHING, UNCONFIRMED, FakePayoutProvider, PayoutDispatcher, PayoutProvider, PayoutProviderError, idempotency_key
+)
+from tests.conftest import FakeSession, compiled_params
+
+
+def make_payouts(count: int, method: PayoutMethodEnum = PayoutMethodEnum.WAVE_MONEY):
+    payouts = []
+    for _ in range(count):
+        withdrawal_id = str(uuid4())
+        payouts.append({
+            "withdrawal_id": withdrawal_id,
+            "idempotency_key": idempotency_key(withdrawal_id),
+            "payout_method": method,
+            "amount": "1000.00",
+            "currency_code": "MMK",
+            "amount_usd": "0.50",
+            "destination": {"phone": "09000000000"},
+        })
+    return payouts
+
+
+class FlakyProvider(FakePayoutProvider):
+    """Fails the first N requests, tracks peak concurrency"""
+    
+    def __init__(self, *args, fail_first: int = 0, retryable: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail_first = fail_first
+        self.retryable = retryable
+        self.active = 0
+        self.peak = 0
+    
+    async def send_batch(self, payouts):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.001)
+            if self.fail_first > 0:
+                self.fail_first -= 1
+                raise PayoutProviderError("gateway timeout", retryable=self.retryable)
+            return await super().send_batch(payouts)
+        finally:
+            self.active -= 1
+
+
+def dispatcher_for(provider, max_attempts: int = 3) -> PayoutDispatcher:
+    return PayoutDispatcher({provider.method: provider}, max_attempts=max_attempts, retry_base_seconds=0)
+
+
+async def test_batches_and_concurrency_limit():
+    """Payouts are chunked to batch_size and never exceed max_concurrency"""
+    provider = FlakyProvider(PayoutMethodEnum.PAYPAL, max_concurrency=2, batch_size=10)
+    results = await dispatcher_for(provider).dispatch(make_payouts(45, PayoutMethodEnum.PAYPAL))
+    
+    assert provider.requests == 5
+    assert provider.peak <= 2
+    assert [r["status"] for r in results] == ["completed"] * 45
+
+
+async def test_retry_reuses_idempotency_key():
+    """A retried request pays each withdrawal exactly once"""
+    provider = FlakyProvider(PayoutMethodEnum.KBZ_PAY, fail_first=2)
+    payouts = make_payouts(1, PayoutMethodEnum.KBZ_PAY)
+    
+    results = await dispatcher_for(provider).dispatch(payouts)
+    assert results[0]["status"] == "completed"
+    assert results[0]["attempts"] == 3
+    
+    # Replaying the same withdrawal (e.g. after a crash) returns the same reference
+    replay = await dispatcher_for(provider).dispatch(payouts)
+    assert replay[0]["reference"] == results[0]["reference"]
+    assert len(provider.paid) == 1
+
+
+async def test_exhausted_retries_stay_pending():
+    provider = FlakyProvider(PayoutMethodEnum.CB_PAY, fail_first=10)
+    results = await dispatcher_for(provider, max_attempts=2).dispatch(make_payouts(3, PayoutMethodEnum.CB_PAY))
+    
+    assert provider.requests == 0  # Failures raised before reaching the fake
+    assert {r["status"] for r in results} == {"pending"}
+
+
+async def test_non_retryable_error_fails_immediately():
+    provider = FlakyProvider(PayoutMethodEnum.AYA_PAY, fail_first=1, retryable=False)
+    results = await dispatcher_for(provider).dispatch(make_payouts(1, PayoutMethodEnum.AYA_PAY))
+    
+    assert results[0]["status"] == "failed"
+    assert results[0]["attempts"] == 1
+
+
+def test_idempotency_key_is_stable():
+    withdrawal_id = uuid4()
+    assert idempotency_key(withdrawal_id) == idempotency_key(str(withdrawal_id))
+    assert idempotency_key(withdrawal_id) != idempotency_key(uuid4())
+
+
+def claimed_withdrawal(method: PayoutMethodEnum, attempts: int = 0) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=uuid4(), user_id=uuid4(), payout_method=method, amount_local=Decimal("1000.00"),
+        currency_code="MMK", payout_details={"phone": "09000000000"},
+        gross_amount_usd=Decimal("0.55"), net_amount_usd=Decimal("0.50"), payout_attempts=attempts,
+    )
+
+
+async def test_process_pending_refunds_only_clear_rejections():
+    """Claimed first, sent outside any transaction; timeouts at the limit wait for an admin"""
+    paid = claimed_withdrawal(PayoutMethodEnum.PAYPAL)
+    declined = claimed_withdrawal(PayoutMethodEnum.AYA_PAY)
+    timed_out = claimed_withdrawal(PayoutMethodEnum.CB_PAY, attempts=settings.PAYOUT_MAX_ATTEMPTS - 1)
+    sessions = []
+    
+    def withdrawals(statement, params):
+        values = compiled_params(statement)
+        if "payout_attempts" not in values:
+            return [paid, declined, timed_out]  # The claim
+        return [(values["id_1"],)]
+    
+    @asynccontextmanager
+    async def session_factory():
+        session = FakeSession({"update withdrawals": withdrawals})
+        sessions.append(session)
+        yield session
+    
+    claim_committed = []
+    
+    class Provider(FlakyProvider):
+        async def send_batch(self, payouts):
+            claim_committed.append(sessions[0].commits == 1 and len(sessions) == 1)
+            return await super().send_batch(payouts)
+    
+    dispatcher = PayoutDispatcher(
+        {
+            PayoutMethodEnum.PAYPAL: Provider(PayoutMethodEnum.PAYPAL),
+            PayoutMethodEnum.AYA_PAY: Provider(PayoutMethodEnum.AYA_PAY, decline_rate=1.0),
+            PayoutMethodEnum.CB_PAY: Provider(PayoutMethodEnum.CB_PAY, fail_first=10),
+        },
+        max_attempts=2,
+        retry_base_seconds=0,
+    )
+    counts = await dispatcher.process_pending(session_factory, limit=10)
+    
+    assert counts == {"claimed": 3, "completed": 1, "failed": 1, "pending": 0, "unconfirmed": 1}
+    assert claim_committed and all(claim_committed)
+    claim, record = sessions
+    assert claim.written("update withdrawals", committed=True)[0]["payout_state"] == DISPATCHING
+    
+    recorded = {str(row["id_1"]): row for row in record.written("update withdrawals", committed=True)}
+    assert recorded[str(paid.id)]["status"] == TransactionStatusEnum.COMPLETED
+    assert recorded[str(declined.id)]["status"] == TransactionStatusEnum.FAILED
+    assert "status" not in recorded[str(timed_out.id)]
+    assert recorded[str(timed_out.id)]["payout_state"] == UNCONFIRMED
+    # Only the declined payout's user gets the money back
+    refunds = record.written("update users", committed=True)
+    assert [row["id_1"] for row in refunds] == [declined.user_id]
+
+
+def test_provider_without_send_batch_cannot_be_built():
+    class Unfinished(PayoutProvider):
+        pass
+    
+    with pytest.raises(TypeError):
+        Unfinished(PayoutMethodEnum.PAYPAL)
@@ -0,0 +1,85 @@
+"""
+Tests for pool settings, health checks and the Prometheus histogram
+"""
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import exc
+
+from src.core import metrics
+from src.core.config import Settings
+from src.db import pool
+
+
+@pytest.fixture(autouse=True)
+def isolated_metrics(monkeypatch):
+    """Histograms and health checks below don't leak into the global registry and state"""
+    monkeypatch.setattr(metrics, "_collectors", list(metrics._collectors))
+    monkeypatch.setattr(pool, "_healthy", {})
+
+
+def make_settings(**overrides) -> Settings:
+    return Settings(DATABASE_URL="postgresql+asyncpg://u:p@localhost/db", SECRET_KEY="x", JWT_SECRET_KEY="y", **overrides)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_wait_seconds", "test", label_names=("pool",), buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.05, 0.05, 0.5, 5.0):
+        histogram.observe(value, "primary")
+    
+    snapshot = histogram.snapshot("primary")
+    assert list(snapshot["buckets"].values()) == [1, 3, 4, 5]
+    assert snapshot["count"] == 5
+    
+    rendered = metrics.render()
+    assert 'test_wait_seconds_bucket{pool="primary",le="0.1"} 3' in rendered
+    assert 'test_wait_seconds_bucket{pool="primary",le="+Inf"} 5' in rendered
+    assert 'test_wait_seconds_count{pool="primary"} 5' in rendered
+
+
+def test_pool_limits_from_connection_budget():
+    assert make_settings(DB_POOL_SIZE=10, DB_MAX_OVERFLOW=20).db_pool_limits == (10, 20)
+    # 100 server connections over 4 workers -> 25 each, 10 kept warm
+    assert make_settings(DB_MAX_CONNECTIONS=100, WEB_CONCURRENCY=4).db_pool_limits == (10, 15)
+    assert make_settings(DB_MAX_CONNECTIONS=20, WEB_CONCURRENCY=4).db_pool_limits == (5, 0)
+
+
+def test_sql_echo_only_in_development():
+    assert make_settings(ENVIRONMENT="development", DEBUG=True).sql_echo
+    assert not make_settings(ENVIRONMENT="production", DEBUG=True).sql_echo
+    assert not make_settings(ENVIRONMENT="development", DEBUG=False).sql_echo
+
+
+class ProbeEngine:
+    """Engine whose connect() raises error, counting dispose() calls"""
+    
+    def __init__(self, error: Exception):
+        self.error = error
+        self.disposed = 0
+    
+    @asynccontextmanager
+    async def connect(self):
+        raise self.error
+        yield
+    
+    async def dispose(self):
+        self.disposed += 1
+
+
+async def test_busy_pool_is_not_disposed():
+    engine = ProbeEngine(exc.TimeoutError("QueuePool limit of size 10 overflow 0 reached"))
+    
+    assert await pool.check_pool_health(engine, "primary") is False
+    assert engine.disposed == 0
+
+
+@pytest.mark.parametrize("error", [
+    ConnectionRefusedError("connection refused"),
+    exc.OperationalError("SELECT 1", {}, Exception("server closed the connection unexpectedly")),
+])
+async def test_broken_connections_dispose_the_pool(error):
+    engine = ProbeEngine(error)
+    
+    assert await pool.check_pool_health(engine, "primary") is False
+    assert engine.disposed == 1
+    assert pool._healthy == {"primary": False}
@@ -0,0 +1,94 @@
+"""
+Tests for MinHash near-duplicate detection of AI proposals (no database)
+"""
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+from sqlalchemy.dialects import postgresql
+
+from src.core.minhash import BANDS, band_keys, cluster, clusters, signature, signatures, similarity
+from src.db.models import AIProposalStatusEnum
+from src.services.proposal_dedup import ProposalDedup
+from tests.conftest import FakeSession
+
+DARK_MODE = "Add dark mode to the mobile app. The white screen hurts my eyes at night"
+DARK_MODE_AGAIN = "Please add a dark mode to the app, the white screen hurts eyes at night"
+MOBILE_MONEY = "Pay withdrawals through mobile money in Myanmar"
+
+
+def stored_row(title, description, upvotes=0):
+    minhash, _ = ProposalDedup.fingerprint(title, description)
+    return SimpleNamespace(
+        id=uuid4(), title=title, status=AIProposalStatusEnum.PENDING, upvotes=upvotes, minhash=minhash,
+    )
+
+
+def test_signatures_estimate_similarity_and_share_buckets():
+    sigs = signatures([DARK_MODE, DARK_MODE_AGAIN, MOBILE_MONEY, "", DARK_MODE.upper()])
+    
+    scores = similarity(sigs[0], sigs)
+    assert scores[0] == scores[4] == 1.0  # case doesn't matter
+    assert scores[1] > 0.4 > 0.1 > scores[2]
+    # One text at a time gives the same signature as the batch
+    assert np.array_equal(signature(DARK_MODE_AGAIN), sigs[1])
+    
+    keys = band_keys(sigs)
+    assert keys.shape == (5, BANDS) and keys.dtype == np.int64
+    assert np.array_equal(keys[0], keys[4])
+    assert not set(keys[0]) & set(keys[2])
+
+
+def test_cluster_groups_near_duplicates_of_a_large_backlog():
+    rng = np.random.default_rng(7)
+    vocabulary = [f"word{i}" for i in range(3000)]
+    texts = [" ".join(rng.choice(vocabulary, 30)) for _ in range(2000)]
+    # Three rewordings of text 0 and one of text 1, scattered through the backlog
+    for position, source in ((500, 0), (900, 0), (1500, 0), (1999, 1)):
+        words = texts[source].split()
+        words[3] = "different"
+        texts[position] = " ".join(words)
+    
+    groups = clusters(cluster(signatures(texts), 0.5))
+    
+    assert [sorted(group.tolist()) for group in groups] == [[0, 500, 900, 1500], [1, 1999]]
+
+
+async def test_similar_scores_bucket_matches_and_drops_distant_ones():
+    close = stored_row("Dark mode", DARK_MODE, upvotes=4)
+    far = stored_row("Mobile money", MOBILE_MONEY)
+    db = FakeSession({"select ai_proposals": [far, close]})
+    minhash, lsh_bands = ProposalDedup.fingerprint("Dark mode", DARK_MODE + " please")
+    
+    similar = await ProposalDedup.similar(db, minhash, lsh_bands)
+    
+    assert [proposal["id"] for proposal in similar] == [str(close.id)]
+    assert 0.5 <= similar[0]["similarity"] < 1
+    _, statement, _ = db.executed[0]
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "ai_proposals.lsh_bands && " in sql and "LIMIT" in sql
+
+
+async def test_cluster_backlog_keeps_the_most_upvoted_and_signs_unsigned_rows():
+    def row(title, description, upvotes, unsigned):
+        return SimpleNamespace(
+            id=uuid4(), title=title, description=description, status=AIProposalStatusEnum.PENDING,
+            upvotes=upvotes, unsigned=unsigned,
+        )
+    
+    rows = [
+        row("Dark mode", DARK_MODE, 1, True),
+        row("Mobile money", MOBILE_MONEY, 9, True),
+        row("Dark mode", DARK_MODE + " please", 5, False),
+    ]
+    db = FakeSession({"select ai_proposals": rows})
+    
+    groups, summary = await ProposalDedup.cluster_backlog(db, store_missing=True)
+    
+    assert [proposal["id"] for proposal in groups[0]["proposals"]] == [str(rows[2].id), str(rows[0].id)]
+    assert groups[0]["upvotes"] == 6
+    assert summary["clusters"] == summary["duplicates"] == 1
+    assert summary["signatures_stored"] == 2
+    signed = db.written("update ai_proposals")
+    assert {row["proposal_id"] for row in signed} == {rows[0].id, rows[1].id}
+    assert all(len(row["lsh_bands"]) == BANDS for row in signed)
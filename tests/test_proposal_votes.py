@@ -0,0 +1,137 @@
+"""
+Tests for deduplicated proposal votes and the cached proposal leaderboard
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.api.v1.ai_proposals import upvote_proposal
+from src.db.base import Base
+from src.db.models import AIProposal, AIProposalStatusEnum, ProposalVote, User
+from src.services.proposal_votes import ProposalLeaderboard, ProposalVotes
+from tests.conftest import TEST_DATABASE_URL, FakeSession
+
+
+def leaderboard_session(proposals):
+    """Serves proposals ordered and paged as the leaderboard query would"""
+    ordered = sorted(proposals, key=lambda p: (-p.upvotes, -p.created_at.timestamp()))
+    
+    def page(statement, params):
+        offset = statement._offset or 0
+        return ordered[offset:offset + statement._limit]
+    
+    return FakeSession({"select ai_proposals": page})
+
+
+def make_proposal(upvotes, created_at):
+    return SimpleNamespace(
+        id=uuid4(), title="Idea", description="Details", category="feature",
+        status=AIProposalStatusEnum.PENDING, upvotes=upvotes, created_at=created_at,
+    )
+
+
+async def test_leaderboard_serves_pages_from_one_load_until_it_expires():
+    start = datetime(2026, 10, 20)
+    proposals = [make_proposal(upvotes, start + timedelta(minutes=upvotes)) for upvotes in range(30)]
+    db = leaderboard_session(proposals)
+    board = ProposalLeaderboard(size=20, ttl_seconds=60)
+    
+    first = await board.page(db, None, 0, 10)
+    second = await board.page(db, None, 10, 10)
+    
+    assert [p["upvotes"] for p in first + second] == list(range(29, 9, -1))
+    assert db.count("select ai_proposals") == 1
+    
+    # Past the cached top 20: straight to the database
+    deep = await board.page(db, None, 15, 10)
+    assert [p["upvotes"] for p in deep] == list(range(14, 4, -1))
+    assert db.count("select ai_proposals") == 2
+    
+    board.record_vote(proposals[29].id, 31)
+    assert (await board.page(db, None, 0, 1))[0]["upvotes"] == 31
+    assert db.count("select ai_proposals") == 2
+    
+    board.ttl_seconds = 0
+    await board.page(db, None, 0, 1)
+    assert db.count("select ai_proposals") == 3
+
+
+async def test_upvote_reports_repeat_votes_and_missing_proposals():
+    user = SimpleNamespace(id=uuid4())
+    proposal_id = str(uuid4())
+    
+    # Nothing inserted (already voted), then the current count
+    response = await upvote_proposal(proposal_id=proposal_id, db=FakeSession({"select ai_proposals": [(7,)]}), current_user=user)
+    assert response == {"message": "Already upvoted", "upvotes": 7}
+    
+    response = await upvote_proposal(proposal_id=proposal_id, db=FakeSession({"update ai_proposals": [(8,)]}), current_user=user)
+    assert response == {"message": "Upvoted successfully", "upvotes": 8}
+    
+    with pytest.raises(HTTPException) as error:
+        await upvote_proposal(proposal_id=proposal_id, db=FakeSession(), current_user=user)
+    assert error.value.status_code == 404
+
+
+@pytest.fixture
+async def vote_engine():
+    """Test database with the voting tables; skipped when it isn't running"""
+    engine = create_async_engine(TEST_DATABASE_URL, pool_size=20, max_overflow=30)
+    tables = [User.__table__, AIProposal.__table__, ProposalVote.__table__]
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=tables)
+    except (OSError, ConnectionError) as e:
+        await engine.dispose()
+        pytest.skip(f"test database not available: {e}")
+    
+    yield engine
+    
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=tables)
+    await engine.dispose()
+
+
+async def test_ten_thousand_parallel_votes_count_exactly(vote_engine):
+    voters = [uuid4() for _ in range(8000)]
+    proposal_id = uuid4()
+    sessions = async_sessionmaker(vote_engine, class_=AsyncSession, expire_on_commit=False)
+    now = datetime.utcnow()
+    
+    async with sessions() as session:
+        for start in range(0, len(voters), 2000):
+            await session.execute(insert(User), [
+                {"id": user_id, "email": f"{user_id.hex}@example.invalid", "hashed_password": "x", "full_name": "Voter"}
+                for user_id in voters[start:start + 2000]
+            ])
+        await session.execute(insert(AIProposal), [{
+            "id": proposal_id, "title": "Dark mode", "description": "Please", "status": AIProposalStatusEnum.PENDING,
+            "upvotes": 0, "created_at": now, "updated_at": now,
+        }])
+        await session.commit()
+    
+    # Every voter once, 2000 of them twice, in random order
+    ballots = voters + random.Random(3).sample(voters, 2000)
+    random.Random(4).shuffle(ballots)
+    gate = asyncio.Semaphore(40)
+    
+    async def vote(user_id):
+        async with gate, sessions() as session:
+            result = await ProposalVotes.upvote(session, proposal_id, user_id)
+            await session.commit()
+            return result[1]
+    
+    counted = await asyncio.gather(*(vote(user_id) for user_id in ballots))
+    
+    async with sessions() as session:
+        upvotes = await session.scalar(select(AIProposal.upvotes).where(AIProposal.id == proposal_id))
+        rows = await session.scalar(select(func.count()).select_from(ProposalVote).where(ProposalVote.proposal_id == proposal_id))
+    
+    assert len(ballots) == 10000
+    assert sum(counted) == upvotes == rows == len(voters)
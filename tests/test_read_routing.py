@@ -0,0 +1,76 @@
+"""
+Tests for read-replica routing (read-your-writes + lag awareness)
+"""
+import time
+
+from starlette.requests import Request
+
+from src.core.security import create_access_token
+from src.db.routing import LAST_WRITE_COOKIE, ReadRouter
+
+
+def make_request(user_id: str = None, cookie: str = None) -> Request:
+    headers = []
+    if user_id:
+        headers.append((b"authorization", f"Bearer {create_access_token({'sub': user_id})}".encode()))
+    if cookie:
+        headers.append((b"cookie", f"{LAST_WRITE_COOKIE}={cookie}".encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def healthy_router(**kwargs) -> ReadRouter:
+    router = ReadRouter(enabled=True, sticky_seconds=5, max_lag_seconds=10, **kwargs)
+    router.replica_lag = 0.0
+    return router
+
+
+def test_reads_go_to_replica_by_default():
+    assert healthy_router().use_replica(make_request("user-1"))
+
+
+def test_recent_writer_reads_from_primary():
+    router = healthy_router()
+    router.record_write("user-1")
+    
+    assert not router.use_replica(make_request("user-1"))
+    assert router.use_replica(make_request("user-2"))
+
+
+def test_sticky_window_expires():
+    router = ReadRouter(enabled=True, sticky_seconds=0.01, max_lag_seconds=10)
+    router.replica_lag = 0.0
+    router.record_write("user-1")
+    time.sleep(0.02)
+    
+    assert router.use_replica(make_request("user-1"))
+
+
+def test_last_write_cookie_pins_to_primary():
+    router = healthy_router()
+    assert not router.use_replica(make_request(cookie=f"{time.time():.3f}"))
+    assert router.use_replica(make_request(cookie=f"{time.time() - 60:.3f}"))
+    assert router.use_replica(make_request(cookie="garbage"))
+
+
+def test_lagging_or_unknown_replica_is_bypassed():
+    router = healthy_router()
+    router.replica_lag = 30.0
+    assert not router.use_replica(make_request("user-1"))
+    
+    router.replica_lag = None
+    assert not router.use_replica(make_request("user-1"))
+
+
+def test_disabled_router_uses_primary():
+    router = ReadRouter(enabled=False, sticky_seconds=5, max_lag_seconds=10)
+    router.replica_lag = 0.0
+    assert not router.use_replica(make_request("user-1"))
+
+
+def test_tracked_writers_are_bounded():
+    router = healthy_router(max_tracked_users=2)
+    for user in ("a", "b", "c"):
+        router.record_write(user)
+    
+    assert not router.recently_wrote("a")
+    assert router.recently_wrote("c")
@@ -0,0 +1,63 @@
+"""
+Tests for referral stats and cursor-paged referral listings (no database)
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from src.api.v1.referrals import get_my_referrals, get_referral_stats
+from src.core.pagination import encode_cursor, decode_cursor
+from tests.conftest import FakeSession
+
+
+def make_referral(created_at, bonus_earned=False):
+    return SimpleNamespace(
+        id=uuid4(),
+        created_at=created_at,
+        bonus_earned=bonus_earned,
+        bonus_amount_usd=5 if bonus_earned else 0,
+        full_name="Friend",
+    )
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    key = (datetime(2026, 10, 19, 8, 30, 15, 123456), uuid4())
+    
+    assert decode_cursor(encode_cursor(*key)) == key
+    assert decode_cursor(None) is None
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("not-a-cursor")
+    assert error.value.status_code == 400
+
+
+async def test_stats_are_one_query_with_defaults_for_new_referrers():
+    db = FakeSession()
+    
+    stats = await get_referral_stats(db=db, current_user=SimpleNamespace(id=uuid4()))
+    
+    assert len(db.executed) == 1 and db.count("select referral_aggregates") == 1
+    assert stats.referral_code == "N/A"
+    assert stats.total_referrals == stats.successful_referrals == 0
+
+
+async def test_full_page_returns_cursor_of_its_last_row():
+    now = datetime.utcnow()
+    rows = [make_referral(now - timedelta(minutes=i), bonus_earned=i == 0) for i in range(3)]
+    
+    page = await get_my_referrals(cursor=None, limit=2, db=FakeSession({"select referrals": rows}), current_user=SimpleNamespace(id=uuid4()))
+    
+    assert [r["joined_at"] for r in page["referrals"]] == [rows[0].created_at, rows[1].created_at]
+    assert page["referrals"][0]["status"] == "Bonus Earned"
+    assert decode_cursor(page["next_cursor"]) == (rows[1].created_at, rows[1].id)
+
+
+async def test_last_page_has_no_cursor():
+    rows = [make_referral(datetime.utcnow())]
+    
+    page = await get_my_referrals(cursor=None, limit=2, db=FakeSession({"select referrals": rows}), current_user=SimpleNamespace(id=uuid4()))
+    
+    assert len(page["referrals"]) == 1
+    assert page["next_cursor"] is None
@@ -0,0 +1,148 @@
+"""
+Tests for the CSR referral graph and referral ring detection
+"""
+from uuid import uuid4
+
+import numpy as np
+
+from src.core.referral_graph import ReferralGraph, connected_components, dense_ids, uuid_keys
+from src.services.referral_graph import find_referral_rings
+
+
+def build(edges):
+    """Graph from (referrer, referred) pairs of UUIDs"""
+    return ReferralGraph.from_edges(uuid_keys(a for a, _ in edges), uuid_keys(b for _, b in edges))
+
+
+def test_dense_ids_round_trip():
+    users = [uuid4() for _ in range(50)]
+    keys = uuid_keys(users + users[:20])
+    
+    unique_keys, hashes, ids = dense_ids(keys)
+    
+    assert len(unique_keys) == 50
+    assert np.all(hashes[1:] > hashes[:-1])
+    assert np.array_equal(unique_keys[ids], keys)
+
+
+def test_downline_depth_and_components():
+    a, b, c, d, e, f, g = (uuid4() for _ in range(7))
+    graph = build([(a, b), (a, c), (b, d), (d, e), (f, g)])
+    node = graph.index_of
+    
+    assert graph.stats(node(a)) == {
+        "depth": 0,
+        "downline_size": 4,
+        "downline_depth": 3,
+        "direct_referrals": 2,
+        "component": graph.component[node(a)],
+        "component_size": 5,
+        "cyclic": False,
+    }
+    assert graph.depth[node(e)] == 3
+    assert graph.downline_size[node(b)] == 2
+    assert {graph.user_id(n) for n in graph.downline(node(a))} == {b, c, d, e}
+    assert {graph.user_id(n) for n in graph.downline(node(a), max_depth=1)} == {b, c}
+    assert graph.component[node(f)] == graph.component[node(g)] != graph.component[node(a)]
+    assert graph.component_sizes() == {int(graph.component[node(a)]): 5, int(graph.component[node(f)]): 2}
+    assert graph.index_of(uuid4()) is None
+
+
+def test_cycles_and_second_referrals_are_handled():
+    x, y, z, h, j, k = (uuid4() for _ in range(6))
+    graph = build([(x, y), (y, x), (y, z), (h, j), (k, j)])
+    node = graph.index_of
+    
+    assert graph.cyclic[[node(x), node(y), node(z)]].all()
+    assert graph.depth[node(z)] == -1 and graph.downline_size[node(x)] == -1
+    assert {graph.user_id(n) for n in graph.downline(node(x))} == {y, z}
+    # j was referred twice: h and k end up in one component
+    assert graph.component[node(h)] == graph.component[node(k)]
+    assert not graph.cyclic[node(j)]
+
+
+def test_components_match_union_find():
+    rng = np.random.default_rng(5)
+    n = 3000
+    src = rng.integers(0, n, 2500).astype(np.int32)
+    dst = rng.integers(0, n, 2500).astype(np.int32)
+    
+    parent = list(range(n))
+    
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    for a, b in zip(src.tolist(), dst.tolist()):
+        parent[find(a)] = find(b)
+    
+    labels = connected_components(n, src, dst)
+    expected = np.array([find(i) for i in range(n)])
+    # Same partition: each label maps to exactly one union-find root and back
+    assert len(set(zip(labels.tolist(), expected.tolist()))) == len(set(labels.tolist())) == len(set(expected.tolist()))
+
+
+def test_rings_need_shared_signals_or_a_cycle():
+    farm = [uuid4() for _ in range(4)]
+    pair = [uuid4() for _ in range(2)]
+    loop = [uuid4() for _ in range(2)]
+    honest = [uuid4() for _ in range(3)]
+    graph = build([
+        (farm[0], farm[1]), (farm[1], farm[2]), (farm[1], farm[3]),
+        (pair[0], pair[1]),
+        (loop[0], loop[1]), (loop[1], loop[0]),
+        (honest[0], honest[1]), (honest[0], honest[2]),
+    ])
+    
+    rings = find_referral_rings(
+        graph,
+        shared_devices={"device-1": [farm[0], farm[1]]},
+        shared_ips={"10.0.0.7": farm[1:], "10.0.0.9": pair},
+        min_size=3,
+    )
+    
+    assert [set(ring["user_ids"]) for ring in rings] == [set(farm), set(loop)]
+    assert rings[0]["score"] == 60.0
+    assert rings[0]["evidence"]["shared_device_edges"] == 1
+    assert rings[0]["evidence"]["shared_ip_edges"] == 2
+    assert rings[0]["evidence"]["top_referrer"] == str(farm[0])
+    assert rings[1]["evidence"]["cycle_edges"] == 2
+
+
+def test_cycles_exclude_the_downline_below_them():
+    ring = [uuid4() for _ in range(3)]
+    tail = [uuid4() for _ in range(3)]
+    selfish, other = uuid4(), uuid4()
+    root, entered = uuid4(), [uuid4() for _ in range(2)]
+    graph = build([
+        (ring[0], ring[1]), (ring[1], ring[2]), (ring[2], ring[0]),
+        (ring[1], tail[0]), (tail[0], tail[1]), (tail[0], tail[2]),
+        (selfish, selfish), (selfish, other),
+        # A cycle the spanning forest reaches through a second referral
+        (root, entered[0]), (entered[0], entered[1]), (entered[1], entered[0]),
+    ])
+    node = graph.index_of
+    cycles = graph.cycles()
+    
+    assert graph.cyclic[[node(user) for user in tail]].all()
+    assert (cycles[[node(user) for user in tail + [other]]] == -1).all()
+    assert len({int(cycles[node(user)]) for user in ring}) == 1
+    assert cycles[node(selfish)] >= 0 and cycles[node(selfish)] != cycles[node(ring[0])]
+    assert cycles[node(root)] == -1 and not graph.cyclic[node(entered[0])]
+    assert cycles[node(entered[0])] == cycles[node(entered[1])] >= 0
+
+
+def test_honest_downline_below_a_ring_is_not_flagged():
+    loop = [uuid4() for _ in range(2)]
+    downline = [uuid4() for _ in range(4)]
+    graph = build([
+        (loop[0], loop[1]), (loop[1], loop[0]),
+        (loop[1], downline[0]), (downline[0], downline[1]), (downline[1], downline[2]), (downline[1], downline[3]),
+    ])
+    
+    rings = find_referral_rings(graph, shared_devices={}, shared_ips={}, min_size=3)
+    
+    assert [set(ring["user_ids"]) for ring in rings] == [set(loop)]
+    assert rings[0]["evidence"]["cycle_edges"] == 2
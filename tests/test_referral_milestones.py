@@ -0,0 +1,140 @@
+"""
+Tests for the referral milestone engine
+"""
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.core.config import settings
+from src.db.base import Base
+from src.db.models import Referral, ReferralAggregate, Transaction, User
+from src.services.referral_milestones import ReferralMilestones
+from tests.conftest import TEST_DATABASE_URL, FakeSession
+
+
+def milestone_session(approved_count=None, paid_rows=()):
+    return FakeSession({
+        "update users": [(approved_count,)],
+        "update referrals": list(paid_rows),
+    })
+
+
+def credited(db: FakeSession) -> dict:
+    """user id -> amount added to the balance (in place, not read-modify-write)"""
+    amounts = {}
+    for values in db.written("update users"):
+        if "available_balance_usd_1" in values:
+            assert values["total_earnings_usd_1"] == values["available_balance_usd_1"]
+            for user_id in values["id_1"]:
+                amounts[user_id] = float(values["available_balance_usd_1"])
+    return amounts
+
+
+def make_user():
+    return SimpleNamespace(id=uuid4())
+
+
+async def test_approvals_below_and_past_the_milestone_only_count():
+    for count in (settings.REFERRAL_BONUS_TASKS - 1, settings.REFERRAL_BONUS_TASKS + 1):
+        db = milestone_session(approved_count=count)
+        
+        assert await ReferralMilestones.record_approval(db, uuid4()) is False
+        assert db.count("update referrals") == 0
+
+
+async def test_crossing_the_milestone_credits_both_parties():
+    referrer, referred = make_user(), make_user()
+    row = SimpleNamespace(id=uuid4(), referrer_id=referrer.id, referred_user_id=referred.id)
+    db = milestone_session(approved_count=settings.REFERRAL_BONUS_TASKS, paid_rows=[row])
+    
+    assert await ReferralMilestones.record_approval(db, referred.id) is True
+    
+    assert credited(db) == {referrer.id: settings.REFERRAL_BONUS_USD, referred.id: settings.REFERRAL_BONUS_USD}
+    bonuses = db.written("insert transactions")
+    assert sorted(t["reference_id"].rsplit(":", 1)[1] for t in bonuses) == ["referred", "referrer"]
+    assert {t["user_id"] for t in bonuses} == {referrer.id, referred.id}
+
+
+async def test_already_paid_referral_is_not_credited_again():
+    # The conditional UPDATE matched nothing: someone else paid it
+    db = milestone_session(approved_count=settings.REFERRAL_BONUS_TASKS)
+    
+    assert await ReferralMilestones.record_approval(db, uuid4()) is False
+    assert db.written("insert transactions") == []
+    assert credited(db) == {}
+
+
+async def test_batch_credit_sums_per_referrer():
+    referrer = make_user()
+    referred = [make_user() for _ in range(3)]
+    rows = [SimpleNamespace(id=uuid4(), referrer_id=referrer.id, referred_user_id=user.id) for user in referred]
+    db = milestone_session(paid_rows=rows)
+    
+    paid = await ReferralMilestones.credit(db, [user.id for user in referred])
+    
+    assert len(paid) == 3
+    assert credited(db) == {
+        referrer.id: 3 * settings.REFERRAL_BONUS_USD,
+        **{user.id: settings.REFERRAL_BONUS_USD for user in referred},
+    }
+    assert db.count("update users") == 2  # One per distinct amount
+    assert len(db.written("insert transactions")) == 6
+    
+    # One aggregate row for the referrer, bumped by all three
+    aggregates, = db.written("insert referral_aggregates")
+    assert aggregates["successful_referrals_m0"] == 3
+    assert "referrer_id_m1" not in aggregates
+
+
+@pytest.fixture
+async def referral_engine():
+    """Test database with the referral tables; skipped when it isn't running"""
+    engine = create_async_engine(TEST_DATABASE_URL)
+    tables = [User.__table__, Referral.__table__, Transaction.__table__, ReferralAggregate.__table__]
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=tables)
+    except (OSError, ConnectionError) as e:
+        await engine.dispose()
+        pytest.skip(f"test database not available: {e}")
+    
+    yield engine
+    
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=tables)
+    await engine.dispose()
+
+
+async def test_bonus_survives_pending_balance_edits_on_the_loaded_user(referral_engine):
+    sessions = async_sessionmaker(referral_engine, class_=AsyncSession, expire_on_commit=False)
+    referrer_id, referred_id = uuid4(), uuid4()
+    
+    async with sessions() as session:
+        await session.execute(insert(User), [
+            {"id": user_id, "email": f"{user_id.hex}@example.invalid", "hashed_password": "x", "full_name": "User",
+             "approved_tasks_count": settings.REFERRAL_BONUS_TASKS - 1}
+            for user_id in (referrer_id, referred_id)
+        ])
+        await session.execute(insert(Referral), [
+            {"referrer_id": referrer_id, "referred_user_id": referred_id, "referral_code": "CODE"},
+        ])
+        await session.commit()
+    
+    # Like an approval: the task reward is an unflushed ORM edit
+    async with sessions() as session:
+        user = await session.get(User, referred_id)
+        user.available_balance_usd += Decimal("10")
+        user.total_earnings_usd += Decimal("10")
+        
+        assert await ReferralMilestones.record_approval(session, referred_id) is True
+        bonus = Decimal(str(settings.REFERRAL_BONUS_USD))
+        assert user.available_balance_usd == Decimal("10") + bonus
+        await session.commit()
+    
+    async with sessions() as session:
+        balances = dict((await session.execute(select(User.id, User.available_balance_usd))).all())
+    assert balances == {referrer_id: bonus, referred_id: Decimal("10") + bonus}
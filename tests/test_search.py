@@ -0,0 +1,73 @@
+"""
+Tests for admin full-text and user search (no database)
+"""
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from src.api.v1.admin import search
+from src.services.search import SearchService, document_query, escape_like, user_filter
+from tests.conftest import FakeSession
+
+
+def compiled(statement):
+    return statement.compile(dialect=postgresql.dialect())
+
+
+def test_user_search_matches_wildcards_literally():
+    assert escape_like("50%_off\\") == "50\\%\\_off\\\\"
+    
+    statement = compiled(user_filter("a_b"))
+    
+    assert "users.email ILIKE" in str(statement) and "users.full_name ILIKE" in str(statement)
+    assert set(statement.params.values()) == {"%a\\_b%"}
+
+
+def test_document_query_ranks_a_capped_candidate_set_and_highlights_last():
+    statement = compiled(document_query("tickets", "refund -crypto", 20))
+    sql = str(statement)
+    
+    assert sql.count("ts_headline(") == 2
+    assert sql.count("search_vector @@ websearch_to_tsquery") == 1
+    assert "refund -crypto" in statement.params.values()
+    assert sorted(value for value in statement.params.values() if isinstance(value, int)) == [20, 32, 5000]
+    # Highlights are built in the outermost select, over the final 20 rows only
+    assert sql.index("ts_headline(") < sql.index("ts_rank_cd(") < sql.index("@@")
+
+
+async def test_search_returns_highlights_per_source_and_bounds_chat_by_date():
+    row = {
+        "id": uuid4(),
+        "created_at": datetime(2026, 10, 1),
+        "rank": 0.123456,
+        "user_id": uuid4(),
+        "conversation_id": "c-1",
+        "role": "user",
+        "message": "my \x02refund\x03 <img src=x onerror=alert(1)> never arrived",
+    }
+    db = FakeSession({"select chat_messages": [row]})
+    
+    results = await SearchService.search(db, "refund", ["chat"], limit=5)
+    
+    hit = results["chat"][0]
+    assert hit["rank"] == 0.1235
+    assert hit["highlights"] == {
+        "message": "my <mark>refund</mark> &lt;img src=x onerror=alert(1)&gt; never arrived"
+    }
+    assert "message" not in hit and hit["conversation_id"] == "c-1"
+    assert "chat_messages.created_at >=" in str(db.executed[0][1])
+
+
+async def test_search_endpoint_rejects_unknown_sources():
+    with pytest.raises(HTTPException) as error:
+        await search(
+            q="refund", sources=["tickets", "wallets"], limit=20, since=None,
+            db=FakeSession(), admin_user=SimpleNamespace(id=uuid4()),
+        )
+    
+    assert error.value.status_code == 400
+    assert "wallets" in error.value.detail
@@ -0,0 +1,87 @@
+"""
+Tests for the support agent inbox (no database)
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from src.api.v1.admin import BulkTicketStatus, assign_next_ticket, bulk_update_ticket_status
+from src.api.v1.support import get_ticket_messages
+from src.core.pagination import decode_cursor
+from src.db.models import SubscriptionTier, TicketPriorityEnum, TicketStatusEnum
+from src.services.support_inbox import TRANSITIONS, SupportInbox, sla_due_at
+from tests.conftest import FakeSession
+
+
+def thread_session(ticket, messages):
+    return FakeSession({"select support_tickets": [ticket], "select support_ticket_messages": messages})
+
+
+def test_sla_deadline_orders_by_priority_age_and_tier():
+    now = datetime(2026, 10, 19, 9, 0)
+    
+    urgent = sla_due_at(TicketPriorityEnum.URGENT, SubscriptionTier.FREE, now)
+    premium_high = sla_due_at(TicketPriorityEnum.HIGH, SubscriptionTier.PREMIUM, now)
+    free_high = sla_due_at(TicketPriorityEnum.HIGH, SubscriptionTier.FREE, now)
+    old_low = sla_due_at(TicketPriorityEnum.LOW, SubscriptionTier.FREE, now - timedelta(days=3))
+    
+    assert urgent == now + timedelta(hours=2)
+    assert urgent < premium_high < free_high
+    # A low-priority ticket that has waited long enough comes up first
+    assert old_low < urgent
+    assert sla_due_at("high", "pro", now) == now + timedelta(hours=6)
+
+
+def test_closed_is_terminal_and_no_status_moves_to_itself():
+    for target, sources in TRANSITIONS.items():
+        assert TicketStatusEnum.CLOSED not in sources
+        assert target not in sources
+
+
+async def test_thread_pages_carry_a_cursor_until_the_last_page():
+    ticket = SimpleNamespace(id=uuid4())
+    start = datetime(2026, 10, 19, 9, 0)
+    messages = [SimpleNamespace(id=uuid4(), created_at=start + timedelta(minutes=i)) for i in range(3)]
+    user = SimpleNamespace(id=uuid4())
+    
+    db = thread_session(ticket, messages)
+    page = await get_ticket_messages(ticket_id=str(ticket.id), cursor=None, limit=2, db=db, current_user=user)
+    
+    assert page["messages"] == messages[:2]
+    assert decode_cursor(page["next_cursor"]) == (messages[1].created_at, messages[1].id)
+    
+    db = thread_session(ticket, messages[2:])
+    page = await get_ticket_messages(ticket_id=str(ticket.id), cursor=None, limit=2, db=db, current_user=user)
+    
+    assert page == {"messages": messages[2:], "next_cursor": None}
+
+
+async def test_assign_next_on_an_empty_queue_is_404_without_commit():
+    db = FakeSession()
+    
+    with pytest.raises(HTTPException) as error:
+        await assign_next_ticket(db=db, admin_user=SimpleNamespace(id=uuid4()))
+    
+    assert error.value.status_code == 404
+    assert db.commits == 0
+
+
+async def test_bulk_status_is_one_statement_and_reports_skipped_tickets():
+    moved, stuck = uuid4(), uuid4()
+    db = FakeSession({"update support_tickets": [moved]})
+    
+    response = await bulk_update_ticket_status(
+        request=BulkTicketStatus(ticket_ids=[moved, stuck], status=TicketStatusEnum.RESOLVED),
+        db=db,
+        admin_user=SimpleNamespace(id=uuid4()),
+    )
+    
+    assert db.count("update support_tickets") == 1
+    assert db.written("update support_tickets")[0]["status"] == TicketStatusEnum.RESOLVED
+    assert response["updated"] == [str(moved)]
+    assert response["skipped"] == [str(stuck)]
+    assert await SupportInbox.bulk_transition(db, [], TicketStatusEnum.CLOSED, uuid4()) == []
+    assert db.count("update support_tickets") == 1
@@ -0,0 +1,74 @@
+"""
+Tests for UnitOfWorkRoute (fake session, no database)
+"""
+from types import SimpleNamespace
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from src.db.session import UnitOfWorkRoute, after_commit
+from tests.conftest import FakeSession
+
+
+def make_client(session: FakeSession, notified: list = None) -> TestClient:
+    notified = [] if notified is None else notified
+    
+    async def fake_db(request: Request):
+        request.state.db = session
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+    
+    router = APIRouter(route_class=UnitOfWorkRoute)
+    
+    @router.post("/write")
+    async def write(db: FakeSession = Depends(fake_db)):
+        db.add(SimpleNamespace(kind="write"))
+        after_commit(db, lambda: notified.append(db.commits))
+        return {"ok": True}
+    
+    @router.post("/reject")
+    async def reject(db: FakeSession = Depends(fake_db)):
+        db.add(SimpleNamespace(kind="write"))
+        raise HTTPException(status_code=400, detail="nope")
+    
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_commits_once_before_response():
+    session, notified = FakeSession(), []
+    response = make_client(session, notified).post("/write")
+    
+    assert response.status_code == 200
+    # The dependency's own commit finds nothing left to do
+    assert session.commits == 1 and not session.in_transaction()
+    # after_commit callbacks run once, after the commit
+    assert notified == [1]
+
+
+def test_failed_commit_is_an_error_not_a_success():
+    session = FakeSession()
+    
+    async def serialization_failure():
+        raise RuntimeError("serialization failure")
+    
+    session.commit = serialization_failure
+    notified = []
+    response = make_client(session, notified).post("/write")
+    
+    assert response.status_code == 500
+    assert session.rollbacks == 1
+    assert notified == []
+
+
+def test_handler_error_rolls_back_without_commit():
+    session = FakeSession()
+    response = make_client(session).post("/reject")
+    
+    assert response.status_code == 400
+    assert session.commits == 0 and session.rollbacks == 1
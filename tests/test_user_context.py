@@ -0,0 +1,76 @@
+"""
+Tests for the AI chat user context snapshot (fake session, no database)
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+from src.db.models import SubscriptionTier
+from src.services.user_context import UserContextStore, snapshot_expires_at
+from tests.conftest import FakeSession
+
+
+def make_user(**fields):
+    return SimpleNamespace(**{
+        "id": uuid4(),
+        "subscription_tier": SubscriptionTier.FREE,
+        "total_earnings_usd": 12.5,
+        "available_balance_usd": 7.25,
+        "pending_balance_usd": 0,
+        "current_streak_days": 3,
+        "is_verified": True,
+        "kyc_verified": False,
+        "face_verified": False,
+        "preferred_language": "en",
+        **fields,
+    })
+
+
+def test_expiry_is_capped_at_utc_midnight():
+    assert snapshot_expires_at(datetime(2026, 3, 1, 8, 0), ttl_seconds=3600) == datetime(2026, 3, 1, 9, 0)
+    assert snapshot_expires_at(datetime(2026, 3, 1, 23, 30), ttl_seconds=3600) == datetime(2026, 3, 2)
+
+
+async def test_missing_snapshot_is_counted_once_then_cached():
+    store = UserContextStore()
+    user = make_user()
+    db = FakeSession({"select submissions": [(4,)]})
+    
+    first = await store.get(db, user)
+    second = await store.get(db, user)
+    
+    assert first["tasks_today"] == second["tasks_today"] == 4
+    assert db.count("select submissions") == 1
+    stored, = db.written("insert ai_context_store")
+    assert stored["context_data"]["tasks_today"] == 4 and stored["user_id"] == user.id
+
+
+async def test_stored_snapshot_needs_no_aggregate_and_live_fields_win():
+    store = UserContextStore()
+    user = make_user(available_balance_usd=20.0)
+    row = SimpleNamespace(
+        expires_at=datetime.utcnow() + timedelta(minutes=5),
+        context_data={"available_balance_usd": 1.0, "tasks_today": 2, "recent_intents": ["greeting"]},
+    )
+    db = FakeSession({"select ai_context_store": [row]})
+    
+    context = await store.get(db, user)
+    
+    assert db.count("select submissions") == 0
+    assert db.written("insert ai_context_store") == []
+    assert context["tasks_today"] == 2
+    assert context["recent_intents"] == ["greeting"]
+    assert context["available_balance_usd"] == 20.0
+
+
+async def test_update_without_live_snapshot_drops_the_cached_copy():
+    store = UserContextStore()
+    user = make_user()
+    db = FakeSession()
+    await store.get(db, user)
+    
+    await store.record_submission(db, user)
+    await store.get(db, user)
+    
+    assert db.count("update ai_context_store") == 1
+    assert db.count("select submissions") == 2
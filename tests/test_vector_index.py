@@ -0,0 +1,64 @@
+"""
+Tests for the IVF vector index used by face-first login
+"""
+import numpy as np
+
+from src.core.vector_index import IVFIndex, normalize
+
+
+def random_vectors(count: int, dim: int = 16, seed: int = 1) -> np.ndarray:
+    return normalize(np.random.default_rng(seed).standard_normal((count, dim)))
+
+
+def test_flat_index_exact_match():
+    """Below the training threshold the index is an exact flat search"""
+    vectors = random_vectors(100)
+    index = IVFIndex(dim=16, n_lists=8, n_probe=2)
+    index.build(list(range(100)), vectors)
+    
+    assert not index.is_trained
+    item_id, score = index.search(vectors[42], k=1)[0]
+    assert item_id == 42
+    assert score > 0.999
+
+
+def test_trained_index_finds_noisy_copy():
+    """IVF search finds the stored vector for a slightly perturbed query"""
+    vectors = random_vectors(8 * IVFIndex.MIN_POINTS_PER_LIST * 2)
+    index = IVFIndex(dim=16, n_lists=8, n_probe=8)
+    index.build(list(range(len(vectors))), vectors)
+    
+    assert index.is_trained
+    query = vectors[7] + 0.01 * np.random.default_rng(2).standard_normal(16)
+    assert index.search(query, k=1)[0][0] == 7
+
+
+def test_add_replace_and_remove():
+    """Adding an existing id replaces it; removal keeps other ids reachable"""
+    vectors = random_vectors(3)
+    index = IVFIndex(dim=16, n_lists=8)
+    for item_id, vector in enumerate(vectors):
+        index.add(item_id, vector)
+    
+    index.add(0, vectors[2])
+    assert len(index) == 3
+    assert {item_id for item_id, _ in index.search(vectors[2], k=2)} == {0, 2}
+    
+    assert index.remove(2)
+    assert not index.remove(2)
+    assert 2 not in index
+    assert index.search(vectors[1], k=1)[0][0] == 1
+    assert index.search(vectors[2], k=1)[0][0] == 0
+
+
+def test_add_switches_to_ivf_at_threshold():
+    """A flat index trains itself once it holds enough vectors"""
+    count = 4 * IVFIndex.MIN_POINTS_PER_LIST
+    vectors = random_vectors(count)
+    index = IVFIndex(dim=16, n_lists=4, n_probe=4)
+    for item_id, vector in enumerate(vectors):
+        index.add(item_id, vector)
+    
+    assert index.is_trained
+    assert len(index) == count
+    assert index.search(vectors[count - 1], k=1)[0][0] == count - 1
@@ -0,0 +1,166 @@
+"""
+Tests for withdrawal risk scoring (fake session, no database)
+"""
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from src.api.v1.admin import complete_withdrawal
+from src.db.models import TransactionStatusEnum, Withdrawal
+from src.services.withdrawal_risk import (
+    STATE_DEVICE_CHANGES, STATE_LIVENESS_COUNT, STATE_LIVENESS_MEAN, STATE_LIVENESS_MIN,
+    STATE_SIZE, STATE_VELOCITY_AT, STATE_VELOCITY_COUNT, STATE_VELOCITY_USD,
+    WithdrawalRiskScorer, feature_matrix, risk_scores,
+)
+from tests.conftest import FakeSession
+
+
+def make_user(age_days, earnings, withdrawn):
+    return SimpleNamespace(
+        id=uuid4(),
+        created_at=datetime.utcnow() - timedelta(days=age_days),
+        total_earnings_usd=earnings,
+        lifetime_withdrawals_usd=withdrawn,
+    )
+
+
+def make_state(count=0.0, usd=0.0, devices=0, liveness=(), now=None):
+    state = np.zeros(STATE_SIZE)
+    state[[STATE_VELOCITY_COUNT, STATE_VELOCITY_USD, STATE_DEVICE_CHANGES]] = count, usd, devices
+    state[STATE_VELOCITY_AT] = now or time.time()
+    if liveness:
+        state[[STATE_LIVENESS_MEAN, STATE_LIVENESS_MIN, STATE_LIVENESS_COUNT]] = np.mean(liveness), min(liveness), len(liveness)
+    return state
+
+
+def test_established_users_score_low_and_fresh_cash_outs_high():
+    now = time.time()
+    states = np.stack([
+        # A year old, withdraws about daily, half of earnings so far, clean liveness
+        make_state(count=1.5, usd=30, liveness=(96, 94, 97), now=now),
+        # Three days old, third withdrawal today, new device, shaky liveness
+        make_state(count=2.0, usd=80, devices=1, liveness=(70, 62), now=now),
+    ])
+    features = feature_matrix(
+        states,
+        amounts=np.array([20.0, 40.0]),
+        earnings=np.array([400.0, 125.0]),
+        withdrawn=np.array([180.0, 80.0]),
+        age_days=np.array([365.0, 3.0]),
+        now=now,
+    )
+    
+    scores = risk_scores(features)
+    
+    assert scores[0] < 0.2
+    assert scores[1] > 0.95
+
+
+async def test_scores_come_from_the_cached_state_and_requests_update_it():
+    user = make_user(age_days=200, earnings=500, withdrawn=100)
+    db = FakeSession()
+    scorer = WithdrawalRiskScorer(cache_seconds=60, max_users=10)
+    
+    first = await scorer.score(db, user, 20, liveness_confidence=97)
+    assert db.count("select withdrawals") == 1
+    
+    for _ in range(5):
+        scorer.record_withdrawal(user.id, 50)
+    faster = await scorer.score(db, user, 20, liveness_confidence=97)
+    shakier = await scorer.score(db, user, 20, liveness_confidence=55)
+    scorer.record_device_change(user.id)
+    moved = await scorer.score(db, user, 20)
+    
+    assert db.count("select withdrawals") == 1
+    assert first < faster < shakier < moved
+    
+    # Scoring itself is in-memory arithmetic
+    state = await scorer.state(db, user.id)
+    started = time.perf_counter()
+    for _ in range(1000):
+        scorer.score_state(state, user, 20)
+    assert (time.perf_counter() - started) / 1000 < 0.001
+
+
+async def test_least_recently_used_states_give_up_their_rows():
+    scorer = WithdrawalRiskScorer(cache_seconds=60, max_users=2)
+    users = [make_user(age_days=10, earnings=0, withdrawn=0) for _ in range(3)]
+    db = FakeSession()
+    
+    for user in users:
+        await scorer.state(db, user.id)
+    scorer.record_device_change(users[2].id)
+    
+    assert db.count("select withdrawals") == 3
+    assert scorer._cached(users[0].id) is None
+    assert scorer._cached(users[2].id)[STATE_DEVICE_CHANGES] == 1
+    await scorer.state(db, users[1].id)
+    assert db.count("select withdrawals") == 3
+
+
+async def test_rescore_pending_holds_and_releases_by_the_new_scores():
+    now = datetime.utcnow()
+    steady, fresh = uuid4(), uuid4()
+    pending = [
+        SimpleNamespace(id=uuid4(), user_id=steady, risk_hold=True, total_earnings_usd=900,
+                        lifetime_withdrawals_usd=200, created_at=now - timedelta(days=400)),
+        SimpleNamespace(id=uuid4(), user_id=fresh, risk_hold=False, total_earnings_usd=100,
+                        lifetime_withdrawals_usd=100, created_at=now - timedelta(days=2)),
+    ]
+    batches = iter([pending, []])
+    db = FakeSession({
+        # The pending batch is the one query joining users
+        "select users": lambda statement, params: next(batches),
+        "select withdrawals": [(steady, 1.0, 20), (fresh, 3.0, 100)],  # decayed withdrawals
+        "select user_devices": [(fresh, 3)],
+        "select face_liveness_logs": [(steady, 97, 95, 4), (fresh, 60, 52, 3)],
+    })
+    
+    counts = await WithdrawalRiskScorer.rescore_pending(db, batch_size=10)
+    
+    assert counts == {"scored": 2, "held": 1, "released": 1}
+    scored = db.written("update withdrawals")
+    assert {row["withdrawal_id"]: row["hold"] for row in scored} == {pending[0].id: False, pending[1].id: True}
+    assert all(0 <= row["score"] <= 1 for row in scored)
+
+
+def pending_withdrawal(**fields) -> Withdrawal:
+    return Withdrawal(id=uuid4(), user_id=uuid4(), status=TransactionStatusEnum.PENDING, risk_hold=False, **fields)
+
+
+@pytest.mark.parametrize("fields, status_code", [
+    ({"risk_hold": True}, 409),
+    ({"payout_state": "unconfirmed"}, 409),
+    ({"payout_batch_id": uuid4()}, 409),
+    ({"status": TransactionStatusEnum.CANCELLED}, 400),
+])
+async def test_admin_cannot_complete_held_or_dispatched_withdrawals(fields, status_code):
+    withdrawal = pending_withdrawal()
+    for name, value in fields.items():
+        setattr(withdrawal, name, value)
+    db = FakeSession({"select withdrawals": [withdrawal]})
+    
+    with pytest.raises(HTTPException) as error:
+        await complete_withdrawal(str(withdrawal.id), "TX-1", db=db, admin_user=SimpleNamespace(id=uuid4()))
+    
+    assert error.value.status_code == status_code
+    assert withdrawal.status == fields.get("status", TransactionStatusEnum.PENDING)
+    assert db.count("update transactions") == 0
+
+
+async def test_admin_completes_a_released_withdrawal():
+    withdrawal = pending_withdrawal()
+    admin = SimpleNamespace(id=uuid4())
+    db = FakeSession({"select withdrawals": [withdrawal]})
+    
+    await complete_withdrawal(str(withdrawal.id), "TX-1", db=db, admin_user=admin)
+    
+    assert withdrawal.status == TransactionStatusEnum.COMPLETED
+    assert (withdrawal.payout_reference, withdrawal.approved_by) == ("TX-1", admin.id)
+    transaction, = db.written("update transactions")
+    assert transaction["status"] == TransactionStatusEnum.COMPLETED